@@ -3,6 +3,7 @@
 import logging
 import os
 
+import click
 import firebase_admin
 from dotenv import load_dotenv
 from firebase_admin import credentials, firestore
@@ -313,4 +314,23 @@ def create_app():
     # Register WebSocket Routes
     from .routes import collab_sockets
 
+    @app.cli.command("qdrant-reconcile")
+    def qdrant_reconcile():
+        """Bootstrap ulang schema Qdrant (collections + payload index) dan perbarui marker versi."""
+        from app.agent.memory_system import reconcile_vector_schema
+
+        report = reconcile_vector_schema()
+        print(f"Qdrant schema v{report['schema_version']} reconciled:")
+        for collection, info in report["collections"].items():
+            print(f"  - {collection}: vector_size={info['vector_size']}")
+
+    @app.cli.command("vector-index-migrate")
+    @click.option("--remove-legacy", is_flag=True, help="Hapus file JSON lama setelah berhasil diimpor.")
+    def vector_index_migrate(remove_legacy):
+        """Impor file chunk JSON lama di instance/vector_store ke index vektor mmap."""
+        from app.services.vector_index import get_vector_index
+
+        report = get_vector_index().migrate_json_store(remove_legacy=remove_legacy)
+        print(f"Vector index migrated: {report['files']} file(s), {report['chunks']} chunk(s), {report['skipped']} already indexed, {report['errors']} error(s)")
+
     return app
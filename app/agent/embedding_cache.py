@@ -0,0 +1,145 @@
+"""
+Cache embedding biner dua tier: LRU in-process + Redis.
+
+Vektor disimpan sebagai bytes packed (float32 default, opsional float16 atau
+int8 terkuantisasi) di key `emb:<model>:<dim>:<dtype>:<sha1>`, jadi ganti model
+atau dimensi otomatis memakai namespace baru. Batch lookup memakai satu MGET,
+batch write memakai satu pipeline. Front tier LRU menyimpan array float32 read-only
+(~12 KB per vektor 3072 dim, bukan list float ~98 KB) dan dibatasi total bytes;
+pemanggil selalu menerima list baru, bukan objek yang dibagi antar request.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+def encode_vector(vector: Sequence[float], dtype: str = "float32") -> bytes:
+    """float32/float16: raw little-endian. int8: 4 byte skala float32 + bytes int8 (symmetric quantization)."""
+    array = np.asarray(vector, dtype=np.float32)
+    if dtype == "float32":
+        return array.astype("<f4", copy=False).tobytes()
+    if dtype == "float16":
+        return array.astype("<f2").tobytes()
+    if dtype == "int8":
+        peak = float(np.max(np.abs(array))) if array.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+        return np.float32(scale).astype("<f4").tobytes() + quantized.tobytes()
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def decode_vector(blob: bytes, dtype: str = "float32") -> List[float]:
+    if dtype == "float32":
+        return np.frombuffer(blob, dtype="<f4").tolist()
+    if dtype == "float16":
+        return np.frombuffer(blob, dtype="<f2").astype(np.float32).tolist()
+    if dtype == "int8":
+        scale = float(np.frombuffer(blob[:4], dtype="<f4")[0])
+        return (np.frombuffer(blob[4:], dtype=np.int8).astype(np.float32) * scale).tolist()
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def _frozen(vector: Sequence[float]) -> np.ndarray:
+    array = np.array(vector, dtype=np.float32)
+    array.flags.writeable = False
+    return array
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        redis_client: Any = None,
+        model: str = "models/gemini-embedding-001",
+        dim: int = 3072,
+        dtype: str = "float32",
+        ttl_seconds: int = 86400,
+        lru_size: int = 2048,
+        lru_max_bytes: int = 32 * 1024 * 1024,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.redis = redis_client
+        self.model = model
+        self.dim = int(dim)
+        self.dtype = dtype
+        self.ttl_seconds = ttl_seconds
+        self.lru = LRUCache(max_items=lru_size, max_bytes=lru_max_bytes, sizeof=lambda array: array.nbytes)
+        model_slug = re.sub(r"[^a-zA-Z0-9_.-]+", "_", model.split("/")[-1])
+        self.namespace = f"emb:{model_slug}:{self.dim}:{dtype}"
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def key_for(self, text: str) -> str:
+        return f"{self.namespace}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, texts: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        remote_texts: List[str] = []
+        for text in dict.fromkeys(texts):
+            array = self.lru.get(text)
+            if array is not None:
+                found[text] = array.tolist()
+            else:
+                remote_texts.append(text)
+        self.stats["lru_hits"] += len(found)
+
+        if remote_texts and self.redis is not None:
+            try:
+                blobs = self.redis.mget([self.key_for(text) for text in remote_texts])
+            except Exception as exc:
+                logger.warning("Embedding cache MGET failed: %s", exc)
+                self.stats["errors"] += 1
+                blobs = [None] * len(remote_texts)
+            for text, blob in zip(remote_texts, blobs):
+                if not blob:
+                    continue
+                try:
+                    vector = decode_vector(blob, self.dtype)
+                except Exception:
+                    self.stats["errors"] += 1
+                    continue
+                if len(vector) != self.dim:
+                    continue
+                found[text] = vector
+                self.lru.set(text, _frozen(vector))
+                self.stats["redis_hits"] += 1
+
+        self.stats["misses"] += sum(1 for text in remote_texts if text not in found)
+        return found
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text]).get(text)
+
+    def set_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        if not vectors:
+            return
+        for text, vector in vectors.items():
+            self.lru.set(text, _frozen(vector))
+        self.stats["writes"] += len(vectors)
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for text, vector in vectors.items():
+                pipe.setex(self.key_for(text), self.ttl_seconds, encode_vector(vector, self.dtype))
+            pipe.execute()
+        except Exception as exc:
+            logger.warning("Embedding cache pipeline write failed: %s", exc)
+            self.stats["errors"] += 1
+
+    def set(self, text: str, vector: Sequence[float]) -> None:
+        self.set_many({text: vector})
+
+    def hit_rate(self) -> float:
+        hits = self.stats["lru_hits"] + self.stats["redis_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
@@ -0,0 +1,255 @@
+"""
+Embedding service untuk memory system.
+
+- `embed_many()` meng-embed banyak teks dengan sesedikit mungkin provider call
+  (dedupe + cache lookup + chunk per `max_batch_size`).
+- `embed()` untuk satu teks lewat micro-batcher: request single-text dari banyak
+  greenlet yang datang dalam jendela `max_wait` digabung jadi satu provider call.
+- Provider bisa ditukar: Gemini (default) atau fake deterministik untuk test/benchmark offline.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+from contextlib import suppress
+from typing import Any, Dict, List, Optional, Sequence
+
+import gevent
+from gevent.event import AsyncResult
+
+from .embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+EMBEDDING_DIM = 3072
+EMBED_CACHE_TTL_SECONDS = 86400
+
+
+class GeminiEmbeddingProvider:
+    """Provider Gemini. `genai.configure` dipanggil sekali per API key, bukan per request."""
+
+    # Batas batchEmbedContents di Gemini API.
+    max_provider_batch = 100
+
+    def __init__(self, api_key: Optional[str] = None, model: str = EMBEDDING_MODEL, dim: int = EMBEDDING_DIM):
+        self.api_key = api_key if api_key is not None else os.environ.get("GEMINI_API_KEY")
+        self.model = model
+        self.dim = dim
+        self._configured_key: Optional[str] = None
+        self._configure_lock = threading.Lock()
+        self.calls = 0
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _client(self):
+        import google.generativeai as genai
+
+        if self._configured_key != self.api_key:
+            with self._configure_lock:
+                if self._configured_key != self.api_key:
+                    genai.configure(api_key=self.api_key)
+                    self._configured_key = self.api_key
+        return genai
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        genai = self._client()
+        self.calls += 1
+        if len(texts) == 1:
+            response = genai.embed_content(model=self.model, content=texts[0])
+            return [response["embedding"]]
+        response = genai.embed_content(model=self.model, content=list(texts))
+        vectors = response["embedding"]
+        if len(vectors) != len(texts):
+            raise ValueError(f"Gemini returned {len(vectors)} embeddings for {len(texts)} texts")
+        return vectors
+
+
+class FakeEmbeddingProvider:
+    """
+    Provider deterministik tanpa network: vektor unit dari SHA-256 teks.
+    `latency` (detik per call) dipakai benchmark untuk mensimulasikan round-trip.
+    """
+
+    max_provider_batch = 100
+    available = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM, latency: float = 0.0, model: str = "fake-embedding"):
+        self.dim = dim
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        values: List[float] = []
+        counter = 0
+        seed = text.encode("utf-8")
+        while len(values) < self.dim:
+            digest = hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+            for (raw,) in struct.iter_unpack("<I", digest):
+                values.append(raw / 4294967295.0 * 2.0 - 1.0)
+            counter += 1
+        values = values[: self.dim]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency:
+            gevent.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+
+class _PendingRequest:
+    __slots__ = ("text", "result")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.result = AsyncResult()
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        provider: Any = None,
+        cache: Any = None,
+        max_batch_size: int = 64,
+        max_wait: float = 0.01,
+        dim: int = EMBEDDING_DIM,
+    ):
+        self.provider = provider or GeminiEmbeddingProvider()
+        self.cache = cache
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.dim = dim
+        self._pending: List[_PendingRequest] = []
+        self._flusher = None
+        self.stats = {"requests": 0, "provider_calls": 0, "cache_hits": 0, "batched_requests": 0}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(getattr(self.cache, "stats", {}) or {})
+        if hasattr(self.cache, "hit_rate"):
+            stats["hit_rate"] = round(self.cache.hit_rate(), 4)
+        return stats
+
+    # ── Batch API ──
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed banyak teks. Urutan output mengikuti input; teks duplikat hanya di-embed sekali."""
+        texts = [str(text or "") for text in texts]
+        if not texts:
+            return []
+        self.stats["requests"] += len(texts)
+
+        if not getattr(self.provider, "available", True):
+            logger.warning("GEMINI_API_KEY is missing. Returning zero vectors.")
+            return [[0.0] * self.dim for _ in texts]
+
+        unique_texts = list(dict.fromkeys(texts))
+        vectors: Dict[str, List[float]] = {}
+        if self.cache is not None:
+            with suppress(Exception):
+                vectors.update(self.cache.get_many(unique_texts))
+        self.stats["cache_hits"] += len(vectors)
+
+        missing = [text for text in unique_texts if text not in vectors]
+        chunk_size = min(self.max_batch_size, getattr(self.provider, "max_provider_batch", self.max_batch_size))
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            self.stats["provider_calls"] += 1
+            fresh = dict(zip(chunk, self.provider.embed_batch(chunk)))
+            vectors.update(fresh)
+            if self.cache is not None:
+                with suppress(Exception):
+                    self.cache.set_many(fresh)
+
+        return [vectors[text] for text in texts]
+
+    # ── Single-text API (micro-batched) ──
+    def embed(self, text: str) -> List[float]:
+        # Micro-batching hanya untuk greenlet di main thread (gunicorn gevent, monkey.patch_all(thread=False)).
+        # Thread OS lain punya hub sendiri, jadi langsung jalan tanpa antre.
+        if (
+            self.max_wait <= 0
+            or self.max_batch_size <= 1
+            or not getattr(self.provider, "available", True)
+            or threading.current_thread() is not threading.main_thread()
+        ):
+            return self.embed_many([text])[0]
+
+        request = _PendingRequest(str(text or ""))
+        self._pending.append(request)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flusher is None:
+            self._flusher = gevent.spawn_later(self.max_wait, self._flush)
+        return request.result.get()
+
+    def _flush(self) -> None:
+        if self._flusher is not None and self._flusher is not gevent.getcurrent():
+            self._flusher.kill(block=False)
+        self._flusher = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.stats["batched_requests"] += len(batch)
+        try:
+            vectors = self.embed_many([request.text for request in batch])
+        except Exception as exc:
+            for request in batch:
+                request.result.set_exception(exc)
+            return
+        for request, vector in zip(batch, vectors):
+            request.result.set(vector)
+
+
+def _build_default_service() -> EmbeddingService:
+    provider_name = os.environ.get("EMBEDDING_PROVIDER", "gemini").strip().lower()
+    if provider_name == "fake":
+        provider: Any = FakeEmbeddingProvider()
+    else:
+        provider = GeminiEmbeddingProvider()
+
+    redis_client = None
+    with suppress(Exception):
+        from .memory_system import redis_client
+    cache = EmbeddingCache(
+        redis_client=redis_client,
+        model=provider.model,
+        dim=provider.dim,
+        dtype=os.environ.get("EMBED_CACHE_DTYPE", "float32"),
+        ttl_seconds=EMBED_CACHE_TTL_SECONDS,
+        lru_size=int(os.environ.get("EMBED_CACHE_LRU_SIZE", "2048")),
+        lru_max_bytes=int(os.environ.get("EMBED_CACHE_LRU_MAX_BYTES", str(32 * 1024 * 1024))),
+    )
+
+    return EmbeddingService(
+        provider=provider,
+        cache=cache,
+        max_batch_size=int(os.environ.get("EMBED_BATCH_MAX_SIZE", "64")),
+        max_wait=float(os.environ.get("EMBED_BATCH_MAX_WAIT_MS", "10")) / 1000.0,
+    )
+
+
+_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Singleton per proses, dibuat saat pertama dipakai."""
+    global _service
+    if _service is None:
+        _service = _build_default_service()
+    return _service
+
+
+def set_embedding_service(service: Optional[EmbeddingService]) -> None:
+    """Ganti service global (test/benchmark). `None` = bangun ulang dari env saat dipakai lagi."""
+    global _service
+    _service = service
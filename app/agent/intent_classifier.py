@@ -1,9 +1,25 @@
 import os
 import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import litellm
 
+from .intent_tiers import (
+    DEFER_TO_LLM,
+    LOCAL_MIN_MARGIN,
+    LOCAL_MIN_PROB,
+    RULE_MIN_CONFIDENCE,
+    TIER_CACHE,
+    TIER_LLM,
+    TIER_LOCAL,
+    TIER_RULES,
+    IntentCache,
+    RuleMatcher,
+    intent_result,
+    local_model_for,
+    shared_intent_cache,
+)
+
 # Configurasi logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -186,14 +202,26 @@ class IntentClassifier:
     akan mengembalikan respons untuk meminta klarifikasi.
     """
     
-    def __init__(self, confidence_threshold: float = 0.7):
+    def __init__(self, confidence_threshold: float = 0.7, cache: Optional[IntentCache] = None,
+                 use_local_model: bool = True, local_min_prob: float = LOCAL_MIN_PROB,
+                 local_min_margin: float = LOCAL_MIN_MARGIN, rule_threshold: float = RULE_MIN_CONFIDENCE):
         self.api_key = os.environ.get("LLM_API_KEY")
         self.model = os.environ.get("INTENT_AGENT_MODEL", "groq/llama-3.1-8b-instant")
         self.confidence_threshold = confidence_threshold
+        self.cache = cache if cache is not None else shared_intent_cache()
+        self.rules = RuleMatcher()
+        self.use_local_model = use_local_model
+        self.local_min_prob = local_min_prob
+        self.local_min_margin = local_min_margin
+        self.rule_threshold = rule_threshold
+        self.tier_counts = {TIER_CACHE: 0, TIER_RULES: 0, TIER_LOCAL: 0, TIER_LLM: 0}
         
         if not self.api_key:
             logger.warning("LLM_API_KEY environment variable is not set. Pemanggilan LLM kemungkinan akan gagal.")
 
+    def _count(self, tier: str) -> None:
+        self.tier_counts[tier] = self.tier_counts.get(tier, 0) + 1
+
     def _call_llm(self, prompt: str) -> str:
         """
         Helper method untuk memanggil API LLM dengan fallback ke Gemini jika Groq limit.
@@ -242,86 +270,41 @@ class IntentClassifier:
         akan mengembalikan properti `ask_user` berisi pertanyaan klarifikasi.
         """
         logger.info(f"| DEBUG | IntentClassifier.classify() -> user_message: '{user_message}'")
-        if "literature review" in user_message.lower():
-            logger.info("| DEBUG | IntentClassifier -> Matched hardcoded rule: 'literature review'")
-            return {
-                "intent": "literature_review",
-                "confidence": 0.95,
-                "key_entities": [],
-                "needs_clarification": False
-            }
-
-        # V2: Hardcoded rules for chapter-specific intents
-        msg_lower = user_message.lower()
-        question_starters = ("bagaimana", "gimana", "apa", "what", "why", "kenapa", "jelaskan")
-        write_intent_verbs = ("buat", "bikin", "tulis", "susun", "generate", "write", "draft", "tolong buatkan")
-
-        # === NEW: Power Agent Intent Shortcuts ===
-        if any(kw in msg_lower for kw in [
-            "cari di google", "cari di internet", "search web", "web search",
-            "cari online", "cari artikel terbaru", "browsing", "dari internet"
-        ]):
-            logger.info("| DEBUG | IntentClassifier -> Matched hardcoded rule: 'web_search'")
-            return {"intent": "web_search", "confidence": 0.97, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in [
-            "tulis ulang", "perbaiki paragraf", "rewrite", "parafrase", "buat lebih formal",
-            "perbaiki kalimat", "susun ulang"
-        ]):
-            logger.info("| DEBUG | IntentClassifier -> Matched hardcoded rule: 'rewrite_paragraph'")
-            logger.info("Classified intent: rewrite_paragraph (confidence: 0.98)")
-            return {"intent": "rewrite_paragraph", "confidence": 0.98, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in [
-            "buatkan bab", "tulis bab lengkap", "generate bab", "buat bab",
-            "tulis bab 1", "tulis bab 2", "tulis bab 3", "tulis bab 4", "tulis bab 5",
-            "bab 1 lengkap", "bab 2 lengkap", "bab 3 lengkap", "bab 4 lengkap", "bab 5 lengkap"
-        ]):
-            return {"intent": "generate_chapter", "confidence": 0.96, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in [
-            "buat abstrak", "tulis abstrak", "buatkan abstrak", "write abstract",
-            "abstract", "bikin abstrak"
-        ]):
-            if "abstract" == msg_lower.strip() or "abstrak" == msg_lower.strip():
-                return {"intent": "unclear", "confidence": 0.45, "ask_user": CLARIFICATION_TEMPLATE}
-            if any(msg_lower.startswith(starter) for starter in question_starters) and not any(verb in msg_lower for verb in write_intent_verbs):
-                # Pertanyaan konseptual tentang abstrak lebih aman didelegasikan ke LLM classifier.
-                pass
-            else:
-                return {"intent": "write_abstract", "confidence": 0.97, "key_entities": [], "needs_clarification": False}
-
-        # === Existing Chapter-Specific Rules ===
-        if any(kw in msg_lower for kw in [
-            "buatkan rumusan masalah", "bikin rumusan masalah", "susun rumusan masalah",
-            "tulis rumusan masalah", "buat rumusan masalah", "rumuskan masalah penelitian"
-        ]):
-            return {"intent": "research_questions", "confidence": 0.96, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in [
-            "buatkan tujuan penelitian", "bikin tujuan penelitian", "susun tujuan penelitian",
-            "tulis tujuan penelitian", "buat tujuan penelitian"
-        ]):
-            return {"intent": "research_objectives", "confidence": 0.95, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["research gap", "gap penelitian", "celah penelitian", "kelemahan penelitian"]):
-            return {"intent": "research_gap", "confidence": 0.93, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["justifikasi metod", "justify method", "alasan memilih metode", "kenapa metode"]):
-            return {"intent": "methodology_justify", "confidence": 0.92, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["interpretasi data", "interpret data", "hubungkan dengan teori", "korelasi bab 2", "correlate"]):
-            return {"intent": "data_interpretation", "confidence": 0.91, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["kesimpulan", "conclusion", "limitasi", "limitation", "saran penelitian selanjutnya"]):
-            return {"intent": "thesis_conclusion", "confidence": 0.92, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["cek sitasi", "validasi sitasi", "citation check", "missing citation"]):
-            return {"intent": "validate_citations", "confidence": 0.94, "key_entities": [], "needs_clarification": False}
-
-        if any(kw in msg_lower for kw in ["benang merah", "golden thread", "koherensi antar bab", "coherence check"]):
-            return {"intent": "golden_thread_check", "confidence": 0.93, "key_entities": [], "needs_clarification": False}
 
+        # Tier 1: cache pesan ternormalisasi (+ 2 turn history terakhir)
+        cached = self.cache.get(user_message, conversation_history) if self.cache is not None else None
+        if cached is not None:
+            self._count(TIER_CACHE)
+            logger.info(f"Classified intent: {cached.get('intent')} (confidence: {cached.get('confidence')}, tier: cache)")
+            return cached
+
+        # Tier 2: rule/keyword matcher (regex ter-compile, urutan = prioritas)
+        matched = self.rules.match(user_message)
+        if isinstance(matched, dict) and matched.get("intent") == "unclear":
+            self._count(TIER_RULES)
+            matched["ask_user"] = matched.get("ask_user") or CLARIFICATION_TEMPLATE
+            return matched
+        if isinstance(matched, dict) and matched["confidence"] >= self.rule_threshold:
+            self._count(TIER_RULES)
+            logger.info(f"Classified intent: {matched['intent']} (confidence: {matched['confidence']}, tier: rules)")
+            return matched
+
+        # Tier 3: model lokal TF-IDF + logistic regression (dilewati jika rule minta LLM)
+        if matched != DEFER_TO_LLM and self.use_local_model and user_message.strip():
+            predicted = local_model_for(INTENT_CLASSIFIER_PROMPT).predict(
+                user_message, min_prob=self.local_min_prob, min_margin=self.local_min_margin
+            )
+            if predicted is not None:
+                intent, probability = predicted
+                self._count(TIER_LOCAL)
+                result = intent_result(intent, round(probability, 4), TIER_LOCAL)
+                logger.info(f"Classified intent: {intent} (confidence: {result['confidence']}, tier: local)")
+                if self.cache is not None:
+                    self.cache.set(user_message, conversation_history, result)
+                return result
+
+        # Tier 4: LLM
+        self._count(TIER_LLM)
         prompt = INTENT_CLASSIFIER_PROMPT.replace("{conversation_history}", json.dumps(conversation_history, indent=2))
         prompt = prompt.replace("{user_message}", user_message)
         
@@ -349,6 +332,9 @@ class IntentClassifier:
                 }
             
             logger.info(f"Classified intent: {result.get('intent')} (confidence: {confidence})")
+            result["tier"] = TIER_LLM
+            if self.cache is not None:
+                self.cache.set(user_message, conversation_history, result)
             return result
             
         except json.JSONDecodeError as e:
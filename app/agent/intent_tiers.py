@@ -0,0 +1,366 @@
+"""
+Tier lokal di depan LLM IntentClassifier.
+
+Urutan: (1) cache pesan ternormalisasi, (2) rule/keyword matcher yang di-compile
+jadi satu regex per intent, (3) model lokal TF-IDF + logistic regression (numpy)
+yang dilatih dari contoh few-shot di prompt classifier (+ SEED_EXAMPLES). Tiap tier punya ambang
+confidence sendiri; pesan yang tidak lolos tier mana pun baru dikirim ke LLM.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.utils.lru_cache import LRUCache
+
+LOCAL_MIN_PROB = float(os.getenv("INTENT_LOCAL_MIN_PROB", "0.6"))
+LOCAL_MIN_MARGIN = float(os.getenv("INTENT_LOCAL_MIN_MARGIN", "0.3"))
+RULE_MIN_CONFIDENCE = float(os.getenv("INTENT_RULE_MIN_CONFIDENCE", "0.9"))
+CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "4096"))
+
+TIER_CACHE = "cache"
+TIER_RULES = "rules"
+TIER_LOCAL = "local"
+TIER_LLM = "llm"
+
+# Sinyal dari rule matcher: jangan tebak lokal, serahkan langsung ke LLM
+DEFER_TO_LLM = "defer_to_llm"
+
+QUESTION_STARTERS = ("bagaimana", "gimana", "apa", "what", "why", "kenapa", "jelaskan")
+WRITE_INTENT_VERBS = ("buat", "bikin", "tulis", "susun", "generate", "write", "draft", "tolong buatkan")
+
+GREETINGS = frozenset({
+    "halo", "hallo", "hai", "hi", "hello", "hey", "ping", "pagi", "siang", "sore", "malam",
+    "selamat pagi", "selamat siang", "selamat sore", "selamat malam", "halo agent", "hai agent",
+    "hi agent", "assalamualaikum", "permisi",
+})
+
+# Urutan = prioritas (sama dengan rantai if di IntentClassifier sebelumnya).
+# (intent, confidence, keyword substring)
+RULES: List[Tuple[str, float, Sequence[str]]] = [
+    ("literature_review", 0.95, ["literature review"]),
+    ("web_search", 0.97, [
+        "cari di google", "cari di internet", "search web", "web search",
+        "cari online", "cari artikel terbaru", "browsing", "dari internet",
+    ]),
+    ("rewrite_paragraph", 0.98, [
+        "tulis ulang", "perbaiki paragraf", "rewrite", "parafrase", "buat lebih formal",
+        "perbaiki kalimat", "susun ulang",
+    ]),
+    ("generate_chapter", 0.96, [
+        "buatkan bab", "tulis bab lengkap", "generate bab", "buat bab",
+        "tulis bab 1", "tulis bab 2", "tulis bab 3", "tulis bab 4", "tulis bab 5",
+        "bab 1 lengkap", "bab 2 lengkap", "bab 3 lengkap", "bab 4 lengkap", "bab 5 lengkap",
+    ]),
+    ("write_abstract", 0.97, [
+        "buat abstrak", "tulis abstrak", "buatkan abstrak", "write abstract",
+        "abstract", "bikin abstrak",
+    ]),
+    ("find_papers", 0.95, [
+        "cari jurnal", "cariin jurnal", "carikan jurnal", "cari paper", "cariin paper",
+        "carikan paper", "cari referensi", "cariin referensi", "carikan referensi",
+        "cari literatur", "find papers", "search papers", "search for papers",
+    ]),
+    ("research_questions", 0.96, [
+        "buatkan rumusan masalah", "bikin rumusan masalah", "susun rumusan masalah",
+        "tulis rumusan masalah", "buat rumusan masalah", "rumuskan masalah penelitian",
+    ]),
+    ("research_objectives", 0.95, [
+        "buatkan tujuan penelitian", "bikin tujuan penelitian", "susun tujuan penelitian",
+        "tulis tujuan penelitian", "buat tujuan penelitian",
+    ]),
+    ("research_gap", 0.93, ["research gap", "gap penelitian", "celah penelitian", "kelemahan penelitian"]),
+    ("methodology_justify", 0.92, ["justifikasi metod", "justify method", "alasan memilih metode", "kenapa metode"]),
+    ("data_interpretation", 0.91, ["interpretasi data", "interpret data", "hubungkan dengan teori", "korelasi bab 2", "correlate"]),
+    ("thesis_conclusion", 0.92, ["kesimpulan", "conclusion", "limitasi", "limitation", "saran penelitian selanjutnya"]),
+    ("validate_citations", 0.94, ["cek sitasi", "validasi sitasi", "citation check", "missing citation"]),
+    ("golden_thread_check", 0.93, ["benang merah", "golden thread", "koherensi antar bab", "coherence check"]),
+]
+
+# Contoh latih tambahan untuk intent yang tidak punya (atau hanya sedikit) contoh few-shot
+# di prompt. Sengaja berbeda dari fixture benchmark supaya akurasi yang dilaporkan jujur.
+SEED_EXAMPLES: Dict[str, Sequence[str]] = {
+    "expand_paragraph": [
+        "panjangkan paragraf ini", "tambah detail di paragraf ini", "elaborasi paragraf berikut",
+        "kembangkan kalimat ini jadi satu paragraf", "expand this paragraph", "perluas penjelasan paragraf ini",
+    ],
+    "summarize": [
+        "ringkas teks ini", "buatkan ringkasan singkat", "rangkum artikel berikut", "summarize this text",
+        "intisari dari bacaan ini apa saja", "rangkuman poin penting dari teks ini",
+    ],
+    "academic_style": [
+        "ubah ke bahasa akademik", "jadikan lebih ilmiah", "gaya bahasa baku dan formal",
+        "bahasa paragraf ini terlalu santai", "make this sound more academic", "ganti ke bahasa ilmiah",
+    ],
+    "citation_format": [
+        "format sitasi apa", "ubah ke format APA", "gaya sitasi IEEE", "rapikan daftar pustaka",
+        "format referensi harvard", "format citation to APA style", "tulis daftar pustaka sesuai format",
+    ],
+    "analyze_argument": [
+        "analisis argumen", "argumen saya kuat tidak", "cek struktur argumen", "evaluasi klaim dan bukti",
+        "analyze the argument", "logika argumennya sudah benar belum",
+    ],
+    "check_coherence": [
+        "cek alur paragraf", "paragraf ini runtut tidak", "cek kepaduan subbab", "transisi antar paragraf",
+        "check paragraph flow", "alur tulisan saya nyambung tidak",
+    ],
+    "thesis_scoring": [
+        "nilai skripsi saya", "beri skor tesis", "evaluasi kualitas draft", "skor kualitas tulisan",
+        "rate my thesis", "kualitas skripsi saya berapa",
+    ],
+    "general_question": [
+        "bagaimana cara menulis metodologi", "apa itu variabel moderasi", "berapa jumlah responden ideal",
+        "apa perbedaan hipotesis dan asumsi", "jelaskan teknik sampling", "bagaimana menentukan populasi",
+        "what is a literature gap", "kenapa perlu uji normalitas",
+    ],
+    "generate_section": [
+        "buatkan latar belakang", "tulis pendahuluan", "bikin landasan teori", "buat kerangka berpikir",
+        "tulis definisi operasional variabel", "buatkan subbab hipotesis", "write the introduction section",
+    ],
+    "edit_thesis": [
+        "edit teks di editor", "ganti kata ini di dokumen", "hapus kalimat di paragraf", "perbaiki typo",
+        "sisipkan kalimat ini di bab 2", "ubah judul subbab di editor", "benerin ejaan di dokumen saya",
+    ],
+    "find_papers": [
+        "cari artikel ilmiah", "jurnal tentang topik ini", "referensi terbaru soal", "sumber pustaka untuk",
+        "paper internasional tentang", "carikan sumber ilmiah",
+    ],
+    "data_interpretation": [
+        "interpretasikan hasil regresi", "makna koefisien korelasi ini", "bahas hasil uji hipotesis",
+        "jelaskan output spss ini", "kaitkan hasil dengan penelitian terdahulu",
+    ],
+    "thesis_conclusion": [
+        "tulis simpulan", "bagian penutup", "saran untuk penelitian berikutnya", "keterbatasan penelitian",
+    ],
+    "validate_citations": [
+        "klaim tanpa sitasi", "periksa kutipan", "sitasi yang hilang", "semua kutipan ada di daftar pustaka",
+    ],
+    "golden_thread_check": [
+        "konsistensi antar bab", "bab 1 dan bab 5 nyambung", "keselarasan rumusan masalah dan kesimpulan",
+    ],
+    "research_questions": [
+        "pertanyaan penelitian", "rumusan masalah", "research questions for my topic",
+    ],
+    "research_objectives": ["tujuan penelitian", "research objectives"],
+    "unclear": ["ini bab saya", "gimana", "lanjut", "oke", "terus"],
+}
+
+_PUNCT_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_message(message: str) -> str:
+    """Huruf kecil, tanda baca dibuang, spasi dirapikan."""
+    return _WS_RE.sub(" ", _PUNCT_RE.sub(" ", (message or "").lower())).strip()
+
+
+def intent_result(intent: str, confidence: float, tier: str, **extra: Any) -> Dict[str, Any]:
+    result = {"intent": intent, "confidence": confidence, "key_entities": [], "needs_clarification": False, "tier": tier}
+    result.update(extra)
+    return result
+
+
+# ── Tier 1: cache ──
+
+class IntentCache:
+    """Hasil klasifikasi per (pesan ternormalisasi, 2 turn history terakhir)."""
+
+    def __init__(self, max_items: int = CACHE_SIZE):
+        self.lru = LRUCache(max_items=max_items)
+
+    @staticmethod
+    def key_for(message: str, history: Optional[List[Dict[str, str]]]) -> Tuple[str, str]:
+        recent = (history or [])[-2:]
+        digest = hashlib.sha1(json.dumps(recent, sort_keys=True, default=str).encode("utf-8")).hexdigest() if recent else ""
+        return normalize_message(message), digest
+
+    def get(self, message, history) -> Optional[Dict[str, Any]]:
+        hit = self.lru.get(self.key_for(message, history))
+        if hit is None:
+            return None
+        result = dict(hit)  # caller (supervisor) boleh memutasi hasil
+        result["tier"] = TIER_CACHE
+        return result
+
+    def set(self, message, history, result: Dict[str, Any]) -> None:
+        self.lru.set(self.key_for(message, history), dict(result))
+
+
+_shared_cache: Optional[IntentCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_intent_cache() -> IntentCache:
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = IntentCache()
+        return _shared_cache
+
+
+# ── Tier 2: rules ──
+
+class RuleMatcher:
+    def __init__(self, rules=RULES):
+        self.rules = [
+            (intent, confidence, re.compile("|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))))
+            for intent, confidence, keywords in rules
+        ]
+
+    def match(self, message: str):
+        """Return dict hasil, DEFER_TO_LLM, atau None (tidak ada rule yang cocok)."""
+        msg_lower = (message or "").lower()
+        normalized = normalize_message(message)
+        if normalized in GREETINGS:
+            return intent_result("greeting", 0.99, TIER_RULES)
+        if normalized in ("abstrak", "abstract"):
+            return {"intent": "unclear", "confidence": 0.45, "ask_user": None, "tier": TIER_RULES}
+
+        deferred = None
+        for intent, confidence, pattern in self.rules:
+            if not pattern.search(msg_lower):
+                continue
+            if intent == "write_abstract" and msg_lower.startswith(QUESTION_STARTERS) \
+                    and not any(verb in msg_lower for verb in WRITE_INTENT_VERBS):
+                # Pertanyaan konseptual tentang abstrak lebih aman didelegasikan ke LLM classifier.
+                deferred = DEFER_TO_LLM
+                continue
+            return intent_result(intent, confidence, TIER_RULES)
+        return deferred
+
+
+# ── Tier 3: model lokal ──
+
+def _features(text: str) -> List[str]:
+    words = _WORD_RE.findall((text or "").lower())
+    feats = [f"w:{w}" for w in words]
+    feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        for n in (3, 4):
+            feats += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    return feats
+
+
+class LocalIntentModel:
+    """
+    TF-IDF (kata, bigram, n-gram karakter 3-4) + multinomial logistic regression,
+    dilatih full-batch gradient descent. Data latih kecil (puluhan contoh), jadi
+    fit selesai dalam hitungan milidetik saat pertama dipakai.
+    """
+
+    def __init__(self, l2: float = 1e-4, epochs: int = 300, lr: float = 5.0):
+        self.l2 = l2
+        self.epochs = epochs
+        self.lr = lr
+        self.vocab: Dict[str, int] = {}
+        self.idf = None
+        self.weights = None
+        self.bias = None
+        self.labels: List[str] = []
+
+    def _vectorize(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            entries = [(self.vocab[feat], (1.0 + math.log(count)) * self.idf[self.vocab[feat]])
+                       for feat, count in Counter(_features(text)).items() if feat in self.vocab]
+            norm = math.sqrt(sum(value * value for _, value in entries)) or 1.0
+            for col, value in entries:
+                rows.append(row)
+                cols.append(col)
+                values.append(value / norm)
+        return sparse.csr_matrix((values, (rows, cols)), shape=(len(texts), len(self.vocab)))
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str]) -> "LocalIntentModel":
+        doc_feats = [set(_features(text)) for text in texts]
+        df = Counter(feat for feats in doc_feats for feat in feats)
+        self.vocab = {feat: i for i, feat in enumerate(sorted(df))}
+        n_docs = len(texts)
+        self.idf = np.array([math.log((1 + n_docs) / (1 + df[feat])) + 1.0 for feat in sorted(df)])
+        self.labels = sorted(set(labels))
+        label_index = {label: i for i, label in enumerate(self.labels)}
+
+        x = self._vectorize(texts)
+        y = np.zeros((n_docs, len(self.labels)))
+        y[np.arange(n_docs), [label_index[label] for label in labels]] = 1.0
+        self.weights = np.zeros((x.shape[1], len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+        x_t = x.T.tocsr()
+        for _ in range(self.epochs):
+            probs = self._softmax(np.asarray(x @ self.weights) + self.bias)
+            grad = probs - y
+            self.weights -= self.lr * (np.asarray(x_t @ grad) / n_docs + self.l2 * self.weights)
+            self.bias -= self.lr * grad.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, text: str) -> List[Tuple[str, float]]:
+        x = self._vectorize([text])
+        if not x.nnz:
+            return []
+        probs = self._softmax(np.asarray(x @ self.weights) + self.bias)[0]
+        order = np.argsort(-probs)
+        return [(self.labels[i], float(probs[i])) for i in order]
+
+    def predict(self, text: str, min_prob: float = LOCAL_MIN_PROB, min_margin: float = LOCAL_MIN_MARGIN):
+        """Return (intent, prob) jika lolos ambang, selain itu None."""
+        ranked = self.predict_proba(text)
+        if not ranked:
+            return None
+        intent, prob = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if intent == "unclear" or prob < min_prob or prob - runner_up < min_margin:
+            return None
+        return intent, prob
+
+
+_EXAMPLE_RE = re.compile(r'Input:\s*(.+?)\s*\nOutput:\s*\{\s*"intent":\s*"(\w+)"', re.S)
+
+
+def prompt_examples(prompt: str) -> List[Tuple[str, str]]:
+    """Ambil pasangan (pesan, intent) dari blok EXAMPLES di prompt few-shot."""
+    examples = []
+    for inputs, intent in _EXAMPLE_RE.findall(prompt):
+        for text in re.findall(r'"([^"]+)"', inputs):
+            examples.append((text, intent))
+    return examples
+
+
+def training_examples(prompt: str, rules=RULES) -> List[Tuple[str, str]]:
+    """Contoh few-shot + frasa rule (tiap keyword jadi satu contoh pendek) + SEED_EXAMPLES."""
+    examples = prompt_examples(prompt)
+    for intent, _, keywords in rules:
+        examples.extend((keyword, intent) for keyword in keywords)
+    examples.extend((greeting, "greeting") for greeting in GREETINGS)
+    for intent, texts in SEED_EXAMPLES.items():
+        examples.extend((text, intent) for text in texts)
+    return examples
+
+
+_models: Dict[str, LocalIntentModel] = {}
+_models_lock = threading.Lock()
+
+
+def local_model_for(prompt: str) -> LocalIntentModel:
+    """Model dilatih sekali per isi prompt per proses."""
+    key = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            texts, labels = zip(*training_examples(prompt))
+            model = _models[key] = LocalIntentModel().fit(texts, labels)
+        return model
@@ -9,6 +9,13 @@ from contextlib import suppress
 import logging
 import uuid
 import hashlib
+import threading
+import atexit
+import copy
+
+import gevent
+from gevent.event import AsyncResult
+from gevent.queue import JoinableQueue
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +23,17 @@ redis_url = os.environ.get("REDIS_URL")
 redis_client = redis.from_url(redis_url) if redis_url else None
 
 from .task_planner import TaskPlan
+from .embedding_service import get_embedding_service
+from app.utils.lru_cache import LRUCache
+from app.utils.search_fanout import STATUS_OK, FanOutExecutor
+from app.utils.token_budget import SECTION_PRIORITY, PromptSection, TokenBudgeter
+from app.utils.token_budget import count_tokens as _count_tokens
 
 if TYPE_CHECKING:
     from .research_agent import StoredPaper
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-import google.generativeai as genai
 
 # --- QDRANT VECTOR DB & EMBEDDING ---
 
@@ -33,88 +44,168 @@ VECTOR_COLLECTION_ALIASES = {
 }
 
 def embed(text: str) -> List[float]:
-    """Generate embeddings using Gemini text-embedding-004 (3072 dimensions) with caching"""
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        print("WARNING: GEMINI_API_KEY is missing. Returning zero vector.")
-        return [0.0] * 3072
-        
-    import hashlib
-    text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-    cache_key = f"embed_cache:{text_hash}"
-    
-    if redis_client:
-        with suppress(Exception):
-            cached = redis_client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-    
+    """Generate embedding Gemini (3072 dimensi) dengan cache; request bersamaan digabung jadi satu batch."""
     try:
-        genai.configure(api_key=api_key)
-        response = genai.embed_content(
-            model="models/gemini-embedding-001",
-            content=text
-        )
-        vec = response['embedding']
-        
-        if redis_client:
-            with suppress(Exception):
-                redis_client.setex(cache_key, 86400, json.dumps(vec))
-                
-        return vec
+        return get_embedding_service().embed(text)
     except Exception as e:
         print(f"Embedding error: {e}")
         raise e
 
-class QdrantVectorDB:
+
+def embed_many(texts: List[str]) -> List[List[float]]:
+    """Batch embedding: satu provider call per `EMBED_BATCH_MAX_SIZE` teks yang belum ter-cache."""
+    return get_embedding_service().embed_many(texts)
+
+# Naikkan angka ini setiap kali collection/payload index berubah; proses yang
+# sudah bootstrap versi lama akan reconcile sekali lagi saat start berikutnya.
+VECTOR_SCHEMA_VERSION = 2
+VECTOR_DIM = 3072
+VECTOR_COLLECTIONS = ["research_papers", "thesis_chunks", "thesis_summaries"]
+VECTOR_PAYLOAD_INDEXES = {
+    "*": (
+        ("doc_id", "keyword"),
+        ("paper_id", "keyword"),
+        ("scope_id", "keyword"),
+        ("user_id", "keyword"),
+        ("project_id", "keyword"),
+        ("chapter_id", "keyword"),
+    ),
+    "thesis_chunks": (
+        ("section", "keyword"),
+        # S1-1: Ensure chunk_index index for ordering
+        ("chunk_index", "integer"),
+    ),
+}
+
+
+class _QdrantClientRegistry:
+    """
+    Registry per proses: satu QdrantClient (dengan connection pool HTTP sendiri) per
+    endpoint, dibagi ke semua greenlet. Bootstrap schema hanya jalan sekali per
+    endpoint + VECTOR_SCHEMA_VERSION; marker di Redis membuat worker gunicorn lain
+    ikut melewati bootstrap.
+    """
+
     def __init__(self):
-        url = os.environ.get("QDRANT_URL")
-        api_key = os.environ.get("QDRANT_API_KEY")
-        
+        self._clients: Dict[str, Any] = {}
+        self._bootstrapped: set = set()
+        self._lock = threading.RLock()
+        self.bootstrap_runs = 0
+
+    @staticmethod
+    def _endpoint() -> tuple:
+        return os.environ.get("QDRANT_URL"), os.environ.get("QDRANT_API_KEY")
+
+    def get_client(self) -> tuple:
+        url, api_key = self._endpoint()
+        key = url if (url and api_key) else ":memory:"
+        client = self._clients.get(key)
+        if client is not None:
+            return key, client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create_client(url, api_key)
+                self._clients[key] = client
+        return key, client
+
+    @staticmethod
+    def _create_client(url: Optional[str], api_key: Optional[str]):
         if not url or not api_key:
             logger.info("Qdrant key belum di set, defaulting to in-memory")
-            self.client = QdrantClient(":memory:")
-        else:
-            try:
-                # Set timeout to 60s to handle cloud latency
-                self.client = QdrantClient(url=url, api_key=api_key, timeout=60)
-            except Exception as e:
-                print(f"Failed to connect to Qdrant Cloud: {e}. Falling back to local in-memory.")
-                self.client = QdrantClient(":memory:")
-            
-        self._ensure_collections()
+            return QdrantClient(":memory:")
+        try:
+            # Set timeout to 60s to handle cloud latency
+            return QdrantClient(
+                url=url,
+                api_key=api_key,
+                timeout=60,
+                pool_size=int(os.environ.get("QDRANT_POOL_SIZE", "32")),
+            )
+        except Exception as e:
+            print(f"Failed to connect to Qdrant Cloud: {e}. Falling back to local in-memory.")
+            return QdrantClient(":memory:")
+
+    @staticmethod
+    def _marker_key(client_key: str) -> str:
+        digest = hashlib.md5(client_key.encode("utf-8")).hexdigest()[:12]
+        return f"qdrant_schema:{digest}"
+
+    def ensure_schema(self, client_key: str, vector_db: "QdrantVectorDB", force: bool = False) -> bool:
+        """Return True jika bootstrap benar-benar dijalankan."""
+        marker = (client_key, VECTOR_SCHEMA_VERSION)
+        if not force and marker in self._bootstrapped:
+            return False
+        with self._lock:
+            if not force and marker in self._bootstrapped:
+                return False
+
+            shared_marker = client_key != ":memory:" and redis_client is not None
+            if not force and shared_marker:
+                with suppress(Exception):
+                    stored = redis_client.get(self._marker_key(client_key))
+                    if stored is not None and int(stored) >= VECTOR_SCHEMA_VERSION:
+                        self._bootstrapped.add(marker)
+                        return False
+
+            vector_db._ensure_collections()
+            self.bootstrap_runs += 1
+            self._bootstrapped.add(marker)
+            if shared_marker:
+                with suppress(Exception):
+                    redis_client.set(self._marker_key(client_key), VECTOR_SCHEMA_VERSION)
+            return True
+
+    def reset(self):
+        """Lupakan semua client dan status bootstrap (dipakai test)."""
+        with self._lock:
+            self._clients.clear()
+            self._bootstrapped.clear()
+            self.bootstrap_runs = 0
+
+
+qdrant_registry = _QdrantClientRegistry()
+
+
+class QdrantVectorDB:
+    """
+    Facade tipis di atas QdrantClient bersama dari `qdrant_registry`.
+    Murah untuk dibuat per request: tidak ada koneksi baru dan tidak ada
+    panggilan schema setelah bootstrap pertama di proses ini.
+    """
+
+    def __init__(self, client: Any = None):
+        if client is not None:
+            # Client eksplisit (test/tooling): caller yang bertanggung jawab atas schema.
+            self.client = client
+            return
+        client_key, self.client = qdrant_registry.get_client()
+        qdrant_registry.ensure_schema(client_key, self)
 
     def _resolve_collection_name(self, collection: str) -> str:
         return VECTOR_COLLECTION_ALIASES.get(collection, collection)
         
     def _ensure_collections(self):
-        collections = ["research_papers", "thesis_chunks", "thesis_summaries"]
-        for logical_collection in collections:
+        for logical_collection in VECTOR_COLLECTIONS:
             col = self._resolve_collection_name(logical_collection)
             # Note: During testing, we ensure that the dimensions match 3072.
             if self.client.collection_exists(col):
                 info = self.client.get_collection(col)
-                if info.config.params.vectors.size != 3072:
+                if info.config.params.vectors.size != VECTOR_DIM:
                     print(f"Collection {col} has wrong dimension, recreating...")
                     self.client.delete_collection(col)
                     self.client.create_collection(
                         collection_name=col,
-                        vectors_config=VectorParams(size=3072, distance=Distance.COSINE),
+                        vectors_config=VectorParams(size=VECTOR_DIM, distance=Distance.COSINE),
                     )
             else:
                 self.client.create_collection(
                     collection_name=col,
-                    vectors_config=VectorParams(size=3072, distance=Distance.COSINE),
+                    vectors_config=VectorParams(size=VECTOR_DIM, distance=Distance.COSINE),
                 )
-            
-            for field_name, field_schema in (
-                ("doc_id", "keyword"),
-                ("paper_id", "keyword"),
-                ("scope_id", "keyword"),
-                ("user_id", "keyword"),
-                ("project_id", "keyword"),
-                ("chapter_id", "keyword"),
-            ):
+
+            indexes = VECTOR_PAYLOAD_INDEXES["*"] + VECTOR_PAYLOAD_INDEXES.get(logical_collection, ())
+            for field_name, field_schema in indexes:
                 try:
                     self.client.create_payload_index(
                         collection_name=col,
@@ -123,44 +214,40 @@ class QdrantVectorDB:
                     )
                 except Exception:
                     pass  # Already exists or transient error
-            
-            if logical_collection == "thesis_chunks":
-                try:
-                    self.client.create_payload_index(
-                        collection_name=col,
-                        field_name="section",
-                        field_schema="keyword",
-                    )
-                except Exception:
-                    pass
-                # S1-1: Ensure chunk_index index for ordering
-                try:
-                    self.client.create_payload_index(
-                        collection_name=col,
-                        field_name="chunk_index",
-                        field_schema="integer",
-                    )
-                except Exception:
-                    pass
+
+    @staticmethod
+    def _point_id(point_id):
+        """Qdrant hanya menerima UUID/int; id string lain dipetakan deterministik ke uuid5."""
+        if isinstance(point_id, str):
+            try:
+                uuid.UUID(point_id)
+            except ValueError:
+                point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, point_id))
+        return point_id
 
     def upsert(self, collection: str, points: List[Dict]):
         collection = self._resolve_collection_name(collection)
         qdrant_points = []
         for p in points:
-            point_id = p["id"]
-            if isinstance(point_id, str):
-                try:
-                    uuid.UUID(point_id)
-                except ValueError:
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, point_id))
-                    
             qdrant_points.append(PointStruct(
-                id=point_id,
+                id=self._point_id(p["id"]),
                 vector=p["vector"],
                 payload=p.get("payload", {})
             ))
         self.client.upsert(collection_name=collection, points=qdrant_points)
 
+    def retrieve(self, collection: str, ids: List[Any]):
+        """Ambil banyak point sekaligus berdasarkan id (satu request, tanpa vector)."""
+        collection = self._resolve_collection_name(collection)
+        if not ids:
+            return []
+        return self.client.retrieve(
+            collection_name=collection,
+            ids=[self._point_id(point_id) for point_id in ids],
+            with_payload=True,
+            with_vectors=False,
+        )
+
     def search(self, collection: str, query_vector: List[float], filter: dict = None, score_threshold: float = None, limit: int = 10):
         collection = self._resolve_collection_name(collection)
         qdrant_filter = None
@@ -192,9 +279,27 @@ class QdrantVectorDB:
         )
         return records
 
+
+def reconcile_vector_schema() -> Dict[str, Any]:
+    """
+    Paksa bootstrap ulang schema Qdrant (collection, dimensi, payload index) untuk
+    endpoint aktif dan perbarui marker versi. Dipanggil dari `flask qdrant-reconcile`
+    setelah mengubah VECTOR_COLLECTIONS / VECTOR_PAYLOAD_INDEXES.
+    """
+    client_key, client = qdrant_registry.get_client()
+    vector_db = QdrantVectorDB(client=client)
+    qdrant_registry.ensure_schema(client_key, vector_db, force=True)
+    collections = {}
+    for logical_collection in VECTOR_COLLECTIONS:
+        col = vector_db._resolve_collection_name(logical_collection)
+        info = client.get_collection(col)
+        collections[col] = {"vector_size": info.config.params.vectors.size}
+    return {"schema_version": VECTOR_SCHEMA_VERSION, "collections": collections}
+
+
 class InMemoryProfileStore:
     """In-memory mock DB untuk test environment. Formerly DummyDocumentDB."""
-    def save(self, profile):
+    def save(self, profile, fields: Optional[List[str]] = None):
         pass
 
     def load_profile(self, user_id: str):
@@ -222,13 +327,16 @@ class FirestoreDocumentDB:
             logger.warning(f"FirestoreDocumentDB unavailable: {exc}")
             return None
 
-    def save(self, profile):
+    def save(self, profile, fields: Optional[List[str]] = None):
+        """Simpan profil; `fields` membatasi payload ke field yang berubah (merge=True)."""
         db = self._get_firestore()
         if not db or not profile:
             return
         try:
             payload = asdict(profile)
             payload["last_active"] = profile.last_active.isoformat()
+            if fields is not None:
+                payload = {k: v for k, v in payload.items() if k in fields or k == "user_id"}
             db.collection("agent_user_profiles").document(str(profile.user_id)).set(payload, merge=True)
         except Exception as exc:
             logger.warning(f"Failed to persist agent user profile: {exc}")
@@ -312,9 +420,12 @@ class FirestoreDocumentDB:
             logger.warning(f"Failed to load recent plan traces: {exc}")
             return []
 
-def count_tokens(text: str) -> int:
-    """Estimasi jumlah token teks secara kasar (1 token ≈ 4 huruf)."""
-    return len(str(text)) // 4
+# Budget token untuk blok SHARED AGENT CONTEXT yang disisipkan ke prompt worker agent
+SHARED_CONTEXT_MAX_TOKENS = int(os.getenv("SHARED_CONTEXT_MAX_TOKENS", "900"))
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Jumlah token teks (tiktoken per model; estimator offline bila tokenizer tidak tersedia)."""
+    return _count_tokens(text, model)
 
 def format_citation(paper: "StoredPaper", style: str) -> str:
     """Helper formatting sitasi statis untuk memory system."""
@@ -338,20 +449,19 @@ def build_memory_prompt_context(memory: Any, include_conversation: bool = True)
 
         req_ctx = getattr(memory, "request_context", {}) or {}
         active_paragraphs = req_ctx.get("active_paragraphs", []) or []
-        paragraph_preview = []
+        paragraph_lines = []
         for paragraph in active_paragraphs[:3]:
             content = str(paragraph.get("content", "")).strip()
             if content:
-                preview = content[:180] + ("..." if len(content) > 180 else "")
-                paragraph_preview.append(f"- [{paragraph.get('paraId', '?')}] {preview}")
+                paragraph_lines.append(f"- [{paragraph.get('paraId', '?')}] {content}")
 
         recent_history = []
         if include_conversation and hasattr(memory, "conversation"):
             for turn in memory.conversation.get_context_window(last_n=4):
                 if isinstance(turn, dict) and turn.get("role") and turn.get("content"):
-                    recent_history.append(f"- {turn['role']}: {str(turn['content'])[:180]}")
+                    recent_history.append(f"- {turn['role']}: {turn['content']}")
 
-        sections = [
+        header = "\n".join([
             "=== SHARED AGENT CONTEXT ===",
             f"Project title: {req_ctx.get('context_title', '') or getattr(profile, 'thesis_topic', '') or '-'}",
             f"Problem statement: {req_ctx.get('context_problem', '-')}",
@@ -359,20 +469,24 @@ def build_memory_prompt_context(memory: Any, include_conversation: bool = True)
             f"Writing style: {getattr(profile, 'writing_style', 'academic formal') if profile else 'academic formal'}",
             f"Language: {getattr(profile, 'preferred_language', 'id') if profile else 'id'}",
             f"Citation style: {getattr(profile, 'citation_style', 'APA') if profile else 'APA'}",
-        ]
-
-        if paragraph_preview:
-            sections.append("Active editor paragraphs:")
-            sections.extend(paragraph_preview)
-
-        references_text = req_ctx.get("references_text", "")
-        if references_text:
-            sections.append("Reference preview:")
-            sections.append(references_text[:600])
-
-        if recent_history:
-            sections.append("Recent conversation:")
-            sections.extend(recent_history)
+        ])
+        # Header wajib utuh; paragraf aktif > referensi > histori berbagi sisa budget
+        fitted = TokenBudgeter(SHARED_CONTEXT_MAX_TOKENS).fit([
+            PromptSection("system", header, priority=SECTION_PRIORITY["system"], required=True),
+            PromptSection("context", "\n".join(paragraph_lines), priority=SECTION_PRIORITY["context"], min_tokens=120),
+            PromptSection("rag", str(req_ctx.get("references_text", "") or ""), priority=SECTION_PRIORITY["rag"], min_tokens=80),
+            PromptSection("history", "\n".join(recent_history), priority=SECTION_PRIORITY["history"], keep="end"),
+        ])
+
+        sections = [fitted.texts["system"]]
+        for title, name in (
+            ("Active editor paragraphs:", "context"),
+            ("Reference preview:", "rag"),
+            ("Recent conversation:", "history"),
+        ):
+            if fitted.texts[name]:
+                sections.append(title)
+                sections.append(fitted.texts[name])
 
         sections.append("=== END SHARED CONTEXT ===")
         return "\n".join(sections)
@@ -403,6 +517,20 @@ class ConversationTurn:
         return cls(d["role"], d["content"], d.get("intent"), d.get("plan_id"), 
                    datetime.fromisoformat(d["timestamp"]), d.get("tokens_used", 0))
 
+# Percakapan disimpan append-only: satu RPUSH per turn ke `conv:<scope>:turns`, rangkuman
+# bergulir di key terpisah `conv:<scope>:summary`. Blob JSON lama (`conv:<scope>`) dimigrasi
+# sekali saat load. Turn yang sudah terangkum tetap di list sampai kena cap/TTL.
+#
+# Key summary berisi {"epoch", "version", "covered_until", "turn"}. Rangkuman digabung oleh
+# ConversationSummarizer di background dengan compare-and-set pada `version`; `epoch` baru
+# setiap tulis ulang penuh (replace/flush) supaya job lama tidak menghidupkan riwayat yang
+# sudah dihapus.
+CONVERSATION_TTL_SECONDS = 86400  # 24 jam TTL
+CONVERSATION_LOG_MAX_TURNS = int(os.getenv("CONVERSATION_LOG_MAX_TURNS", "2000"))
+CONVERSATION_SUMMARY_WORKERS = int(os.getenv("CONVERSATION_SUMMARY_WORKERS", "2"))
+CONVERSATION_SUMMARY_CAS_ATTEMPTS = 3
+
+
 class ConversationMemory:
     def __init__(self, scope_id: str, max_turns: int = 20, db: Any = None):
         self.scope_id = scope_id
@@ -410,20 +538,91 @@ class ConversationMemory:
         self.max_turns = max_turns
         self.plans: Dict[str, TaskPlan] = {}
         self.db = db
+        self.summary_state: Dict[str, Any] = {"epoch": "", "version": 0, "covered_until": None}
         self.load()
-        
+
+    @property
+    def legacy_key(self) -> str:
+        return f"conv:{self.scope_id}"
+
+    @property
+    def turns_key(self) -> str:
+        return f"conv:{self.scope_id}:turns"
+
+    @property
+    def summary_key(self) -> str:
+        return f"conv:{self.scope_id}:summary"
+
+    @staticmethod
+    def _parse_summary(raw) -> tuple:
+        data = json.loads(raw) if raw else {}
+        state = {
+            "epoch": data.get("epoch", ""),
+            "version": int(data.get("version", 0)),
+            "covered_until": data.get("covered_until"),
+        }
+        turn = ConversationTurn.from_dict(data["turn"]) if data.get("turn") else None
+        return state, turn
+
     def load(self):
-        if redis_client:
-            data = redis_client.get(f"conv:{self.scope_id}")
-            if data:
-                with suppress(Exception):
-                    raw = json.loads(data)
-                    self.turns = [ConversationTurn.from_dict(t) for t in raw]
-                    
+        if not redis_client:
+            return
+        with suppress(Exception):
+            self._migrate_legacy_blob()
+        with suppress(Exception):
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.get(self.summary_key)
+            pipe.lrange(self.turns_key, -self.max_turns, -1)
+            summary_raw, turns_raw = pipe.execute()
+            turns = [ConversationTurn.from_dict(json.loads(item)) for item in turns_raw or []]
+            self.summary_state, summary = self._parse_summary(summary_raw)
+            if summary:
+                turns.insert(0, summary)
+            self.turns = turns
+
+    def _migrate_legacy_blob(self):
+        """Pindahkan blob `conv:<scope>` lama ke list + summary. GET+DEL dalam satu MULTI,
+        jadi kalau dua worker load bersamaan hanya satu yang mendapat datanya."""
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.get(self.legacy_key)
+        pipe.delete(self.legacy_key)
+        data, _ = pipe.execute()
+        if not data:
+            return
+        try:
+            turns = [ConversationTurn.from_dict(t) for t in json.loads(data)]
+        except Exception:
+            logger.warning(f"Blob percakapan lama {self.legacy_key} tidak valid, dilewati")
+            return
+        self.turns = turns
+        self.save()
+
     def save(self):
-        if redis_client:
-            raw = json.dumps([t.to_dict() for t in self.turns])
-            redis_client.setex(f"conv:{self.scope_id}", 86400, raw) # 24 jam TTL
+        """Tulis ulang seluruh state (replace/flush/rollback) dengan epoch baru.
+        Jalur per-turn pakai `_persist_turn`."""
+        summary = self.turns[0] if self.turns and self.turns[0].intent == "summary" else None
+        body = self.turns[1:] if summary else self.turns
+        self.summary_state = {"epoch": uuid.uuid4().hex, "version": 0, "covered_until": None}
+        if not redis_client:
+            return
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(self.turns_key)
+        if body:
+            pipe.rpush(self.turns_key, *[json.dumps(t.to_dict()) for t in body])
+            pipe.expire(self.turns_key, CONVERSATION_TTL_SECONDS)
+        payload = {**self.summary_state, "turn": summary.to_dict() if summary else None}
+        pipe.set(self.summary_key, json.dumps(payload), ex=CONVERSATION_TTL_SECONDS)
+        pipe.execute()
+
+    def _persist_turn(self, turn: ConversationTurn):
+        if not redis_client:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.rpush(self.turns_key, json.dumps(turn.to_dict()))
+        pipe.ltrim(self.turns_key, -max(CONVERSATION_LOG_MAX_TURNS, self.max_turns), -1)
+        pipe.expire(self.turns_key, CONVERSATION_TTL_SECONDS)
+        pipe.expire(self.summary_key, CONVERSATION_TTL_SECONDS)
+        pipe.execute()
 
     def _build_turn(self, role: str, content: str, intent: str = None, plan_id: str = None) -> ConversationTurn:
         return ConversationTurn(
@@ -438,12 +637,12 @@ class ConversationMemory:
     def _append_turn(self, turn: ConversationTurn):
         self.turns.append(turn)
 
-        # Trim kalau terlalu panjang (kompresi)
+        self._persist_turn(turn)
+
+        # Trim kalau terlalu panjang; rangkuman dibuat di background
         if len(self.turns) > self.max_turns:
             self._compress_old_turns()
 
-        self.save()
-
     def add_turn(self, role: str, content: str, intent: str = None, plan_id: str = None):
         turn = self._build_turn(role=role, content=content, intent=intent, plan_id=plan_id)
         self._append_turn(turn)
@@ -548,20 +747,81 @@ class ConversationMemory:
             return f"Ringkasan {len(turns)} pesan sebelumnya (gagal diproses)."
         
     def _compress_old_turns(self):
-        old_turns = self.turns[:-self.max_turns]
-        summary = self._summarize(old_turns)
-        
-        summary_turn = ConversationTurn(
-            role="system",
-            content=f"[Ringkasan percakapan sebelumnya]: {summary}",
-            intent="summary",
-            plan_id=None,
-            timestamp=datetime.now(),
-            tokens_used=count_tokens(summary)
-        )
-        
-        self.turns = [summary_turn] + self.turns[-self.max_turns:]
-        
+        """Potong window sekarang juga; turn yang keluar dirangkum oleh ConversationSummarizer."""
+        summary = self.turns[0] if self.turns and self.turns[0].intent == "summary" else None
+        body = self.turns[1:] if summary else self.turns
+        old_turns = body[:-self.max_turns]
+        self.turns = ([summary] if summary else []) + body[-self.max_turns:]
+        if old_turns:
+            get_conversation_summarizer().submit(self, old_turns)
+
+    def _read_summary(self) -> tuple:
+        if not redis_client:
+            current = self.turns[0] if self.turns and self.turns[0].intent == "summary" else None
+            return dict(self.summary_state), current
+        return self._parse_summary(redis_client.get(self.summary_key))
+
+    def _compare_and_set_summary(self, expected: Dict[str, Any], state: Dict[str, Any], turn: ConversationTurn) -> bool:
+        if not redis_client:
+            current = self.summary_state
+            return current["epoch"] == expected["epoch"] and current["version"] == expected["version"]
+
+        pipe = redis_client.pipeline(transaction=True)
+        try:
+            pipe.watch(self.summary_key)
+            current, _ = self._parse_summary(pipe.get(self.summary_key))
+            if current["epoch"] != expected["epoch"] or current["version"] != expected["version"]:
+                return False
+            pipe.multi()
+            pipe.set(self.summary_key, json.dumps({**state, "turn": turn.to_dict()}), ex=CONVERSATION_TTL_SECONDS)
+            pipe.execute()
+            return True
+        except redis.WatchError:
+            return False
+        finally:
+            pipe.reset()
+
+    def merge_summary(self, old_turns: List[ConversationTurn], epoch: str) -> bool:
+        """
+        Gabungkan `old_turns` ke rangkuman bergulir (dipanggil worker background).
+        Compare-and-set pada version: kalau worker lain sudah menggabung duluan, baca ulang
+        dan rangkum hanya turn yang belum tercakup `covered_until`. Epoch berbeda berarti
+        riwayat sudah ditulis ulang/dihapus, job dibuang.
+        """
+        for _ in range(CONVERSATION_SUMMARY_CAS_ATTEMPTS):
+            state, current = self._read_summary()
+            if state["epoch"] != epoch:
+                return False
+            covered_until = datetime.fromisoformat(state["covered_until"]) if state["covered_until"] else None
+            fresh = [t for t in old_turns if covered_until is None or t.timestamp > covered_until]
+            if not fresh:
+                return True
+
+            summary = self._summarize(([current] if current else []) + fresh)
+            summary_turn = ConversationTurn(
+                role="system",
+                content=f"[Ringkasan percakapan sebelumnya]: {summary}",
+                intent="summary",
+                plan_id=None,
+                timestamp=datetime.now(),
+                tokens_used=count_tokens(summary)
+            )
+            new_state = {
+                "epoch": epoch,
+                "version": state["version"] + 1,
+                "covered_until": max(t.timestamp for t in fresh).isoformat(),
+            }
+            if self._compare_and_set_summary(state, new_state, summary_turn):
+                if self.summary_state.get("epoch") == epoch:
+                    self.summary_state = new_state
+                    if self.turns and self.turns[0].intent == "summary":
+                        self.turns[0] = summary_turn
+                    else:
+                        self.turns.insert(0, summary_turn)
+                return True
+        logger.warning(f"Merge rangkuman {self.scope_id} gagal setelah {CONVERSATION_SUMMARY_CAS_ATTEMPTS} percobaan")
+        return False
+
     def store_plan(self, plan: TaskPlan):
         self.plans[plan.plan_id] = plan
         if self.db and hasattr(self.db, "save_plan"):
@@ -587,6 +847,76 @@ class ConversationMemory:
                 self.save()
             raise
 
+class ConversationSummarizer:
+    """
+    Antrian kompresi percakapan di luar request path. Request yang melewati ambang
+    `max_turns` hanya memotong window dan submit job; N greenlet worker memanggil LLM lalu
+    `ConversationMemory.merge_summary`. Job yang belum diambil worker digabung per instance
+    memory, jadi beberapa turn beruntun cukup satu panggilan LLM.
+    """
+
+    def __init__(self, workers: int = CONVERSATION_SUMMARY_WORKERS):
+        self.workers = max(1, workers)
+        self._queue = JoinableQueue()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._greenlets: List[Any] = []
+        self.stats = {"submitted": 0, "coalesced": 0, "merged": 0, "discarded": 0, "failed": 0}
+
+    def submit(self, memory: "ConversationMemory", turns: List[ConversationTurn]):
+        self.stats["submitted"] += 1
+        job = self._pending.get(id(memory))
+        if job is not None and job["epoch"] == memory.summary_state.get("epoch"):
+            job["turns"].extend(turns)
+            self.stats["coalesced"] += 1
+            return
+        job = {"memory": memory, "turns": list(turns), "epoch": memory.summary_state.get("epoch", "")}
+        # Greenlet hanya untuk main thread (gunicorn gevent, monkey.patch_all(thread=False));
+        # thread lain tidak punya hub yang berjalan, jadi job dijalankan langsung.
+        if threading.current_thread() is not threading.main_thread():
+            self._run_job(job)
+            return
+        self._pending[id(memory)] = job
+        self._queue.put(job)
+        self._ensure_workers()
+
+    def _ensure_workers(self):
+        self._greenlets = [g for g in self._greenlets if not g.dead]
+        while len(self._greenlets) < self.workers:
+            self._greenlets.append(gevent.spawn(self._worker_loop))
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if self._pending.get(id(job["memory"])) is job:
+                del self._pending[id(job["memory"])]
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: Dict[str, Any]):
+        try:
+            merged = job["memory"].merge_summary(job["turns"], job["epoch"])
+            self.stats["merged" if merged else "discarded"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Kompresi percakapan {job['memory'].scope_id} gagal: {e}")
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Tunggu semua job selesai (tes/shutdown)."""
+        return self._queue.join(timeout=timeout)
+
+
+_conversation_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_conversation_summarizer() -> ConversationSummarizer:
+    global _conversation_summarizer
+    if _conversation_summarizer is None:
+        _conversation_summarizer = ConversationSummarizer()
+    return _conversation_summarizer
+
+
 # --- DOCUMENT MEMORY ---
 
 @dataclass
@@ -675,8 +1005,37 @@ class DocumentMemory:
             }]
         )
         
-    def get_relevant_context(self, query: str, doc_id: str, top_k: int = 3) -> str:
-        embedding = embed(query)
+    def add_or_update_chunks(self, doc_id: str, section: str, contents: List[str]):
+        """Bulk version: satu batch embedding + satu upsert untuk semua chunk section ini."""
+        contents = [content for content in contents if content]
+        if not contents:
+            return
+        embeddings = embed_many(contents)
+        version = self._get_next_version(doc_id, section)
+        edited_at = datetime.now().isoformat()
+        scope = self._resolve_scope(doc_id=doc_id)
+        points = []
+        for chunk_index, (content, embedding) in enumerate(zip(contents, embeddings)):
+            chunk_id = f"{doc_id}_{section}_v{version}_{chunk_index}_{int(time.time())}"
+            points.append({
+                "id": str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk_id)),
+                "vector": embedding,
+                "payload": {
+                    "doc_id": doc_id,
+                    "section": section,
+                    "content": content,
+                    "version": version,
+                    "chunk_index": chunk_index,
+                    "last_edited": edited_at,
+                    "schema_version": 2,
+                    **scope,
+                }
+            })
+        self.vector_db.upsert(collection="thesis_chunks", points=points)
+
+    def get_relevant_context(self, query: str, doc_id: str, top_k: int = 3,
+                             query_vector: Optional[List[float]] = None) -> str:
+        embedding = query_vector if query_vector is not None else embed(query)
         results = self.vector_db.search(
             collection="thesis_chunks",
             query_vector=embedding,
@@ -763,13 +1122,30 @@ class DocumentMemory:
 
 # --- RESEARCH MEMORY ---
 
+RESEARCH_UPSERT_BATCH_SIZE = int(os.getenv("RESEARCH_UPSERT_BATCH_SIZE", "64"))
+RESEARCH_PAPER_CACHE_SIZE = int(os.getenv("RESEARCH_PAPER_CACHE_SIZE", "4096"))
+
+# Payload paper per (scope_id, paper_id), dibagi antar request di proses ini. ResearchMemory
+# dibuat ulang per request, jadi cache instance (`self.papers`) saja tidak cukup.
+_research_paper_cache = LRUCache(max_items=RESEARCH_PAPER_CACHE_SIZE)
+
+
 class ResearchMemory:
-    def __init__(self, vector_db, user_id: Optional[str] = None, project_id: Optional[str] = None):
+    def __init__(
+        self,
+        vector_db,
+        user_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        paper_cache: Optional[LRUCache] = None,
+        upsert_batch_size: int = RESEARCH_UPSERT_BATCH_SIZE,
+    ):
         self.vector_db = vector_db
         self.user_id = str(user_id) if user_id else ""
         self.project_id = str(project_id) if project_id else ""
         self.papers: Dict[str, "StoredPaper"] = {}
         self.topic_index: Dict[str, List[str]] = {}
+        self.paper_cache = paper_cache if paper_cache is not None else _research_paper_cache
+        self.upsert_batch_size = max(1, upsert_batch_size)
 
     def _resolve_scope(self) -> Dict[str, str]:
         scope: Dict[str, str] = {}
@@ -876,10 +1252,40 @@ class ResearchMemory:
             "doi": paper.doi or None,
         }
 
-    async def _fetch_papers_from_db(self, paper_ids: List[str]) -> List["StoredPaper"]:
-        fetched: List["StoredPaper"] = []
-        seen_ids = set()
+    def _point_id(self, paper_id: str) -> str:
+        scope_id = self._resolve_scope().get("scope_id")
+        return f"{scope_id}:{paper_id}" if scope_id else paper_id
 
+    def _paper_cache_key(self, paper_id: str) -> tuple:
+        return (self._resolve_scope().get("scope_id", ""), paper_id)
+
+    def _in_scope(self, payload: Dict[str, Any]) -> bool:
+        return all(payload.get(key) == value for key, value in self._build_filter().items())
+
+    def _retrieve_payloads(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Satu `retrieve` untuk semua id (point id deterministik dari scope + paper_id)."""
+        retrieve = getattr(self.vector_db, "retrieve", None)
+        if not callable(retrieve):
+            return self._scroll_payloads(paper_ids)
+
+        wanted = set(paper_ids)
+        try:
+            records = retrieve(collection="research_papers", ids=[self._point_id(pid) for pid in paper_ids])
+        except Exception as exc:
+            logger.warning("ResearchMemory DB retrieve failed for %d ids: %s", len(paper_ids), exc)
+            return {}
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for record in records or []:
+            payload = dict(getattr(record, "payload", {}) or {})
+            paper_id = payload.get("paper_id")
+            if paper_id in wanted and self._in_scope(payload):
+                found[paper_id] = payload
+        return found
+
+    def _scroll_payloads(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Jalur lama untuk vector_db tanpa `retrieve`: satu scroll per id."""
+        found: Dict[str, Dict[str, Any]] = {}
         for paper_id in paper_ids:
             try:
                 records = self.vector_db.scroll(
@@ -891,21 +1297,41 @@ class ResearchMemory:
             except Exception as exc:
                 logger.warning("ResearchMemory DB fetch failed for %s: %s", paper_id, exc)
                 continue
-
             for record in records or []:
                 payload = dict(getattr(record, "payload", {}) or {})
-                if not payload:
-                    continue
-                if self._is_expired(payload):
-                    continue
-                if payload.get("is_academic_source") is False:
-                    continue
-
-                payload.setdefault("paper_id", paper_id)
-                paper = self._cache_paper_payload(payload)
-                if paper and paper.paper_id not in seen_ids:
-                    fetched.append(paper)
-                    seen_ids.add(paper.paper_id)
+                if payload:
+                    payload.setdefault("paper_id", paper_id)
+                    found[paper_id] = payload
+                    break
+        return found
+
+    async def _fetch_papers_from_db(self, paper_ids: List[str]) -> List["StoredPaper"]:
+        unique_ids = list(dict.fromkeys(paper_ids))
+        payloads: Dict[str, Dict[str, Any]] = {}
+        for paper_id in unique_ids:
+            cached = self.paper_cache.get(self._paper_cache_key(paper_id))
+            if cached is not None:
+                payloads[paper_id] = cached
+
+        missing_ids = [paper_id for paper_id in unique_ids if paper_id not in payloads]
+        if missing_ids:
+            for paper_id, payload in self._retrieve_payloads(missing_ids).items():
+                self.paper_cache.set(self._paper_cache_key(paper_id), payload)
+                payloads[paper_id] = payload
+
+        fetched: List["StoredPaper"] = []
+        for paper_id in unique_ids:
+            payload = payloads.get(paper_id)
+            if not payload:
+                continue
+            if self._is_expired(payload):
+                continue
+            if payload.get("is_academic_source") is False:
+                continue
+
+            paper = self._cache_paper_payload(dict(payload))
+            if paper:
+                fetched.append(paper)
 
         return fetched
 
@@ -919,6 +1345,7 @@ class ResearchMemory:
             return False
         
     def add_papers(self, papers: List[Dict]):
+        prepared = []
         for paper_data in papers:
             normalized_payload = self._coerce_stored_paper_payload(paper_data)
             if not normalized_payload:
@@ -934,21 +1361,29 @@ class ResearchMemory:
             paper = self._cache_paper_payload(normalized_payload)
             if not paper:
                 continue
-                
-            embedding = embed(paper.abstract)
-            scope_id = normalized_payload.get("scope_id")
-            point_id = f"{scope_id}:{paper.paper_id}" if scope_id else paper.paper_id
-            self.vector_db.upsert(
-                collection="research_papers",
-                points=[{
+            prepared.append((paper, normalized_payload))
+
+        if not prepared:
+            return
+        # Satu embed_many + satu upsert per chunk (bukan per paper)
+        for start in range(0, len(prepared), self.upsert_batch_size):
+            chunk = prepared[start:start + self.upsert_batch_size]
+            embeddings = embed_many([paper.abstract for paper, _ in chunk])
+            points = {}
+            for (paper, normalized_payload), embedding in zip(chunk, embeddings):
+                point_id = self._point_id(paper.paper_id)
+                points[point_id] = {
                     "id": point_id,
                     "vector": embedding,
                     "payload": normalized_payload
-                }]
-            )
+                }
+            self.vector_db.upsert(collection="research_papers", points=list(points.values()))
+            for point in points.values():
+                self.paper_cache.set(self._paper_cache_key(point["payload"]["paper_id"]), point["payload"])
             
-    def get_papers(self, topic: str, min_relevance: float = 0.5) -> Optional[List[Dict]]:
-        embedding = embed(topic)
+    def get_papers(self, topic: str, min_relevance: float = 0.5,
+                   query_vector: Optional[List[float]] = None) -> Optional[List[Dict]]:
+        embedding = query_vector if query_vector is not None else embed(topic)
         results = self.vector_db.search(
             collection="research_papers",
             query_vector=embedding,
@@ -1026,25 +1461,182 @@ class UserProfile:
     total_papers_found: int
     frequently_used_tools: List[str]
 
+# Penulisan profil: Redis hanya ditulis kalau isi profil berubah (hash tanpa last_active),
+# Firestore di-debounce per user (maks. satu write per PROFILE_FLUSH_INTERVAL_SECONDS) dan
+# hanya field yang berubah yang dikirim. last_active saja dianggap berubah kalau nilai
+# tersimpan sudah lebih tua dari PROFILE_ACTIVE_REFRESH_SECONDS.
+PROFILE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROFILE_FLUSH_INTERVAL_SECONDS", "30"))
+PROFILE_ACTIVE_REFRESH_SECONDS = float(os.getenv("PROFILE_ACTIVE_REFRESH_SECONDS", "600"))
+
+
+def profile_snapshot(profile: "UserProfile") -> Dict[str, Any]:
+    snapshot = asdict(profile)
+    snapshot.pop("last_active", None)
+    return snapshot
+
+
+def profile_fingerprint(snapshot: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(snapshot, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _read_redis_profile(user_id: str) -> Optional["UserProfile"]:
+    if not redis_client:
+        return None
+    data = redis_client.get(f"profile:{user_id}")
+    if not data:
+        return None
+    with suppress(Exception):
+        d = json.loads(data)
+        d["last_active"] = datetime.fromisoformat(d["last_active"])
+        return UserProfile(**d)
+    return None
+
+
+class ProfileWriteBuffer:
+    """
+    State per proses (UserProfileMemory dibuat ulang tiap request): baseline diff per user,
+    field Firestore yang masih pending, dan timer flush. Baseline ditimpa setiap profil
+    dibaca ulang dari store (`observe`), jadi diff selalu terhadap isi store saat request ini,
+    bukan terhadap write terakhir proses ini (worker lain bisa sudah mengubah profil).
+    Write pending di-flush saat interval lewat, lewat `flush_all()` (atexit), atau langsung
+    kalau dipanggil di luar main thread (tidak ada hub gevent untuk timer).
+    """
+
+    def __init__(self, interval: float = PROFILE_FLUSH_INTERVAL_SECONDS,
+                 active_refresh: float = PROFILE_ACTIVE_REFRESH_SECONDS, clock=time.monotonic):
+        self.interval = interval
+        self.active_refresh = active_refresh
+        self.clock = clock
+        self._written: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._timers: Dict[str, Any] = {}
+        self.stats = {
+            "performed": 0, "skipped": 0, "coalesced": 0,
+            "redis_performed": 0, "redis_skipped": 0,
+        }
+
+    def observe(self, profile: Optional["UserProfile"], user_id: Optional[str] = None):
+        """
+        Catat profil yang baru dibaca dari store sebagai baseline (belum ada yang perlu
+        ditulis). None = profil belum ada di store: semua field dianggap berubah.
+        """
+        if profile is None:
+            self._written.pop(user_id, None)
+            return
+        snapshot = profile_snapshot(profile)
+        self._written[profile.user_id] = {
+            "snapshot": snapshot,
+            "digest": profile_fingerprint(snapshot),
+            "last_active": profile.last_active,
+        }
+
+    def pending_profile(self, user_id: str) -> Optional["UserProfile"]:
+        job = self._pending.get(user_id)
+        return copy.deepcopy(job["profile"]) if job else None
+
+    def changed_fields(self, profile: "UserProfile") -> List[str]:
+        snapshot = profile_snapshot(profile)
+        written = self._written.get(profile.user_id)
+        if written is None:
+            return sorted(snapshot) + ["last_active"]
+        fields = []
+        if profile_fingerprint(snapshot) != written["digest"]:
+            fields = sorted(k for k, v in snapshot.items() if written["snapshot"].get(k) != v)
+        stale = (profile.last_active - written["last_active"]).total_seconds() >= self.active_refresh
+        if fields or stale:
+            fields.append("last_active")
+        return fields
+
+    def record(self, db: Any, profile: "UserProfile", write_redis) -> List[str]:
+        """Tulis Redis sekarang (kalau ada yang berubah) dan jadwalkan write Firestore."""
+        fields = self.changed_fields(profile)
+        if not fields:
+            self.stats["skipped"] += 1
+            self.stats["redis_skipped"] += 1
+            return []
+
+        write_redis(profile)
+        self.stats["redis_performed"] += 1
+        snapshot = profile_snapshot(profile)
+        self._written[profile.user_id] = {
+            "snapshot": snapshot,
+            "digest": profile_fingerprint(snapshot),
+            "last_active": profile.last_active,
+        }
+        if not (db and hasattr(db, "save")):
+            return fields
+
+        user_id = profile.user_id
+        job = self._pending.get(user_id)
+        if job is not None:
+            job["fields"].update(fields)
+            job["profile"] = copy.deepcopy(profile)
+            self.stats["coalesced"] += 1
+        else:
+            self._pending[user_id] = {"db": db, "profile": copy.deepcopy(profile), "fields": set(fields)}
+
+        wait = self._last_flush.get(user_id, float("-inf")) + self.interval - self.clock()
+        if wait <= 0 or threading.current_thread() is not threading.main_thread():
+            self.flush(user_id)
+        elif user_id not in self._timers:
+            self._timers[user_id] = gevent.spawn_later(wait, self.flush, user_id)
+        return fields
+
+    def flush(self, user_id: str):
+        timer = self._timers.pop(user_id, None)
+        if timer is not None and timer is not gevent.getcurrent():
+            timer.kill(block=False)
+        job = self._pending.pop(user_id, None)
+        if job is None:
+            return
+        self._last_flush[user_id] = self.clock()
+        self.stats["performed"] += 1
+        # Selama debounce worker lain bisa sudah menulis profil yang lebih baru ke Redis
+        profile = _read_redis_profile(user_id) or job["profile"]
+        try:
+            job["db"].save(profile, fields=sorted(job["fields"]))
+        except Exception as e:
+            logger.warning(f"Flush profil {user_id} gagal: {e}")
+
+    def flush_all(self):
+        for user_id in list(self._pending):
+            self.flush(user_id)
+
+
+_profile_write_buffer: Optional[ProfileWriteBuffer] = None
+
+
+def get_profile_write_buffer() -> ProfileWriteBuffer:
+    global _profile_write_buffer
+    if _profile_write_buffer is None:
+        _profile_write_buffer = ProfileWriteBuffer()
+        atexit.register(_profile_write_buffer.flush_all)
+    return _profile_write_buffer
+
+
 class UserProfileMemory:
-    def __init__(self, db):
+    def __init__(self, db, write_buffer: Optional[ProfileWriteBuffer] = None):
         self.db = db
         self.profiles: Dict[str, UserProfile] = {}
+        self.write_buffer = write_buffer or get_profile_write_buffer()
         
     def get_or_create(self, user_id: str) -> UserProfile:
         if user_id in self.profiles:
             return self.profiles[user_id]
 
         # Coba load dari Redis
-        if redis_client:
-            data = redis_client.get(f"profile:{user_id}")
-            if data:
-                with suppress(Exception):
-                    d = json.loads(data)
-                    d["last_active"] = datetime.fromisoformat(d["last_active"])
-                    profile = UserProfile(**d)
-                    self.profiles[user_id] = profile
-                    return profile
+        profile = _read_redis_profile(user_id)
+        if profile:
+            self.write_buffer.observe(profile)
+            self.profiles[user_id] = profile
+            return profile
+
+        # Perubahan yang belum sampai Firestore (debounce) lebih baru dari isi Firestore
+        pending = self.write_buffer.pending_profile(user_id)
+        if pending:
+            self.profiles[user_id] = pending
+            return pending
 
         if self.db and hasattr(self.db, "load_profile"):
             stored = self.db.load_profile(user_id)
@@ -1066,6 +1658,7 @@ class UserProfileMemory:
                 )
                 merged_profile = {**base_profile.__dict__, **stored}
                 profile = UserProfile(**merged_profile)
+                self.write_buffer.observe(profile)
                 self.profiles[user_id] = profile
                 self.save_profile(profile)
                 return profile
@@ -1085,6 +1678,7 @@ class UserProfileMemory:
             total_papers_found=0,
             frequently_used_tools=[]
         )
+        self.write_buffer.observe(None, user_id)
         self.profiles[user_id] = profile
         return profile
         
@@ -1174,21 +1768,18 @@ class UserProfileMemory:
                 profile.preferred_language = 'en'
                 updated = True
 
+        profile.last_active = datetime.now()
         if updated:
-            profile.last_active = datetime.now()
-            if hasattr(self.db, 'save'):
-                self.db.save(profile)
-            self.save_profile(profile)
             self.profiles[user_id] = profile
-        else:
-            # Tetap update last_active
-            profile.last_active = datetime.now()
-            if hasattr(self.db, 'save'):
-                self.db.save(profile)
-            self.save_profile(profile)
+        # Tanpa perubahan isi, write dilewati (last_active ikut saat sudah basi)
+        self.write_buffer.record(self.db, profile, self.save_profile)
 
 # --- SHARED MEMORY COORDINATOR ---
 
+# Budget total build_agent_context (embed + lookup paralel). Sumber yang lewat deadline
+# diganti nilai kosong supaya request tetap jalan.
+AGENT_CONTEXT_DEADLINE_SECONDS = float(os.getenv("AGENT_CONTEXT_DEADLINE_SECONDS", "3.0"))
+
 class SharedMemory:
     """Mengikat semua modul memory (Conversation, Document, Research, User Profile)"""
     def __init__(self, user_id: str, project_id: str, vector_db, db):
@@ -1207,15 +1798,67 @@ class SharedMemory:
     def _project_doc_id(self) -> str:
         return self.project_scope
         
+    def _context_lookups(self, current_query: str, skip_semantic: bool, need_sections: bool) -> Dict[str, Any]:
+        """
+        Embed query sekali dan lookup paper, dokumen dan percakapan berjalan konkuren dalam
+        satu fan-out dengan deadline bersama (AGENT_CONTEXT_DEADLINE_SECONDS). Lookup semantik
+        menunggu hasil embed di dalam deadline itu, percakapan tidak menunggu apa pun; embed
+        yang macet/gagal = retrieval semantik kosong. Latency per sumber dicatat di
+        `self.context_metrics`.
+        """
+        started = time.perf_counter()
+        metrics: Dict[str, Any] = {"sources": {}}
+        values: Dict[str, Any] = {"papers": [], "document": "", "conversation": []}
+
+        tasks = {"conversation": lambda: [self.conversation.get_context_window(last_n=6)]}
+        if not skip_semantic:
+            query_vector = AsyncResult()
+
+            def embed_query():
+                try:
+                    query_vector.set(embed(current_query))
+                except BaseException as exc:  # termasuk gevent.Timeout: lookup semantik ikut dilepas
+                    query_vector.set_exception(exc)
+                    raise
+                return []
+
+            tasks["embed"] = embed_query
+            tasks["papers"] = lambda: [self.research.get_papers(
+                topic=current_query, min_relevance=0.6, query_vector=query_vector.get())]
+            if need_sections:
+                tasks["document"] = lambda: [self.document.get_relevant_context(
+                    current_query, doc_id=self._project_doc_id(), top_k=2, query_vector=query_vector.get())]
+
+        executor = FanOutExecutor(default_deadline=AGENT_CONTEXT_DEADLINE_SECONDS)
+        for outcome in executor.run(tasks):
+            metrics["sources"][outcome.name] = {"status": outcome.status, "duration_ms": outcome.duration_ms}
+            if outcome.ok and outcome.results:
+                values[outcome.name] = outcome.results[0]
+        if metrics["sources"].get("embed", {}).get("status", STATUS_OK) != STATUS_OK:
+            logger.warning("Embedding query konteks gagal/telat, retrieval semantik dilewati")
+
+        metrics["total_ms"] = int((time.perf_counter() - started) * 1000)
+        self.context_metrics = metrics
+        logger.info(
+            "| CONTEXT | %s total=%dms",
+            " ".join(f"{name}={m['status']}:{m['duration_ms']}ms" for name, m in metrics["sources"].items()),
+            metrics["total_ms"],
+        )
+        return values
+
     def build_agent_context(self, current_query: str) -> Dict[str, Any]:
         profile = self.profile.get_or_create(self.user_id)
         request_context = getattr(self, "request_context", {}) or {}
         skip_semantic_retrieval = bool(request_context.get("_skip_semantic_retrieval"))
         precomputed_pruned_context = request_context.get("_pruned_context", "")
 
-        known_papers = []
-        if not skip_semantic_retrieval:
-            known_papers = self.research.get_papers(topic=current_query, min_relevance=0.6)
+        lookups = self._context_lookups(
+            current_query,
+            skip_semantic=skip_semantic_retrieval,
+            need_sections=not precomputed_pruned_context,
+        )
+
+        known_papers = lookups["papers"]
         known_papers_on_topic = []
         if known_papers:
             # Flatten paper text format
@@ -1232,13 +1875,7 @@ class SharedMemory:
         else:
             known_papers_str = "Belum ada paper tersimpan untuk topik ini."
 
-        relevant_sections = precomputed_pruned_context or ""
-        if not relevant_sections and not skip_semantic_retrieval:
-            relevant_sections = self.document.get_relevant_context(
-                current_query,
-                doc_id=self._project_doc_id(),
-                top_k=2
-            )
+        relevant_sections = precomputed_pruned_context or lookups["document"] or ""
         if not relevant_sections:
             relevant_sections = "Belum ada draft tersimpan."
             
@@ -1250,7 +1887,7 @@ class SharedMemory:
                 "citation_style": profile.citation_style,
                 "preferred_language": profile.preferred_language
             },
-            "conversation_history": self.conversation.get_context_window(last_n=6),
+            "conversation_history": lookups["conversation"],
             "relevant_thesis_sections": relevant_sections,
             "known_papers_summary": known_papers_str,
             "known_papers_on_topic": known_papers_on_topic,
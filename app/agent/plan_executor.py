@@ -1,10 +1,14 @@
 import gevent
+from gevent.lock import BoundedSemaphore
+from gevent.pool import Pool
+from gevent.queue import Queue
 from gevent.timeout import Timeout
 import json
 import logging
+import os
 import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set
 from dataclasses import dataclass
 
 from .task_planner import TaskPlan, TaskStep
@@ -32,9 +36,116 @@ ERROR_MESSAGES = {
     )
 }
 
+# Penanda dari _run_step: hentikan plan tanpa pesan khusus.
+_STOP = object()
+
+# Batas jumlah step DAG yang berjalan bersamaan di seluruh proses (semua plan).
+_GLOBAL_STEP_SLOTS = BoundedSemaphore(int(os.getenv("PLAN_GLOBAL_MAX_PARALLEL_STEPS", "16")))
+
+
+class _OrderedEventRelay:
+    """
+    Meneruskan event step ke SSE dalam urutan plan walau step berjalan paralel.
+    Event step yang berada di "kepala" antrian diteruskan langsung; event step lain
+    di-buffer sampai semua step sebelumnya selesai.
+    """
+
+    def __init__(self, deliver, step_order: List[str]):
+        self._deliver = deliver
+        self._order = list(step_order)
+        self._buffers: Dict[str, List[tuple]] = {step_id: [] for step_id in self._order}
+        self._closed: Set[str] = set()
+        self._cursor = 0
+
+    def _head(self) -> Optional[str]:
+        return self._order[self._cursor] if self._cursor < len(self._order) else None
+
+    def emit(self, step_id: str, event_type: str, data: dict):
+        if step_id == self._head():
+            self._deliver(event_type, data)
+        else:
+            self._buffers.setdefault(step_id, []).append((event_type, data))
+
+    def close(self, step_id: str):
+        self._closed.add(step_id)
+        self._drain()
+
+    def flush(self):
+        self._closed.update(self._order)
+        self._drain()
+
+    def _drain(self):
+        while self._cursor < len(self._order):
+            head = self._order[self._cursor]
+            for event_type, data in self._buffers.pop(head, []):
+                self._deliver(event_type, data)
+            if head not in self._closed:
+                return
+            self._cursor += 1
+
+
+class _TokenDeltaStream:
+    """
+    Callback on_chunk untuk stream_tool(): menggabungkan token menjadi event TOOL_DELTA.
+    Token pertama langsung dikirim (time-to-first-token), sisanya di-flush per
+    min_chars / flush_interval.
+    """
+
+    def __init__(self, emit, step: TaskStep, attempt: int, started_at: float, min_chars: int, flush_interval: float):
+        self._emit = emit
+        self._step = step
+        self._attempt = attempt
+        self._started_at = started_at
+        self._min_chars = min_chars
+        self._flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._last_flush = started_at
+        self.seq = 0
+        self.chars = 0
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def ttft_ms(self) -> Optional[int]:
+        if self.first_token_at is None:
+            return None
+        return int((self.first_token_at - self._started_at) * 1000)
+
+    def __call__(self, delta: str):
+        if not delta:
+            return
+        now = time.time()
+        self._buffer.append(delta)
+        self._buffered_chars += len(delta)
+        self.chars += len(delta)
+        if self.first_token_at is None:
+            self.first_token_at = now
+            self.flush()
+        elif self._buffered_chars >= self._min_chars or now - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self.seq += 1
+        self._emit("TOOL_DELTA", {
+            "id": self._step.step_id,
+            "step_id": self._step.step_id,
+            "agent": self._step.agent,
+            "tool": self._step.tool,
+            "attempt": self._attempt,
+            "seq": self.seq,
+            "delta": "".join(self._buffer),
+        })
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = time.time()
+
+
 class PlanExecutor:
     """
-    Menjalankan plan (TaskPlan) secara step by step (serial).
+    Menjalankan plan (TaskPlan) step by step. Plan yang punya cabang independen
+    dijalankan sebagai DAG di atas gevent Pool; plan linear tetap serial.
     Menerapkan timeout, dependency injection, dan DataAdapter antar-langkah.
     """
     
@@ -161,6 +272,16 @@ class PlanExecutor:
             "refine_with_critique",
         }
         self.max_retries_per_step = 1
+        # "dag" menjalankan step independen paralel, "serial" memaksa urutan plan.
+        self.execution_mode = os.getenv("PLAN_EXECUTOR_MODE", "dag").strip().lower()
+        self.max_parallel_steps = max(1, int(os.getenv("PLAN_MAX_PARALLEL_STEPS", "3")))
+        self._event_relay: Optional[_OrderedEventRelay] = None
+        # Token streaming tool -> SSE (TOOL_DELTA). Delta digabung sampai min_chars
+        # atau flush_interval agar jumlah event SSE tetap wajar.
+        self.stream_tokens = os.getenv("PLAN_STREAM_TOKENS", "1") != "0"
+        self.stream_min_chars = int(os.getenv("PLAN_STREAM_MIN_CHARS", "24"))
+        self.stream_flush_interval = float(os.getenv("PLAN_STREAM_FLUSH_MS", "80")) / 1000.0
+        self._step_by_greenlet: Dict[Any, str] = {}
         self.high_token_threshold = 5000
         self.max_validation_passes = 2
         self.academic_quality_threshold = 7.0
@@ -169,6 +290,14 @@ class PlanExecutor:
     def _emit(self, event_type: str, data: dict):
         if not self.on_event:
             return
+        relay = self._event_relay
+        step_id = self._step_by_greenlet.get(gevent.getcurrent()) if relay is not None else None
+        if step_id is not None:
+            relay.emit(step_id, event_type, data)
+            return
+        self._deliver_event(event_type, data)
+
+    def _deliver_event(self, event_type: str, data: dict):
         try:
             self.on_event(event_type, data)
         except Exception as emit_error:
@@ -317,6 +446,27 @@ class PlanExecutor:
             candidate = self._replace_result_text(candidate, self._extract_result_text(revised_text))
         return candidate
     
+    def _call_tool(self, agent, step: TaskStep, input_data, params: dict, attempt: int, trace_entry: dict):
+        """
+        Panggil tool; jika agent mendukung streaming untuk tool ini, token diteruskan
+        sebagai TOOL_DELTA dan time-to-first-token dicatat di trace_entry.
+        """
+        stream_tool = getattr(agent, "stream_tool", None)
+        if not (self.stream_tokens and callable(stream_tool) and step.tool in getattr(agent, "streaming_tools", ())):
+            return agent.run_tool(step.tool, input_data, params, memory=self.memory)
+
+        stream = _TokenDeltaStream(
+            self._emit, step, attempt, time.time(), self.stream_min_chars, self.stream_flush_interval,
+        )
+        try:
+            return stream_tool(step.tool, input_data, params, memory=self.memory, on_chunk=stream)
+        finally:
+            stream.flush()
+            if stream.first_token_at is not None:
+                trace_entry["ttft_ms"] = stream.ttft_ms
+                trace_entry["streamed_chars"] = stream.chars
+                logger.info(f"[Observability] step={step.step_id} tool={step.tool} ttft_ms={stream.ttft_ms} chars={stream.chars}")
+
     def wait_for_deps(self, depends_on: list[str]):
         """
         Karena ini adalah executor serial sederhana, saat langkah ke-N dieksekusi,
@@ -329,6 +479,321 @@ class PlanExecutor:
             gevent.sleep(0.1)
         return False
         
+    def _run_step(self, plan: TaskPlan, step: TaskStep, idx: int, allow_self_evaluation: bool):
+        """
+        Jalankan satu step. Return None untuk lanjut, `_STOP` untuk menghentikan plan,
+        atau string pesan yang langsung dikembalikan ke user.
+        """
+        logger.info(f"Mengeksekusi step [{step.step_id}] - {step.tool} ({step.agent})")
+        
+        # Verifikasi dependensi tersedia di self.results
+        valid_deps = self.wait_for_deps(step.depends_on)
+        if not valid_deps and step.depends_on:
+            logger.error(f"Dependencies untuk {step.step_id} belum terpenuhi: {step.depends_on}")
+            self.results[step.step_id] = {"error": "dependency failure"}
+            plan.status = "failed"
+            return _STOP
+            
+        # Ambil data input
+        input_data = None
+        if step.input_from == "user":
+            input_data = plan.user_query
+            if not str(input_data).strip():
+                return ERROR_MESSAGES["empty_input"]
+        elif step.input_from == "memory":
+            # Mengambil dari SharedMemory jika ada
+            if self.memory and hasattr(self.memory, 'research'):
+                input_data = self.memory.research.get_papers(plan.user_query)
+            else:
+                input_data = [] # Fallback
+        else:
+            input_data = self.results.get(step.input_from)
+            # ERROR PROPAGATION CHECK
+            if isinstance(input_data, dict) and "error" in input_data:
+                logger.error(f"Menghentikan eksekusi karena input {step.input_from} error.")
+                plan.status = "failed"
+                self.results[step.step_id] = input_data
+                return _STOP
+        # ── DataAdapter: adaptasi tipe data antar step ──
+        if step.input_from not in ("user", "memory") and input_data is not None:
+            # Cari source tool dari step sebelumnya
+            source_step = next((s for s in plan.steps if s.step_id == step.input_from), None)
+            source_tool = source_step.tool if source_step else ""
+            input_data = self._adapt_data(input_data, source_tool, step.tool)
+            logger.info(f"DataAdapter: {source_tool} → {step.tool} (type: {type(input_data).__name__})")
+
+        # Cari instance agen yang sesuai di registry `self.agents`
+        agent = self.agents.get(step.agent)
+        if not agent:
+            logger.error(f"Agent {step.agent} tak ditemukan di registry.")
+            plan.status = "failed"
+            self.results[step.step_id] = {"error": f"Agent {step.agent} not found"}
+            return _STOP
+
+        resolved_params = self._resolve_param_references(step.params or {})
+        
+        # Eksekusi dengan Timeout limit
+        step_timeout = self.tool_timeouts.get(step.tool, self.timeout_per_step)
+        max_attempts = 1 + (self.max_retries_per_step if step.tool in self.retryable_tools else 0)
+        attempt = 0
+
+        while attempt < max_attempts:
+            attempt += 1
+            step_started_at = time.time()
+            trace_entry = {
+                "step_id": step.step_id,
+                "agent": step.agent,
+                "tool": step.tool,
+                "attempt": attempt,
+            }
+
+            try:
+                self._emit("TOOL_CALL", {
+                    "id": step.step_id,
+                    "step_id": step.step_id,
+                    "agent": step.agent,
+                    "tool": step.tool,
+                    "args": resolved_params,
+                    "attempt": attempt,
+                })
+                with Timeout(step_timeout):
+                    # Inject memory into agent tool execution
+                    result = self._call_tool(agent, step, input_data, resolved_params, attempt, trace_entry)
+                    # Autosave search results to ResearchMemory
+                    if step.tool == "search_papers" and self.memory and hasattr(self.memory, 'research'):
+                        self.memory.research.add_papers(result)
+
+                    # --- PHASE 3.2: SELF-EVALUATION LOOP ---
+                    if (
+                        allow_self_evaluation
+                        and step.agent == "writing_agent"
+                        and step.tool in ["rewrite_text", "paraphrase_text", "expand_paragraph", "generate_literature_review", "generate_section", "polish_academic_tone"]
+                    ):
+                        remaining_budget = max(1, step_timeout - (time.time() - step_started_at))
+                        logger.info(f"Menjalankan validator loop untuk hasil {step.tool}. Remaining budget={remaining_budget:.2f}s")
+                        with Timeout(remaining_budget):
+                            self._emit("STEP", {"step": "evaluating", "message": f"Memvalidasi kualitas {step.tool}..."})
+                            try:
+                                result = self._refine_generated_output(step, result)
+                            except Exception as eval_err:
+                                logger.warning(f"Validator loop terlewati (error): {eval_err}")
+                    # ---------------------------------------
+
+                duration_ms = int((time.time() - step_started_at) * 1000)
+                trace_entry.update({"status": "success", "duration_ms": duration_ms})
+                plan.execution_trace.append(trace_entry)
+                self.results[step.step_id] = result
+                result_event = {
+                    "id": step.step_id,
+                    "step_id": step.step_id,
+                    "agent": step.agent,
+                    "tool": step.tool,
+                    "result": result,
+                    "attempt": attempt,
+                    "duration_ms": duration_ms,
+                }
+                if "ttft_ms" in trace_entry:
+                    result_event["ttft_ms"] = trace_entry["ttft_ms"]
+                self._emit("TOOL_RESULT", result_event)
+                break
+
+            except Timeout:
+                duration_ms = int((time.time() - step_started_at) * 1000)
+                logger.warning(f"Timeout (>{step_timeout}s) pada step: {step.step_id} attempt={attempt}")
+                trace_entry.update({"status": "timeout", "duration_ms": duration_ms})
+                plan.execution_trace.append(trace_entry)
+
+                if attempt < max_attempts:
+                    self._emit("STEP", {
+                        "step": "executing",
+                        "message": f"Langkah {step.step_id} timeout, mencoba ulang sekali lagi...",
+                    })
+                    gevent.sleep(0.2)
+                    continue
+
+                self.results[step.step_id] = {"error": "timeout", "partial": True}
+                self._emit("TOOL_RESULT", {
+                    "id": step.step_id,
+                    "step_id": step.step_id,
+                    "agent": step.agent,
+                    "tool": step.tool,
+                    "result": self.results[step.step_id],
+                    "attempt": attempt,
+                    "duration_ms": duration_ms,
+                })
+                self._emit("ERROR", {
+                    "message": f"Langkah {step.step_id} melebihi batas waktu {step_timeout} detik."
+                })
+                plan.status = "partial"
+                if idx < len(plan.steps) - 1:
+                    return ERROR_MESSAGES["timeout"]
+                break
+
+            except Exception as e:
+                duration_ms = int((time.time() - step_started_at) * 1000)
+                logger.error(f"Error eksekusi pada {step.step_id} attempt={attempt}: {str(e)}")
+                trace_entry.update({"status": "error", "duration_ms": duration_ms, "error": str(e)})
+                plan.execution_trace.append(trace_entry)
+
+                if attempt < max_attempts:
+                    self._emit("STEP", {
+                        "step": "executing",
+                        "message": f"Langkah {step.step_id} gagal, mencoba ulang sekali lagi...",
+                    })
+                    gevent.sleep(0.2)
+                    continue
+
+                self.results[step.step_id] = {"error": str(e)}
+                self._emit("TOOL_RESULT", {
+                    "id": step.step_id,
+                    "step_id": step.step_id,
+                    "agent": step.agent,
+                    "tool": step.tool,
+                    "result": self.results[step.step_id],
+                    "attempt": attempt,
+                    "duration_ms": duration_ms,
+                })
+                plan.status = "failed"
+                break
+
+        if plan.status in {"failed", "partial"} and isinstance(self.results.get(step.step_id), dict) and "error" in self.results.get(step.step_id):
+            return _STOP
+
+        return None
+
+    # ── DAG mode ──
+
+    @staticmethod
+    def _collect_step_refs(value, step_ids: Set[str], found: Set[str]):
+        if isinstance(value, str) and value in step_ids:
+            found.add(value)
+        elif isinstance(value, list):
+            for item in value:
+                PlanExecutor._collect_step_refs(item, step_ids, found)
+        elif isinstance(value, dict):
+            for item in value.values():
+                PlanExecutor._collect_step_refs(item, step_ids, found)
+
+    def _dependency_graph(self, plan: TaskPlan) -> Optional[Dict[str, Set[str]]]:
+        """
+        Dependensi efektif per step: depends_on + input_from + referensi step di params
+        + step yang output_to-nya menunjuk step ini. Step dengan input "memory" menunggu
+        search_papers sebelumnya (autosave ResearchMemory). None jika plan tidak valid
+        (step_id duplikat, dependensi tak dikenal, atau siklus) -> pakai jalur serial.
+        """
+        step_ids = [step.step_id for step in plan.steps]
+        known = set(step_ids)
+        if len(known) != len(step_ids):
+            return None
+
+        graph: Dict[str, Set[str]] = {step_id: set() for step_id in step_ids}
+        for idx, step in enumerate(plan.steps):
+            deps = graph[step.step_id]
+            deps.update(step.depends_on or [])
+            if step.input_from in known:
+                deps.add(step.input_from)
+            elif step.input_from == "memory":
+                deps.update(s.step_id for s in plan.steps[:idx] if s.tool == "search_papers")
+            self._collect_step_refs(step.params or {}, known, deps)
+            if step.output_to in known:
+                graph[step.output_to].add(step.step_id)
+        for step_id, deps in graph.items():
+            deps.discard(step_id)
+            if not deps <= known:
+                return None
+
+        # Deteksi siklus (Kahn)
+        indegree = {step_id: len(deps) for step_id, deps in graph.items()}
+        ready = [step_id for step_id, count in indegree.items() if count == 0]
+        visited = 0
+        while ready:
+            current = ready.pop()
+            visited += 1
+            for step_id, deps in graph.items():
+                if current in deps:
+                    indegree[step_id] -= 1
+                    if indegree[step_id] == 0:
+                        ready.append(step_id)
+        return graph if visited == len(graph) else None
+
+    def _should_run_dag(self, plan: TaskPlan) -> bool:
+        if self.execution_mode != "dag" or self.max_parallel_steps < 2 or len(plan.steps) < 2:
+            return False
+        graph = self._dependency_graph(plan)
+        if graph is None:
+            return False
+        # Plan linear (tiap langkah hanya bisa jalan setelah langkah sebelumnya) tidak
+        # untung apa-apa dari pool; jalur serial menjaga perilaku lama persis sama.
+        done: Set[str] = set()
+        pending = set(graph)
+        while pending:
+            ready = [step_id for step_id in pending if graph[step_id] <= done]
+            if len(ready) > 1:
+                return True
+            done.update(ready)
+            pending.difference_update(ready)
+        return False
+
+    def _execute_dag(self, plan: TaskPlan, allow_self_evaluation: bool):
+        """
+        Ready-queue scheduler: step yang semua dependensinya sukses di-dispatch ke
+        gevent Pool (max_parallel_steps, plus batas global per proses). Selesainya step
+        disinyalkan lewat Queue, bukan polling. Event SSE tetap keluar dalam urutan plan.
+        """
+        graph = self._dependency_graph(plan)
+        index_of = {step.step_id: idx for idx, step in enumerate(plan.steps)}
+        steps_by_id = {step.step_id: step for step in plan.steps}
+        relay = _OrderedEventRelay(self._deliver_event, [step.step_id for step in plan.steps])
+        completions: Queue = Queue()
+        pool = Pool(self.max_parallel_steps)
+        self._event_relay = relay
+        self._step_by_greenlet = {}
+
+        def run(step_id: str):
+            self._step_by_greenlet[gevent.getcurrent()] = step_id
+            outcome = None
+            try:
+                with _GLOBAL_STEP_SLOTS:
+                    step = steps_by_id[step_id]
+                    outcome = self._run_step(plan, step, index_of[step_id], allow_self_evaluation)
+            except Exception as run_error:
+                logger.error(f"DAG step {step_id} crashed: {run_error}")
+                self.results[step_id] = {"error": str(run_error)}
+                plan.status = "failed"
+                outcome = _STOP
+            finally:
+                self._step_by_greenlet.pop(gevent.getcurrent(), None)
+                relay.close(step_id)
+                completions.put((step_id, outcome))
+
+        dispatched: Set[str] = set()
+        finished: Set[str] = set()
+        early_return = None
+        try:
+            while True:
+                for step in plan.steps:
+                    if step.step_id not in dispatched and graph[step.step_id] <= finished:
+                        dispatched.add(step.step_id)
+                        pool.spawn(run, step.step_id)
+                if len(finished) == len(dispatched):
+                    break
+                step_id, outcome = completions.get()
+                finished.add(step_id)
+                if outcome is not None:
+                    if outcome is not _STOP:
+                        early_return = outcome
+                    # Plan berhenti; step lain yang masih berjalan tidak akan dipakai lagi.
+                    pool.kill(block=True)
+                    break
+        finally:
+            relay.flush()
+            self._event_relay = None
+            self._step_by_greenlet = {}
+
+        if early_return is not None:
+            return early_return
+        return self._finalize(plan)
+
     def execute(self, plan: TaskPlan) -> str:
         """
         Menjalankan TaskPlan dan mereturn output dari langkah terakhir.
@@ -353,181 +818,20 @@ class PlanExecutor:
             })
             return ERROR_MESSAGES["too_many_steps"]
 
+        if self._should_run_dag(plan):
+            return self._execute_dag(plan, allow_self_evaluation)
+
         for idx, step in enumerate(plan.steps):
-            
-            logger.info(f"Mengeksekusi step [{step.step_id}] - {step.tool} ({step.agent})")
-            
-            # Verifikasi dependensi tersedia di self.results
-            valid_deps = self.wait_for_deps(step.depends_on)
-            if not valid_deps and step.depends_on:
-                logger.error(f"Dependencies untuk {step.step_id} belum terpenuhi: {step.depends_on}")
-                self.results[step.step_id] = {"error": "dependency failure"}
-                plan.status = "failed"
-                break
-                
-            # Ambil data input
-            input_data = None
-            if step.input_from == "user":
-                input_data = plan.user_query
-                if not str(input_data).strip():
-                    return ERROR_MESSAGES["empty_input"]
-            elif step.input_from == "memory":
-                # Mengambil dari SharedMemory jika ada
-                if self.memory and hasattr(self.memory, 'research'):
-                    input_data = self.memory.research.get_papers(plan.user_query)
-                else:
-                    input_data = [] # Fallback
-            else:
-                input_data = self.results.get(step.input_from)
-                # ERROR PROPAGATION CHECK
-                if isinstance(input_data, dict) and "error" in input_data:
-                    logger.error(f"Menghentikan eksekusi karena input {step.input_from} error.")
-                    plan.status = "failed"
-                    self.results[step.step_id] = input_data
-                    break
-            # ── DataAdapter: adaptasi tipe data antar step ──
-            if step.input_from not in ("user", "memory") and input_data is not None:
-                # Cari source tool dari step sebelumnya
-                source_step = next((s for s in plan.steps if s.step_id == step.input_from), None)
-                source_tool = source_step.tool if source_step else ""
-                input_data = self._adapt_data(input_data, source_tool, step.tool)
-                logger.info(f"DataAdapter: {source_tool} → {step.tool} (type: {type(input_data).__name__})")
-
-            # Cari instance agen yang sesuai di registry `self.agents`
-            agent = self.agents.get(step.agent)
-            if not agent:
-                logger.error(f"Agent {step.agent} tak ditemukan di registry.")
-                plan.status = "failed"
-                self.results[step.step_id] = {"error": f"Agent {step.agent} not found"}
+            outcome = self._run_step(plan, step, idx, allow_self_evaluation)
+            if outcome is _STOP:
                 break
+            if outcome is not None:
+                return outcome
 
-            resolved_params = self._resolve_param_references(step.params or {})
-            
-            # Eksekusi dengan Timeout limit
-            step_timeout = self.tool_timeouts.get(step.tool, self.timeout_per_step)
-            max_attempts = 1 + (self.max_retries_per_step if step.tool in self.retryable_tools else 0)
-            attempt = 0
-
-            while attempt < max_attempts:
-                attempt += 1
-                step_started_at = time.time()
-                trace_entry = {
-                    "step_id": step.step_id,
-                    "agent": step.agent,
-                    "tool": step.tool,
-                    "attempt": attempt,
-                }
-
-                try:
-                    self._emit("TOOL_CALL", {
-                        "id": step.step_id,
-                        "step_id": step.step_id,
-                        "agent": step.agent,
-                        "tool": step.tool,
-                        "args": resolved_params,
-                        "attempt": attempt,
-                    })
-                    with Timeout(step_timeout):
-                        # Inject memory into agent tool execution
-                        result = agent.run_tool(step.tool, input_data, resolved_params, memory=self.memory)
-                        # Autosave search results to ResearchMemory
-                        if step.tool == "search_papers" and self.memory and hasattr(self.memory, 'research'):
-                            self.memory.research.add_papers(result)
-
-                        # --- PHASE 3.2: SELF-EVALUATION LOOP ---
-                        if (
-                            allow_self_evaluation
-                            and step.agent == "writing_agent"
-                            and step.tool in ["rewrite_text", "paraphrase_text", "expand_paragraph", "generate_literature_review", "generate_section", "polish_academic_tone"]
-                        ):
-                            remaining_budget = max(1, step_timeout - (time.time() - step_started_at))
-                            logger.info(f"Menjalankan validator loop untuk hasil {step.tool}. Remaining budget={remaining_budget:.2f}s")
-                            with Timeout(remaining_budget):
-                                self._emit("STEP", {"step": "evaluating", "message": f"Memvalidasi kualitas {step.tool}..."})
-                                try:
-                                    result = self._refine_generated_output(step, result)
-                                except Exception as eval_err:
-                                    logger.warning(f"Validator loop terlewati (error): {eval_err}")
-                        # ---------------------------------------
-
-                    duration_ms = int((time.time() - step_started_at) * 1000)
-                    trace_entry.update({"status": "success", "duration_ms": duration_ms})
-                    plan.execution_trace.append(trace_entry)
-                    self.results[step.step_id] = result
-                    self._emit("TOOL_RESULT", {
-                        "id": step.step_id,
-                        "step_id": step.step_id,
-                        "agent": step.agent,
-                        "tool": step.tool,
-                        "result": result,
-                        "attempt": attempt,
-                        "duration_ms": duration_ms,
-                    })
-                    break
-
-                except Timeout:
-                    duration_ms = int((time.time() - step_started_at) * 1000)
-                    logger.warning(f"Timeout (>{step_timeout}s) pada step: {step.step_id} attempt={attempt}")
-                    trace_entry.update({"status": "timeout", "duration_ms": duration_ms})
-                    plan.execution_trace.append(trace_entry)
-
-                    if attempt < max_attempts:
-                        self._emit("STEP", {
-                            "step": "executing",
-                            "message": f"Langkah {step.step_id} timeout, mencoba ulang sekali lagi...",
-                        })
-                        gevent.sleep(0.2)
-                        continue
-
-                    self.results[step.step_id] = {"error": "timeout", "partial": True}
-                    self._emit("TOOL_RESULT", {
-                        "id": step.step_id,
-                        "step_id": step.step_id,
-                        "agent": step.agent,
-                        "tool": step.tool,
-                        "result": self.results[step.step_id],
-                        "attempt": attempt,
-                        "duration_ms": duration_ms,
-                    })
-                    self._emit("ERROR", {
-                        "message": f"Langkah {step.step_id} melebihi batas waktu {step_timeout} detik."
-                    })
-                    plan.status = "partial"
-                    if idx < len(plan.steps) - 1:
-                        return ERROR_MESSAGES["timeout"]
-                    break
-
-                except Exception as e:
-                    duration_ms = int((time.time() - step_started_at) * 1000)
-                    logger.error(f"Error eksekusi pada {step.step_id} attempt={attempt}: {str(e)}")
-                    trace_entry.update({"status": "error", "duration_ms": duration_ms, "error": str(e)})
-                    plan.execution_trace.append(trace_entry)
-
-                    if attempt < max_attempts:
-                        self._emit("STEP", {
-                            "step": "executing",
-                            "message": f"Langkah {step.step_id} gagal, mencoba ulang sekali lagi...",
-                        })
-                        gevent.sleep(0.2)
-                        continue
-
-                    self.results[step.step_id] = {"error": str(e)}
-                    self._emit("TOOL_RESULT", {
-                        "id": step.step_id,
-                        "step_id": step.step_id,
-                        "agent": step.agent,
-                        "tool": step.tool,
-                        "result": self.results[step.step_id],
-                        "attempt": attempt,
-                        "duration_ms": duration_ms,
-                    })
-                    plan.status = "failed"
-                    break
-
-            if plan.status in {"failed", "partial"} and isinstance(self.results.get(step.step_id), dict) and "error" in self.results.get(step.step_id):
-                break
+        return self._finalize(plan)
 
-        # Selesai loop. Ambil nilai result dari tool terakhir untuk dikembalikan ke user
+    def _finalize(self, plan: TaskPlan):
+        """Ambil nilai result dari tool terakhir untuk dikembalikan ke user."""
         if plan.status == "running":
             plan.status = "done"
             
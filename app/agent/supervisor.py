@@ -9,6 +9,7 @@ from .intent_classifier import IntentClassifier
 from .task_planner import TaskPlanner, TaskPlan
 from .plan_executor import PlanExecutor
 from .memory_system import SharedMemory, QdrantVectorDB, FirestoreDocumentDB
+from app.utils.token_budget import SECTION_PRIORITY, PromptSection, TokenBudgeter, count_tokens
 
 # Configurasi logging
 logging.basicConfig(level=logging.INFO)
@@ -57,6 +58,9 @@ Example: "Langkah berikutnya: kamu bisa minta saya untuk expand bagian gap penel
 {memory_context}
 """
 
+# Batas token blok PROJECT CONTEXT yang disisipkan ke system prompt supervisor
+SUPERVISOR_MEMORY_CONTEXT_MAX_TOKENS = int(os.getenv("SUPERVISOR_MEMORY_CONTEXT_MAX_TOKENS", "6000"))
+
 MEMORY_CONTEXT_INJECTOR_TEMPLATE = """
 === PROJECT CONTEXT ===
 Judul Tesis: {project_title}
@@ -111,7 +115,7 @@ class SupervisorAgent:
         """Format context dictionary into string template for LLM injection."""
         prof = context.get('user_profile', {})
         req_ctx = context.get('request_context', {})
-        return MEMORY_CONTEXT_INJECTOR_TEMPLATE.format(
+        fields = dict(
             project_title=req_ctx.get('context_title', 'Belum diatur'),
             project_problem=req_ctx.get('context_problem', 'Belum diatur'),
             project_method=req_ctx.get('context_method', 'Belum diatur'),
@@ -120,8 +124,30 @@ class SupervisorAgent:
             writing_style=prof.get('writing_style', ''),
             language=prof.get('preferred_language', 'id'),
             citation_style=prof.get('citation_style', 'APA'),
-            relevant_thesis_sections=context.get('relevant_thesis_sections', 'Belum ada draft tersimpan.'),
-            known_papers_summary=context.get('known_papers_summary', 'Belum ada paper tersimpan untuk topik ini.')
+        )
+        # Draft (context) dan daftar paper (RAG) berbagi budget sisa setelah template + profil
+        model = getattr(self, "model", None)
+        fixed_tokens = count_tokens(
+            MEMORY_CONTEXT_INJECTOR_TEMPLATE.format(relevant_thesis_sections="", known_papers_summary="", **fields),
+            model,
+        )
+        fitted = TokenBudgeter(SUPERVISOR_MEMORY_CONTEXT_MAX_TOKENS - fixed_tokens, model).fit([
+            PromptSection(
+                "context",
+                str(context.get('relevant_thesis_sections', 'Belum ada draft tersimpan.')),
+                priority=SECTION_PRIORITY["context"],
+            ),
+            PromptSection(
+                "rag",
+                str(context.get('known_papers_summary', 'Belum ada paper tersimpan untuk topik ini.')),
+                priority=SECTION_PRIORITY["rag"],
+                min_tokens=300,
+            ),
+        ])
+        return MEMORY_CONTEXT_INJECTOR_TEMPLATE.format(
+            relevant_thesis_sections=fitted.texts["context"],
+            known_papers_summary=fitted.texts["rag"],
+            **fields,
         )
 
     def _humanize_final_output(self, raw_output: Any) -> str:
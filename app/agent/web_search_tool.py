@@ -66,10 +66,10 @@ class WebSearchAgent:
         self.timeout = int(os.environ.get("WEB_SEARCH_TIMEOUT", "10"))
         self.max_results = int(os.environ.get("WEB_SEARCH_MAX_RESULTS", "5"))
 
-    def _get_requests(self):
-        """Lazy import for requests to avoid issues at module load time."""
-        import requests
-        return requests
+    def _get_http(self):
+        """Lazy import klien HTTP bersama (connection pool + cache) saat dipakai."""
+        from app.utils.http_client import get_http_client
+        return get_http_client()
 
     def _get_bs4(self):
         """Lazy import for BeautifulSoup."""
@@ -81,12 +81,12 @@ class WebSearchAgent:
         DuckDuckGo HTML search — returns list of {title, url, snippet}.
         No API key required.
         """
-        requests = self._get_requests()
+        http = self._get_http()
         results = []
         try:
             # DuckDuckGo HTML endpoint
             url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            resp = requests.get(url, headers=HEADERS, timeout=self.timeout)
+            resp = http.get(url, headers=HEADERS, timeout=self.timeout, source="duckduckgo")
             resp.raise_for_status()
 
             BeautifulSoup = self._get_bs4()
@@ -129,7 +129,7 @@ class WebSearchAgent:
         Search OpenAlex API for academic papers.
         Falls back to general DuckDuckGo search if OpenAlex returns 0 results or fails.
         """
-        requests = self._get_requests()
+        http = self._get_http()
         results = []
         try:
             url = "https://api.openalex.org/works"
@@ -138,7 +138,7 @@ class WebSearchAgent:
                 "mailto": "admin@onthesis.com",
                 "per-page": num_results
             }
-            resp = requests.get(url, params=params, timeout=self.timeout)
+            resp = http.get(url, params=params, timeout=self.timeout, source="openalex")
             resp.raise_for_status()
             
             data = resp.json()
@@ -204,9 +204,9 @@ class WebSearchAgent:
         Fetch a URL and return plaintext (stripped HTML).
         Max chars to prevent oversized context injection.
         """
-        requests = self._get_requests()
+        http = self._get_http()
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=self.timeout)
+            resp = http.get(url, headers=HEADERS, timeout=self.timeout, source="web")
             resp.raise_for_status()
 
             BeautifulSoup = self._get_bs4()
@@ -4,6 +4,7 @@ import logging
 import asyncio
 from typing import Dict, Any, Optional, List
 import litellm
+from gevent.local import local as greenlet_local
 
 # Configurasi logging
 logging.basicConfig(level=logging.INFO)
@@ -220,6 +221,8 @@ class WritingAgent:
         
         if not self.api_key:
             logger.warning("LLM_API_KEY environment variable is not set. Pemanggilan LLM kemungkinan akan gagal.")
+        # Callback token per greenlet; diisi oleh stream_tool() selama satu eksekusi tool.
+        self._stream_local = greenlet_local()
 
     def _run_async(self, coroutine):
         try:
@@ -329,9 +332,6 @@ class WritingAgent:
         Wrapper untuk litellm dengan model default dari env dan fallback ke Gemini.
         Sekarang menerima `memory` untuk context injection ke system prompt.
         """
-        import litellm
-        from litellm.exceptions import RateLimitError
-        
         fallback_api_key = os.environ.get("GEMINI_API_KEY")
         fallback_model = "gemini/gemini-2.5-flash"
 
@@ -342,6 +342,10 @@ class WritingAgent:
             {"role": "system", "content": enriched_system_prompt},
             {"role": "user", "content": prompt}
         ]
+
+        on_token = getattr(self._stream_local, "on_token", None)
+        if on_token is not None:
+            return self._complete_streaming(messages, max_tokens, on_token, fallback_model, fallback_api_key)
         
         try:
             logger.info(f"| DEBUG | WritingAgent -> Mencoba Primary: {self.model}")
@@ -374,6 +378,39 @@ class WritingAgent:
                 logger.error(f"Fallback LLM gagal: {str(fallback_e)}")
                 raise fallback_e
 
+    def _complete_streaming(self, messages, max_tokens, on_token, fallback_model, fallback_api_key) -> str:
+        """
+        Jalur streaming _call_llm(): token diteruskan ke on_token, teks lengkap dikembalikan.
+        Fallback ke Gemini hanya jika primary gagal sebelum token pertama; error setelah
+        token mengalir di-raise agar tool tidak menggabungkan dua jawaban berbeda.
+        """
+        streamed = {"any": False}
+
+        def _stream(model, api_key):
+            parts = []
+            response = litellm.completion(
+                model=model,
+                messages=messages,
+                api_key=api_key,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            for chunk in response:
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    streamed["any"] = True
+                    on_token(content)
+            return "".join(parts)
+
+        try:
+            return _stream(self.model, self.api_key)
+        except Exception as e:
+            if streamed["any"] or not fallback_api_key:
+                raise
+            logger.warning(f"Stream primary gagal sebelum token pertama, fallback ke {fallback_model}: {e}")
+            return _stream(fallback_model, fallback_api_key)
+
     def _call_llm_stream(
         self,
         prompt: str,
@@ -385,8 +422,6 @@ class WritingAgent:
         Versi streaming dari _call_llm(). Yields chunk string secara real-time.
         Digunakan untuk UX yang lebih responsif via SSE.
         """
-        import litellm
-        from litellm.exceptions import RateLimitError
 
         fallback_api_key = os.environ.get("GEMINI_API_KEY")
         fallback_model = "gemini/gemini-2.5-flash"
@@ -427,57 +462,32 @@ class WritingAgent:
             logger.error(f"LLM Stream gagal: {e}")
             yield f"Error: {str(e)}"
 
+    # Tool yang output utamanya teks LLM panjang; PlanExecutor men-stream token-nya ke SSE.
+    streaming_tools = frozenset({
+        "generate_section",
+        "rewrite_text",
+        "paraphrase_text",
+        "expand_paragraph",
+        "summarize_text",
+        "generate_literature_review",
+        "polish_academic_tone",
+        "generate_full_chapter",
+        "write_abstract",
+    })
+
     def stream_tool(self, tool_name: str, input_data: Any, params: Dict[str, Any],
-                    memory: Any = None, on_chunk=None, **kwargs) -> str:
+                    memory: Any = None, on_chunk=None, **kwargs) -> Any:
         """
-        Versi streaming dari run_tool(). Yields chunks via on_chunk callback
-        dan mengembalikan output lengkap sebagai string.
+        Versi streaming dari run_tool(). Prompt dan kontrak output sama persis dengan
+        run_tool(); bedanya setiap panggilan LLM di dalam tool meneruskan token ke
+        on_chunk begitu diterima. Return output lengkap seperti run_tool().
         """
-        # Bangun prompt sesuai tool (reuse logic dari non-streaming methods)
-        prompt_map = {
-            "generate_section": lambda t, p: (
-                f"Buatkan teks baru berdasarkan instruksi berikut dengan gaya {p.get('style', 'akademik formal')}. "
-                f"Pastikan isinya akademis dan komprehensif.\n\n"
-                f"Instruksi:\n{t}\n\nTeks yang dihasilkan:\n(BERIKAN HANYA TEKS HASILNYA SAJA TANPA KATA PENGANTAR)"
-            ),
-            "rewrite_text": lambda t, p: (
-                f"Tulis ulang teks berikut dengan gaya {p.get('style', 'akademik formal')}. "
-                f"Pertahankan makna inti, tingkatkan kejelasan dan alur akademik.\n\n"
-                f"Teks asli:\n{t}\n\nHasil penulisan ulang:" + anti_chatty
-            ),
-            "paraphrase_text": lambda t, p: (
-                f"Parafrase teks berikut agar terhindar dari plagiarisme. "
-                f"Gunakan kata-kata dan struktur kalimat yang berbeda.\n\n"
-                f"Teks asli:\n{t}\n\nHasil parafrase:" + anti_chatty
-            ),
-            "expand_paragraph": lambda t, p: (
-                f"Kembangkan paragraf berikut dengan fokus pada: {p.get('direction', 'detail akademis lebih dalam')}.\n\n"
-                f"Paragraf asli:\n{t}\n\nParagraf yang dikembangkan:"
-            ),
-            "summarize_text": lambda t, p: (
-                f"Rangkum teks berikut secara padat. Panjang target: {p.get('length', '1 paragraf')}.\n\n"
-                f"Teks asli:\n{t}\n\nRangkuman:"
-            ),
-            "polish_academic_tone": lambda t, p: (
-                f"Perbaiki teks berikut agar sesuai standar penulisan akademik bahasa Indonesia formal.\n\n"
-                f"Teks asli:\n{t}\n\nTeks yang diperbaiki:"
-            ),
-        }
-
-        if tool_name not in prompt_map:
-            # Fallback ke non-streaming untuk tools yang tidak support stream
+        previous = getattr(self._stream_local, "on_token", None)
+        self._stream_local.on_token = on_chunk
+        try:
             return self.run_tool(tool_name, input_data, params, memory=memory, **kwargs)
-
-        text_input = str(input_data) if input_data is not None else ""
-        prompt = prompt_map[tool_name](text_input, params)
-
-        full_output = []
-        for chunk in self._call_llm_stream(prompt, memory=memory):
-            full_output.append(chunk)
-            if on_chunk:
-                on_chunk(chunk)
-
-        return "".join(full_output)
+        finally:
+            self._stream_local.on_token = previous
 
     # ═══════════════════════════════════════════════════════════════
     # Tool Methods — Semua prompt sekarang dalam bahasa Indonesia
@@ -49,59 +49,25 @@ def _graph_models():
 # ==============================================================================
 # HELPER: Get or Create Graph
 # ==============================================================================
+def _graph_store():
+    from app.services.research_graph_store import get_research_graph_store
+
+    return get_research_graph_store(firestore_db)
+
+
 def _get_or_create_graph(project_id: str, user_id: str) -> ResearchGraph:
     """
     Get Research Graph, always re-synced from current project settings.
     Preserves manually-added graph data (chapter snapshots, theories via API).
+    Served from the graph cache; only sections whose project fields changed
+    are rebuilt, and reads never write back to Firestore.
     """
-    ResearchGraph = _graph_models()["ResearchGraph"]
-    doc_ref = firestore_db.collection(GRAPH_COLLECTION).document(project_id)
-    doc = doc_ref.get()
-    
-    # Load existing graph (for preserving manual edits)
-    existing_graph = None
-    if doc.exists:
-        data = doc.to_dict()
-        if data.get("user_id") == user_id:
-            existing_graph = ResearchGraph.from_firestore_dict(data)
-    
-    # Always rebuild from latest project settings
-    proj_ref = firestore_db.collection("projects").document(project_id)
-    proj_doc = proj_ref.get()
-    
-    if proj_doc.exists:
-        proj_data = proj_doc.to_dict()
-        if proj_data.get("userId") == user_id:
-            fresh_graph = ResearchGraph.build_from_project(proj_data, project_id, user_id)
-            
-            # Merge: keep chapter snapshots & theories from existing graph
-            if existing_graph:
-                # Preserve chapter snapshots (user progress)
-                for ch_id, snapshot in existing_graph.chapter_snapshots.items():
-                    if snapshot.status != "empty":
-                        fresh_graph.chapter_snapshots[ch_id] = snapshot
-                
-                # Preserve manually-added theories not in fresh build
-                fresh_theory_names = {t.name.lower() for t in fresh_graph.theories}
-                for theory in existing_graph.theories:
-                    if theory.name.lower() not in fresh_theory_names:
-                        fresh_graph.theories.append(theory)
-            
-            # Save the re-synced graph
-            doc_ref.set(fresh_graph.to_firestore_dict())
-            logger.info(f"🔄 Research Graph re-synced for project {project_id}")
-            return fresh_graph
-    
-    # Fallback: return existing or empty
-    if existing_graph:
-        return existing_graph
-    return ResearchGraph(project_id=project_id, user_id=user_id)
-
-
-def _save_graph(graph: ResearchGraph):
-    """Save Research Graph to Firestore"""
-    doc_ref = firestore_db.collection(GRAPH_COLLECTION).document(graph.project_id)
-    doc_ref.set(graph.to_firestore_dict())
+    return _graph_store().load(project_id, user_id)
+
+
+def _save_graph(graph: ResearchGraph, source_hashes=None):
+    """Save Research Graph to Firestore (skipped when the content is unchanged)"""
+    _graph_store().save(graph, source_hashes=source_hashes)
 
 
 # ==============================================================================
@@ -417,6 +383,11 @@ def sync_from_project(project_id):
         if proj_data.get("userId") != str(current_user.id):
             return jsonify({"error": "Unauthorized"}), 403
         
+        from app.services.research_graph_store import source_fingerprints
+        # Hash sumber dihitung dari dokumen project apa adanya (tanpa citations),
+        # sama dengan yang dilihat GET, supaya GET berikutnya tidak me-resync ulang.
+        source_hashes = source_fingerprints(proj_data)
+        
         # Also load references
         refs_query = firestore_db.collection("citations")\
             .where("projectId", "==", project_id).stream()
@@ -433,17 +404,13 @@ def sync_from_project(project_id):
         graph = ResearchGraph.build_from_project(proj_data, project_id, str(current_user.id))
         
         # Preserve existing chapter snapshots if any
-        existing_ref = firestore_db.collection(GRAPH_COLLECTION).document(project_id)
-        existing_doc = existing_ref.get()
-        if existing_doc.exists:
-            existing_data = existing_doc.to_dict()
-            existing_graph = ResearchGraph.from_firestore_dict(existing_data)
-            # Merge snapshots (keep existing if they have content)
-            for ch_id, snap in existing_graph.chapter_snapshots.items():
-                if snap.summary and ch_id in graph.chapter_snapshots:
-                    graph.chapter_snapshots[ch_id] = snap
+        existing_graph = _graph_store().load(project_id, str(current_user.id))
+        # Merge snapshots (keep existing if they have content)
+        for ch_id, snap in existing_graph.chapter_snapshots.items():
+            if snap.summary and ch_id in graph.chapter_snapshots:
+                graph.chapter_snapshots[ch_id] = snap
         
-        _save_graph(graph)
+        _save_graph(graph, source_hashes=source_hashes)
         
         return jsonify({
             "status": "success",
@@ -1,10 +1,11 @@
 import os
-import json
 import logging
 import re
 import numpy as np
 from typing import List, Dict, Tuple
 
+from app.services.vector_index import get_vector_index, legacy_doc_key
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -66,6 +67,7 @@ class RagEngine:
         self.storage_path = storage_path
         if not os.path.exists(self.storage_path):
             os.makedirs(self.storage_path)
+        self.index = get_vector_index(self.storage_path)
 
     def _get_embedding(self, text: str) -> List[float]:
         active_embedder = _get_embedder()
@@ -83,18 +85,14 @@ class RagEngine:
         return float(np.dot(vec_a, vec_b) / (norm_a * norm_b))
 
     def _load_user_chunks(self, user_id: str) -> List[Dict]:
-        all_chunks = []
-        user_files = [f for f in os.listdir(self.storage_path) if f.startswith(f"{user_id}_")]
-        for filename in user_files:
-            try:
-                with open(os.path.join(self.storage_path, filename), "r", encoding="utf-8") as f:
-                    all_chunks.extend(json.load(f))
-            except Exception:
-                continue
-        return all_chunks
+        self.index.ensure_migrated(user_id)
+        return list(self.index.iter_chunks(user_id))
 
     def _keyword_score(self, query: str, content: str) -> float:
-        query_words = set(re.findall(r"\w+", query.lower()))
+        return self._keyword_overlap(set(re.findall(r"\w+", query.lower())), content)
+
+    @staticmethod
+    def _keyword_overlap(query_words: set, content: str) -> float:
         if not query_words:
             return 0.0
         chunk_words = set(re.findall(r"\w+", (content or '').lower()))
@@ -119,31 +117,35 @@ class RagEngine:
         return selected
 
     def retrieve_with_confidence(self, query: str, user_id: str, k: int = 5, threshold: float = 0.2, chapter: str = None) -> Dict[str, object]:
-        all_chunks = self._load_user_chunks(user_id)
+        self.index.ensure_migrated(user_id)
+        query_vec = self._get_embedding(query) if _get_embedder() else []
+        # Satu matmul untuk skor semantic seluruh chunk; keyword dihitung di atas side table.
+        semantic, all_chunks = self.index.score_all(user_id, query_vec)
         if chapter:
-            all_chunks = [c for c in all_chunks if str(c.get('metadata', {}).get('chapter', '')).lower() == chapter.lower()]
+            keep = [i for i, c in enumerate(all_chunks) if str(c.get('metadata', {}).get('chapter', '')).lower() == chapter.lower()]
+            semantic = semantic[keep]
+            all_chunks = [all_chunks[i] for i in keep]
         if not all_chunks:
             return {"documents": [], "confidence": 0.0}
 
-        scored_chunks = []
-        query_vec = self._get_embedding(query) if _get_embedder() else []
-
-        for chunk in all_chunks:
-            semantic = self._cosine_similarity(query_vec, chunk.get('vector', [])) if query_vec else 0.0
-            keyword = self._keyword_score(query, chunk.get('content', ''))
-            score = max(semantic, keyword * 0.6)
-            if score >= threshold:
-                scored_chunks.append((score, chunk))
+        query_words = set(re.findall(r"\w+", query.lower()))
+        keyword = np.fromiter(
+            (self._keyword_overlap(query_words, c.get('content', '')) for c in all_chunks),
+            dtype=np.float32,
+            count=len(all_chunks),
+        )
+        scores = np.maximum(semantic, keyword * 0.6)
+        candidates = np.flatnonzero(scores >= threshold)
 
         # fallback to top candidates even if below threshold
-        if not scored_chunks:
-            for chunk in all_chunks:
-                score = self._keyword_score(query, chunk.get('content', '')) * 0.4
-                if score > 0:
-                    scored_chunks.append((score, chunk))
-
-        scored_chunks.sort(key=lambda x: x[0], reverse=True)
-        top20 = scored_chunks[:20]
+        if candidates.size == 0:
+            scores = keyword * 0.4
+            candidates = np.flatnonzero(scores > 0)
+
+        if candidates.size > 20:
+            candidates = candidates[np.argpartition(-scores[candidates], 19)[:20]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        top20 = [(float(scores[i]), all_chunks[i]) for i in candidates]
         reranked = self._apply_diversity(top20, k)
 
         confidences = [s for s, _ in reranked]
@@ -175,7 +177,5 @@ class RagEngine:
                 "metadata": metadata or {}
             })
 
-        filename = os.path.join(self.storage_path, f"{user_id}_{doc_id}.json")
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(chunks, f)
+        self.index.upsert_document(user_id, legacy_doc_key(user_id, doc_id), chunks)
         return len(chunks)
@@ -13,6 +13,7 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, Response, stream_with_context  # type: ignore
 from flask_login import login_required, current_user  # type: ignore
 from app.agent.memory_system import QdrantVectorDB, SharedMemory, FirestoreDocumentDB, count_tokens  # type: ignore
+from app.utils.token_budget import PromptSection, TokenBudgeter
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,10 @@ MODEL_MAP = {
     "gemma-9b":    "groq/gemma2-9b-it",
 }
 FALLBACK_MODEL = "gemini/gemini-2.5-flash"
+# Backpressure SSE: worker supervisor menunggu (maks SSE_PUT_TIMEOUT_S) jika client
+# lambat membaca; setelah itu stream dianggap putus dan event berikutnya dibuang.
+SSE_EVENT_QUEUE_SIZE = int(os.getenv("SSE_EVENT_QUEUE_SIZE", "256"))
+SSE_PUT_TIMEOUT_S = float(os.getenv("SSE_PUT_TIMEOUT_S", "30"))
 DEFAULT_MODEL_KEY = "llama-70b"
 
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -267,20 +272,22 @@ def _build_pruned_context(task: str, context: dict, user_id: str, project_id: st
         logger.warning(f"Could not init SharedMemory: {e}")
         shared_mem = None
 
-    parts = []
-    
     # 1. Base Project Info (Highest Priority)
-    parts.append(f"Judul Tesis: {context.get('context_title', 'Untitled')}")
-    parts.append(f"Rumusan Masalah: {context.get('context_problem', '-')}")
-    parts.append(f"Metodologi: {context.get('context_method', '-')}")
-    
+    metadata = "\n\n".join([
+        f"Judul Tesis: {context.get('context_title', 'Untitled')}",
+        f"Rumusan Masalah: {context.get('context_problem', '-')}",
+        f"Metodologi: {context.get('context_method', '-')}",
+    ])
+    # (judul, isi, prioritas) untuk bagian yang boleh dipangkas
+    sections = []
+
     # 2. Active Paragraphs
     paragraphs = context.get("active_paragraphs", [])
     if paragraphs:
         para_lines = []
         for p in paragraphs:
             para_lines.append(f"  [{p.get('paraId', '?')}] {p.get('content', '')}")
-        parts.append("Bab Aktif:\n" + "\n".join(para_lines))
+        sections.append(("Bab Aktif:", "\n".join(para_lines), 3.0))
 
     # 3. Chapter Summaries
     if shared_mem:
@@ -288,7 +295,7 @@ def _build_pruned_context(task: str, context: dict, user_id: str, project_id: st
             summaries = shared_mem.document.get_all_chapter_summaries(shared_mem.project_scope)
             if summaries:
                 sum_lines = [f"  - {s['chapter_id']}: {s['summary']}" for s in summaries]
-                parts.append("Ringkasan Bab Lain:\n" + "\n".join(sum_lines))
+                sections.append(("Ringkasan Bab Lain:", "\n".join(sum_lines), 2.0))
         except Exception as e:
             logger.warning(f"Failed to fetch summaries: {e}")
 
@@ -297,25 +304,24 @@ def _build_pruned_context(task: str, context: dict, user_id: str, project_id: st
         try:
             fragments = shared_mem.document.get_relevant_context(task, shared_mem.project_scope, top_k=3)
             if fragments:
-                parts.append(f"Fragmen Relevan dari Bab Lain:\n{fragments}")
+                sections.append(("Fragmen Relevan dari Bab Lain:", str(fragments), 1.0))
         except Exception as e:
             logger.warning(f"Failed semantic retrieval: {e}")
 
-    # 5. Token Pruning
-    full_context = "=== KONTEKS TESIS ===\n" + "\n\n".join(parts) + "\n=== AKHIR KONTEKS ==="
-    
-    if count_tokens(full_context) <= MAX_TOKENS:
-        return full_context
-    
-    # If over budget, we prune from fragments first, then summaries, then active chapter
-    # Dynamic pruning implementation
-    current_tokens = count_tokens(full_context)
-    logger.info(f"Context too large ({current_tokens} tokens), pruning...")
-    
-    # Simple strategy: Keep only top 10 active paragraphs if still too large
-    if paragraphs and len(paragraphs) > 10:
-        parts[3] = "Bab Aktif (Terpotong):\n" + "\n".join([f"  [{p.get('paraId','?')}] {p.get('content','')}" for p in paragraphs[:10]])
-    
+    # 5. Token Budgeting
+    # Metadata selalu utuh; bila melebihi budget, sisanya dibagi sesuai prioritas dan
+    # dipotong di batas kalimat (fragmen dulu yang menyusut, lalu ringkasan, lalu bab aktif)
+    overhead = count_tokens("=== KONTEKS TESIS (TRUNCATED) ===\n\n=== AKHIR KONTEKS ===")
+    overhead += sum(count_tokens(title) + 2 for title, _, _ in sections)
+    fitted = TokenBudgeter(MAX_TOKENS - overhead).fit(
+        [PromptSection("metadata", metadata, required=True)]
+        + [PromptSection(title, body, priority=priority, min_tokens=200) for title, body, priority in sections]
+    )
+    parts = [metadata] + [f"{title}\n{fitted.texts[title]}" for title, _, _ in sections if fitted.texts[title]]
+    if not fitted.truncated:
+        return "=== KONTEKS TESIS ===\n" + "\n\n".join(parts) + "\n=== AKHIR KONTEKS ==="
+
+    logger.info(f"Context too large ({sum(fitted.requested.values()) + overhead}+ tokens), pruned to {fitted.total_tokens + overhead}")
     return "=== KONTEKS TESIS (TRUNCATED) ===\n" + "\n\n".join(parts) + "\n=== AKHIR KONTEKS ==="
 
 
@@ -399,7 +405,7 @@ def run_agent_sse():
     def generate():
         """SSE generator - delegates execution to SupervisorAgent and streams events."""
         from gevent import spawn  # type: ignore
-        from gevent.queue import Queue  # type: ignore
+        from gevent.queue import Full, Queue  # type: ignore
         from app.agent.supervisor import SupervisorAgent  # type: ignore
 
         request_start = time.time()  # S2-5: Request-level timing
@@ -412,16 +418,24 @@ def run_agent_sse():
         def emit(event_data: dict) -> str:
             return f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
 
+        stream_state = {"closed": False}
         try:
-            event_queue = Queue()
+            event_queue = Queue(maxsize=SSE_EVENT_QUEUE_SIZE)
             emitted_text_delta = False
+            first_token_ms = None
             done_sentinel = "__SUPERVISOR_DONE__"
 
             def on_event(event_type: str, data: dict):
+                if stream_state["closed"]:
+                    return
                 payload = {"type": event_type}
                 if isinstance(data, dict):
                     payload.update(data)
-                event_queue.put(payload)
+                try:
+                    event_queue.put(payload, timeout=SSE_PUT_TIMEOUT_S)
+                except Full:
+                    stream_state["closed"] = True
+                    logger.warning(f"[AgentRun] SSE consumer stalled >{SSE_PUT_TIMEOUT_S}s, dropping further events")
 
             runtime_context = dict(context or {})
             runtime_context["projectId"] = project_id
@@ -456,7 +470,15 @@ def run_agent_sse():
                 except Exception as worker_error:
                     worker_state["error"] = str(worker_error)
                 finally:
-                    event_queue.put({"type": done_sentinel})
+                    stream_state["closed"] = True
+                    # Sentinel selalu masuk walau antrian penuh, agar loop SSE bisa selesai.
+                    while True:
+                        try:
+                            event_queue.put({"type": done_sentinel}, timeout=SSE_PUT_TIMEOUT_S)
+                            break
+                        except Full:
+                            if stream_state.get("consumer_gone"):
+                                break
 
             spawn(worker)
 
@@ -467,6 +489,8 @@ def run_agent_sse():
 
                 if event.get("type") == "TEXT_DELTA":
                     emitted_text_delta = True
+                if first_token_ms is None and event.get("type") in ("TOOL_DELTA", "TEXT_DELTA"):
+                    first_token_ms = int((time.time() - request_start) * 1000)
 
                 yield emit(event)
 
@@ -499,6 +523,8 @@ def run_agent_sse():
             final_text = worker_state.get("result")
             if final_text and not emitted_text_delta:
                 yield emit({"type": "TEXT_DELTA", "delta": str(final_text)})
+                if first_token_ms is None:
+                    first_token_ms = int((time.time() - request_start) * 1000)
 
             # S2-5: Request-level latency observability
             request_duration_ms = int((time.time() - request_start) * 1000)
@@ -506,6 +532,7 @@ def run_agent_sse():
                 f"[Observability] SSE request user={user_id} "
                 f"project={project_id} "
                 f"duration_ms={request_duration_ms} "
+                f"ttft_ms={first_token_ms} "
                 f"task={task[:50]}"
             )
 
@@ -516,6 +543,10 @@ def run_agent_sse():
             import traceback
             traceback.print_exc()
             yield emit({"type": "ERROR", "message": f"Unexpected error: {str(e)}"})
+        finally:
+            # Client putus (GeneratorExit) atau selesai: hentikan produksi event.
+            stream_state["closed"] = True
+            stream_state["consumer_gone"] = True
 
     response = Response(
         stream_with_context(generate()),
@@ -172,9 +172,34 @@ def get_variable_view():
 def get_data_view():
     ds = OnThesisDataset.load(current_user.id)
     if not ds: return jsonify({'error': 'No data'})
-    data_dict = ds.get_data_view_data()
-    data_dict['data'] = data_dict['data'][:1000] # Limit to 1000 rows max
-    return jsonify(data_dict)
+    # Hanya 1000 baris pertama yang diserialisasi (dulu seluruh tabel lalu dipotong)
+    return jsonify(ds.get_data_view_window(offset=0, limit=1000))
+
+@analysis_bp.route('/api/data-view/window', methods=['GET'])
+@login_required
+def get_data_view_window():
+    """
+    Jendela data view untuk grid virtual. Query: offset, limit, col_offset, col_limit,
+    columns (dipisah koma), sort ("SKOR:desc,NAMA"), filters (JSON [{column, op, value}]),
+    orient ("rows" | "columns"). Edit dari grid yang di-sort/filter memakai row_ids.
+    """
+    ds = OnThesisDataset.load(current_user.id)
+    if not ds: return jsonify({'error': 'No data'})
+    args = request.args
+    try:
+        window = ds.get_data_view_window(
+            offset=args.get('offset', 0, type=int),
+            limit=args.get('limit', 200, type=int),
+            col_offset=args.get('col_offset', 0, type=int),
+            col_limit=args.get('col_limit', type=int),
+            columns=[c for c in args.get('columns', '').split(',') if c] or None,
+            sort=args.get('sort'),
+            filters=args.get('filters'),
+            orient=args.get('orient', 'rows'),
+        )
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': str(e).strip("'")}), 400
+    return jsonify(window)
 
 @analysis_bp.route('/api/data-view/update', methods=['POST'])
 @login_required
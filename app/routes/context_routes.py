@@ -397,13 +397,11 @@ def save_chapter_content(project_id):
                  # S1-2: Split into paragraph-level chunks for granular retrieval
                  chunks = _split_into_chunks(plain_text, max_chars=800)
                  doc_id = shared_memory.project_scope
-                 for idx, chunk in enumerate(chunks):
-                     shared_memory.document.add_or_update_chunk(
-                         doc_id=doc_id,
-                         section=chapter_id,
-                         content=chunk,
-                         chunk_index=idx,
-                     )
+                 shared_memory.document.add_or_update_chunks(
+                     doc_id=doc_id,
+                     section=chapter_id,
+                     contents=chunks,
+                 )
              except Exception as e:
                  logger.error(f"Background DocumentMemory sync error: {e}")
 
@@ -2,8 +2,9 @@
 # Deskripsi: Route utama dashboard & profil. Refactored to use Service Layer.
 
 import os
+import json
 import logging
-from flask import render_template, request, flash, redirect, url_for, jsonify
+from flask import render_template, request, flash, redirect, url_for, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from firebase_admin import auth
 import PyPDF2
@@ -233,18 +234,39 @@ def api_unified_search():
         # CCTV Log
         general_utils.log_user_activity(firestore_db, current_user.id, 'search', {'query': query})
 
-        results = search_utils.unified_search(
+        if data.get('stream'):
+            # Streaming: kirim hasil tiap sumber begitu sumber itu selesai (SSE).
+            def generate():
+                total = 0
+                for event in search_utils.iter_unified_search(query=query, sources=sources, year=year):
+                    total += len(event["results"])
+                    yield f"data: {json.dumps({'type': 'SOURCE_RESULT', **event}, ensure_ascii=False)}\n\n"
+                yield f"data: {json.dumps({'type': 'DONE', 'total': total})}\n\n"
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+            )
+
+        search_payload = search_utils.unified_search(
             query=query,
             sources=sources,
-            year=year
+            year=year,
+            with_status=True,
         )
+        results = search_payload["results"]
+        source_status = search_payload["sources"]
         logger.info(
-            "Reference search completed: endpoint=%s results=%s query=%r",
+            "Reference search completed: endpoint=%s results=%s query=%r sources=%s translation=%s",
             request.endpoint,
             len(results) if isinstance(results, list) else "unknown",
             query,
+            source_status,
+            search_payload.get("translation"),
         )
-        return jsonify({"message": "Success", "results": results}), 200
+        partial = any(item.get("status") != "ok" for item in source_status.values())
+        return jsonify({"message": "Success", "results": results, "sources": source_status, "partial": partial}), 200
 
     except Exception as e:
         logger.exception("Search API Error")
@@ -16,6 +16,7 @@ from app.utils.ai_utils import safe_completion as completion
 litellm.drop_params = True
 
 from app.utils.ai_utils import get_smart_model, clean_json_output
+from app.utils.token_budget import truncate_to_tokens
 from app.engines.rule_engine import AcademicRuleEngine
 
 
@@ -23,6 +24,9 @@ from app.engines.rule_engine import AcademicRuleEngine
 logger = logging.getLogger(__name__)
 llm_client = Groq()
 
+# Budget token konteks dokumen yang disisipkan ke system prompt chat
+CHAT_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "2500"))
+
 
 
 # Coba import pptx
@@ -43,20 +47,18 @@ class AIService:
     # 0. HELPER: SMART CONTEXT PRUNING
     # ==========================================
     @staticmethod
-    def _prune_text(text, max_chars=10000, position='end'):
+    def _prune_text(text, max_tokens=2500, position='end', model=None):
         """
         Memotong teks agar tidak meledakkan token limit AI.
+        Dihitung dalam token (bukan huruf) dan dipotong di batas kalimat.
         """
         if not text:
             return ""
-        
-        if len(text) <= max_chars:
-            return text
-            
+
         if position == 'end':
-            return "... (context truncated) ...\n" + text[-max_chars:]
+            return truncate_to_tokens(text, max_tokens, model, keep='end', marker="... (context truncated) ...")
         else:
-            return text[:max_chars] + "\n... (references truncated) ..."
+            return truncate_to_tokens(text, max_tokens, model, keep='start', marker="... (references truncated) ...")
 
     # =========================================================================
     # 1. CORE: ROBUST PROMPT ENGINEERING (OTAK BARU - METHODOLOGY AWARE)
@@ -90,6 +92,7 @@ class AIService:
             )
             
             if context_str:
+                context_str = AIService._prune_text(context_str, max_tokens=CHAT_CONTEXT_MAX_TOKENS, position='start')
                 system_instruction += f"\n\n[KONTEKS DOKUMEN/PROYEK]:\n{context_str}"
             
             if p_title:
@@ -123,7 +126,7 @@ class AIService:
         # Kita definisikan di sini agar aman dipakai di blok bawah
         topic = data.get('topic') or p_title or 'Topik Umum'
         method_name = data.get('methodology') or data.get('context_method') or 'Metode Standar'
-        ref_str = f"Referensi: {context_str[:1000]}..." if context_str else ""
+        ref_str = f"Referensi: {AIService._prune_text(context_str, max_tokens=250, position='start')}" if context_str else ""
         problem = data.get('problem') or p_problem or 'Belum ditentukan'
         
         # Cek tipe metodologi (untuk percabangan prompt)
@@ -873,8 +876,8 @@ GUARDRAILS:
                     role = msg.get('role', 'user')
                     content = msg.get('content', '')
                     # Truncate very long messages to save tokens
-                    if role == 'assistant' and len(content) > 600:
-                        content = content[:600] + "..."
+                    if role == 'assistant':
+                        content = truncate_to_tokens(content, 150, keep='start', marker="...")
                     messages.append({"role": role, "content": content})
             
             # Add current user message
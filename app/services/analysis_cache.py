@@ -0,0 +1,162 @@
+# File: app/services/analysis_cache.py
+# Deskripsi: Cache hasil analisis statistik per (versi isi dataset, id analisis, params
+# ternormalisasi). Tier 1: LRU in-process (JSON terserialisasi, dibatasi bytes); tier 2:
+# Redis bila REDIS_URL ada, selain itu file JSON di samping dataset lokal. Versi dataset
+# berganti di setiap mutasi (lihat OnThesisDataset.content_version), jadi entri lama tidak
+# pernah terbaca lagi; di tier disk, direktori versi lama langsung dihapus.
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from app.utils import data_engine
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_LRU_SIZE = int(os.getenv("ANALYSIS_CACHE_LRU_SIZE", "512"))
+ANALYSIS_CACHE_LRU_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_LRU_MAX_BYTES", str(64 * 1024 * 1024)))
+ANALYSIS_CACHE_TTL_S = int(os.getenv("ANALYSIS_CACHE_TTL_S", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_DIR = "analysis_cache"
+
+SOURCE_LRU = "lru"
+SOURCE_REDIS = "redis"
+SOURCE_DISK = "disk"
+SOURCE_COMPUTED = "computed"
+
+
+def normalize_params(params: Any) -> str:
+    """
+    Bentuk kanonik params (JSON dengan key terurut). Sengaja tidak mengubah nilai: dua
+    params yang bisa menghasilkan angka berbeda tidak boleh berbagi entri cache.
+    """
+    return json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class AnalysisResultCache:
+    def __init__(self, redis_client: Any = None, disk_root: Optional[str] = None,
+                 lru_size: int = ANALYSIS_CACHE_LRU_SIZE, lru_max_bytes: int = ANALYSIS_CACHE_LRU_MAX_BYTES,
+                 ttl_seconds: int = ANALYSIS_CACHE_TTL_S):
+        self.redis = redis_client
+        self.disk_root = disk_root
+        self.ttl_seconds = ttl_seconds
+        self.lru = LRUCache(max_items=lru_size, max_bytes=lru_max_bytes, sizeof=len)
+        self._disk_lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    @staticmethod
+    def key_for(user_id: str, project_id: str, version: str, analysis_id: str, params: Any) -> str:
+        digest = hashlib.sha1(normalize_params(params).encode("utf-8")).hexdigest()
+        return f"analysis:{user_id}:{project_id}:{version}:{analysis_id}:{digest}"
+
+    def disk_dir(self, user_id, project_id) -> str:
+        root = self.disk_root if self.disk_root is not None else data_engine.LOCAL_STORAGE_PATH
+        return os.path.join(root, str(user_id), str(project_id), ANALYSIS_CACHE_DIR)
+
+    def _disk_path(self, user_id, project_id, version, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir(user_id, project_id), version, f"{digest}.json")
+
+    def _remote_get(self, key, path) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            if self.redis is not None:
+                raw = self.redis.get(key)
+                if raw:
+                    return (raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)), SOURCE_REDIS
+                return None, None
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read(), SOURCE_DISK
+        except Exception as exc:
+            logger.warning("Analysis cache GET failed: %s", exc)
+            self.stats["errors"] += 1
+        return None, None
+
+    def _remote_set(self, key, path, payload):
+        try:
+            if self.redis is not None:
+                self.redis.setex(key, self.ttl_seconds, payload)
+                return
+            version_dir = os.path.dirname(path)
+            with self._disk_lock:
+                # Versi dataset baru = hasil versi lama tidak mungkin terpakai lagi
+                cache_dir = os.path.dirname(version_dir)
+                if os.path.isdir(cache_dir):
+                    for name in os.listdir(cache_dir):
+                        if name != os.path.basename(version_dir):
+                            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+                os.makedirs(version_dir, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+        except Exception as exc:
+            logger.warning("Analysis cache SET failed: %s", exc)
+            self.stats["errors"] += 1
+
+    def get(self, user_id, project_id, version, analysis_id, params) -> Tuple[Optional[Any], Optional[str]]:
+        """(hasil, sumber) atau (None, None). Hasil selalu salinan baru, aman dimodifikasi pemanggil."""
+        if not version:
+            return None, None
+        key = self.key_for(user_id, project_id, version, analysis_id, params)
+        payload = self.lru.get(key)
+        source = SOURCE_LRU
+        if payload is None:
+            payload, source = self._remote_get(key, self._disk_path(user_id, project_id, version, key))
+            if payload is None:
+                self.stats["misses"] += 1
+                return None, None
+            self.lru.set(key, payload)
+        self.stats[f"{source}_hits"] += 1
+        return json.loads(payload), source
+
+    def set(self, user_id, project_id, version, analysis_id, params, result) -> bool:
+        if not version or result is None or (isinstance(result, dict) and result.get("error")):
+            return False
+        try:
+            payload = json.dumps(result, allow_nan=False)
+        except (TypeError, ValueError):
+            return False  # hasil non-JSON (mis. NaN mentah) tidak di-cache
+        key = self.key_for(user_id, project_id, version, analysis_id, params)
+        self.lru.set(key, payload)
+        self._remote_set(key, self._disk_path(user_id, project_id, version, key), payload)
+        self.stats["writes"] += 1
+        return True
+
+    def get_or_compute(self, user_id, project_id, version, analysis_id, params,
+                       compute: Callable[[], Any]) -> Tuple[Any, str]:
+        result, source = self.get(user_id, project_id, version, analysis_id, params)
+        if source is not None:
+            return result, source
+        result = compute()
+        self.set(user_id, project_id, version, analysis_id, params, result)
+        return result, SOURCE_COMPUTED
+
+
+def _default_redis():
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        return None
+    try:
+        import redis
+
+        return redis.from_url(redis_url)
+    except Exception as exc:
+        logger.warning("Analysis cache: Redis unavailable (%s), using disk tier", exc)
+        return None
+
+
+_cache: Optional[AnalysisResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisResultCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisResultCache(redis_client=_default_redis())
+        return _cache
@@ -7,6 +7,7 @@ from typing import Dict, Any, List, Optional, Union
 
 from app.utils import stats_utils, general_utils
 from app.utils.data_engine import OnThesisDataset
+from app.services.analysis_cache import get_analysis_cache
 
 # Import Service AI (Pastikan file ai_service.py sudah diupdate dgn fitur interpret_statistics)
 from app.services.ai_service import AIService
@@ -54,49 +55,65 @@ class AnalysisService:
         if not func_to_run:
             raise ValueError(f"Analisis '{analysis_type}' belum didukung oleh sistem.")
 
-        # 2. Load Dataset User
-        dataset = OnThesisDataset.load(user.id)
-        if not dataset or dataset.df.empty:
-            raise FileNotFoundError("Dataset kosong. Harap upload atau import data terlebih dahulu.")
-
-
-        try:
-            # 2.A DEBUG: Cek Kolom Tersedia
-            print(f"📋 [DEBUG] Available Columns: {dataset.df.columns.tolist()}")
-            
-            # 2.B Validation: Ensure requested variables exist
+        # 2. Cek cache hasil dulu: versi dataset cukup dibaca dari meta.json + edit log,
+        # jadi buka ulang hasil / ganti chart tidak perlu membaca CSV dan menghitung ulang
+        req_vars = params.get('variables', [])
+        if req_vars:
             # FATAL FIX: API Request often sends raw names (e.g., "Medsos Use"), 
             # but Dataset Engine stores them as normalized (e.g., "MEDSOS_USE").
             # We must normalize the request BEFORE checking or passing to stats_utils.
-            
-            req_vars = params.get('variables', [])
-            if req_vars:
-                # Normalize Params First
-                normalized_vars = [re.sub(r'\s+', '_', str(v)).upper().strip() for v in req_vars]
-                params['variables'] = normalized_vars # Update params for stats_utils
-                
+            params['variables'] = [re.sub(r'\s+', '_', str(v)).upper().strip() for v in req_vars]
+
+        dataset = OnThesisDataset.load(user.id, load_data=False)
+        version = dataset.content_version()
+        cache = get_analysis_cache()
+        cached, source = cache.get(user.id, dataset.project_id, version, analysis_type, params)
+
+        try:
+            if cached is not None:
+                print(f"⚡ [CACHE] {analysis_type} served from {source} (dataset v{version})")
+                result = cached
+            else:
+                # 2.A Load Dataset User: bila variabel disebut, hanya kolom itu yang dibaca
+                # dari snapshot kolumnar (stats_utils menerima DataFrame langsung)
+                if params.get('variables'):
+                    data = OnThesisDataset.load_columns(user.id, params['variables'], project_id=dataset.project_id)
+                    available, has_data = data.columns.tolist(), bool(dataset.meta) and len(data) > 0
+                else:
+                    data = OnThesisDataset.load(user.id)
+                    available, has_data = data.df.columns.tolist(), not data.df.empty
+                if not has_data:
+                    raise FileNotFoundError("Dataset kosong. Harap upload atau import data terlebih dahulu.")
+
+                # 2.B DEBUG: Cek Kolom Tersedia
+                print(f"📋 [DEBUG] Available Columns: {available}")
+
+                # 2.C Validation: Ensure requested variables exist
                 # Check against dataset columns (which are already normalized)
-                missing = [v for v in normalized_vars if v not in dataset.df.columns]
+                missing = [v for v in params.get('variables', []) if v not in available]
                 if missing:
                     error_msg = f"Variabel tidak ditemukan: {', '.join(missing)}. Mohon 'Simpan Project' atau Refresh halaman."
                     print(f"❌ [ERROR] {error_msg}")
                     raise ValueError(error_msg)
 
-            # 3. Eksekusi Fungsi Statistik (MATH)
-            print("📊 [PROCESS] Calculating Statistics...")
-            
-            # Note: stats_utils accepts (dataset, params) and handles parsing internally via _get_vars()
-            # This unified call works for ALL analysis types (Descriptive, T-Test, ANOVA, etc.)
-            raw_result = func_to_run(dataset, params)
-            
-            # --- NORMALISASI RESULT (Agar konsisten jadi Dictionary) ---
-            result = {}
-            if isinstance(raw_result, list):
-                result = { "summary_table": raw_result }
-            elif isinstance(raw_result, dict):
-                result = raw_result
-            else:
-                result = { "summary_table": [], "raw": str(raw_result) }
+                # 3. Eksekusi Fungsi Statistik (MATH)
+                print("📊 [PROCESS] Calculating Statistics...")
+
+                # Note: stats_utils accepts (dataset, params) and handles parsing internally via _get_vars()
+                # This unified call works for ALL analysis types (Descriptive, T-Test, ANOVA, etc.)
+                raw_result = func_to_run(data, params)
+
+                # --- NORMALISASI RESULT (Agar konsisten jadi Dictionary) ---
+                result = {}
+                if isinstance(raw_result, list):
+                    result = { "summary_table": raw_result }
+                elif isinstance(raw_result, dict):
+                    result = raw_result
+                else:
+                    result = { "summary_table": [], "raw": str(raw_result) }
+
+                # Simpan hasil statistik murni (sebelum narasi AI) untuk versi dataset ini
+                cache.set(user.id, dataset.project_id, version, analysis_type, params, result)
 
             # 4. [AI Enrichment] PANGGIL AI (THE MAGIC)
             print("🤖 [PROCESS] Calling AI Service for Narrative...")
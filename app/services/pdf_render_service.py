@@ -0,0 +1,252 @@
+# File: app/services/pdf_render_service.py
+# Deskripsi: Render service PDF yang hidup lama (satu proses per worker Flask).
+# Chromium di-launch sekali; N browser context + page disiapkan hangat dan dipakai
+# bergantian oleh antrean job. Tiap job punya timeout sendiri, context di-recycle
+# setelah sejumlah render (membatasi kebocoran memori renderer), dan aset statis
+# (logo, font di app/static) dilayani dari cache in-memory lewat route Playwright.
+#
+# Dijalankan sebagai skrip (bukan `-m app...`) supaya tidak ikut mem-boot app Flask:
+#   python app/services/pdf_render_service.py
+# Protokol stdin/stdout, satu JSON per baris:
+#   -> {"id": "...", "html": "<html>...", "timeout": 60}
+#   <- {"ready": true} sekali setelah browser siap
+#   <- {"id": "...", "ok": true, "pdf": "<base64>", "ms": 123.4}
+#   <- {"id": "...", "ok": false, "error": "..."}
+
+import asyncio
+import base64
+import json
+import mimetypes
+import os
+import sys
+import time
+
+ASSET_ORIGIN = "http://onthesis.local"
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "static"))
+BROWSER_ARGS = ["--no-sandbox", "--disable-setuid-sandbox"]
+
+POOL_SIZE = int(os.getenv("PDF_RENDER_POOL_SIZE", "2"))
+CONTEXT_MAX_RENDERS = int(os.getenv("PDF_RENDER_CONTEXT_MAX_RENDERS", "50"))
+JOB_TIMEOUT_S = float(os.getenv("PDF_RENDER_TIMEOUT_S", "60"))
+
+# Clean Header Template (SVG Logo from OnThesisLogo.tsx)
+HEADER_TEMPLATE = '''
+            <div style="font-size: 9px; width: 100%; margin: 0 1cm; display: flex; align-items: center; justify-content: flex-end; padding-bottom: 5px;">
+                <svg width="100" height="28" viewBox="0 0 560 140" xmlns="http://www.w3.org/2000/svg">
+                    <g>
+                        <rect x="40" y="42" width="40" height="8" rx="4" fill="#0284c7" />
+                        <rect x="30" y="56" width="60" height="8" rx="4" fill="#0284c7" />
+                        <rect x="26" y="70" width="68" height="8" rx="4" fill="#0284c7" />
+                        <rect x="30" y="84" width="60" height="8" rx="4" fill="#0284c7" />
+                        <rect x="40" y="98" width="40" height="8" rx="4" fill="#0284c7" />
+                    </g>
+                    <text x="110" y="92" font-family="Arial, sans-serif" font-size="52" font-weight="bold" fill="#0284c7">OnThesis</text>
+                </svg>
+            </div>
+            '''
+
+FOOTER_TEMPLATE = '''
+            <div style="font-size: 8px; width: 100%; text-align: center; color: #999;">
+                OnThesis.pro
+            </div>
+            '''
+
+PDF_OPTIONS = {
+    "format": "A4",
+    "print_background": True,
+    "margin": {
+        "top": "1.5cm",  # Reduced since header_template takes space
+        "right": "2.54cm",
+        "bottom": "1.5cm",
+        "left": "2.54cm",
+    },
+    "display_header_footer": True,
+    "header_template": HEADER_TEMPLATE,
+    "footer_template": FOOTER_TEMPLATE,
+}
+
+
+class AssetCache:
+    """File di bawah app/static dibaca sekali, lalu disajikan dari memori."""
+
+    def __init__(self, static_dir=STATIC_DIR):
+        self.static_dir = static_dir
+        self._files = {}
+
+    def get(self, rel_path):
+        if rel_path in self._files:
+            return self._files[rel_path]
+        path = os.path.abspath(os.path.join(self.static_dir, rel_path))
+        if not path.startswith(self.static_dir + os.sep) or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            body = f.read()
+        entry = (body, mimetypes.guess_type(path)[0] or "application/octet-stream")
+        self._files[rel_path] = entry
+        return entry
+
+
+class RenderPool:
+    """
+    Pool browser context hangat di atas satu browser Chromium.
+    `browser_factory` = coroutine tanpa argumen yang mengembalikan Browser Playwright.
+    """
+
+    def __init__(self, browser_factory, size=POOL_SIZE, context_max_renders=CONTEXT_MAX_RENDERS,
+                 job_timeout=JOB_TIMEOUT_S, assets=None):
+        self.browser_factory = browser_factory
+        self.size = max(1, int(size))
+        self.context_max_renders = max(1, int(context_max_renders))
+        self.job_timeout = job_timeout
+        self.assets = assets or AssetCache()
+        self.browser = None
+        self.stats = {"renders": 0, "timeouts": 0, "errors": 0, "recycled_contexts": 0, "browser_launches": 0}
+        self._queue = None
+        self._workers = []
+        self._browser_lock = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._browser_lock = asyncio.Lock()
+        await self._ensure_browser()
+        slots = await asyncio.gather(*(self._new_slot() for _ in range(self.size)))
+        self._workers = [asyncio.ensure_future(self._worker(slot)) for slot in slots]
+
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self.browser is None or not self.browser.is_connected():
+                self.browser = await self.browser_factory()
+                self.stats["browser_launches"] += 1
+            return self.browser
+
+    async def _serve_asset(self, route):
+        path = route.request.url[len(ASSET_ORIGIN):].split("?", 1)[0]
+        entry = self.assets.get(path[len("/static/"):]) if path.startswith("/static/") else None
+        if path == "/":
+            await route.fulfill(status=200, content_type="text/html", body="<html></html>")
+        elif entry is None:
+            await route.fulfill(status=404, body="")
+        else:
+            await route.fulfill(status=200, content_type=entry[1], body=entry[0])
+
+    async def _new_slot(self):
+        browser = await self._ensure_browser()
+        context = await browser.new_context()
+        # Dokumen ber-origin ASSET_ORIGIN: URL relatif /static/... dilayani dari AssetCache
+        await context.route(f"{ASSET_ORIGIN}/**", self._serve_asset)
+        page = await context.new_page()
+        await page.goto(f"{ASSET_ORIGIN}/")
+        return {"context": context, "page": page, "renders": 0}
+
+    async def _recycle(self, slot):
+        self.stats["recycled_contexts"] += 1
+        try:
+            await slot["context"].close()
+        except Exception:
+            pass
+        return await self._new_slot()
+
+    async def _worker(self, slot):
+        while True:
+            job, future = await self._queue.get()
+            if future.cancelled():
+                continue
+            if slot is None:
+                try:
+                    slot = await self._new_slot()
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    future.set_result({"ok": False, "error": f"Browser unavailable: {e}"})
+                    continue
+            started = time.perf_counter()
+            healthy = True
+            try:
+                pdf = await asyncio.wait_for(self._render(slot["page"], job["html"]),
+                                             timeout=job.get("timeout") or self.job_timeout)
+                self.stats["renders"] += 1
+                future.set_result({"ok": True, "pdf": pdf, "ms": (time.perf_counter() - started) * 1e3})
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                healthy = False  # page mungkin macet di tengah render
+                future.set_result({"ok": False, "error": "PDF render timed out"})
+            except Exception as e:
+                self.stats["errors"] += 1
+                healthy = False
+                future.set_result({"ok": False, "error": str(e)})
+            slot["renders"] += 1
+            if not healthy or slot["renders"] >= self.context_max_renders:
+                try:
+                    slot = await self._recycle(slot)
+                except Exception:
+                    slot = None  # dibuat ulang saat job berikutnya datang
+
+    async def _render(self, page, html):
+        await page.set_content(html, wait_until="load")
+        return await page.pdf(**PDF_OPTIONS)
+
+    async def submit(self, job):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+
+
+def _write(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+async def _handle(pool, job):
+    result = await pool.submit(job)
+    if result["ok"]:
+        result["pdf"] = base64.b64encode(result["pdf"]).decode("ascii")
+    result["id"] = job.get("id")
+    _write(result)
+
+
+async def serve():
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        async def launch():
+            return await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+
+        pool = RenderPool(launch)
+        try:
+            await pool.start()
+        except Exception as e:
+            _write({"ready": False, "error": f"Browser launch failed: {e}"})
+            return
+        _write({"ready": True, "pool_size": pool.size})
+
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=64 * 1024 * 1024)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break  # stdin ditutup: selesaikan job yang tersisa lalu keluar
+            try:
+                job = json.loads(line)
+            except ValueError:
+                continue
+            task = asyncio.ensure_future(_handle(pool, job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
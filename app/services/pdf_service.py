@@ -1,11 +1,190 @@
 import os
-from flask import render_template
-from playwright.sync_api import sync_playwright
+import sys
+import json
+import uuid
+from flask import Flask, render_template
 import base64
 
+import gevent
+from gevent import subprocess as gsubprocess
+from gevent.event import AsyncResult
+from gevent.lock import Semaphore
+
+SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+RENDER_SERVICE_SCRIPT = os.path.join(SERVICES_DIR, 'pdf_render_service.py')
+TEMPLATE_DIR = os.path.abspath(os.path.join(SERVICES_DIR, '..', 'templates'))
+
+# "pool" = render service hangat (default), "subprocess" = satu proses pdf_worker per export
+PDF_RENDER_MODE = os.getenv("PDF_RENDER_MODE", "pool")
+PDF_RENDER_TIMEOUT_S = float(os.getenv("PDF_RENDER_TIMEOUT_S", "60"))
+# Batas tunggu di sisi Flask: antrean di render service + render + transfer
+PDF_RENDER_WAIT_S = float(os.getenv("PDF_RENDER_WAIT_S", str(PDF_RENDER_TIMEOUT_S * 2)))
+PDF_RENDER_START_TIMEOUT_S = float(os.getenv("PDF_RENDER_START_TIMEOUT_S", "30"))
+# Proses render service diganti baru setelah N job (membatasi kebocoran memori Chromium)
+PDF_RENDER_PROCESS_MAX_JOBS = int(os.getenv("PDF_RENDER_PROCESS_MAX_JOBS", "500"))
+
+
+class RenderServiceUnavailable(Exception):
+    """Render service tidak bisa start (mis. Chromium belum ter-install)."""
+
+
+class _RenderProcess:
+    """Satu proses pdf_render_service.py + greenlet pembaca respons dari stdout."""
+
+    def __init__(self, script):
+        self.popen = gsubprocess.Popen(
+            [sys.executable, script], stdin=gsubprocess.PIPE, stdout=gsubprocess.PIPE,
+        )
+        self.pending = {}
+        self.started_jobs = 0
+        self.retiring = False
+        self.ready = AsyncResult()
+        self._write_lock = Semaphore()
+        self._reader = gevent.spawn(self._read_loop)
+
+    def _read_loop(self):
+        for line in self.popen.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if "ready" in message:
+                self.ready.set(message)
+                continue
+            result = self.pending.pop(message.get("id"), None)
+            if result is not None:
+                result.set(message)
+            if self.retiring and not self.pending:
+                self.close()
+        # EOF: proses keluar (crash / selesai retire)
+        if not self.ready.ready():
+            self.ready.set({"ready": False, "error": "render service exited during startup"})
+        for result in self.pending.values():
+            result.set({"ok": False, "error": "render service exited"})
+        self.pending.clear()
+
+    def alive(self):
+        return self.popen.poll() is None
+
+    def submit(self, html, timeout):
+        job_id = uuid.uuid4().hex
+        result = self.pending[job_id] = AsyncResult()
+        self.started_jobs += 1
+        line = json.dumps({"id": job_id, "html": html, "timeout": timeout}) + "\n"
+        with self._write_lock:
+            self.popen.stdin.write(line.encode("utf-8"))
+            self.popen.stdin.flush()
+        return job_id, result
+
+    def close(self):
+        """Tutup stdin: service menyelesaikan job yang tersisa lalu keluar."""
+        try:
+            self.popen.stdin.close()
+        except Exception:
+            pass
+
+    def kill(self):
+        try:
+            self.popen.kill()
+        except Exception:
+            pass
+
+
+class PdfRenderClient:
+    """Klien ke render service; proses di-start lazy dan di-recycle setelah max_jobs."""
+
+    def __init__(self, script=RENDER_SERVICE_SCRIPT, max_jobs_per_process=PDF_RENDER_PROCESS_MAX_JOBS,
+                 job_timeout=PDF_RENDER_TIMEOUT_S, wait_timeout=PDF_RENDER_WAIT_S,
+                 start_timeout=PDF_RENDER_START_TIMEOUT_S):
+        self.script = script
+        self.max_jobs_per_process = max(1, int(max_jobs_per_process))
+        self.job_timeout = job_timeout
+        self.wait_timeout = wait_timeout
+        self.start_timeout = start_timeout
+        self.stats = {"jobs": 0, "process_starts": 0, "recycles": 0}
+        self._proc = None
+        self._lock = Semaphore()
+
+    def _process(self):
+        with self._lock:
+            proc = self._proc
+            if proc is not None and proc.alive() and proc.started_jobs >= self.max_jobs_per_process:
+                proc.retiring = True
+                if not proc.pending:
+                    proc.close()
+                self.stats["recycles"] += 1
+                proc = None
+            if proc is None or not proc.alive():
+                proc = _RenderProcess(self.script)
+                self.stats["process_starts"] += 1
+                try:
+                    status = proc.ready.get(timeout=self.start_timeout)
+                except gevent.Timeout:
+                    status = {"ready": False, "error": "render service start timed out"}
+                if not status.get("ready"):
+                    proc.kill()
+                    self._proc = None
+                    raise RenderServiceUnavailable(status.get("error"))
+                self._proc = proc
+            return proc
+
+    def render(self, html, timeout=None):
+        proc = self._process()
+        job_id, result = proc.submit(html, timeout or self.job_timeout)
+        self.stats["jobs"] += 1
+        try:
+            message = result.get(timeout=self.wait_timeout)
+        except gevent.Timeout:
+            proc.pending.pop(job_id, None)
+            raise TimeoutError("PDF render timed out")
+        if not message.get("ok"):
+            raise Exception(f"PDF render failed: {message.get('error')}")
+        return base64.b64decode(message["pdf"])
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None:
+                self._proc.close()
+                self._proc = None
+
+
+_render_client = None
+_template_app = None
+
+
+def get_render_client():
+    global _render_client
+    if _render_client is None:
+        _render_client = PdfRenderClient()
+    return _render_client
+
+
+def render_export_html(data):
+    """Render template export dengan app Flask minimal (sama seperti pdf_worker)."""
+    global _template_app
+    if _template_app is None:
+        _template_app = Flask(__name__, template_folder=TEMPLATE_DIR)
+    with _template_app.app_context():
+        template_name = data.get('template', 'academic_report')
+        return render_template(f'export/{template_name}.html', data=data)
+
+
 class PdfService:
     @staticmethod
     def generate_pdf(data):
+        """
+        Generates PDF via the long-lived render service (warm Chromium contexts).
+        Falls back to the one-shot subprocess worker if the service cannot start.
+        """
+        if PDF_RENDER_MODE != "subprocess":
+            try:
+                return get_render_client().render(render_export_html(data))
+            except RenderServiceUnavailable as e:
+                print(f"PdfService: Render service unavailable ({e}), using subprocess worker")
+        return PdfService.generate_pdf_subprocess(data)
+
+    @staticmethod
+    def generate_pdf_subprocess(data):
         """
         Generates PDF by spawning a separate process to run pdf_worker.py.
         This avoids threading/signal issues with Flask+Playwright on Windows.
@@ -4,6 +4,9 @@ import os
 from flask import Flask, render_template
 from playwright.sync_api import sync_playwright
 
+# Dijalankan sebagai skrip: direktori skrip ada di sys.path
+from pdf_render_service import PDF_OPTIONS
+
 # Setup minimal Flask context just for template rendering
 # We need to mimic the app structure to find templates
 def generate_pdf_in_process(input_path, output_path, template_folder):
@@ -70,41 +73,8 @@ def generate_pdf_in_process(input_path, output_path, template_folder):
             
             print("Worker: Printing PDF...")
             
-            # Clean Header Template (SVG Logo from OnThesisLogo.tsx)
-            header_html = f'''
-            <div style="font-size: 9px; width: 100%; margin: 0 1cm; display: flex; align-items: center; justify-content: flex-end; padding-bottom: 5px;">
-                <svg width="100" height="28" viewBox="0 0 560 140" xmlns="http://www.w3.org/2000/svg">
-                    <g>
-                        <rect x="40" y="42" width="40" height="8" rx="4" fill="#0284c7" />
-                        <rect x="30" y="56" width="60" height="8" rx="4" fill="#0284c7" />
-                        <rect x="26" y="70" width="68" height="8" rx="4" fill="#0284c7" />
-                        <rect x="30" y="84" width="60" height="8" rx="4" fill="#0284c7" />
-                        <rect x="40" y="98" width="40" height="8" rx="4" fill="#0284c7" />
-                    </g>
-                    <text x="110" y="92" font-family="Arial, sans-serif" font-size="52" font-weight="bold" fill="#0284c7">OnThesis</text>
-                </svg>
-            </div>
-            '''
-            
-            footer_html = '''
-            <div style="font-size: 8px; width: 100%; text-align: center; color: #999;">
-                OnThesis.pro
-            </div>
-            '''
-
-            pdf_bytes = page.pdf(
-                format="A4",
-                print_background=True,
-                margin={
-                    "top": "1.5cm", # Reduced since header_template takes space
-                    "right": "2.54cm",
-                    "bottom": "1.5cm",
-                    "left": "2.54cm"
-                },
-                display_header_footer=True,
-                header_template=header_html,
-                footer_template=footer_html
-            )
+            # Header/footer & opsi halaman sama dengan render service (pool hangat)
+            pdf_bytes = page.pdf(**PDF_OPTIONS)
             browser.close()
             
             # 4. Save Output
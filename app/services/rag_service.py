@@ -1,12 +1,13 @@
 # app/services/rag_service.py
 
 import os
-import json
 import logging
 import re
 import numpy as np
 from typing import List, Dict
 
+from app.services.vector_index import get_vector_index, legacy_doc_key
+
 # Library PDF
 try:
     from pypdf import PdfReader
@@ -79,6 +80,7 @@ class LiteContextEngine:
         self.storage_path = storage_path
         if not os.path.exists(self.storage_path):
             os.makedirs(self.storage_path)
+        self.index = get_vector_index(self.storage_path)
 
     def _get_embedding(self, text: str):
         """Mengubah teks menjadi vektor angka (List of Floats)."""
@@ -137,10 +139,8 @@ class LiteContextEngine:
                         }
                     )
 
-            file_key = f"{user_id}_{project_id}_{doc_id}.json" if project_id else f"{user_id}_{doc_id}.json"
-            storage_file = os.path.join(self.storage_path, file_key)
-            with open(storage_file, "w", encoding="utf-8") as f:
-                json.dump(chunks, f)
+            self.index.upsert_document(user_id, legacy_doc_key(user_id, doc_id, project_id), chunks, project_id=project_id)
+            storage_file = self.index.partition_dir(user_id, project_id)
 
             token_count = sum(len((chunk.get("content") or "").split()) for chunk in chunks)
             summary_parts = [chunk.get("content", "")[:240] for chunk in chunks[:3] if chunk.get("content")]
@@ -163,48 +163,26 @@ class LiteContextEngine:
         Mencari potongan teks paling relevan menggunakan Semantic Search.
         """
         try:
-            all_chunks = []
-            user_files = [f for f in os.listdir(self.storage_path) if f.startswith(f"{user_id}_")]
-
-            if not user_files:
-                return []
-
-            for filename in user_files:
-                try:
-                    with open(os.path.join(self.storage_path, filename), "r", encoding="utf-8") as f:
-                        file_chunks = json.load(f)
-                        if project_id:
-                            file_chunks = [
-                                chunk for chunk in file_chunks
-                                if str(chunk.get("project_id") or "") == str(project_id)
-                            ]
-                        all_chunks.extend(file_chunks)
-                except Exception as load_err:
-                    logging.error(f"Gagal load chunk {filename}: {load_err}")
-                    continue
-
-            if not all_chunks:
-                return []
+            self.index.ensure_migrated(user_id)
+            project_filter = str(project_id) if project_id else None
 
             scored_chunks = []
             has_semantic = _get_embedder() is not None
 
             if has_semantic:
                 query_vector = self._get_embedding(query)
-                for chunk in all_chunks:
-                    if chunk.get("vector"):
-                        score = self._cosine_similarity(query_vector, chunk["vector"])
-                        if score > 0.25:
-                            scored_chunks.append((score, chunk))
+                scored_chunks = self.index.search(user_id, query_vector, k=k, project_id=project_filter, min_score=0.25)
 
             if len(scored_chunks) < k:
                 query_words = set(query.lower().split())
-                for chunk in all_chunks:
+                seen_contents = {c.get("content") for _, c in scored_chunks}
+                for chunk in self.index.iter_chunks(user_id, project_filter):
                     chunk_words = set(chunk.get("content", "").lower().split())
                     intersect = query_words.intersection(chunk_words)
                     score = len(intersect) / len(query_words) if query_words else 0
-                    if score > 0.1 and not any(c["content"] == chunk["content"] for _, c in scored_chunks):
+                    if score > 0.1 and chunk.get("content") not in seen_contents:
                         scored_chunks.append((score * 0.5, chunk))
+                        seen_contents.add(chunk.get("content"))
 
             scored_chunks.sort(key=lambda x: x[0], reverse=True)
 
@@ -0,0 +1,336 @@
+"""
+Penyimpanan Research Graph: read-through cache + write-on-change.
+
+Graph per project adalah turunan dari dokumen `projects/<id>` (field setting
+penelitian) ditambah data manual yang ditulis lewat API (snapshot bab, teori,
+constraint hasil approval). Store ini:
+
+- Menyimpan graph yang sudah di-resync di LRU in-process dan (opsional) Redis,
+  dengan versi = update timestamp dokumen project. GET yang versinya cocok
+  dilayani dari cache tanpa membaca dokumen `research_graphs` dan tanpa write.
+- Saat dokumen project berubah, hanya seksi graph yang field sumbernya berubah
+  (hash per seksi, `source_hashes`) yang dibangun ulang; sisanya tetap.
+- Menulis ke Firestore hanya bila content hash graph berbeda dari yang
+  terakhir dipersist. Resync di jalur baca tidak pernah menulis: hasilnya
+  deterministik dari dokumen project + graph tersimpan, jadi cukup di-cache.
+
+Tanpa Redis, entri LRU divalidasi terhadap `content_hash` di dokumen graph
+(satu read) supaya worker gunicorn lain yang menulis tetap terlihat. Dengan Redis,
+key yang hilang dibaca ulang dari dokumen graph lalu di-seed kembali ke Redis + LRU.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+GRAPH_COLLECTION = "research_graphs"
+PROJECT_COLLECTION = "projects"
+GRAPH_CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_GRAPH_CACHE_TTL", "86400"))
+GRAPH_CACHE_LRU_SIZE = int(os.getenv("RESEARCH_GRAPH_CACHE_LRU_SIZE", "256"))
+
+# Seksi graph -> field dokumen project yang dibaca build_from_project untuk seksi itu
+SOURCE_SECTIONS = {
+    "metadata": ("title", "field_of_study", "academic_level", "methodology", "population_sample"),
+    "variables": ("variables_indicators", "variables"),
+    "rumusan_masalah": ("problem_statement",),
+    "hypotheses": ("hypothesis",),
+    "theories": ("theoretical_framework",),
+    "references": ("references",),
+}
+PROJECT_TIMESTAMP_FIELDS = ("lastUpdated", "updatedAt", "updated_at")
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def source_fingerprints(project_data: Dict[str, Any]) -> Dict[str, str]:
+    """Hash per seksi dari field project yang menjadi sumbernya."""
+    return {
+        section: _digest([project_data.get(field) for field in fields])
+        for section, fields in SOURCE_SECTIONS.items()
+    }
+
+
+def content_hash(graph) -> str:
+    """Hash isi graph; `updated_at` diabaikan karena berubah di setiap serialisasi."""
+    return _digest(graph.model_dump(exclude={"updated_at"}))
+
+
+def _project_version(snapshot, project_data: Dict[str, Any]) -> str:
+    update_time = getattr(snapshot, "update_time", None)
+    if update_time is not None:
+        return str(update_time)
+    for field in PROJECT_TIMESTAMP_FIELDS:
+        if project_data.get(field):
+            return str(project_data[field])
+    return _digest(source_fingerprints(project_data))
+
+
+def _graph_model():
+    from app.engines.research_graph import ResearchGraph
+
+    return ResearchGraph
+
+
+def _merge_full_rebuild(fresh, existing) -> None:
+    """Rebuild penuh (graph lama belum punya source_hashes): pertahankan snapshot bab & teori manual."""
+    for ch_id, snapshot in existing.chapter_snapshots.items():
+        if snapshot.status != "empty":
+            fresh.chapter_snapshots[ch_id] = snapshot
+    _merge_theories(fresh, existing)
+
+
+def _merge_theories(fresh, existing) -> None:
+    fresh_theory_names = {t.name.lower() for t in fresh.theories}
+    for theory in existing.theories:
+        if theory.name.lower() not in fresh_theory_names:
+            fresh.theories.append(theory)
+
+
+def _apply_section(graph, fresh, section: str) -> None:
+    """Salin satu seksi hasil build_from_project ke graph yang sudah ada."""
+    if section == "metadata":
+        for field in SOURCE_SECTIONS["metadata"]:
+            setattr(graph, field, getattr(fresh, field))
+        graph.constraints.locked_methodology = fresh.constraints.locked_methodology
+    elif section == "variables":
+        graph.variables = fresh.variables
+        graph.constraints.locked_variables = fresh.constraints.locked_variables
+    elif section == "theories":
+        auto_names = {t.name.lower() for t in fresh.theories}
+        manual = [t for t in graph.theories if t.name.lower() not in auto_names]
+        graph.theories = fresh.theories + manual
+    else:
+        setattr(graph, section, getattr(fresh, section))
+
+
+class ResearchGraphStore:
+    def __init__(
+        self,
+        db: Any,
+        redis_client: Any = None,
+        lru_size: int = GRAPH_CACHE_LRU_SIZE,
+        ttl_seconds: int = GRAPH_CACHE_TTL_SECONDS,
+    ):
+        self.db = db
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.lru = LRUCache(max_items=lru_size)
+        self.stats = {"hits": 0, "resyncs": 0, "writes": 0, "skipped_writes": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Cache tiers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _key(project_id: str) -> str:
+        return f"rgraph:{project_id}"
+
+    def _graph_ref(self, project_id: str):
+        return self.db.collection(GRAPH_COLLECTION).document(project_id)
+
+    def _entry_from_doc(self, project_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        graph = _graph_model().from_firestore_dict(data)
+        stored_hash = data.get("content_hash")
+        return {
+            "token": None,
+            "user_id": data.get("user_id"),
+            "project_version": data.get("project_version"),
+            "source_hashes": data.get("source_hashes") or {},
+            "persisted_hash": stored_hash,
+            "content_hash": stored_hash or content_hash(graph),
+            "graph": graph,
+        }
+
+    def _read_persisted(self, project_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._graph_ref(project_id).get()
+        if not doc.exists:
+            return None
+        return self._entry_from_doc(project_id, doc.to_dict())
+
+    def _cached_entry(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Entri terbaru yang diketahui: LRU bila tokennya cocok dengan tier bersama."""
+        entry = self.lru.get(project_id)
+        if self.redis is None:
+            persisted = self._read_persisted(project_id)
+            if persisted is None:
+                # Belum pernah dipersist: entri LRU hasil resync tetap valid
+                return entry if entry is not None and entry["persisted_hash"] is None else None
+            if entry is not None and entry["persisted_hash"] == persisted["persisted_hash"]:
+                return entry
+            self.lru.set(project_id, persisted)
+            return persisted
+
+        try:
+            token = self.redis.get(f"{self._key(project_id)}:token")
+            raw = None
+            if token is not None:
+                token = token.decode() if isinstance(token, bytes) else token
+                if entry is not None and entry["token"] == token:
+                    return entry
+                raw = self.redis.get(self._key(project_id))
+        except Exception as exc:
+            logger.warning("Research graph cache read failed: %s", exc)
+            self.stats["errors"] += 1
+            return self._read_persisted(project_id)
+        if not raw:
+            return self._reseed(project_id)
+        payload = json.loads(raw)
+        payload["graph"] = _graph_model().from_firestore_dict(payload["graph"])
+        self.lru.set(project_id, payload)
+        return payload
+
+    def _reseed(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Redis kosong (restart, flush, TTL habis): dokumen graph tersimpan adalah sumber
+        kebenaran. Tanpa ini load() membangun ulang dari dokumen project saja dan save()
+        berikutnya menimpa snapshot bab, teori manual, variabel, dan constraint.
+        """
+        persisted = self._read_persisted(project_id)
+        if persisted is not None:
+            self._remember(project_id, persisted)
+        return persisted
+
+    def _remember(self, project_id: str, entry: Dict[str, Any]) -> None:
+        entry["token"] = uuid.uuid4().hex
+        self.lru.set(project_id, entry)
+        if self.redis is None:
+            return
+        payload = dict(entry, graph=entry["graph"].model_dump())
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(self._key(project_id), self.ttl_seconds, json.dumps(payload, default=str))
+            pipe.setex(f"{self._key(project_id)}:token", self.ttl_seconds, entry["token"])
+            pipe.execute()
+        except Exception as exc:
+            logger.warning("Research graph cache write failed: %s", exc)
+            self.stats["errors"] += 1
+
+    def invalidate(self, project_id: str) -> None:
+        self.lru.pop(project_id)
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._key(project_id), f"{self._key(project_id)}:token")
+            except Exception as exc:
+                logger.warning("Research graph cache invalidate failed: %s", exc)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def load(self, project_id: str, user_id: str):
+        """
+        Graph yang sudah di-resync dengan setting project terbaru. Tidak pernah menulis
+        ke Firestore. Hasilnya salinan, aman dimutasi caller sebelum `save`.
+        """
+        ResearchGraph = _graph_model()
+        proj_doc = self.db.collection(PROJECT_COLLECTION).document(project_id).get()
+        proj_data = proj_doc.to_dict() if proj_doc.exists else None
+
+        if not proj_data or proj_data.get("userId") != user_id:
+            # Project tidak ada / bukan milik user: graph tersimpan apa adanya, atau kosong
+            entry = self._cached_entry(project_id)
+            if entry and entry["user_id"] == user_id:
+                return entry["graph"].model_copy(deep=True)
+            return ResearchGraph(project_id=project_id, user_id=user_id)
+
+        version = _project_version(proj_doc, proj_data)
+        entry = self._cached_entry(project_id)
+        if entry and entry["user_id"] != user_id:
+            entry = None
+        if entry and entry["project_version"] == version:
+            self.stats["hits"] += 1
+            return entry["graph"].model_copy(deep=True)
+
+        self.stats["resyncs"] += 1
+        source_hashes = source_fingerprints(proj_data)
+        fresh = ResearchGraph.build_from_project(proj_data, project_id, user_id)
+        if entry is None:
+            graph = fresh
+        elif not entry["source_hashes"]:
+            graph = fresh
+            _merge_full_rebuild(graph, entry["graph"])
+        else:
+            graph = entry["graph"].model_copy(deep=True)
+            changed = [s for s, h in source_hashes.items() if entry["source_hashes"].get(s) != h]
+            for section in changed:
+                _apply_section(graph, fresh, section)
+            if changed:
+                logger.info(f"🔄 Research Graph re-synced for project {project_id}: {', '.join(changed)}")
+
+        self._remember(project_id, {
+            "user_id": user_id,
+            "project_version": version,
+            "source_hashes": source_hashes,
+            "persisted_hash": entry["persisted_hash"] if entry else None,
+            "content_hash": content_hash(graph),
+            "graph": graph,
+        })
+        return graph.model_copy(deep=True)
+
+    def save(self, graph, source_hashes: Optional[Dict[str, str]] = None) -> bool:
+        """Persist graph bila isinya berubah. Return True kalau benar-benar menulis."""
+        project_id = graph.project_id
+        new_hash = content_hash(graph)
+        entry = self.lru.get(project_id)
+        if entry is not None and entry["user_id"] != graph.user_id:
+            entry = None
+        if source_hashes is None:
+            source_hashes = entry["source_hashes"] if entry else {}
+        project_version = entry["project_version"] if entry and source_hashes == entry["source_hashes"] else None
+
+        if entry is not None and entry["persisted_hash"] == new_hash and entry["source_hashes"] == source_hashes:
+            self.stats["skipped_writes"] += 1
+            return False
+
+        data = graph.to_firestore_dict()
+        data.update({
+            "content_hash": new_hash,
+            "source_hashes": source_hashes,
+            "project_version": project_version,
+        })
+        self._graph_ref(project_id).set(data)
+        self.stats["writes"] += 1
+        self._remember(project_id, {
+            "user_id": graph.user_id,
+            "project_version": project_version,
+            "source_hashes": source_hashes,
+            "persisted_hash": new_hash,
+            "content_hash": new_hash,
+            "graph": graph.model_copy(deep=True),
+        })
+        return True
+
+
+_stores: Dict[int, ResearchGraphStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _default_redis():
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        return None
+    try:
+        import redis
+
+        return redis.from_url(redis_url)
+    except Exception as exc:
+        logger.warning("Research graph cache: Redis unavailable (%s), LRU only", exc)
+        return None
+
+
+def get_research_graph_store(db: Any) -> ResearchGraphStore:
+    """Satu store per klien Firestore per proses, supaya LRU dipakai bersama antar request."""
+    with _stores_lock:
+        store = _stores.get(id(db))
+        if store is None or store.db is not db:
+            store = _stores[id(db)] = ResearchGraphStore(db, redis_client=_default_redis())
+        return store
@@ -4,6 +4,7 @@
 import logging
 from app.utils import stats_utils
 from app.utils.data_engine import OnThesisDataset
+from app.services.analysis_cache import get_analysis_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,7 @@ class StatEngine:
     
     def __init__(self):
         self.dataset = None
+        self.dataset_version = None
         self.reload_data()
         
     @classmethod
@@ -19,19 +21,41 @@ class StatEngine:
         if cls._instance is None:
             cls._instance = StatEngine()
         else:
-            # Always reload data to ensure freshness
-            cls._instance.reload_data()
+            # Reload hanya bila isi dataset berubah (cek versi dari meta.json, tanpa baca CSV)
+            cls._instance.refresh()
         return cls._instance
+
+    def refresh(self):
+        try:
+            version = OnThesisDataset.load(user_id="guest", project_id="default", load_data=False).content_version()
+        except Exception:
+            version = None
+        if version is None or version != self.dataset_version:
+            self.reload_data()
     
     def reload_data(self):
         """Reload data from storage (assuming default user for single-user desktop app)"""
         try:
             # Load default project for guest/default user
             # Adjust user_id if authentication is fully implemented
+            # Versi dibaca sebelum data: edit yang menyusul di tengah load = versi baru, bukan hasil basi
+            version = OnThesisDataset.load(user_id="guest", project_id="default", load_data=False).content_version()
             self.dataset = OnThesisDataset.load(user_id="guest", project_id="default")
+            self.dataset_version = version
         except Exception as e:
             logger.warning(f"StatEngine: Failed to load dataset ({str(e)}). Initializing empty.")
             self.dataset = OnThesisDataset(user_id="guest")
+            self.dataset_version = None
+
+    def _run(self, analysis_id, func, params):
+        """Jalankan fungsi stats_utils lewat cache hasil (per versi dataset)."""
+        if not self.dataset_version:
+            return func(self.dataset, params)
+        result, _ = get_analysis_cache().get_or_compute(
+            self.dataset.user_id, self.dataset.project_id, self.dataset_version, analysis_id, params,
+            lambda: func(self.dataset, params),
+        )
+        return result
 
     @property
     def df(self):
@@ -42,9 +66,9 @@ class StatEngine:
     def descriptive_analysis(self, columns: list = None):
         """Run descriptive statistics"""
         if columns:
-            return stats_utils.run_descriptive_analysis(self.dataset, {'variables': columns})
+            return self._run('descriptive-analysis', stats_utils.run_descriptive_analysis, {'variables': columns})
         # If no columns specified, use numerical columns
-        return stats_utils.run_descriptive_analysis(self.dataset, {})
+        return self._run('descriptive-analysis', stats_utils.run_descriptive_analysis, {})
 
     def correlation_analysis(self, variables: list, method='pearson'):
         """Run correlation analysis"""
@@ -52,7 +76,7 @@ class StatEngine:
             'variables': variables,
             'method': method
         }
-        return stats_utils.run_correlation(self.dataset, params)
+        return self._run('correlation-analysis', stats_utils.run_correlation, params)
 
     def run_ttest(self, var1, var2, test_type='independent'):
         """Run T-Test (Independent or Paired)"""
@@ -62,14 +86,14 @@ class StatEngine:
                 'test_variable': var1,
                 'group_variable': var2
             }
-            return stats_utils.run_independent_ttest(self.dataset, params)
+            return self._run('independent-ttest', stats_utils.run_independent_ttest, params)
         else:
             # Paired
             params = {
                 'variable1': var1,
                 'variable2': var2
             }
-            return stats_utils.run_paired_ttest(self.dataset, params)
+            return self._run('paired-ttest', stats_utils.run_paired_ttest, params)
 
     def run_anova(self, dep_var, group_var):
         """Run One-Way ANOVA"""
@@ -77,7 +101,7 @@ class StatEngine:
             'dependent_variable': dep_var,
             'factor_variable': group_var
         }
-        return stats_utils.run_oneway_anova(self.dataset, params)
+        return self._run('oneway-anova', stats_utils.run_oneway_anova, params)
 
     def chi_square_test(self, var1, var2):
         """Run Chi-Square Test"""
@@ -85,7 +109,7 @@ class StatEngine:
             'row_variable': var1,
             'col_variable': var2
         }
-        return stats_utils.run_chi_square(self.dataset, params)
+        return self._run('chi-square', stats_utils.run_chi_square, params)
 
     def linear_regression(self, dep_var, indep_vars: list):
         """Run Linear Regression"""
@@ -93,11 +117,11 @@ class StatEngine:
             'dependent_variable': dep_var,
             'independent_variables': indep_vars
         }
-        return stats_utils.run_linear_regression(self.dataset, params)
+        return self._run('linear-regression', stats_utils.run_linear_regression, params)
 
     def reliability_analysis(self, items: list):
         """Run Reliability Analysis (Cronbach's Alpha)"""
         params = {
             'items': items
         }
-        return stats_utils.run_reliability_analysis(self.dataset, params)
+        return self._run('reliability', stats_utils.run_reliability_analysis, params)
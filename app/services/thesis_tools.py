@@ -496,27 +496,14 @@ def _search_references(args: dict, references_text: str, references_raw: list) -
         return {"error": "query is required"}
 
     # Translate query to English to match English abstracts/titles
-    import litellm  # type: ignore
+    # (dibagi dengan unified_search: cache + skip query Inggris + single-flight)
+    from app.utils.query_translation import translate_query
     original_query = query
-    english_query = query
-    try:
-        prompt = f"Translate this academic search query to English. Return only the translated query, nothing else:\n{query}"
-        resp = litellm.completion(
-            model="groq/llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        english_query = resp.choices[0].message.content.strip()
-        if english_query.startswith('"') and english_query.endswith('"'):
-            english_query = english_query[1:-1]
-        
-        # Remove trailing punctuation that might break string matching
-        english_query = english_query.replace(".", "").replace("?", "").replace("!", "")
-        
-        print(f"[TRANSLATE - THESIS TOOLS] \"{original_query}\" -> \"{english_query}\"")
-        query = english_query.lower()
-    except Exception as e:
-        print(f"Translation error: {e}")
+    translated = translate_query(query)
+    # Remove trailing punctuation that might break string matching
+    english_query = translated.replace(".", "").replace("?", "").replace("!", "")
+    print(f"[TRANSLATE - THESIS TOOLS] \"{original_query}\" -> \"{english_query}\" ({translated.reason})")
+    query = english_query.lower()
 
     # Search in raw references list if available
     if references_raw:
@@ -0,0 +1,455 @@
+"""
+Index vektor lokal per user/project berbasis matriks float32 yang di-mmap.
+
+Setiap partisi (user, project) tinggal di `<storage>/index/<partisi>/`:
+
+- `vectors.<seg>.npy`  : segmen matriks float32 kontigu (n x dim), baris sudah dinormalisasi L2
+- `chunks.<seg>.json`  : side table metadata chunk segmen itu (tanpa field `vector`)
+- `manifest.json`      : generasi, dim, daftar segmen [seg, baris], rentang baris global per dokumen
+- `.migrated.<user>`   : (di root index) penanda migrasi file JSON lama user sudah selesai
+
+Upsert hanya menulis satu segmen baru berisi chunk dokumen itu, lalu mengganti
+manifest secara atomik (os.replace); segmen lama tidak disentuh, jadi biaya append
+sebanding dengan ukuran dokumen, bukan ukuran index. Delete hanya menghapus rentang
+dokumen dari manifest (tombstone). Compaction (tulis ulang semua baris hidup ke satu
+segmen, O(ukuran index)) berjalan saat baris mati melewati VECTOR_INDEX_COMPACT_RATIO
+atau jumlah segmen melewati VECTOR_INDEX_MAX_SEGMENTS. Pembaca yang masih memegang
+mmap lama tetap konsisten. Search = satu perkalian matriks-vektor per segmen + argpartition.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager, suppress
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock antar-proses tidak tersedia
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+INDEX_DIRNAME = "index"
+NO_PROJECT = "_"
+COMPACT_DEAD_RATIO = float(os.getenv("VECTOR_INDEX_COMPACT_RATIO", "0.25"))
+MAX_SEGMENTS = int(os.getenv("VECTOR_INDEX_MAX_SEGMENTS", "16"))
+_SEGMENT_FILE = re.compile(r"^(?:vectors\.(\d+)\.npy|chunks\.(\d+)\.json)$")
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_.-]+", "-", str(value or "")) or NO_PROJECT
+
+
+def legacy_doc_key(user_id: str, doc_id: str, project_id: str = "") -> str:
+    """Nama dokumen sama dengan nama file JSON lama (tanpa .json), agar re-index menimpa entri yang sama."""
+    return f"{user_id}_{project_id}_{doc_id}" if project_id else f"{user_id}_{doc_id}"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _segments(manifest: Dict) -> List[Tuple[int, int]]:
+    """[(seg, baris)]; manifest format lama (satu matriks per generasi) = satu segmen."""
+    if "segments" in manifest:
+        return [(int(seg), int(rows)) for seg, rows in manifest["segments"]]
+    count = int(manifest.get("count") or 0)
+    return [(int(manifest["generation"]), count)] if count else []
+
+
+def _load_matrix(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # mmap menolak array berukuran nol (partisi kosong / keyword-only)
+        return np.load(path)
+
+
+class _Partition:
+    """Snapshot read-only satu partisi: mmap segmen matriks + metadata + mask baris hidup."""
+
+    def __init__(self, stamp, manifest: Dict, segments: List[np.ndarray], chunks: List[Dict]):
+        self.stamp = stamp
+        self.manifest = manifest
+        self.segments = segments
+        self.chunks = chunks
+        alive = np.zeros(len(chunks), dtype=bool)
+        for start, stop in manifest.get("docs", {}).values():
+            alive[start:stop] = True
+        self.alive = alive
+        self.live_rows = np.flatnonzero(alive)
+
+    @property
+    def dim(self) -> int:
+        return int(self.manifest.get("dim") or 0)
+
+    def live_chunks(self) -> Iterable[Tuple[int, Dict]]:
+        for row in self.live_rows:
+            yield int(row), self.chunks[row]
+
+    def scores(self, unit_query: Optional[np.ndarray]) -> np.ndarray:
+        """Skor cosine baris hidup (sejajar `live_rows`); query harus sudah dinormalisasi."""
+        if unit_query is None or self.dim != unit_query.size or not self.segments:
+            return np.zeros(self.live_rows.size, dtype=np.float32)
+        # Segmen keyword-only yang ditulis sebelum partisi punya dim berbentuk (n, 0): skor 0
+        scores = np.concatenate([
+            segment @ unit_query if segment.shape[1] == unit_query.size else np.zeros(len(segment), dtype=np.float32)
+            for segment in self.segments
+        ])
+        return scores if self.live_rows.size == scores.size else scores[self.live_rows]
+
+
+class VectorIndex:
+    def __init__(self, storage_path: str = "instance/vector_store"):
+        self.storage_path = storage_path
+        self.root = os.path.join(storage_path, INDEX_DIRNAME)
+        os.makedirs(self.root, exist_ok=True)
+        self._snapshots: Dict[str, _Partition] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._migrated_users = set()
+
+    # ------------------------------------------------------------------ layout
+
+    def partition_name(self, user_id: str, project_id: str = "") -> str:
+        return f"{_slug(user_id)}__{_slug(project_id) if project_id else NO_PROJECT}"
+
+    def partition_dir(self, user_id: str, project_id: str = "") -> str:
+        return os.path.join(self.root, self.partition_name(user_id, project_id))
+
+    def user_partitions(self, user_id: str, project_id: Optional[str] = None) -> List[str]:
+        if project_id:
+            name = self.partition_name(user_id, project_id)
+            return [name] if os.path.isdir(os.path.join(self.root, name)) else []
+        prefix = f"{_slug(user_id)}__"
+        try:
+            return sorted(name for name in os.listdir(self.root) if name.startswith(prefix))
+        except FileNotFoundError:
+            return []
+
+    # ----------------------------------------------------------------- reading
+
+    def _read_manifest(self, directory: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, name: str) -> Optional[_Partition]:
+        directory = os.path.join(self.root, name)
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            self._snapshots.pop(name, None)
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._snapshots.get(name)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        manifest = self._read_manifest(directory)
+        if manifest is None:
+            return None
+        segments: List[np.ndarray] = []
+        chunks: List[Dict] = []
+        try:
+            for seg, rows in _segments(manifest):
+                segments.append(_load_matrix(os.path.join(directory, f"vectors.{seg}.npy"))[:rows])
+                with open(os.path.join(directory, f"chunks.{seg}.json"), "r", encoding="utf-8") as f:
+                    chunks.extend(json.load(f)[:rows])
+        except (FileNotFoundError, ValueError) as exc:
+            logger.warning("Vector index partition %s unreadable: %s", name, exc)
+            return None
+        snapshot = _Partition(stamp, manifest, segments, chunks)
+        self._snapshots[name] = snapshot
+        return snapshot
+
+    def partitions(self, user_id: str, project_id: Optional[str] = None) -> List[_Partition]:
+        loaded = (self._load(name) for name in self.user_partitions(user_id, project_id))
+        return [snapshot for snapshot in loaded if snapshot is not None]
+
+    def iter_chunks(self, user_id: str, project_id: Optional[str] = None) -> Iterable[Dict]:
+        for snapshot in self.partitions(user_id, project_id):
+            for _, chunk in snapshot.live_chunks():
+                yield chunk
+
+    def score_all(
+        self, user_id: str, query_vector: Sequence[float], project_id: Optional[str] = None
+    ) -> Tuple[np.ndarray, List[Dict]]:
+        """Skor cosine untuk semua chunk hidup, urutan sejajar dengan list chunk.
+
+        Chunk tanpa vektor disimpan sebagai baris nol, jadi skornya otomatis 0.0.
+        """
+        snapshots, scores = self._score_partitions(user_id, query_vector, project_id)
+        chunks = [snapshot.chunks[row] for snapshot in snapshots for row in snapshot.live_rows]
+        return scores, chunks
+
+    def _score_partitions(self, user_id, query_vector, project_id) -> Tuple[List[_Partition], np.ndarray]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query)) if query.size else 0.0
+        unit_query = query / query_norm if query_norm > 0 else None
+        snapshots = [snapshot for snapshot in self.partitions(user_id, project_id) if snapshot.live_rows.size]
+        if not snapshots:
+            return [], np.zeros(0, dtype=np.float32)
+        return snapshots, np.concatenate([snapshot.scores(unit_query) for snapshot in snapshots])
+
+    def search(
+        self,
+        user_id: str,
+        query_vector: Sequence[float],
+        k: int = 5,
+        project_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[float, Dict]]:
+        snapshots, scores = self._score_partitions(user_id, query_vector, project_id)
+        if not snapshots or k <= 0:
+            return []
+        if min_score is not None:
+            candidates = np.flatnonzero(scores > min_score)
+        else:
+            candidates = np.arange(scores.size)
+        if candidates.size > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        # Petakan posisi global kembali ke (partisi, baris) hanya untuk top-k.
+        offsets = np.cumsum([0] + [snapshot.live_rows.size for snapshot in snapshots])
+        results = []
+        for position in ordered:
+            part = int(np.searchsorted(offsets, position, side="right")) - 1
+            snapshot = snapshots[part]
+            row = snapshot.live_rows[position - offsets[part]]
+            results.append((float(scores[position]), snapshot.chunks[row]))
+        return results
+
+    # ----------------------------------------------------------------- writing
+
+    @contextmanager
+    def _write_lock(self, directory: str):
+        with self._guard:
+            lock = self._locks.setdefault(directory, threading.Lock())
+        with lock:
+            os.makedirs(directory, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, ".lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_segment(self, directory: str, seg: int, vectors: np.ndarray, chunks: List[Dict]) -> None:
+        vectors_path = os.path.join(directory, f"vectors.{seg}.npy")
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(vectors_path + ".tmp", vectors_path)
+
+        chunks_path = os.path.join(directory, f"chunks.{seg}.json")
+        with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        os.replace(chunks_path + ".tmp", chunks_path)
+
+    def _commit(self, directory: str, manifest: Dict) -> None:
+        """Compaction bila perlu, ganti manifest secara atomik, lalu hapus segmen yang tidak dirujuk."""
+        manifest = self._maybe_compact(directory, manifest)
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        live = {seg for seg, _ in _segments(manifest)}
+        for filename in os.listdir(directory):
+            match = _SEGMENT_FILE.match(filename)
+            if match and int(match.group(1) or match.group(2)) not in live:
+                with suppress(OSError):
+                    os.remove(os.path.join(directory, filename))
+
+    def _current(self, directory: str) -> Dict:
+        manifest = self._read_manifest(directory)
+        if manifest is None:
+            return {"generation": 0, "dim": 0, "count": 0, "docs": {}, "segments": []}
+        return dict(manifest, segments=[list(item) for item in _segments(manifest)])
+
+    def _read_rows(self, directory: str, manifest: Dict) -> Tuple[np.ndarray, List[Dict]]:
+        """Semua baris partisi sebagai satu matriks (count x dim); hanya untuk compaction."""
+        dim = int(manifest.get("dim") or 0)
+        vectors = np.zeros((int(manifest.get("count") or 0), dim), dtype=np.float32)
+        rows: List[Dict] = []
+        for seg, count in _segments(manifest):
+            segment = _load_matrix(os.path.join(directory, f"vectors.{seg}.npy"))[:count]
+            if segment.shape[1] == dim:
+                vectors[len(rows):len(rows) + count] = segment
+            with open(os.path.join(directory, f"chunks.{seg}.json"), "r", encoding="utf-8") as f:
+                rows.extend(json.load(f)[:count])
+        return vectors, rows
+
+    def upsert_document(self, user_id: str, doc_key: str, chunks: Sequence[Dict], project_id: str = "") -> int:
+        """Ganti semua chunk milik `doc_key` dengan `chunks` (field `vector` boleh kosong = keyword only)."""
+        # Migrasi file JSON lama dulu, supaya dokumen baru tidak menutupi dokumen lama user
+        self.ensure_migrated(user_id)
+        return self._upsert(user_id, doc_key, chunks, project_id)
+
+    def _upsert(self, user_id: str, doc_key: str, chunks: Sequence[Dict], project_id: str = "") -> int:
+        directory = self.partition_dir(user_id, project_id)
+        with self._write_lock(directory):
+            manifest = self._current(directory)
+            docs = dict(manifest.get("docs") or {})
+            docs.pop(doc_key, None)
+
+            dim = int(manifest.get("dim") or 0)
+            if not dim:
+                dim = next((len(c["vector"]) for c in chunks if c.get("vector")), 0)
+
+            new_vectors = np.zeros((len(chunks), dim), dtype=np.float32)
+            new_rows = []
+            for position, chunk in enumerate(chunks):
+                meta = {key: value for key, value in chunk.items() if key != "vector"}
+                vector = chunk.get("vector") or []
+                if dim and len(vector) == dim:
+                    new_vectors[position] = vector
+                elif vector:
+                    logger.warning("Vector index %s: dim %s != %s, chunk disimpan tanpa vektor", doc_key, len(vector), dim)
+                new_rows.append(meta)
+
+            gen = int(manifest["generation"]) + 1
+            start = int(manifest.get("count") or 0)
+            segments = manifest["segments"]
+            if new_rows:
+                self._write_segment(directory, gen, _normalize_rows(new_vectors), new_rows)
+                segments = segments + [[gen, len(new_rows)]]
+            docs[doc_key] = [start, start + len(new_rows)]
+            self._commit(directory, {
+                "generation": gen,
+                "dim": dim,
+                "count": start + len(new_rows),
+                "docs": docs,
+                "segments": segments,
+            })
+        return len(new_rows)
+
+    def delete_document(self, user_id: str, doc_key: str, project_id: str = "") -> bool:
+        directory = self.partition_dir(user_id, project_id)
+        if not os.path.isdir(directory):
+            return False
+        with self._write_lock(directory):
+            manifest = self._current(directory)
+            docs = dict(manifest.get("docs") or {})
+            if docs.pop(doc_key, None) is None:
+                return False
+            self._commit(directory, dict(manifest, generation=int(manifest["generation"]) + 1, docs=docs))
+        return True
+
+    def _maybe_compact(self, directory: str, manifest: Dict) -> Dict:
+        count = int(manifest.get("count") or 0)
+        live = sum(stop - start for start, stop in manifest["docs"].values())
+        too_dead = count and (count - live) / count > COMPACT_DEAD_RATIO
+        if not too_dead and len(manifest["segments"]) <= MAX_SEGMENTS:
+            return manifest
+        vectors, rows = self._read_rows(directory, manifest)
+        keep: List[int] = []
+        docs = {}
+        for doc_key, (start, stop) in sorted(manifest["docs"].items(), key=lambda item: item[1][0]):
+            docs[doc_key] = [len(keep), len(keep) + (stop - start)]
+            keep.extend(range(start, stop))
+        gen = int(manifest["generation"]) + 1
+        segments = []
+        if keep:
+            self._write_segment(directory, gen, vectors[np.asarray(keep, dtype=np.int64)], [rows[i] for i in keep])
+            segments = [[gen, len(keep)]]
+        return dict(manifest, generation=gen, count=len(keep), docs=docs, segments=segments)
+
+    # --------------------------------------------------------------- migration
+
+    def migrate_json_store(self, user_id: Optional[str] = None, remove_legacy: bool = False) -> Dict[str, int]:
+        """
+        Impor file `<user>_*.json` lama di storage_path ke index. Aman dijalankan berulang:
+        dokumen yang sudah ada di index dilewati (versi index selalu lebih baru, karena file
+        JSON lama tidak ditulis lagi).
+        """
+        report = {"files": 0, "chunks": 0, "errors": 0, "skipped": 0}
+        try:
+            filenames = sorted(f for f in os.listdir(self.storage_path) if f.endswith(".json"))
+        except FileNotFoundError:
+            return report
+        if user_id is not None:
+            filenames = [f for f in filenames if f.startswith(f"{user_id}_")]
+
+        for filename in filenames:
+            path = os.path.join(self.storage_path, filename)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    chunks = json.load(f)
+            except Exception as exc:
+                logger.error("Gagal migrasi chunk %s: %s", filename, exc)
+                report["errors"] += 1
+                continue
+            if not isinstance(chunks, list):
+                continue
+            doc_key = filename[: -len(".json")]
+            first = chunks[0] if chunks else {}
+            owner = str(first.get("user_id") or user_id or doc_key.split("_", 1)[0])
+            project_id = str(first.get("project_id") or "")
+            existing = self._read_manifest(self.partition_dir(owner, project_id)) or {}
+            if doc_key in (existing.get("docs") or {}):
+                report["skipped"] += 1
+            else:
+                self._upsert(owner, doc_key, chunks, project_id=project_id)
+                report["files"] += 1
+                report["chunks"] += len(chunks)
+            if remove_legacy:
+                with suppress(OSError):
+                    os.remove(path)
+        return report
+
+    def _migration_marker(self, user_id: str) -> str:
+        return os.path.join(self.root, f".migrated.{_slug(user_id)}")
+
+    def ensure_migrated(self, user_id: str) -> None:
+        """
+        Migrasi lazy file JSON lama milik user. Selesai = penanda `.migrated.<user>` ditulis;
+        migrasi yang gagal (exception / file rusak) dicoba lagi di pemanggilan berikutnya.
+        """
+        if user_id in self._migrated_users:
+            return
+        marker = self._migration_marker(user_id)
+        if not os.path.exists(marker):
+            try:
+                report = self.migrate_json_store(user_id=user_id)
+            except Exception as exc:
+                logger.warning("Vector index: migration for user %s failed, will retry: %s", user_id, exc)
+                return
+            if report["files"]:
+                logger.info("Vector index: migrated %s legacy file(s) for user %s", report["files"], user_id)
+            if report["errors"]:
+                logger.warning("Vector index: %s legacy file(s) for user %s failed, will retry", report["errors"], user_id)
+                return
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write("1")
+        self._migrated_users.add(user_id)
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(storage_path: str = "instance/vector_store") -> VectorIndex:
+    """Satu VectorIndex per storage_path per proses, supaya cache snapshot mmap dipakai bersama."""
+    key = os.path.abspath(storage_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VectorIndex(storage_path)
+        return index
@@ -0,0 +1,114 @@
+# File: app/utils/columnar_store.py
+# Deskripsi: Format snapshot dataset kolumnar: satu file .npy per kolom + schema.json.
+# Kolom numerik/bool/datetime disimpan apa adanya (dtype terjaga, bisa di-mmap tanpa
+# parse teks); kolom teks/kategori disimpan sebagai kode integer + daftar kategori,
+# sehingga encoding kategori (termasuk urutan) tidak hilang. Bisa membaca sebagian kolom.
+# Tanpa dependensi baru (pyarrow tidak dibutuhkan); CSV tetap jalur import/export.
+
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+SCHEMA_FILE = "schema.json"
+
+KIND_ARRAY = "array"        # ndarray numpy mentah (int/float/bool/datetime)
+KIND_CODES = "codes"        # kode int32 + kategori (teks, campuran, extension dtype)
+KIND_CATEGORY = "category"  # pd.Categorical: kode + kategori + flag ordered
+
+
+def _json_scalar(value: Any) -> Any:
+    if isinstance(value, (bool, np.bool_)): return bool(value)
+    if isinstance(value, (int, np.integer)): return int(value)
+    if isinstance(value, (float, np.floating)): return float(value)
+    if isinstance(value, str): return value
+    return str(value)
+
+
+def _encode_column(series: pd.Series) -> Dict[str, Any]:
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+        return {"kind": KIND_ARRAY, "values": series.to_numpy()}
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {
+            "kind": KIND_CATEGORY,
+            "values": series.cat.codes.to_numpy().astype(np.int32),
+            "categories": [_json_scalar(v) for v in dtype.categories],
+            "ordered": bool(dtype.ordered),
+        }
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return {"kind": KIND_CODES, "values": codes.astype(np.int32), "categories": [_json_scalar(v) for v in uniques]}
+
+
+def _decode_column(spec: Dict[str, Any], values: np.ndarray):
+    kind = spec["kind"]
+    if kind == KIND_ARRAY:
+        # ndarray biasa di atas buffer mmap: subclass np.memmap tidak ikut menyebar ke pandas
+        return values.view(np.ndarray) if isinstance(values, np.memmap) else values
+    if kind == KIND_CATEGORY:
+        dtype = pd.CategoricalDtype(spec["categories"], ordered=spec.get("ordered", False))
+        return pd.Categorical.from_codes(np.asarray(values), dtype=dtype)
+    lookup = np.empty(len(spec["categories"]) + 1, dtype=object)
+    lookup[:-1] = spec["categories"]
+    lookup[-1] = np.nan  # kode -1 = missing
+    decoded = lookup[values]
+    if spec["dtype"] in ("object", "str"):
+        return decoded  # pandas menebak sendiri (str bila semua teks, object bila campuran)
+    try:
+        return pd.array(decoded).astype(spec["dtype"])
+    except (TypeError, ValueError):
+        return decoded
+
+
+def write_snapshot(df: pd.DataFrame, directory: str) -> Dict[str, Any]:
+    """Tulis df ke `directory` (dibuat baru, atomic via rename direktori sementara)."""
+    tmp_dir = f"{directory}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    try:
+        columns = []
+        for position, name in enumerate(df.columns):
+            encoded = _encode_column(df.iloc[:, position])
+            file_name = f"{position}.npy"
+            np.save(os.path.join(tmp_dir, file_name), np.ascontiguousarray(encoded.pop("values")), allow_pickle=False)
+            columns.append({"name": str(name), "file": file_name, "dtype": str(df.dtypes.iloc[position]), **encoded})
+        schema = {"format": FORMAT_VERSION, "rows": int(len(df)), "columns": columns}
+        with open(os.path.join(tmp_dir, SCHEMA_FILE), "w", encoding="utf-8") as f:
+            json.dump(schema, f)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+        return schema
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_schema(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def column_names(schema: Dict[str, Any]) -> List[str]:
+    return [spec["name"] for spec in schema["columns"]]
+
+
+def read_snapshot(directory: str, columns: Optional[Sequence[str]] = None, mmap: bool = True,
+                  schema: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Baca snapshot (semua kolom, atau hanya `columns` sesuai urutan di snapshot). Dengan mmap,
+    kolom numerik adalah view read-only langsung ke file: tidak ada parse dan tidak disalin.
+    """
+    schema = schema or read_schema(directory)
+    wanted = set(columns) if columns is not None else None
+    data = {}
+    for spec in schema["columns"]:
+        if wanted is not None and spec["name"] not in wanted:
+            continue
+        values = np.load(os.path.join(directory, spec["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        data[spec["name"]] = _decode_column(spec, values)
+    return pd.DataFrame(data, index=pd.RangeIndex(schema["rows"]), copy=False)
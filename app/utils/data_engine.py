@@ -1,6 +1,12 @@
 # File: app/utils/data_engine.py
 # Deskripsi: Engine Data Processing dengan Optimasi Local-First Strategy.
 # Updated: Menambahkan flag 'local_only' pada save() untuk performa real-time editing.
+# Updated: Edit cell ditulis sebagai delta ke edits.jsonl (append-only) di atas snapshot
+#          data.csv; compaction periodik + cloud sync yang di-debounce, replay saat load.
+# Updated: Frame hasil load dibagi lewat DatasetRegistry per versi isi; mutasi copy-on-write.
+# Updated: Snapshot default kolumnar (columns/<gen>/, lihat columnar_store): dtype & kategori
+#          terjaga, kolom numerik di-mmap, bisa load sebagian kolom. data.csv = format lama.
+# Updated: Cloud sync per blok baris + manifest (dataset_cloud_sync), hanya blok yang berubah.
 
 import pandas as pd
 import numpy as np
@@ -9,9 +15,16 @@ import uuid
 import io
 import os
 import re
+import shutil
+import threading
+import time
 from datetime import datetime
+import gevent
 from firebase_admin import firestore
 
+from app.utils import columnar_store, data_view, dataset_cloud_sync
+from app.utils.dataset_registry import get_registry
+
 # --- KONFIGURASI LOCAL STORAGE (FALLBACK) ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOCAL_STORAGE_PATH = os.path.abspath(os.path.join(BASE_DIR, '../../instance/user_data'))
@@ -19,6 +32,40 @@ LOCAL_STORAGE_PATH = os.path.abspath(os.path.join(BASE_DIR, '../../instance/user
 if not os.path.exists(LOCAL_STORAGE_PATH):
     os.makedirs(LOCAL_STORAGE_PATH)
 
+# --- FORMAT SNAPSHOT ---
+# "columnar" (default): satu .npy per kolom + schema.json; "csv": data.csv seperti dulu.
+# Project lama dengan data.csv tetap terbaca dan pindah ke format ini di save berikutnya.
+DATASET_STORAGE_FORMAT = os.getenv("DATASET_STORAGE_FORMAT", "columnar")
+
+# --- KONFIGURASI EDIT LOG ---
+# Setiap edit cell = 1 baris JSON di edits.jsonl (O(1) I/O), bukan tulis ulang seluruh CSV.
+# Setelah COMPACT_EVERY_EDITS delta, log di-compact ke snapshot data.csv yang baru.
+COMPACT_EVERY_EDITS = int(os.getenv("DATASET_COMPACT_EVERY_EDITS", "500"))
+# Cloud sync otomatis setelah edit berhenti selama DEBOUNCE detik (0 = nonaktif),
+# tapi paling lambat MAX_WAIT detik sejak edit pertama yang belum ter-sync.
+CLOUD_SYNC_DEBOUNCE_S = float(os.getenv("DATASET_CLOUD_SYNC_DEBOUNCE_S", "10"))
+CLOUD_SYNC_MAX_WAIT_S = float(os.getenv("DATASET_CLOUD_SYNC_MAX_WAIT_S", "60"))
+
+_cloud_sync_pending = {}  # (user_id, project_id) -> (greenlet, waktu edit pertama)
+_cloud_sync_lock = threading.Lock()
+
+
+def _flush_cloud_sync(user_id, project_id):
+    """Satu sync untuk semua edit yang terkumpul: load (replay log) lalu compact + push ke Firestore."""
+    with _cloud_sync_lock:
+        _cloud_sync_pending.pop((user_id, project_id), None)
+    try:
+        OnThesisDataset.load(user_id, project_id).save(sync_to_cloud=True)
+    except Exception as e:
+        print(f"⚠️ Debounced Cloud Sync Failed: {e}")
+
+
+def _cancel_cloud_sync(user_id, project_id):
+    with _cloud_sync_lock:
+        pending = _cloud_sync_pending.pop((user_id, project_id), None)
+    if pending:
+        pending[0].kill(block=False)
+
 # --- Helper: Konversi Tipe Data Agresif ---
 def safe_value(val):
     if pd.isna(val): return None
@@ -107,6 +154,18 @@ class OnThesisDataset:
         self.local_dir = os.path.join(LOCAL_STORAGE_PATH, self.user_id, self.project_id)
         self.local_data_path = os.path.join(self.local_dir, "data.csv")
         self.local_meta_path = os.path.join(self.local_dir, "meta.json")
+        self.local_edit_log_path = os.path.join(self.local_dir, "edits.jsonl")
+        self.local_columns_dir = os.path.join(self.local_dir, "columns")
+
+        # Generasi snapshot data.csv; delta di edit log hanya berlaku untuk generasi yang sama
+        self.base_gen = None
+        self.pending_edits = 0
+        # Revisi meta.json; berganti di setiap tulis meta (save penuh atau edit metadata)
+        self.meta_rev = None
+        # Versi isi yang persis diwakili self.df (None = tidak diketahui, jangan dibagi), dan
+        # apakah self.df adalah view read-only dari DatasetRegistry (tulis = copy dulu)
+        self.version = None
+        self._shared = False
 
         if not self.df.empty: 
             self._normalize_column_names() 
@@ -114,6 +173,50 @@ class OnThesisDataset:
             # Initial save: Sync ke Cloud agar aman
             self.save(sync_to_cloud=True)
 
+    def _ensure_writable(self):
+        """Copy-on-write: frame bersama dari registry disalin sekali sebelum mutasi pertama."""
+        if self._shared:
+            self.df = self.df.copy()
+            self._shared = False
+
+    def _publish(self, version):
+        """Daftarkan self.df ke registry sebagai isi `version`; None = cukup lupakan versinya."""
+        self.version = version
+        if version and self.df is not None and not self.df.empty:
+            self.df = get_registry().put(self.user_id, self.project_id, version, self.df, self.pending_edits)
+            self._shared = True
+
+    def _snapshot_dir(self, gen=None):
+        gen = gen or self.base_gen
+        return os.path.join(self.local_columns_dir, gen) if gen else None
+
+    def _has_snapshot(self):
+        snapshot_dir = self._snapshot_dir()
+        return os.path.exists(self.local_data_path) or bool(snapshot_dir and os.path.isdir(snapshot_dir))
+
+    def _load_snapshot(self, columns=None):
+        """Isi self.df dari snapshot generasi base_gen: kolumnar bila ada, selain itu data.csv."""
+        snapshot_dir = self._snapshot_dir()
+        if snapshot_dir and os.path.isdir(snapshot_dir):
+            print(f"📂 [LOAD] Loading from Local (columnar): {snapshot_dir}")
+            self.df = columnar_store.read_snapshot(snapshot_dir, columns)
+            self._shared = True  # kolom numerik = mmap read-only; tulis = copy dulu
+            return
+        print(f"📂 [LOAD] Loading from Local: {self.local_data_path}")
+        self.df = pd.read_csv(self.local_data_path, low_memory=False)
+        self._normalize_column_names()
+        if columns is not None:
+            self.df = self.df[[c for c in self.df.columns if c in set(columns)]]
+
+    def _drop_stale_snapshots(self):
+        """Hapus snapshot generasi lain (mmap yang masih terbuka tetap valid di POSIX)."""
+        keep = self.base_gen if DATASET_STORAGE_FORMAT != 'csv' else None
+        if os.path.isdir(self.local_columns_dir):
+            for name in os.listdir(self.local_columns_dir):
+                if name != keep:
+                    shutil.rmtree(os.path.join(self.local_columns_dir, name), ignore_errors=True)
+        if keep and os.path.exists(self.local_data_path): os.remove(self.local_data_path)
+
     def _normalize_column_names(self):
         if self.df is None or self.df.empty: return
         new_columns = []
@@ -129,43 +232,65 @@ class OnThesisDataset:
             if col not in self.meta:
                 self.meta[col] = OnThesisVariableMetadata(col, self.df[col])
 
+    def _meta_export(self):
+        return {
+            'variables': {k: v.to_dict() for k, v in self.meta.items()},
+            'updated_at': datetime.now().isoformat(),
+            'row_count': len(self.df),
+            'col_count': len(self.df.columns),
+            'base_gen': self.base_gen,
+            'rev': self.meta_rev,
+        }
+
+    def _write_meta(self):
+        """Tulis meta.json saja (atomic) tanpa menyentuh data.csv."""
+        self.meta_rev = uuid.uuid4().hex[:12]
+        tmp_path = self.local_meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._meta_export(), f, indent=2)
+        os.replace(tmp_path, self.local_meta_path)
+
     # --- SAVE OPTIMIZED: Local First, Cloud Optional ---
     def save(self, sync_to_cloud=False):
         """
         Menyimpan data. Default sync_to_cloud=False untuk operasi cepat (edit cell).
         Gunakan sync_to_cloud=True untuk checkpoint penting (load awal, save manual).
+        Save penuh sekaligus compaction: snapshot data.csv baru + edit log dikosongkan.
         """
         self._normalize_column_names() 
         
-        meta_export = {
-            'variables': {k: v.to_dict() for k, v in self.meta.items()},
-            'updated_at': datetime.now().isoformat(),
-            'row_count': len(self.df),
-            'col_count': len(self.df.columns)
-        }
-        
         # 1. ALWAYS Save Local (Speed: <50ms)
         try:
             if not os.path.exists(self.local_dir): os.makedirs(self.local_dir)
             # print(f"💾 [SAVE] Saving to {self.local_data_path}")
-            self.df.to_csv(self.local_data_path, index=False)
-            with open(self.local_meta_path, 'w', encoding='utf-8') as f:
-                json.dump(meta_export, f, indent=2)
+            new_gen = uuid.uuid4().hex[:12]
+            if DATASET_STORAGE_FORMAT == 'csv':
+                tmp_path = self.local_data_path + ".tmp"
+                self.df.to_csv(tmp_path, index=False)
+                os.replace(tmp_path, self.local_data_path)
+            else:
+                columnar_store.write_snapshot(self.df, self._snapshot_dir(new_gen))
+            # meta.json (base_gen baru) adalah titik switch atomic ke snapshot baru
+            self.base_gen = new_gen
+            self._write_meta()
+            if os.path.exists(self.local_edit_log_path): os.remove(self.local_edit_log_path)
+            self.pending_edits = 0
+            self._drop_stale_snapshots()
+            self._publish(self.content_version())
             print(f"✅ [SAVE] Saved Locally: {self.project_id} ({len(self.df)} cols)")
         except Exception as e:
             print(f"❌ Local Save Failed: {e}")
             return False, f"Local Save Failed: {str(e)}"
 
+        meta_export = self._meta_export()
         # 2. OPTIONAL Save Cloud (Speed: ~500ms - 2s)
         if sync_to_cloud and self.db and self.doc_ref:
+            _cancel_cloud_sync(self.user_id, self.project_id)
             try:
-                data_json = self.df.replace({np.nan: None}).to_dict(orient='records')
-                batch = self.db.batch()
-                batch.set(self.doc_ref, meta_export, merge=True)
-                data_ref = self.doc_ref.collection('data_storage').document('main_data')
-                batch.set(data_ref, {'rows': data_json})
-                batch.commit()
-                print(f"☁️ Synced to Firestore: {self.project_id}")
+                # Blok baris ber-hash + manifest: hanya blok yang berubah yang diunggah
+                _, stats = dataset_cloud_sync.push_dataset(self.db, self.doc_ref, self.df, meta_export)
+                print(f"☁️ Synced to Firestore: {self.project_id} "
+                      f"({stats['uploaded_blocks']}/{stats['blocks']} blocks, {stats['bytes_written']} bytes)")
             except Exception as e:
                 print(f"⚠️ Firestore Sync Failed: {e}")
                 # Jangan return False jika lokal sukses, cukup warning
@@ -182,7 +307,8 @@ class OnThesisDataset:
     def load(user_id, project_id='default', load_data=True):
         instance = OnThesisDataset(user_id=user_id, project_id=project_id)
         
-        local_exists = os.path.exists(instance.local_data_path) and os.path.exists(instance.local_meta_path)
+        local_exists = os.path.exists(instance.local_meta_path) and (
+            os.path.exists(instance.local_data_path) or os.path.isdir(instance.local_columns_dir))
         
         if local_exists:
             try:
@@ -191,9 +317,16 @@ class OnThesisDataset:
                 instance._parse_meta(meta_data)
                 
                 if load_data:
-                    print(f"📂 [LOAD] Loading from Local: {instance.local_data_path}")
-                    instance.df = pd.read_csv(instance.local_data_path, low_memory=False)
-                    instance._normalize_column_names()
+                    # Versi dibaca sebelum data: edit yang menyusul di tengah load = versi baru
+                    version = instance.content_version()
+                    df, pending_edits = get_registry().checkout(instance.user_id, instance.project_id, version)
+                    if df is not None:
+                        instance.df, instance.pending_edits = df, pending_edits
+                        instance.version, instance._shared = version, True
+                        return instance
+                    instance._load_snapshot()
+                    instance._replay_edit_log()
+                    if instance.version is None: instance._publish(version)  # compaction sudah publish
                 return instance
             except Exception as e:
                 print(f"⚠️ Local Load Corrupt, falling back to Cloud: {e}")
@@ -207,14 +340,10 @@ class OnThesisDataset:
                     instance._parse_meta(meta_data)
                     
                     if load_data:
-                        data_ref = instance.doc_ref.collection('data_storage').document('main_data')
-                        data_snap = data_ref.get()
-                        if data_snap.exists:
-                            data_dict = data_snap.to_dict()
-                            rows = data_dict.get('rows', [])
-                            if rows:
-                                instance.df = pd.DataFrame(rows)
-                                instance._normalize_column_names()
+                        df = dataset_cloud_sync.pull_dataset(instance.doc_ref)
+                        if df is not None and not df.empty:
+                            instance.df = df
+                            instance._normalize_column_names()
                         
                         # Setelah load dari Cloud, simpan ke lokal buat cache selanjutnya
                         instance.save(sync_to_cloud=False) 
@@ -225,17 +354,113 @@ class OnThesisDataset:
 
         return instance
 
+    @staticmethod
+    def load_columns(user_id, columns, project_id='default'):
+        """
+        DataFrame read-only berisi `columns` saja (yang ada), untuk analisis yang hanya
+        memakai beberapa variabel: dari registry bila frame penuh sudah ada, selain itu
+        hanya kolom tersebut yang dibaca dari snapshot kolumnar (+ replay edit log-nya).
+        """
+        instance = OnThesisDataset.load(user_id, project_id, load_data=False)
+        wanted = list(dict.fromkeys(columns))
+        df, _ = get_registry().checkout(instance.user_id, instance.project_id, instance.content_version())
+        snapshot_dir = instance._snapshot_dir()
+        if df is None and snapshot_dir and os.path.isdir(snapshot_dir):
+            all_columns = columnar_store.column_names(columnar_store.read_schema(snapshot_dir))
+            instance._load_snapshot([c for c in wanted if c in all_columns])
+            instance._replay_edit_log(all_columns=all_columns)
+            df = instance.df
+        elif df is None:
+            df = OnThesisDataset.load(user_id, project_id).df  # format lama / cloud: load penuh
+        return df[[c for c in wanted if c in df.columns]]
+
     def _parse_meta(self, meta_data):
+        self.base_gen = meta_data.get('base_gen')
+        self.meta_rev = meta_data.get('rev') or self.base_gen
         vars_dict = meta_data.get('variables', {})
         for col_name, col_meta in vars_dict.items():
             self.meta[col_name] = OnThesisVariableMetadata(col_name, meta_dict=col_meta)
         if not self.df.empty:
             self.sync_metadata()
 
+    # --- CONTENT VERSION ---
+    def content_version(self):
+        """
+        Versi isi dataset di disk: revisi meta.json + panjang edit log. Save/compaction dan
+        edit metadata mengganti revisi, edit cell menambah panjang log, jadi mutasi apa pun
+        menghasilkan versi baru. None = belum ada snapshot lokal (jangan di-cache).
+        """
+        if not self.meta_rev or not self._has_snapshot():
+            return None
+        try: log_size = os.path.getsize(self.local_edit_log_path)
+        except OSError: log_size = 0
+        return f"{self.meta_rev}.{log_size}"
+
+    # --- EDIT LOG (DELTA) ---
+    def _replay_edit_log(self, all_columns=None):
+        """
+        Terapkan ulang delta edits.jsonl di atas snapshot yang baru di-load. `all_columns` =
+        urutan kolom penuh bila self.df hanya sebagian kolom (delta kolom lain dilewati).
+        """
+        if not os.path.exists(self.local_edit_log_path): return
+        with open(self.local_edit_log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try: op = json.loads(line)
+                except ValueError: break  # baris terakhir terpotong (crash saat append)
+                # Delta dari generasi lama sudah ikut ter-compact ke snapshot
+                if op.get('g') != self.base_gen: continue
+                c = op['c']
+                if all_columns is not None:
+                    if c >= len(all_columns) or all_columns[c] not in self.df.columns: continue
+                    c = self.df.columns.get_loc(all_columns[c])
+                self._apply_cell(op['r'], c, np.nan if op['v'] is None else op['v'])
+                self.pending_edits += 1
+        if self.pending_edits >= COMPACT_EVERY_EDITS and all_columns is None:
+            self.save(sync_to_cloud=False)
+
+    def _append_edit(self, r, c, val):
+        """Tulis 1 delta; compaction bila log sudah panjang."""
+        if self.base_gen is None or not self._has_snapshot():
+            # Belum ada snapshot lokal untuk ditumpuk delta
+            return self.save(sync_to_cloud=False)
+        # Frame hanya boleh dibagi bila sebelum edit ini sama persis dengan isi di disk
+        in_sync = self.version is not None and self.version == self.content_version()
+        op = {'g': self.base_gen, 'r': int(r), 'c': int(c), 'v': safe_value(val)}
+        with open(self.local_edit_log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(op) + "\n")
+        self.pending_edits += 1
+        if self.pending_edits >= COMPACT_EVERY_EDITS:
+            return self.save(sync_to_cloud=False)
+        self._publish(self.content_version() if in_sync else None)
+        return True, "Edit Logged"
+
+    def _schedule_cloud_sync(self):
+        """Debounce: banyak edit beruntun = satu batch sync ke Firestore."""
+        if CLOUD_SYNC_DEBOUNCE_S <= 0 or not self.doc_ref: return
+        key = (self.user_id, self.project_id)
+        now = time.monotonic()
+        with _cloud_sync_lock:
+            pending = _cloud_sync_pending.get(key)
+            first_edit_at = pending[1] if pending else now
+            if pending:
+                if now - first_edit_at >= CLOUD_SYNC_MAX_WAIT_S: return  # biarkan timer lama jalan
+                pending[0].kill(block=False)
+            delay = min(CLOUD_SYNC_DEBOUNCE_S, max(0.0, first_edit_at + CLOUD_SYNC_MAX_WAIT_S - now))
+            greenlet = gevent.spawn_later(delay, _flush_cloud_sync, self.user_id, self.project_id)
+            _cloud_sync_pending[key] = (greenlet, first_edit_at)
+
     # --- EDITING METHODS (OPTIMIZED) ---
+    def _apply_cell(self, r, c, val):
+        self._ensure_writable()
+        if r >= len(self.df): self.add_empty_row()
+        if r < len(self.df): self.df.iat[r, c] = val
+        else:
+            new_row = {col: np.nan for col in self.df.columns}
+            new_row[self.df.columns[c]] = val
+            self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
+
     def update_cell_data(self, r, c, val):
         try:
-            if r >= len(self.df): self.add_empty_row()
             col_name = self.df.columns[c]
             
             # Smart Type Conversion
@@ -248,14 +473,12 @@ class OnThesisDataset:
                         if val.is_integer(): val = int(val)
                 except: pass # Keep as string if conversion fails
 
-            if r < len(self.df): self.df.iat[r, c] = val
-            else:
-                new_row = {col: np.nan for col in self.df.columns}
-                new_row[col_name] = val
-                self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
+            self._apply_cell(r, c, val)
             
-            # 🔥 OPTIMIZATION: Hanya save ke Local, tidak ke Cloud (tunggu trigger sync)
-            self.save(sync_to_cloud=False)
+            # 🔥 OPTIMIZATION: Hanya append delta ke edit log lokal; cloud sync di-debounce
+            success, msg = self._append_edit(r, c, val)
+            if not success: return False, msg
+            self._schedule_cloud_sync()
             return True, "Success (Local)"
         except Exception as e: return False, str(e)
 
@@ -266,6 +489,7 @@ class OnThesisDataset:
         if field == 'name':
             new_name = str(value).strip()
             if new_name == "" or (new_name in self.df.columns and new_name != old_name): return False
+            self._ensure_writable()
             self.df.rename(columns={old_name: new_name}, inplace=True)
             self.meta[new_name] = self.meta.pop(old_name)
             self.meta[new_name].name = new_name
@@ -277,8 +501,13 @@ class OnThesisDataset:
             try: var_meta.decimals = int(value)
             except: pass
 
-        # Metadata update juga Local-Only demi UI snappy
-        self.save(sync_to_cloud=False)
+        # Metadata update juga Local-Only demi UI snappy. Rename mengubah header CSV
+        # (save penuh); field lain cukup menulis ulang meta.json.
+        if field == 'name' or self.base_gen is None: self.save(sync_to_cloud=False)
+        else:
+            in_sync = self.version is not None and self.version == self.content_version()
+            self._write_meta()
+            self._publish(self.content_version() if in_sync else None)
         return True
 
     # --- SMART PREVIEW (No Change, Keep it as is) ---
@@ -376,16 +605,21 @@ class OnThesisDataset:
     def clear_all_data(self):
         self.df = pd.DataFrame()
         self.meta = {}
+        self.version, self._shared = None, False
+        get_registry().invalidate(self.user_id, self.project_id)
         try:
             if self.doc_ref:
-                self.doc_ref.collection('data_storage').document('main_data').delete()
+                dataset_cloud_sync.delete_dataset(self.db, self.doc_ref)
                 self.clear_analysis_history()
                 self.doc_ref.delete()
         except Exception as e: print(f"❌ Firestore Delete Failed: {e}")
         try:
             if os.path.exists(self.local_data_path): os.remove(self.local_data_path)
             if os.path.exists(self.local_meta_path): os.remove(self.local_meta_path)
+            if os.path.exists(self.local_edit_log_path): os.remove(self.local_edit_log_path)
+            if os.path.isdir(self.local_columns_dir): shutil.rmtree(self.local_columns_dir)
         except Exception as e: print(f"❌ Local Delete Failed: {e}")
+        _cancel_cloud_sync(self.user_id, self.project_id)
         return True
 
     # --- UTILS (No Change) ---
@@ -395,6 +629,10 @@ class OnThesisDataset:
     def get_variable_metadata(self, var_name): return self.meta.get(var_name)
     def get_variable_view_data(self): return [self.meta[c].to_dict() for c in self.df.columns if c in self.meta]
     def get_data_view_data(self): return { "columns": list(self.df.columns), "data": self.df.replace({np.nan: None}).values.tolist() }
+    def get_data_view_window(self, **params):
+        """Jendela data view (lihat data_view.get_window); permutasi sort/filter di-cache per versi."""
+        cache_key = (str(self.user_id), self.project_id, self.version) if self.version else None
+        return data_view.get_window(self.df, cache_key=cache_key, **params)
     def export_to_csv(self):
         output = io.BytesIO()
         self.df.to_csv(output, index=False)
@@ -408,6 +646,7 @@ class OnThesisDataset:
     def handle_missing_values(self, action, target_columns=None):
         cols = target_columns if target_columns and isinstance(target_columns, list) and len(target_columns) > 0 else self.df.columns.tolist()
         try:
+            self._ensure_writable()
             if action == 'drop_rows':
                 self.df.dropna(subset=cols, inplace=True)
                 self.df.reset_index(drop=True, inplace=True)
@@ -427,6 +666,7 @@ class OnThesisDataset:
     def remove_duplicates(self, target_columns=None):
         try:
             subset = target_columns if target_columns and len(target_columns) > 0 else None
+            self._ensure_writable()
             self.df.drop_duplicates(subset=subset, inplace=True)
             self.df.reset_index(drop=True, inplace=True)
             success, save_msg = self.save(sync_to_cloud=True)
@@ -442,6 +682,7 @@ class OnThesisDataset:
                 except: return val
             find_val = try_convert(find_text)
             replace_val = try_convert(replace_text)
+            self._ensure_writable()
             
             for col in cols:
                 if col not in self.df.columns: continue
@@ -472,6 +713,7 @@ class OnThesisDataset:
             # Warning: Jika mapping partial, sisa values tetap string -> kolom jadi object
             # Jika user mau convert_to_numeric, pastikan semua value tercover atau sisa dimap ke NaN.
             
+            self._ensure_writable()
             self.df[col_name] = self.df[col_name].replace(mapping)
             
             # 2. Convert Type if Requested
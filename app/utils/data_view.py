@@ -0,0 +1,195 @@
+# File: app/utils/data_view.py
+# Deskripsi: Data view berjendela (windowed) untuk spreadsheet besar. Klien meminta rentang
+# baris/kolom + sort/filter; server hanya menserialisasi jendela itu. Sort/filter dievaluasi
+# sekali per (dataset, versi isi, spec) menjadi permutasi posisi baris yang di-cache (LRU,
+# dibatasi bytes), jadi scroll berikutnya cukup slice permutasi + iloc. Versi berganti di
+# setiap mutasi, sehingga permutasi basi tidak pernah terpakai.
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.utils.lru_cache import LRUCache
+
+DATA_VIEW_MAX_ROWS = int(os.getenv("DATA_VIEW_MAX_ROWS", "5000"))
+DATA_VIEW_DEFAULT_ROWS = int(os.getenv("DATA_VIEW_DEFAULT_ROWS", "200"))
+DATA_VIEW_INDEX_CACHE_SIZE = int(os.getenv("DATA_VIEW_INDEX_CACHE_SIZE", "64"))
+DATA_VIEW_INDEX_CACHE_MAX_BYTES = int(os.getenv("DATA_VIEW_INDEX_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+ORIENT_ROWS = "rows"        # [[v, v, ...], ...] seperti /api/data-view/get
+ORIENT_COLUMNS = "columns"  # [[kolom 0...], [kolom 1...]]: lebih ringkas untuk grid virtual
+
+FILTER_OPS = ("eq", "ne", "lt", "le", "gt", "ge", "contains", "isnull", "notnull")
+
+_index_cache = LRUCache(
+    max_items=DATA_VIEW_INDEX_CACHE_SIZE,
+    max_bytes=DATA_VIEW_INDEX_CACHE_MAX_BYTES,
+    sizeof=lambda positions: positions.nbytes,
+)
+
+
+def parse_sort(spec: Any) -> List[Dict[str, Any]]:
+    """'SKOR:desc,NAMA' atau [{'column': 'SKOR', 'desc': True}] -> bentuk kanonik."""
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        items = []
+        for part in spec.split(","):
+            name, _, direction = part.strip().partition(":")
+            if name:
+                items.append({"column": name, "desc": direction.lower() == "desc"})
+        return items
+    if not isinstance(spec, list) or not all(isinstance(item, dict) and "column" in item for item in spec):
+        raise ValueError("Sort harus berupa 'KOLOM:desc,...' atau list [{column, desc}]")
+    return [{"column": str(item["column"]), "desc": bool(item.get("desc", False))} for item in spec]
+
+
+def parse_filters(spec: Any) -> List[Dict[str, Any]]:
+    """JSON string atau list [{'column', 'op', 'value'}]; op di luar FILTER_OPS ditolak."""
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    if not isinstance(spec, list) or not all(isinstance(item, dict) and "column" in item for item in spec):
+        raise ValueError("Filter harus berupa list [{column, op, value}]")
+    filters = []
+    for item in spec:
+        op = item.get("op", "eq")
+        if op not in FILTER_OPS:
+            raise ValueError(f"Operator filter tidak dikenal: {op}")
+        filters.append({"column": str(item["column"]), "op": op, "value": item.get("value")})
+    return filters
+
+
+def _coerce(series: pd.Series, value: Any) -> Any:
+    if pd.api.types.is_numeric_dtype(series) and isinstance(value, str):
+        try: return float(value)
+        except ValueError: return value
+    return value
+
+
+def _filter_mask(df: pd.DataFrame, filters: Sequence[Dict[str, Any]]) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for item in filters:
+        if item["column"] not in df.columns:
+            raise KeyError(f"Kolom tidak ditemukan: {item['column']}")
+        series = df[item["column"]]
+        op, value = item["op"], _coerce(series, item["value"])
+        if op == "isnull": cond = series.isna()
+        elif op == "notnull": cond = series.notna()
+        elif op == "contains": cond = series.astype(str).str.contains(str(value), case=False, regex=False) & series.notna()
+        elif op == "eq": cond = series == value
+        elif op == "ne": cond = series != value
+        else:
+            try:
+                cond = {"lt": series < value, "le": series <= value, "gt": series > value, "ge": series >= value}[op]
+            except TypeError:
+                raise ValueError(f"Filter '{op}' tidak bisa dipakai pada kolom {item['column']}")
+        mask &= np.asarray(cond.fillna(False) if hasattr(cond, "fillna") else cond, dtype=bool)
+    return mask
+
+
+def _sort_keys(series: pd.Series, desc: bool):
+    """
+    Kolom kunci sort untuk satu kolom. Kolom object spreadsheet sering campur angka dan teks
+    (juga hasil decode KIND_CODES), yang membuat sort_values TypeError: angka dulu (urut
+    nilai), lalu teks (urut string), kosong selalu di akhir.
+    """
+    if series.dtype != object:
+        return [(series.reset_index(drop=True), not desc)]
+    numbers = pd.to_numeric(series, errors="coerce")
+    group = np.where(numbers.notna(), 0, np.where(series.notna(), 1, 2))
+    text = series.where(group == 1).map(str, na_action="ignore")
+    return [
+        (pd.Series(group), True),
+        (pd.Series(numbers.to_numpy()), not desc),
+        (pd.Series(text.to_numpy(dtype=object)), not desc),
+    ]
+
+
+def row_positions(df: pd.DataFrame, sort=None, filters=None) -> Optional[np.ndarray]:
+    """Posisi baris (int64) setelah filter lalu sort stabil; None = urutan asli tanpa filter."""
+    if not sort and not filters:
+        return None
+    positions = np.flatnonzero(_filter_mask(df, filters)) if filters else np.arange(len(df))
+    if sort:
+        missing = [item["column"] for item in sort if item["column"] not in df.columns]
+        if missing:
+            raise KeyError(f"Kolom tidak ditemukan: {', '.join(missing)}")
+        parts = [part for item in sort for part in _sort_keys(df[item["column"]].iloc[positions], item["desc"])]
+        keys = pd.DataFrame({i: values for i, (values, _) in enumerate(parts)})
+        order = keys.sort_values(
+            by=list(keys.columns), ascending=[ascending for _, ascending in parts],
+            kind="mergesort", na_position="last",
+        ).index.to_numpy()
+        positions = positions[order]
+    return positions.astype(np.int64, copy=False)
+
+
+def cached_row_positions(cache_key, df, sort=None, filters=None) -> Optional[np.ndarray]:
+    """row_positions lewat cache; cache_key None (versi tidak diketahui) = hitung langsung."""
+    if not sort and not filters:
+        return None
+    if cache_key is None:
+        return row_positions(df, sort, filters)
+    key = (cache_key, json.dumps([sort, filters], sort_keys=True, default=str))
+    positions = _index_cache.get(key)
+    if positions is None:
+        positions = row_positions(df, sort, filters)
+        positions.flags.writeable = False
+        _index_cache.set(key, positions)
+    return positions
+
+
+def _json_values(frame: pd.DataFrame) -> np.ndarray:
+    return frame.astype(object).where(frame.notna(), None).to_numpy()
+
+
+def get_window(df: pd.DataFrame, cache_key=None, offset: int = 0, limit: int = DATA_VIEW_DEFAULT_ROWS,
+               columns: Optional[Sequence[str]] = None, col_offset: int = 0, col_limit: Optional[int] = None,
+               sort=None, filters=None, orient: str = ORIENT_ROWS) -> Dict[str, Any]:
+    """
+    Satu jendela data view. `row_ids` = posisi baris asli (dipakai /api/data-view/update
+    saat grid sedang di-sort/filter); `total_rows` = jumlah baris setelah filter.
+    """
+    sort, filters = parse_sort(sort), parse_filters(filters)
+    offset = max(0, int(offset))
+    limit = max(0, min(int(limit), DATA_VIEW_MAX_ROWS))
+
+    if columns:
+        unknown = [c for c in columns if c not in df.columns]
+        if unknown:
+            raise KeyError(f"Kolom tidak ditemukan: {', '.join(unknown)}")
+        view_columns = list(columns)
+    else:
+        view_columns = list(df.columns)
+    col_offset = max(0, int(col_offset))
+    view_columns = view_columns[col_offset:col_offset + col_limit if col_limit is not None else None]
+
+    positions = cached_row_positions(cache_key, df, sort, filters)
+    total = len(df) if positions is None else len(positions)
+    if positions is None:
+        row_ids = np.arange(offset, min(offset + limit, total))
+    else:
+        row_ids = positions[offset:offset + limit]
+    frame = df.iloc[row_ids, [df.columns.get_loc(c) for c in view_columns]]
+
+    values = _json_values(frame)
+    data = values.T.tolist() if orient == ORIENT_COLUMNS else values.tolist()
+    return {
+        "columns": view_columns,
+        "total_rows": int(total),
+        "total_columns": int(len(df.columns)),
+        "offset": offset,
+        "col_offset": col_offset,
+        "row_ids": row_ids.tolist(),
+        "orient": ORIENT_COLUMNS if orient == ORIENT_COLUMNS else ORIENT_ROWS,
+        "data": data,
+    }
+
+
+def clear_cache() -> None:
+    _index_cache.clear()
@@ -0,0 +1,237 @@
+# File: app/utils/dataset_cloud_sync.py
+# Deskripsi: Sync dataset ke Firestore dalam blok baris (chunked), pengganti satu dokumen
+# data_storage/main_data {'rows': [...]} yang mentok limit 1 MiB per dokumen dan diunggah
+# ulang penuh di setiap save. Blok dialamatkan dengan hash isinya (immutable), manifest
+# (data_storage/manifest) menyimpan urutan blok + kolom. Save hanya mengunggah blok yang
+# hash-nya belum ada di manifest sebelumnya; restore mengunduh blok secara paralel.
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from gevent.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 2
+STORAGE_COLLECTION = 'data_storage'
+BLOCKS_COLLECTION = 'data_blocks'
+MANIFEST_DOC = 'manifest'
+LEGACY_DOC = 'main_data'
+
+# Target ukuran payload per blok: jauh di bawah limit dokumen Firestore (1 MiB)
+BLOCK_TARGET_BYTES = int(os.getenv("DATASET_CLOUD_BLOCK_BYTES", str(256 * 1024)))
+BLOCK_MAX_ROWS = int(os.getenv("DATASET_CLOUD_BLOCK_MAX_ROWS", "5000"))
+# Batas keras per blok yang benar-benar ditulis; estimasi sampel bisa meleset jauh kalau
+# ukuran baris timpang (mis. jawaban teks bebas panjang hanya di sebagian baris)
+BLOCK_HARD_MAX_BYTES = int(os.getenv("DATASET_CLOUD_BLOCK_HARD_MAX_BYTES", str(768 * 1024)))
+DOWNLOAD_CONCURRENCY = int(os.getenv("DATASET_CLOUD_DOWNLOAD_CONCURRENCY", "8"))
+# Limit batched write Firestore: 500 operasi / ~10 MiB per commit
+BATCH_MAX_OPS = 400
+BATCH_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic): return value.item()
+    if isinstance(value, (pd.Timestamp, datetime)): return value.isoformat()
+    return str(value)
+
+
+def block_payload(block: pd.DataFrame) -> str:
+    """Baris blok sebagai JSON list-of-lists (NaN -> null), urutan kolom sesuai manifest."""
+    rows = block.astype(object).where(block.notna(), None).values.tolist()
+    return json.dumps(rows, default=_json_default, separators=(",", ":"))
+
+
+def block_hash(block: pd.DataFrame) -> str:
+    """Hash isi blok (nilai + dtype per kolom, tanpa index) untuk deteksi blok yang berubah."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(block, index=False).to_numpy().tobytes())
+    digest.update(f"{len(block)}x{len(block.columns)}".encode())
+    return digest.hexdigest()
+
+
+def choose_block_rows(df: pd.DataFrame, previous: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Jumlah baris per blok dari perkiraan ukuran JSON per baris. Ukuran blok manifest sebelumnya
+    dipertahankan selama masih muat: batas blok yang bergeser = semua blok dianggap berubah.
+    """
+    sample = df.iloc[:: max(1, len(df) // 200)].head(200)
+    row_bytes = max(1.0, len(block_payload(sample)) / max(1, len(sample))) if len(sample) else 1.0
+    fits = max(1, min(BLOCK_MAX_ROWS, int(BLOCK_TARGET_BYTES / row_bytes)))
+    kept = (previous or {}).get('block_rows')
+    if kept and kept * row_bytes <= 2 * BLOCK_TARGET_BYTES:
+        return int(kept)
+    return fits
+
+
+def split_block(block: pd.DataFrame, known=(), max_bytes: int = BLOCK_HARD_MAX_BYTES):
+    """
+    Yield (hash, sub_blok, payload) dengan payload <= max_bytes: blok yang kebesaran dibelah
+    dua sampai muat. Belahan deterministik dari isi, jadi blok yang tidak berubah tetap sama
+    hash-nya; blok di `known` (sudah ada di cloud) tidak diserialisasi ulang (payload None).
+    """
+    digest = block_hash(block)
+    if digest in known:
+        yield digest, block, None
+        return
+    payload = block_payload(block)
+    if len(payload) <= max_bytes:
+        yield digest, block, payload
+        return
+    if len(block) <= 1:
+        raise ValueError(f"Satu baris dataset ({len(payload)} bytes) melebihi batas blok {max_bytes} bytes")
+    middle = len(block) // 2
+    yield from split_block(block.iloc[:middle], known, max_bytes)
+    yield from split_block(block.iloc[middle:], known, max_bytes)
+
+
+class _BatchWriter:
+    """Batched write yang otomatis di-commit sebelum melewati limit operasi / bytes."""
+
+    def __init__(self, db):
+        self.db = db
+        self.batch = None
+        self.ops = 0
+        self.bytes = 0
+        self.commits = 0
+        self.bytes_written = 0
+
+    def _ensure(self, size):
+        if self.batch is not None and (self.ops >= BATCH_MAX_OPS or self.bytes + size > BATCH_MAX_BYTES):
+            self.flush()
+        if self.batch is None:
+            self.batch = self.db.batch()
+
+    def set(self, ref, data, size=0, merge=False):
+        self._ensure(size)
+        if merge: self.batch.set(ref, data, merge=True)
+        else: self.batch.set(ref, data)
+        self.ops += 1
+        self.bytes += size
+        self.bytes_written += size
+
+    def delete(self, ref):
+        self._ensure(0)
+        self.batch.delete(ref)
+        self.ops += 1
+
+    def flush(self):
+        if self.batch is not None and self.ops:
+            self.batch.commit()
+            self.commits += 1
+        self.batch, self.ops, self.bytes = None, 0, 0
+
+
+def fetch_manifest(doc_ref) -> Optional[Dict[str, Any]]:
+    snap = doc_ref.collection(STORAGE_COLLECTION).document(MANIFEST_DOC).get()
+    return snap.to_dict() if snap.exists else None
+
+
+def push_dataset(db, doc_ref, df: pd.DataFrame, meta_export: Dict[str, Any],
+                 previous: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Unggah df sebagai blok + manifest. Urutan: blok baru dulu, lalu manifest + meta project
+    dalam satu batch (reader tidak pernah melihat manifest yang menunjuk blok belum ada),
+    terakhir hapus blok yang tidak dirujuk lagi. `previous` default = manifest di cloud.
+    """
+    storage = doc_ref.collection(STORAGE_COLLECTION)
+    blocks_ref = doc_ref.collection(BLOCKS_COLLECTION)
+    if previous is None:
+        previous = fetch_manifest(doc_ref)
+    known = set((previous or {}).get('blocks', []))
+
+    block_rows = choose_block_rows(df, previous)
+    order: List[str] = []
+    writer = _BatchWriter(db)
+    uploaded = set()
+    for start in range(0, len(df), block_rows):
+        for digest, block, payload in split_block(df.iloc[start:start + block_rows], known):
+            order.append(digest)
+            if payload is None or digest in uploaded:
+                continue
+            writer.set(blocks_ref.document(digest), {'rows': payload, 'row_count': len(block)}, size=len(payload))
+            uploaded.add(digest)
+    writer.flush()
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'columns': [str(c) for c in df.columns],
+        'row_count': int(len(df)),
+        'block_rows': int(block_rows),
+        'blocks': order,
+        'updated_at': datetime.now().isoformat(),
+    }
+    writer.set(doc_ref, meta_export, size=len(json.dumps(meta_export, default=str)), merge=True)
+    writer.set(storage.document(MANIFEST_DOC), manifest, size=len(json.dumps(manifest)))
+    if previous is None:
+        writer.delete(storage.document(LEGACY_DOC))  # migrasi dari format satu dokumen
+    writer.flush()
+
+    for digest in known - set(order):
+        writer.delete(blocks_ref.document(digest))
+    writer.flush()
+
+    stats = {
+        'blocks': len(order),
+        'uploaded_blocks': len(uploaded),
+        'reused_blocks': len(order) - len(uploaded),
+        'bytes_written': writer.bytes_written,
+        'commits': writer.commits,
+    }
+    return manifest, stats
+
+
+def _fetch_block(blocks_ref, digest):
+    snap = blocks_ref.document(digest).get()
+    if not snap.exists:
+        raise LookupError(f"Blok dataset {digest} tidak ada di cloud")
+    return json.loads(snap.to_dict()['rows'])
+
+
+def _pull_blocks(doc_ref, manifest: Dict[str, Any], concurrency: int) -> pd.DataFrame:
+    blocks_ref = doc_ref.collection(BLOCKS_COLLECTION)
+    unique = list(dict.fromkeys(manifest.get('blocks', [])))
+    fetched = {}
+    if unique:
+        pool = Pool(max(1, min(concurrency, len(unique))))
+        fetched = dict(zip(unique, pool.imap(lambda digest: _fetch_block(blocks_ref, digest), unique)))
+    rows = [row for digest in manifest.get('blocks', []) for row in fetched[digest]]
+    return pd.DataFrame(rows, columns=manifest.get('columns', []))
+
+
+def pull_dataset(doc_ref, concurrency: int = DOWNLOAD_CONCURRENCY) -> Optional[pd.DataFrame]:
+    """
+    Restore df dari manifest + blok (diunduh paralel); fallback ke dokumen main_data lama.
+    push_dataset menghapus blok lama tepat setelah manifest baru di-commit, jadi pull yang
+    membaca manifest lama bisa kehilangan blok: baca ulang manifest lalu coba sekali lagi.
+    """
+    manifest = fetch_manifest(doc_ref)
+    if manifest is None:
+        legacy = doc_ref.collection(STORAGE_COLLECTION).document(LEGACY_DOC).get()
+        rows = legacy.to_dict().get('rows', []) if legacy.exists else []
+        return pd.DataFrame(rows) if rows else None
+
+    try:
+        return _pull_blocks(doc_ref, manifest, concurrency)
+    except LookupError as exc:
+        retry = fetch_manifest(doc_ref)
+        if retry is None or retry.get('blocks') == manifest.get('blocks'):
+            raise
+        logger.info("Manifest dataset berganti saat restore (%s), mengulang dengan manifest baru", exc)
+        return _pull_blocks(doc_ref, retry, concurrency)
+
+
+def delete_dataset(db, doc_ref) -> None:
+    """Hapus manifest, semua blok, dan dokumen format lama."""
+    storage = doc_ref.collection(STORAGE_COLLECTION)
+    writer = _BatchWriter(db)
+    for ref in doc_ref.collection(BLOCKS_COLLECTION).list_documents():
+        writer.delete(ref)
+    writer.delete(storage.document(MANIFEST_DOC))
+    writer.delete(storage.document(LEGACY_DOC))
+    writer.flush()
@@ -0,0 +1,123 @@
+# File: app/utils/dataset_registry.py
+# Deskripsi: Registry DataFrame hasil parse per proses, dikunci (user, project, versi isi).
+# Request analisis / data-view pada dataset yang sama berbagi satu frame (LRU, dibatasi
+# bytes) alih-alih pd.read_csv + replay edit log di setiap request. Frame di registry
+# dibekukan (array numpy read-only) dan dibagikan sebagai view dangkal; mutasi wajib
+# copy-on-write eksplisit lewat OnThesisDataset._ensure_writable.
+
+import os
+import sys
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.lru_cache import LRUCache
+
+DATASET_REGISTRY_MAX_BYTES = int(os.getenv("DATASET_REGISTRY_MAX_BYTES", str(512 * 1024 * 1024)))
+DATASET_REGISTRY_MAX_ITEMS = int(os.getenv("DATASET_REGISTRY_MAX_ITEMS", "32"))
+
+
+def frame_nbytes(frame: pd.DataFrame, sample: int = 1000) -> int:
+    """
+    Perkiraan ukuran frame di memori untuk budget LRU. Kolom teks diestimasi dari sampel:
+    memory_usage(deep=True) memeriksa setiap string (ratusan ms per juta baris).
+    """
+    try:
+        total = int(frame.memory_usage(index=True, deep=False).sum())
+        for col in frame.columns:
+            series = frame[col]
+            if len(series) and not pd.api.types.is_numeric_dtype(series):
+                values = series.iloc[:: max(1, len(series) // sample)].head(sample)
+                total += int(sum(sys.getsizeof(v) for v in values) / len(values) * len(series))
+        return total
+    except Exception:
+        return int(frame.size * 8)
+
+
+def freeze(frame: pd.DataFrame) -> pd.DataFrame:
+    """Tandai array numpy milik frame read-only: tulis in-place ke frame bersama langsung error."""
+    for block in getattr(frame._mgr, "blocks", ()):
+        values = getattr(block, "values", None)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return frame
+
+
+def readonly_view(frame: pd.DataFrame) -> pd.DataFrame:
+    """View dangkal: objek DataFrame sendiri (rename/tambah kolom tidak bocor), data dibagi."""
+    return frame.copy(deep=False)
+
+
+class _Entry:
+    __slots__ = ("frame", "pending_edits", "nbytes")
+
+    def __init__(self, frame, pending_edits, nbytes):
+        self.frame = frame
+        self.pending_edits = pending_edits
+        self.nbytes = nbytes
+
+
+class DatasetRegistry:
+    def __init__(self, max_bytes: int = DATASET_REGISTRY_MAX_BYTES, max_items: int = DATASET_REGISTRY_MAX_ITEMS):
+        self.lru = LRUCache(max_items=max_items, max_bytes=max_bytes, sizeof=lambda entry: entry.nbytes)
+        # (user, project) -> key versi terbaru; versi lama langsung dibuang saat versi baru masuk
+        self._latest: Dict[Tuple[str, str], Hashable] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id, project_id, version):
+        return (str(user_id), str(project_id), version)
+
+    def checkout(self, user_id, project_id, version) -> Tuple[Optional[pd.DataFrame], int]:
+        """(view read-only, jumlah delta edit log yang sudah termasuk) atau (None, 0)."""
+        if not version:
+            return None, 0
+        entry = self.lru.get(self._key(user_id, project_id, version))
+        if entry is None:
+            return None, 0
+        return readonly_view(entry.frame), entry.pending_edits
+
+    def put(self, user_id, project_id, version, frame: pd.DataFrame, pending_edits: int = 0) -> pd.DataFrame:
+        """
+        Daftarkan frame sebagai isi `version`. Frame dibekukan di tempat (pemanggil tidak
+        boleh menulisnya lagi) dan yang dikembalikan adalah view read-only untuk dipakai.
+        """
+        if not version or frame is None:
+            return frame
+        freeze(frame)
+        key = self._key(user_id, project_id, version)
+        with self._lock:
+            previous = self._latest.get(key[:2])
+            self._latest[key[:2]] = key
+        if previous is not None and previous != key:
+            self.lru.pop(previous)
+        self.lru.set(key, _Entry(frame, pending_edits, frame_nbytes(frame)))
+        return readonly_view(frame)
+
+    def invalidate(self, user_id, project_id) -> None:
+        with self._lock:
+            previous = self._latest.pop((str(user_id), str(project_id)), None)
+        if previous is not None:
+            self.lru.pop(previous)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latest.clear()
+        self.lru.clear()
+
+    def stats(self):
+        return self.lru.stats()
+
+
+_registry: Optional[DatasetRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DatasetRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DatasetRegistry()
+        return _registry
@@ -6,7 +6,6 @@ import json
 import io
 import base64
 import requests
-import time
 import PyPDF2
 import docx
 from datetime import date, datetime
@@ -15,41 +14,34 @@ from scipy.stats import t
 import matplotlib.pyplot as plt
 import traceback
 
+from .http_client import get_http_client
+
 # ==========================================
 # 1. API & NETWORK HELPERS
 # ==========================================
 
-def make_api_request_with_retry(url, headers, params=None, timeout=25, retries=3, backoff_factor=2):
+def make_api_request_with_retry(url, headers, params=None, timeout=25, retries=3, backoff_factor=2, source=None):
     """
     Membuat request API dengan mekanisme coba ulang (retry) jika terjadi rate limit atau error koneksi.
+    Lewat klien HTTP bersama: koneksi dipakai ulang per host, backoff ber-jitter (gevent.sleep),
+    dan respons GET di-cache sesuai Cache-Control/ETag atau TTL per `source`.
+    `backoff_factor` dipertahankan demi kompatibilitas; jeda kini diatur http_client.
     """
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=timeout)
-            if response.status_code == 404:
-                print(f"Sumber tidak ditemukan (404) di URL: {url}. Melewati.")
-                return None
-            response.raise_for_status()
-            return response
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429: # Rate limit
-                if attempt < retries - 1:
-                    delay = backoff_factor ** attempt
-                    print(f"Rate limit terdeteksi. Mencoba lagi dalam {delay} detik...")
-                    time.sleep(delay)
-                else:
-                    print("Gagal setelah beberapa kali percobaan. Melemparkan error.")
-                    raise
-            else:
-                raise
-        except requests.exceptions.RequestException as e:
-            print(f"Error koneksi: {e}")
-            if attempt < retries - 1:
-                delay = backoff_factor ** attempt
-                time.sleep(delay)
-            else:
-                raise
-    return None
+    try:
+        response = get_http_client().get(url, headers=headers, params=params, timeout=timeout,
+                                         retries=retries, source=source)
+    except requests.exceptions.RequestException as e:
+        print(f"Error koneksi: {e}")
+        raise
+    if response is None:
+        return None
+    if response.status_code == 404:
+        print(f"Sumber tidak ditemukan (404) di URL: {url}. Melewati.")
+        return None
+    if response.status_code == 429:
+        print("Gagal setelah beberapa kali percobaan. Melemparkan error.")
+    response.raise_for_status()
+    return response
 
 # ==========================================
 # 2. DATA & FILE PROCESSING HELPERS
@@ -0,0 +1,381 @@
+# File: app/utils/http_client.py
+# Deskripsi: Lapisan HTTP bersama untuk API eksternal (CORE, Crossref, OpenAlex, DOAJ,
+# ERIC, PubMed, DuckDuckGo, Groq). Satu requests.Session per proses dengan connection
+# pool per host, timeout wajib, retry dengan jittered backoff yang ramah gevent, dan
+# cache respons GET (LRU in-process di depan Redis/disk) yang menghormati
+# Cache-Control + ETag/Last-Modified, plus override TTL per sumber.
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+import gevent
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+READ_TIMEOUT_S = float(os.getenv("HTTP_READ_TIMEOUT_S", "25"))
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF_BASE_S = float(os.getenv("HTTP_BACKOFF_BASE_S", "0.5"))
+BACKOFF_CAP_S = float(os.getenv("HTTP_BACKOFF_CAP_S", "8"))
+
+CACHE_BACKEND = os.getenv("HTTP_CACHE_BACKEND", "auto")  # auto | redis | disk | memory | off
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "onthesis_http_cache"))
+CACHE_LRU_SIZE = int(os.getenv("HTTP_CACHE_LRU_SIZE", "512"))
+# Batas total body (base64) di LRU per worker; item count saja bisa mencapai 512 x 2 MB
+CACHE_LRU_MAX_BYTES = int(os.getenv("HTTP_CACHE_LRU_MAX_BYTES", str(64 * 1024 * 1024)))
+# Entri basi tetap disimpan selama ini supaya bisa direvalidasi (304) alih-alih diunduh ulang
+CACHE_MAX_STALE_S = int(os.getenv("HTTP_CACHE_MAX_STALE_S", str(7 * 24 * 3600)))
+CACHE_MAX_BODY_BYTES = int(os.getenv("HTTP_CACHE_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+
+# TTL paksa per sumber (detik), menang atas Cache-Control server. Metadata karya
+# ilmiah jarang berubah; hasil pencarian web lebih cepat basi. Override: HTTP_CACHE_TTL_<SUMBER>.
+SOURCE_TTLS = {
+    "core": 6 * 3600,
+    "crossref": 6 * 3600,
+    "openalex": 6 * 3600,
+    "doaj": 6 * 3600,
+    "eric": 6 * 3600,
+    "pubmed": 6 * 3600,
+    "duckduckgo": 30 * 60,
+    "web": 30 * 60,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Header request yang ikut menentukan kunci cache (respons berbeda per kredensial/bahasa)
+KEY_HEADERS = ("authorization", "accept", "accept-language")
+STORED_HEADERS = ("content-type", "content-encoding", "etag", "last-modified", "cache-control", "date")
+
+_MAX_AGE_RE = re.compile(r"(?:^|[,\s])max-age\s*=\s*\"?(\d+)", re.I)
+_S_MAXAGE_RE = re.compile(r"s-maxage\s*=\s*\"?(\d+)", re.I)
+
+
+def source_ttl(source: Optional[str]) -> Optional[int]:
+    if not source:
+        return None
+    override = os.getenv(f"HTTP_CACHE_TTL_{source.upper()}")
+    if override is not None:
+        return int(override)
+    return SOURCE_TTLS.get(source)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Any]:
+    """Ambil direktif yang relevan: no-store, no-cache, max-age (s-maxage didahulukan)."""
+    value = value or ""
+    directives = {token.split("=", 1)[0].strip().lower() for token in value.split(",") if token.strip()}
+    max_age = _S_MAXAGE_RE.search(value) or _MAX_AGE_RE.search(value)
+    return {
+        "no_store": "no-store" in directives,
+        "no_cache": "no-cache" in directives,
+        "max_age": int(max_age.group(1)) if max_age else None,
+    }
+
+
+def jittered_backoff(attempt: int, base: float = BACKOFF_BASE_S, cap: float = BACKOFF_CAP_S) -> float:
+    """Full jitter: acak di [0, min(cap, base * 2^attempt)] supaya klien tidak retry serempak."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _RedisStore:
+    def __init__(self, client, prefix="httpc:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, entry, ttl):
+        self.client.set(self.prefix + key, json.dumps(entry), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class _DiskStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("evict_at", 0) < time.time():
+            self.delete(key)
+            return None
+        return entry
+
+    def set(self, key, entry, ttl):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(entry, evict_at=time.time() + ttl), f)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """
+    Cache respons GET. Entri = status, header terpilih, body (base64), waktu simpan,
+    umur segar (detik) dan validator (ETag/Last-Modified) untuk revalidasi bersyarat.
+    """
+
+    def __init__(self, store=None, lru_size=CACHE_LRU_SIZE, max_stale=CACHE_MAX_STALE_S,
+                 max_body_bytes=CACHE_MAX_BODY_BYTES, lru_max_bytes=CACHE_LRU_MAX_BYTES):
+        self.store = store
+        self.lru = LRUCache(max_items=lru_size, max_bytes=lru_max_bytes, sizeof=lambda entry: len(entry["body"]))
+        self.max_stale = max_stale
+        self.max_body_bytes = max_body_bytes
+
+    def get(self, key):
+        entry = self.lru.get(key)
+        if entry is None and self.store is not None:
+            try:
+                entry = self.store.get(key)
+            except Exception as exc:
+                logger.warning("HTTP cache read failed: %s", exc)
+                entry = None
+            if entry is not None:
+                self.lru.set(key, entry)
+        return entry
+
+    def put(self, key, response, fresh_for):
+        body = response.content or b""
+        if len(body) > self.max_body_bytes:
+            return None
+        entry = {
+            "url": response.url,
+            "status": response.status_code,
+            "headers": {k: response.headers[k] for k in STORED_HEADERS if k in response.headers},
+            "body": base64.b64encode(body).decode("ascii"),
+            "encoding": response.encoding,
+            "stored_at": time.time(),
+            "fresh_for": max(0, int(fresh_for)),
+        }
+        self._write(key, entry)
+        return entry
+
+    def touch(self, key, entry, fresh_for, headers=None):
+        """Setelah 304: perpanjang umur segar dan perbarui validator dari respons server."""
+        entry = dict(entry, stored_at=time.time(), fresh_for=max(0, int(fresh_for)))
+        if headers:
+            entry["headers"] = dict(entry["headers"], **{k: headers[k] for k in ("etag", "last-modified", "cache-control") if k in headers})
+        self._write(key, entry)
+        return entry
+
+    def _write(self, key, entry):
+        self.lru.set(key, entry)
+        if self.store is not None:
+            try:
+                self.store.set(key, entry, entry["fresh_for"] + self.max_stale)
+            except Exception as exc:
+                logger.warning("HTTP cache write failed: %s", exc)
+
+    def clear(self):
+        self.lru.clear()
+
+    @staticmethod
+    def is_fresh(entry, now=None):
+        return (now or time.time()) - entry["stored_at"] < entry["fresh_for"]
+
+    @staticmethod
+    def to_response(entry):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = base64.b64decode(entry["body"])
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = entry["url"]
+        response.encoding = entry.get("encoding")
+        response.reason = "OK"
+        response.from_cache = True
+        return response
+
+
+class HttpClient:
+    """
+    Klien HTTP bersama. Semua request selalu punya timeout (connect, read); GET
+    di-cache bila `cache=True` (default) dan server/sumber mengizinkan.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None, timeout=None, retries=RETRIES,
+                 pool_hosts=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE, sleep=None):
+        self.cache = cache
+        self.timeout = timeout or (CONNECT_TIMEOUT_S, READ_TIMEOUT_S)
+        self.retries = max(1, int(retries))
+        self.sleep = sleep or gevent.sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {"requests": 0, "cache_hits": 0, "revalidated": 0, "cache_stores": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        if isinstance(timeout, (tuple, list)):
+            return tuple(timeout)
+        return (min(CONNECT_TIMEOUT_S, float(timeout)), float(timeout))
+
+    @staticmethod
+    def cache_key(method, url, params=None, headers=None):
+        if params:
+            items = params.items() if isinstance(params, dict) else params
+            query = urlencode(sorted((str(k), str(v)) for k, v in items if v is not None))
+            url = f"{url}{'&' if urlsplit(url).query else '?'}{query}"
+        lowered = {k.lower(): v for k, v in (headers or {}).items()}
+        varying = "|".join(f"{name}={lowered[name]}" for name in KEY_HEADERS if name in lowered)
+        return hashlib.sha256(f"{method.upper()} {url} {varying}".encode("utf-8")).hexdigest()
+
+    def _send(self, method, url, retries, retry_statuses=RETRY_STATUSES, **kwargs):
+        """Satu request + retry untuk status sementara / error koneksi. Retry-After dihormati."""
+        attempts = self.retries if retries is None else max(1, int(retries))
+        for attempt in range(attempts):
+            self._count("requests")
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
+                if attempt >= attempts - 1:
+                    raise
+                delay = jittered_backoff(attempt)
+                logger.info("HTTP %s %s gagal (%s), retry dalam %.2fs", method, url, exc, delay)
+            else:
+                if response.status_code not in retry_statuses or attempt >= attempts - 1:
+                    return response
+                delay = self._retry_after(response) or jittered_backoff(attempt)
+                logger.info("HTTP %s %s -> %s, retry dalam %.2fs", method, url, response.status_code, delay)
+                response.close()
+            self._count("retries")
+            self.sleep(delay)
+        return None
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get("Retry-After")
+        if value and value.strip().isdigit():
+            return min(BACKOFF_CAP_S, float(value))
+        return None
+
+    def _fresh_for(self, response, source, ttl):
+        policy = parse_cache_control(response.headers.get("Cache-Control"))
+        if policy["no_store"]:
+            return None
+        if ttl is None:
+            ttl = source_ttl(source)
+        if ttl is not None:
+            return ttl
+        if policy["no_cache"]:
+            return 0
+        return policy["max_age"] or 0
+
+    def get(self, url, params=None, headers=None, timeout=None, source=None, ttl=None,
+            cache=True, retries=None, **kwargs):
+        """
+        GET dengan cache. `source` memilih TTL per sumber; `ttl` (detik) override langsung.
+        Respons yang berasal dari cache punya atribut `from_cache = True`.
+        """
+        headers = dict(headers or {})
+        request_kwargs = dict(params=params, headers=headers, timeout=self._timeout(timeout), **kwargs)
+        if not cache or self.cache is None:
+            return self._send("GET", url, retries, **request_kwargs)
+
+        key = self.cache_key("GET", url, params, headers)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            self._count("cache_hits")
+            return self.cache.to_response(entry)
+
+        if entry is not None:
+            if entry["headers"].get("etag"):
+                headers["If-None-Match"] = entry["headers"]["etag"]
+            if entry["headers"].get("last-modified"):
+                headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+
+        response = self._send("GET", url, retries, **request_kwargs)
+        if response is None:
+            return None
+        if entry is not None and response.status_code == 304:
+            self._count("revalidated")
+            fresh_for = self._fresh_for(response, source, ttl)
+            entry = self.cache.touch(key, entry, fresh_for or 0, response.headers)
+            return self.cache.to_response(entry)
+        if response.status_code == 200:
+            fresh_for = self._fresh_for(response, source, ttl)
+            if fresh_for is not None and self.cache.put(key, response, fresh_for) is not None:
+                self._count("cache_stores")
+        response.from_cache = False
+        return response
+
+    def post(self, url, timeout=None, retries=None, **kwargs):
+        """POST tidak di-cache; hanya pooling, timeout wajib, dan retry."""
+        return self._send("POST", url, retries, timeout=self._timeout(timeout), **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def _default_cache():
+    backend = CACHE_BACKEND.lower()
+    if backend == "off":
+        return None
+    store = None
+    redis_url = os.environ.get("REDIS_URL")
+    if backend in ("auto", "redis") and redis_url:
+        try:
+            import redis
+
+            store = _RedisStore(redis.from_url(redis_url))
+        except Exception as exc:
+            logger.warning("HTTP cache: Redis unavailable (%s)", exc)
+    if store is None and backend in ("auto", "disk"):
+        try:
+            store = _DiskStore(CACHE_DIR)
+        except OSError as exc:
+            logger.warning("HTTP cache: disk cache unavailable (%s), memory only", exc)
+    return ResponseCache(store=store)
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Satu klien per proses supaya connection pool dan cache dipakai bersama."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(cache=_default_cache())
+        return _client
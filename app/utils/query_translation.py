@@ -0,0 +1,344 @@
+# File: app/utils/query_translation.py
+# Deskripsi: Terjemahan query pencarian ke bahasa Inggris dengan sesedikit mungkin LLM call.
+# 1) Deteksi bahasa lokal (stopword + profil trigram karakter): query berbahasa Inggris
+#    tidak diterjemahkan sama sekali.
+# 2) Cache hasil per query ternormalisasi: LRU in-process di depan Redis (dipakai bersama
+#    antar worker/user).
+# 3) Single-flight: greenlet yang menerjemahkan query yang sama secara bersamaan
+#    menunggu satu upstream call yang sama.
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+from gevent.event import AsyncResult
+
+from .http_client import get_http_client
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MODEL = os.getenv("QUERY_TRANSLATION_MODEL", "llama-3.1-8b-instant")
+CACHE_TTL_S = int(os.getenv("QUERY_TRANSLATION_TTL_S", str(30 * 24 * 3600)))
+LRU_SIZE = int(os.getenv("QUERY_TRANSLATION_LRU_SIZE", "2048"))
+FLIGHT_TIMEOUT_S = float(os.getenv("QUERY_TRANSLATION_WAIT_S", "35"))
+
+# Alasan per query; semua kecuali "llm" berarti satu LLM call dihemat
+REASON_ENGLISH = "english"
+REASON_CACHE = "cache"
+REASON_DEDUPED = "deduped"
+REASON_LLM = "llm"
+REASON_UNAVAILABLE = "unavailable"
+
+# ── Deteksi bahasa ──
+
+EN_STOPWORDS = frozenset("""
+a an the of in on at to for from by with without about into onto over under between among
+and or but nor not no is are was were be been being has have had do does did can could
+should would may might will shall this that these those it its their there which what who
+whom whose how why when where than then as vs versus using based toward towards through
+during within across effect effects impact role study analysis case among
+""".split())
+
+ID_STOPWORDS = frozenset("""
+dan atau yang di ke dari pada untuk dengan dalam terhadap oleh sebagai adalah ini itu
+tersebut para serta bagi antara tentang kepada secara tidak bukan akan telah sudah sedang
+juga karena agar supaya sehingga bagaimana apa apakah mengapa kapan dimana siapa tanpa
+studi pengaruh hubungan analisis dampak peran penerapan efektivitas kasus tingkat
+""".split())
+
+# Korpus kecil untuk profil trigram karakter: kosakata judul/abstrak penelitian tipikal
+_EN_SEED = """
+the effect of social media on student learning outcomes and academic performance in higher
+education a systematic review of machine learning approaches for classification and prediction
+the relationship between motivation self efficacy and achievement among university students
+impact of digital transformation on organizational performance and employee satisfaction
+analysis of factors influencing customer loyalty purchase intention and brand trust
+implementation of project based learning to improve critical thinking skills
+an empirical study of leadership style work environment and job satisfaction
+determinants of financial performance in banking companies listed on the stock exchange
+development of an information system using a waterfall method for small business
+"""
+
+_ID_SEED = """
+pengaruh media sosial terhadap hasil belajar dan prestasi akademik mahasiswa di perguruan tinggi
+tinjauan sistematis pendekatan pembelajaran mesin untuk klasifikasi dan prediksi
+hubungan antara motivasi efikasi diri dan prestasi belajar pada siswa sekolah menengah
+dampak transformasi digital terhadap kinerja organisasi dan kepuasan kerja karyawan
+analisis faktor faktor yang mempengaruhi loyalitas pelanggan minat beli dan kepercayaan merek
+penerapan model pembelajaran berbasis proyek untuk meningkatkan kemampuan berpikir kritis
+studi empiris gaya kepemimpinan lingkungan kerja dan kepuasan kerja pegawai
+determinan kinerja keuangan perusahaan perbankan yang terdaftar di bursa efek indonesia
+pengembangan sistem informasi menggunakan metode waterfall pada usaha kecil menengah
+"""
+
+_ID_AFFIX_RE = re.compile(r"^(meng|meny|mem|men|me|peng|peny|pem|pen|ber|ter|di|ke)\w{3,}|\w{3,}(kan|nya|an|lah)$")
+_TOKEN_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _trigrams(word):
+    padded = f" {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _profile(seed):
+    counts = Counter(gram for word in _TOKEN_RE.findall(seed.lower()) for gram in _trigrams(word))
+    total = sum(counts.values())
+    vocab = len(counts) + 1
+    return {gram: math.log((n + 1) / (total + vocab)) for gram, n in counts.items()}, math.log(1 / (total + vocab))
+
+
+_EN_PROFILE = _profile(_EN_SEED)
+_ID_PROFILE = _profile(_ID_SEED)
+
+
+def _ngram_score(words, profile):
+    table, unseen = profile
+    grams = [gram for word in words for gram in _trigrams(word)]
+    if not grams:
+        return 0.0
+    return sum(table.get(gram, unseen) for gram in grams) / len(grams)
+
+
+def detect_language(text: str) -> str:
+    """
+    Return "en", "id", atau "unknown". Murah (mikrodetik), tanpa network.
+    Stopword adalah sinyal kuat; untuk query tanpa stopword (mis. "deep learning")
+    dipakai selisih log-probabilitas trigram karakter + imbuhan khas bahasa Indonesia.
+    """
+    words = _TOKEN_RE.findall((text or "").lower())
+    if not words:
+        return "unknown"
+    if any(ord(ch) > 0x24F for word in words for ch in word):
+        return "unknown"  # aksara non-Latin: serahkan ke LLM
+
+    en_hits = sum(word in EN_STOPWORDS for word in words)
+    id_hits = sum(word in ID_STOPWORDS for word in words)
+    affix_hits = sum(bool(_ID_AFFIX_RE.match(word)) for word in words if word not in EN_STOPWORDS)
+    margin = _ngram_score(words, _EN_PROFILE) - _ngram_score(words, _ID_PROFILE)
+
+    score = 1.5 * (en_hits - id_hits) - 0.5 * affix_hits + 2.0 * margin
+    if id_hits and id_hits >= en_hits:
+        return "id"
+    if score >= 0.6:
+        return "en"
+    if score <= -0.6:
+        return "id"
+    return "unknown"
+
+
+def normalize_query(query: str) -> str:
+    """Kunci cache: huruf kecil, spasi dirapikan, tanda baca di ujung dibuang."""
+    return re.sub(r"\s+", " ", (query or "").lower()).strip(" \t\"'.,;:!?")
+
+
+# ── Upstream ──
+
+def groq_translate(query: str) -> Optional[str]:
+    """Satu LLM call ke Groq. Return None bila API key tidak ada."""
+    api_key = os.getenv("GROQ_API_KEY") or os.getenv("LLM_API_KEY")
+    if not api_key:
+        return None
+
+    prompt = (
+        "Translate this academic search query to English. "
+        "Return only the translated query, nothing else:\n"
+        f"{query}"
+    )
+    response = get_http_client().post(
+        "https://api.groq.com/openai/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": TRANSLATION_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.1,
+        },
+        timeout=30,
+    )
+    response.raise_for_status()
+    data = response.json()
+    translated = (
+        data.get("choices", [{}])[0]
+        .get("message", {})
+        .get("content", "")
+        .strip()
+    )
+    if translated.startswith('"') and translated.endswith('"'):
+        translated = translated[1:-1]
+    return translated or None
+
+
+class TranslatedQuery(str):
+    """Query hasil terjemahan (tetap `str`) plus metadata untuk metrik per pencarian."""
+
+    reason: str = REASON_LLM
+    language: str = "unknown"
+
+    def __new__(cls, text, reason, language):
+        obj = super().__new__(cls, text)
+        obj.reason = reason
+        obj.language = language
+        return obj
+
+    @property
+    def llm_calls(self) -> int:
+        return 1 if self.reason == REASON_LLM else 0
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return 1 if self.reason in (REASON_ENGLISH, REASON_CACHE, REASON_DEDUPED) else 0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "language": self.language,
+            "reason": self.reason,
+            "llm_calls": self.llm_calls,
+            "llm_calls_saved": self.llm_calls_saved,
+        }
+
+
+class QueryTranslator:
+    def __init__(self, redis_client: Any = None, translate_fn: Callable[[str], Optional[str]] = groq_translate,
+                 lru_size: int = LRU_SIZE, ttl_seconds: int = CACHE_TTL_S, flight_timeout: float = FLIGHT_TIMEOUT_S):
+        self.redis = redis_client
+        self.translate_fn = translate_fn
+        self.lru = LRUCache(max_items=lru_size)
+        self.ttl_seconds = ttl_seconds
+        self.flight_timeout = flight_timeout
+        self._flights: Dict[str, AsyncResult] = {}
+        self.stats = {
+            "requests": 0, "skipped_english": 0, "lru_hits": 0, "redis_hits": 0, "deduped": 0,
+            "llm_calls": 0, "errors": 0,
+        }
+
+    @staticmethod
+    def key_for(normalized: str) -> str:
+        return f"qtrans:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+    def _cached(self, normalized):
+        text = self.lru.get(normalized)
+        if text is not None:
+            self.stats["lru_hits"] += 1
+            return text
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self.key_for(normalized))
+        except Exception as exc:
+            logger.warning("Query translation cache GET failed: %s", exc)
+            self.stats["errors"] += 1
+            return None
+        if not raw:
+            return None
+        text = raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+        self.lru.set(normalized, text)
+        self.stats["redis_hits"] += 1
+        return text
+
+    def _store(self, normalized, text):
+        self.lru.set(normalized, text)
+        if self.redis is None:
+            return
+        try:
+            self.redis.setex(self.key_for(normalized), self.ttl_seconds, text)
+        except Exception as exc:
+            logger.warning("Query translation cache SET failed: %s", exc)
+            self.stats["errors"] += 1
+
+    def _call_upstream(self, query, normalized):
+        try:
+            translated = self.translate_fn(query)
+        except Exception as exc:
+            logger.warning("Query translation failed, using original query: %s", exc)
+            self.stats["llm_calls"] += 1
+            self.stats["errors"] += 1
+            return None
+        if translated:
+            self.stats["llm_calls"] += 1  # None = tidak ada API key, tidak ada call
+            self._store(normalized, translated)
+        return translated
+
+    def translate(self, query: str) -> TranslatedQuery:
+        self.stats["requests"] += 1
+        language = detect_language(query)
+        if language == "en":
+            self.stats["skipped_english"] += 1
+            return TranslatedQuery(query, REASON_ENGLISH, language)
+
+        normalized = normalize_query(query)
+        if not normalized:
+            return TranslatedQuery(query, REASON_ENGLISH, language)
+        cached = self._cached(normalized)
+        if cached is not None:
+            return TranslatedQuery(cached, REASON_CACHE, language)
+
+        # Single-flight hanya untuk greenlet di main thread (pola sama dengan EmbeddingService.embed)
+        if threading.current_thread() is not threading.main_thread():
+            translated = self._call_upstream(query, normalized)
+            return TranslatedQuery(translated or query, REASON_LLM if translated else REASON_UNAVAILABLE, language)
+
+        flight = self._flights.get(normalized)
+        if flight is not None:
+            # wait() tidak me-raise gevent.Timeout (BaseException) saat leader lebih lambat
+            # dari flight_timeout (POST 30 s + retry); cukup pakai query asli
+            flight.wait(timeout=self.flight_timeout)
+            if not flight.ready():
+                logger.warning("Query translation wait timed out, using original query")
+                self.stats["errors"] += 1
+                return TranslatedQuery(query, REASON_UNAVAILABLE, language)
+            self.stats["deduped"] += 1
+            translated = flight.get()
+            return TranslatedQuery(translated or query, REASON_DEDUPED, language)
+
+        flight = self._flights[normalized] = AsyncResult()
+        translated = None
+        try:
+            translated = self._call_upstream(query, normalized)
+        finally:
+            self._flights.pop(normalized, None)
+            flight.set(translated)
+        return TranslatedQuery(translated or query, REASON_LLM if translated else REASON_UNAVAILABLE, language)
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        saved = stats["skipped_english"] + stats["lru_hits"] + stats["redis_hits"] + stats["deduped"]
+        stats["llm_calls_saved"] = saved
+        stats["llm_calls_per_search"] = round(stats["llm_calls"] / stats["requests"], 4) if stats["requests"] else 0.0
+        return stats
+
+
+def _default_redis():
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        return None
+    try:
+        import redis
+
+        return redis.from_url(redis_url)
+    except Exception as exc:
+        logger.warning("Query translation cache: Redis unavailable (%s), LRU only", exc)
+        return None
+
+
+_translator: Optional[QueryTranslator] = None
+_translator_lock = threading.Lock()
+
+
+def get_query_translator() -> QueryTranslator:
+    global _translator
+    with _translator_lock:
+        if _translator is None:
+            _translator = QueryTranslator(redis_client=_default_redis())
+        return _translator
+
+
+def translate_query(query: str) -> TranslatedQuery:
+    return get_query_translator().translate(query)
@@ -0,0 +1,96 @@
+# File: app/utils/reliability.py
+# Deskripsi: Engine reliabilitas closed-form. Matriks kovarians item dihitung SEKALI,
+# lalu Cronbach's Alpha, alpha-if-item-deleted, corrected item-total correlation dan
+# statistik split-half diturunkan secara aljabar dari matriks itu (tanpa re-run per item).
+#
+# Notasi: C = kovarians item (k x k, ddof=1), V = sum(C) = varians skor total,
+# s_i = sum baris ke-i dari C = cov(item_i, total).
+#   alpha            = k/(k-1) * (1 - trace(C)/V)                      (sama dgn pingouin)
+#   V tanpa item i   = V - 2*s_i + C_ii
+#   r item-total (i) = (s_i - C_ii) / sqrt(C_ii * V_tanpa_i)
+#   split-half       = paruh item ganjil vs genap, dari blok-blok C
+
+import numpy as np
+import pandas as pd
+from scipy.stats import f
+
+
+def item_covariance(values):
+    """Return (mean per item, matriks kovarians k x k) dari matriks n x k tanpa NaN."""
+    X = np.asarray(values, dtype=np.float64)
+    means = X.mean(axis=0)
+    centered = X - means
+    cov = centered.T @ centered / (X.shape[0] - 1)
+    return means, cov
+
+
+def _alpha(k, trace, total_var):
+    return (k / (k - 1)) * (1 - trace / total_var)
+
+
+def _alpha_ci(alpha, n, k, ci=.95):
+    """CI Feldt, formula & pembulatan identik dengan pg.cronbach_alpha."""
+    a = 1 - ci
+    df1 = n - 1
+    df2 = df1 * (k - 1)
+    lower = 1 - (1 - alpha) * f.isf(a / 2, df1, df2)
+    upper = 1 - (1 - alpha) * f.isf(1 - a / 2, df1, df2)
+    return np.round([lower, upper], 3)
+
+
+def split_half(cov):
+    """Split-half ganjil/genap: korelasi antar paruh, Spearman-Brown, dan Guttman (lambda-4)."""
+    k = cov.shape[0]
+    first, second = np.arange(0, k, 2), np.arange(1, k, 2)
+    var_a = cov[np.ix_(first, first)].sum()
+    var_b = cov[np.ix_(second, second)].sum()
+    cov_ab = cov[np.ix_(first, second)].sum()
+    r_halves = cov_ab / np.sqrt(var_a * var_b)
+    return {
+        "r_halves": r_halves,
+        "spearman_brown": 2 * r_halves / (1 + r_halves),
+        "guttman": 2 * (1 - (var_a + var_b) / (var_a + var_b + 2 * cov_ab)),
+    }
+
+
+def reliability_statistics(data, ci=.95):
+    """
+    Semua statistik reliabilitas dari satu matriks kovarians.
+    `data`: DataFrame/array n x k (numerik, tanpa NaN), minimal 2 item & 2 responden.
+    """
+    columns = list(data.columns) if isinstance(data, pd.DataFrame) else list(range(np.shape(data)[1]))
+    n, k = np.shape(data)
+    if k < 2: raise ValueError("Reliabilitas memerlukan minimal 2 item.")
+    if n < 2: raise ValueError("Reliabilitas memerlukan minimal 2 responden.")
+
+    means, cov = item_covariance(data)
+    item_var = np.diag(cov)
+    row_sums = cov.sum(axis=1)
+    total_var = row_sums.sum()
+    trace = item_var.sum()
+
+    alpha = _alpha(k, trace, total_var)
+
+    # Skala tanpa item i (vektor untuk semua i sekaligus)
+    var_without = total_var - 2 * row_sums + item_var
+    cov_with_rest = row_sums - item_var
+    with np.errstate(divide="ignore", invalid="ignore"):
+        item_total_r = cov_with_rest / np.sqrt(item_var * var_without)
+        if k > 2:
+            alpha_if_deleted = _alpha(k - 1, trace - item_var, var_without)
+        else:
+            alpha_if_deleted = np.zeros(k)  # alpha tidak terdefinisi untuk 1 item
+        halves = split_half(cov)
+
+    return {
+        "alpha": alpha,
+        "ci": _alpha_ci(alpha, n, k, ci),
+        "n_items": k,
+        "n_samples": n,
+        "items": columns,
+        "mean": means,
+        "sd": np.sqrt(item_var),
+        "corrected_item_total": item_total_r,
+        "alpha_if_deleted": alpha_if_deleted,
+        "split_half": halves,
+    }
@@ -0,0 +1,112 @@
+# File: app/utils/search_fanout.py
+# Deskripsi: Fan-out executor berbasis gevent Pool untuk query paralel ke banyak sumber.
+# Dipakai unified_search supaya latency = sumber paling lambat (dibatasi deadline),
+# bukan jumlah latency semua sumber.
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import gevent
+from gevent.pool import Pool
+from gevent.queue import Empty, Queue
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+
+@dataclass
+class SourceOutcome:
+    """Hasil satu sumber dari fan-out. `results` selalu list (kosong jika gagal/timeout)."""
+
+    name: str
+    status: str
+    results: List[Any] = field(default_factory=list)
+    duration_ms: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+class FanOutExecutor:
+    """
+    Menjalankan sekumpulan callable tanpa argumen secara konkuren di gevent Pool.
+
+    - Setiap sumber punya deadline sendiri (`deadlines[name]`, fallback `default_deadline`).
+    - Sumber yang melewati deadline dilaporkan sebagai `timeout` dengan hasil kosong,
+      sumber lain tetap dikembalikan (partial result).
+    - `iter_outcomes` meng-yield hasil sesuai urutan selesai, sehingga caller bisa
+      streaming hasil awal tanpa menunggu sumber paling lambat.
+    """
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        default_deadline: float = 12.0,
+        deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.pool_size = pool_size
+        self.default_deadline = float(default_deadline)
+        self.deadlines = dict(deadlines or {})
+
+    def deadline_for(self, name: str) -> float:
+        return float(self.deadlines.get(name, self.default_deadline))
+
+    def _run_one(self, name: str, fn: Callable[[], Any], outbox: Queue) -> None:
+        started_at = time.time()
+        deadline = self.deadline_for(name)
+        try:
+            with gevent.Timeout(deadline):
+                result = fn()
+            outcome = SourceOutcome(name=name, status=STATUS_OK, results=list(result or []))
+        except gevent.Timeout:
+            logger.warning("[FANOUT] source=%s missed deadline %.2fs", name, deadline)
+            outcome = SourceOutcome(name=name, status=STATUS_TIMEOUT, error=f"deadline {deadline:.2f}s exceeded")
+        except Exception as exc:
+            logger.warning("[FANOUT] source=%s failed: %s", name, exc)
+            outcome = SourceOutcome(name=name, status=STATUS_ERROR, error=str(exc))
+        outcome.duration_ms = int((time.time() - started_at) * 1000)
+        outbox.put(outcome)
+
+    def iter_outcomes(self, tasks: Dict[str, Callable[[], Any]]) -> Iterator[SourceOutcome]:
+        """Yield `SourceOutcome` per sumber sesuai urutan selesai."""
+        if not tasks:
+            return
+
+        outbox: Queue = Queue()
+        pool = Pool(self.pool_size or len(tasks))
+        for name, fn in tasks.items():
+            pool.spawn(self._run_one, name, fn, outbox)
+
+        # Jaring pengaman: jika greenlet macet di luar Timeout (mis. blocking C call),
+        # caller tetap dilepas setelah deadline terpanjang + margin kecil.
+        hard_deadline = time.time() + max(self.deadline_for(name) for name in tasks) + 1.0
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = max(0.0, hard_deadline - time.time())
+                try:
+                    outcome = outbox.get(timeout=remaining)
+                except Empty:
+                    for name in sorted(pending):
+                        yield SourceOutcome(
+                            name=name,
+                            status=STATUS_TIMEOUT,
+                            error="source did not yield before hard deadline",
+                            duration_ms=int(self.deadline_for(name) * 1000),
+                        )
+                    return
+                pending.discard(outcome.name)
+                yield outcome
+        finally:
+            # Caller berhenti lebih awal (stream ditutup) atau semua selesai: bersihkan sisa greenlet.
+            pool.kill(block=False)
+
+    def run(self, tasks: Dict[str, Callable[[], Any]]) -> List[SourceOutcome]:
+        return list(self.iter_outcomes(tasks))
@@ -5,9 +5,11 @@
 import os
 import re
 import logging
-import requests  # pyre-ignore
 import urllib.parse
 from .general_utils import make_api_request_with_retry  # pyre-ignore
+from .http_client import get_http_client  # pyre-ignore
+from .query_translation import translate_query  # pyre-ignore
+from .search_fanout import FanOutExecutor  # pyre-ignore
 
 logger = logging.getLogger(__name__)
 
@@ -22,44 +24,8 @@ print = _safe_module_print
 
 
 def _translate_query_to_english(query: str) -> str:
-    api_key = os.getenv("GROQ_API_KEY") or os.getenv("LLM_API_KEY")
-    if not api_key:
-        return query
-
-    prompt = (
-        "Translate this academic search query to English. "
-        "Return only the translated query, nothing else:\n"
-        f"{query}"
-    )
-
-    try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "llama-3.1-8b-instant",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
-            },
-            timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-        translated = (
-            data.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
-        )
-        if translated.startswith('"') and translated.endswith('"'):
-            translated = translated[1:-1]
-        return translated or query
-    except Exception as exc:
-        logger.warning("Query translation failed, using original query: %s", exc)
-        return query
+    """Terjemahan lewat QueryTranslator: query Inggris di-skip, hasil di-cache, call identik digabung."""
+    return translate_query(query)
 
 def _parse_keywords(keywords_string):
     """
@@ -92,7 +58,7 @@ def search_core(keywords, year=None, limit=10):
     params = {'q': core_query, 'limit': limit}
     headers = {"Authorization": f"Bearer {core_api_key}"}
 
-    response = make_api_request_with_retry(core_url, headers=headers, params=params)
+    response = make_api_request_with_retry(core_url, headers=headers, params=params, source='core')
     if not response: return []
     
     results = []
@@ -122,7 +88,7 @@ def search_crossref(keywords, year=None, limit=10):
         params['filter'] = f'from-pub-date:{year}-01-01'
 
     headers = {'User-Agent': 'OnThesisApp/1.0 (mailto:dev@onthesis.app)'}
-    response = make_api_request_with_retry(base_url, headers=headers, params=params)
+    response = make_api_request_with_retry(base_url, headers=headers, params=params, source='crossref')
     if not response: return []
 
     results = []
@@ -165,7 +131,7 @@ def search_openalex(keywords, year=None, limit=10):
     params = {'filter': ",".join(filters), 'per-page': limit}
     headers = {'User-Agent': 'support@onthesis.app'} 
     
-    response = make_api_request_with_retry(base_url, headers=headers, params=params)
+    response = make_api_request_with_retry(base_url, headers=headers, params=params, source='openalex')
     if not response: return []
 
     results = []
@@ -210,7 +176,7 @@ def search_doaj(keywords, year=None, limit=10):
     
     params = {'pageSize': limit}
     
-    response = make_api_request_with_retry(base_url, headers={}, params=params)
+    response = make_api_request_with_retry(base_url, headers={}, params=params, source='doaj')
     if not response: return []
 
     results = []
@@ -243,7 +209,7 @@ def search_eric(keywords, year=None, limit=10):
         search_term += f"&publicationdate_from={year}"
         
     params = {'search': search_term, 'rows': limit, 'format': 'json'}
-    response = make_api_request_with_retry(base_url, headers={}, params=params)
+    response = make_api_request_with_retry(base_url, headers={}, params=params, source='eric')
     if not response: return []
 
     results = []
@@ -279,7 +245,7 @@ def search_pubmed(keywords, year=None, limit=10):
     # Step 1: Search IDs
     search_url = f"{base_url}esearch.fcgi"
     params = {'db': 'pubmed', 'term': term, 'retmax': limit, 'retmode': 'json', 'api_key': api_key}
-    search_response = make_api_request_with_retry(search_url, headers={}, params=params)
+    search_response = make_api_request_with_retry(search_url, headers={}, params=params, source='pubmed')
     if not search_response: return []
 
     ids = search_response.json().get('esearchresult', {}).get('idlist', [])
@@ -288,7 +254,7 @@ def search_pubmed(keywords, year=None, limit=10):
     # Step 2: Get Details
     summary_url = f"{base_url}esummary.fcgi"
     params = {'db': 'pubmed', 'id': ",".join(ids), 'retmode': 'json', 'api_key': api_key}
-    summary_response = make_api_request_with_retry(summary_url, headers={}, params=params)
+    summary_response = make_api_request_with_retry(summary_url, headers={}, params=params, source='pubmed')
     if not summary_response: return []
 
     results = []
@@ -311,12 +277,118 @@ def search_pubmed(keywords, year=None, limit=10):
     return results
 
 # ==========================================
-# MAIN UNIFIED SEARCH (Gevent-safe sequential)
+# MAIN UNIFIED SEARCH (Gevent fan-out, per-source deadline)
 # ==========================================
-def unified_search(query, sources=None, year=None, limit=10):
+def _search_functions():
+    # Di-resolve saat dipanggil supaya monkeypatch search_* tetap berlaku.
+    return {
+        'core': search_core,
+        'crossref': search_crossref,
+        'openalex': search_openalex,
+        'doaj': search_doaj,
+        'eric': search_eric,
+        'pubmed': search_pubmed,
+    }
+
+SOURCE_LABELS = {
+    'core': 'CORE',
+    'crossref': 'Crossref',
+    'openalex': 'OpenAlex',
+    'doaj': 'DOAJ',
+    'eric': 'ERIC',
+    'pubmed': 'PubMed',
+}
+
+# Deadline per sumber (detik). PubMed butuh dua request (esearch + esummary).
+DEFAULT_SOURCE_DEADLINES = {
+    'core': 12.0,
+    'crossref': 12.0,
+    'openalex': 12.0,
+    'doaj': 10.0,
+    'eric': 10.0,
+    'pubmed': 15.0,
+}
+DEFAULT_SEARCH_DEADLINE = float(os.getenv("UNIFIED_SEARCH_DEADLINE", "12"))
+
+
+def _reference_identifier(ref):
+    title_val = ref.get('title')
+    title_norm = re.sub(r'\W+', '', str(title_val if title_val else '').lower())
+    doi_val = ref.get('doi')
+    return str(doi_val) if doi_val else str(title_norm)[0:50]  # type: ignore
+
+
+def iter_unified_search(query, sources=None, year=None, limit=10, deadlines=None, search_functions=None, metrics=None):
     """
-    Menjalankan pencarian terpadu ke berbagai sumber secara sequential.
+    Versi streaming dari unified_search. Semua sumber di-query bersamaan lewat
+    FanOutExecutor dan setiap sumber yang selesai langsung di-yield sebagai event:
+
+        {"source", "label", "status", "results", "duration_ms", "error"}
+
+    `results` hanya berisi referensi yang belum pernah muncul dari sumber sebelumnya
+    (dedup DOI/judul), sehingga caller cukup meng-append. Sumber yang melewati
+    deadline di-yield dengan status "timeout" dan results kosong.
+
+    Jika `metrics` (dict) diberikan, key "translation" diisi metrik terjemahan query
+    (bahasa terdeteksi, alasan, llm_calls, llm_calls_saved).
+    """
+    if not sources:
+        sources = ['crossref', 'openalex', 'doaj']
+
+    english_query = _translate_query_to_english(query)
+    reason = getattr(english_query, "reason", "llm")
+    translation_metrics = english_query.metrics() if hasattr(english_query, "metrics") else {"reason": reason}
+    if metrics is not None:
+        metrics["translation"] = translation_metrics
+    print(f"[TRANSLATE] \"{query}\" -> \"{english_query}\" ({reason})")
+
+    functions = search_functions or _search_functions()
+    selected_sources = {name: fn for name, fn in functions.items() if name in sources}
+
+    merged_deadlines = dict(DEFAULT_SOURCE_DEADLINES)
+    merged_deadlines.update(deadlines or {})
+    executor = FanOutExecutor(default_deadline=DEFAULT_SEARCH_DEADLINE, deadlines=merged_deadlines)
+
+    def _bind(fn):
+        return lambda: fn(english_query, year, limit)
+
+    for name in selected_sources:
+        logger.info(f"[SEARCH-{SOURCE_LABELS.get(name, name)}] Searching: {english_query}")
+
+    seen_identifiers = set()
+    tasks = {name: _bind(fn) for name, fn in selected_sources.items()}
+    for outcome in executor.iter_outcomes(tasks):
+        label = SOURCE_LABELS.get(outcome.name, outcome.name)
+        fresh = []
+        for ref in outcome.results:
+            identifier = _reference_identifier(ref)
+            if identifier and identifier not in seen_identifiers:
+                fresh.append(ref)
+                seen_identifiers.add(identifier)
+
+        if outcome.ok:
+            logger.info(f"[SEARCH-{label}] Found: {len(outcome.results)} results ({outcome.duration_ms}ms)")
+        else:
+            logger.warning(f"[SEARCH-{label}] {outcome.status}: {outcome.error}")
+
+        yield {
+            "source": outcome.name,
+            "label": label,
+            "status": outcome.status,
+            "results": fresh,
+            "duration_ms": outcome.duration_ms,
+            "error": outcome.error,
+        }
+
+
+def unified_search(query, sources=None, year=None, limit=10, deadlines=None, with_status=False):
+    """
+    Menjalankan pencarian terpadu ke berbagai sumber secara paralel (gevent fan-out).
     Menerima parameter 'limit' untuk menentukan jumlah hasil per sumber.
+
+    Sumber yang gagal atau melewati deadline dilewati (partial result). Jika
+    `with_status=True`, return dict {"results", "sources", "translation"} berisi status per
+    sumber dan metrik terjemahan query (termasuk LLM call yang dihemat).
     """
     logger.info(
         "unified_search invoked: module=%s query=%r sources=%s year=%s limit=%s",
@@ -326,61 +398,21 @@ def unified_search(query, sources=None, year=None, limit=10):
         year,
         limit,
     )
-    if not sources:
-        sources = ['crossref', 'openalex', 'doaj'] 
-
-    original_query = query
-    english_query = _translate_query_to_english(query)
-    print(f"[TRANSLATE] \"{original_query}\" -> \"{english_query}\"")
 
-    all_references = []
-    
-    search_functions = {
-        'core': search_core,
-        'crossref': search_crossref,
-        'openalex': search_openalex,
-        'doaj': search_doaj,
-        'eric': search_eric,
-        'pubmed': search_pubmed,
-    }
-    source_labels = {
-        'core': 'CORE',
-        'crossref': 'Crossref',
-        'openalex': 'OpenAlex',
-        'doaj': 'DOAJ',
-        'eric': 'ERIC',
-        'pubmed': 'PubMed',
-    }
-    selected_sources = {name: fn for name, fn in search_functions.items() if name in sources}
-
-    # Execute sequentially (Gevent-safe, no ThreadPoolExecutor/as_completed)
-    for name, fn in selected_sources.items():
-        label = source_labels.get(name, name)
-        try:
-            logger.info(f"[SEARCH-{label}] Searching: {english_query}")
-            result_data = fn(english_query, year, limit) or []  # type: ignore
-            all_references.extend(result_data)
-            logger.info(f"[SEARCH-{label}] Found: {len(result_data)} results")
-        except Exception as exc:
-            logger.warning(f"[SEARCH-{label}] failed: {exc}")
-            continue
-
-    # Deduplicate Results (Based on DOI or Title)
     unique_references = []
-    seen_identifiers = set()
-    
-    for ref in all_references:
-        title_val = ref.get('title')
-        title_norm = re.sub(r'\W+', '', str(title_val if title_val else '').lower())
-        
-        doi_val = ref.get('doi')
-        identifier = str(doi_val) if doi_val else str(title_norm)[0:50]  # type: ignore
-        
-        if identifier and identifier not in seen_identifiers:
-            unique_references.append(ref)
-            seen_identifiers.add(identifier)
-            
+    source_status = {}
+    metrics = {}
+    for event in iter_unified_search(query, sources=sources, year=year, limit=limit, deadlines=deadlines, metrics=metrics):
+        unique_references.extend(event["results"])
+        source_status[event["source"]] = {
+            "status": event["status"],
+            "count": len(event["results"]),
+            "duration_ms": event["duration_ms"],
+        }
+
     print(f"✅ Total Unique Results: {len(unique_references)}")
+    if with_status:
+        return {"results": unique_references, "sources": source_status, "translation": metrics.get("translation")}
     return unique_references
 
 # ==========================================
@@ -400,10 +432,11 @@ def get_openalex_related(doi, limit=10):
 
     base_url = "https://api.openalex.org/works"
     headers = {'User-Agent': 'support@onthesis.app'}
+    http = get_http_client()
     
     # 1. Cari ID OpenAlex dari DOI dulu
     try:
-        lookup_resp = requests.get(f"{base_url}/https://doi.org/{clean_doi}", headers=headers)
+        lookup_resp = http.get(f"{base_url}/https://doi.org/{clean_doi}", headers=headers, source='openalex')
         if lookup_resp.status_code != 200: return []
         work_data = lookup_resp.json()
         openalex_id = work_data.get('id') # Format: https://openalex.org/W123456...
@@ -426,8 +459,11 @@ def get_openalex_related(doi, limit=10):
         'per-page': limit,
         'sort': 'relevance_score:desc'
     }
-    resp_cited = requests.get(base_url, headers=headers, params=params_cited)
-    if resp_cited.status_code == 200:
+    try:
+        resp_cited = http.get(base_url, headers=headers, params=params_cited, source='openalex')
+    except Exception:
+        resp_cited = None
+    if resp_cited is not None and resp_cited.status_code == 200:
         for item in resp_cited.json().get('results', []):
             related_papers.append(_parse_openalex_item(item, "cited_by"))
 
@@ -435,7 +471,7 @@ def get_openalex_related(doi, limit=10):
     # Ini biasanya pengganti 'references' yang lebih cerdas
     related_url = work_data.get('related_works_url')
     if related_url:
-        resp_related = requests.get(related_url, headers=headers) # Biasanya balik list ID
+        # related_works_url biasanya balik list ID saja; respons itu dulu diambil tapi tidak dipakai.
         # Kalau formatnya list ID, kita harus fetch detailnya. 
         # Untuk MVP, kita pakai filter 'related_to' saja kalau didukung, atau skip complexity ini.
         # Kita ganti strategi: Ambil dari 'referenced_works' list (IDs)
@@ -443,8 +479,11 @@ def get_openalex_related(doi, limit=10):
         if ref_ids:
             # Fetch detail batch (filter=openalex_id:A|B|C)
             ids_str = "|".join(ref_ids)
-            resp_refs = requests.get(base_url, headers=headers, params={'filter': f'openalex_id:{ids_str}'})
-            if resp_refs.status_code == 200:
+            try:
+                resp_refs = http.get(base_url, headers=headers, params={'filter': f'openalex_id:{ids_str}'}, source='openalex')
+            except Exception:
+                resp_refs = None
+            if resp_refs is not None and resp_refs.status_code == 200:
                 for item in resp_refs.json().get('results', []):
                     related_papers.append(_parse_openalex_item(item, "reference"))
 
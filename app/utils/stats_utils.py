@@ -5,6 +5,8 @@ import statsmodels.api as sm
 from scipy import stats
 import traceback
 
+from app.utils.reliability import reliability_statistics
+
 # ==========================================
 # 1. HELPER FUNCTIONS
 # ==========================================
@@ -304,13 +306,15 @@ def _get_df(dataset, variables=None):
     if hasattr(dataset, 'get_analysis_dataframe'):
         return dataset.get_analysis_dataframe(variables)
     elif hasattr(dataset, 'df'): # Jika dataset adalah object OnThesisDataset tapi method tidak ketemu
-        df = dataset.df.copy()
+        # Tanpa .copy(): df dataset bisa view read-only bersama dari DatasetRegistry, dan
+        # seleksi kolom + dropna di bawah sudah menghasilkan frame baru
+        df = dataset.df
         if variables:
             available_cols = df.columns.tolist()
             valid_vars = [v for v in variables if v in available_cols]
             if valid_vars:
                 return df[valid_vars].dropna()
-        return df
+        return df.copy(deep=False)
     elif isinstance(dataset, pd.DataFrame): # Jika dataset langsung berupa DataFrame
         df = dataset.copy()
         if variables:
@@ -844,11 +848,10 @@ def run_reliability_analysis(dataset, params):
             raise ValueError("Reliabilitas memerlukan minimal 2 variabel item (numerik).")
 
         # 2. Hitung Cronbach's Alpha Global
-        # ci=.95 artinya Confidence Interval 95%
-        alpha_res = pg.cronbach_alpha(data=df_numeric, ci=.95) 
-        alpha_val = alpha_res[0]
-        ci_lower = alpha_res[1][0]
-        ci_upper = alpha_res[1][1]
+        # Satu matriks kovarians item -> alpha, CI 95%, item-total & split-half (closed-form)
+        rel = reliability_statistics(df_numeric, ci=.95)
+        alpha_val = rel["alpha"]
+        ci_lower, ci_upper = rel["ci"]
 
         # Interpretasi Global
         status = "Sangat Reliabel" if alpha_val > 0.8 else \
@@ -856,29 +859,16 @@ def run_reliability_analysis(dataset, params):
                  "Kurang Reliabel" if alpha_val > 0.4 else "Tidak Reliabel"
 
         # 3. Item-Total Statistics ("Cronbach if Item Deleted")
-        # Ini fitur mahal! Kita hitung simulasi jika item dibuang.
+        # Diturunkan dari matriks kovarians yang sama, tanpa menghitung ulang alpha per item.
         item_stats = []
-        total_score = df_numeric.sum(axis=1)
-
-        for col in df_numeric.columns:
-            # Korelasi Item-Total (Corrected)
-            # Menghitung korelasi item ini dgn total skor (minus item ini sendiri)
-            other_cols = [c for c in df_numeric.columns if c != col]
-            sub_total = df_numeric[other_cols].sum(axis=1)
-            r_it, _ = stats.pearsonr(df_numeric[col], sub_total)
-
-            # Cronbach jika item ini dibuang
-            if len(other_cols) >= 2:
-                alpha_drop = pg.cronbach_alpha(data=df_numeric[other_cols])[0]
-            else:
-                alpha_drop = 0.0 # Tidak bisa hitung alpha cuma 1 item
-
+        for i, col in enumerate(rel["items"]):
+            r_it = rel["corrected_item_total"][i]
             item_stats.append({
                 "Item": col,
-                "Mean": round(df_numeric[col].mean(), 3),
-                "SD": round(df_numeric[col].std(), 3),
+                "Mean": round(rel["mean"][i], 3),
+                "SD": round(rel["sd"][i], 3),
                 "Corrected_Item_Total_Correlation": round(r_it, 3),
-                "Cronbach_Alpha_if_Deleted": round(alpha_drop, 3),
+                "Cronbach_Alpha_if_Deleted": round(rel["alpha_if_deleted"][i], 3),
                 "Action": "Pertahankan" if r_it > 0.3 else "Pertimbangkan Hapus" # Rule of thumb umum
             })
 
@@ -904,7 +894,10 @@ def run_reliability_analysis(dataset, params):
                 "N_Items": df_numeric.shape[1],
                 "N_Sample": df_numeric.shape[0],
                 "CI_95_Lower": ci_lower,
-                "CI_95_Upper": ci_upper
+                "CI_95_Upper": ci_upper,
+                "Split_Half_r": round(rel["split_half"]["r_halves"], 3),
+                "Spearman_Brown": round(rel["split_half"]["spearman_brown"], 3),
+                "Guttman_Split_Half": round(rel["split_half"]["guttman"], 3)
             }],
             "summary_table_coefficients": item_stats, # Tabel detail per item
             "charts": {
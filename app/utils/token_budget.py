@@ -0,0 +1,338 @@
+# File: app/utils/token_budget.py
+# Deskripsi: Hitung token + bagi budget prompt per section (system/context/history/rag).
+# Tokenizer: tiktoken dengan encoding di-cache per model; kalau tiktoken tidak ada atau
+# file BPE tidak bisa dimuat (offline), turun ke estimator regex yang cenderung sedikit
+# melebihkan hitungan cl100k (aman untuk budget). Pemotongan teks selalu di batas
+# kalimat/baris bila memungkinkan.
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Sequence
+
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken ikut terpasang bersama litellm
+    tiktoken = None
+
+DEFAULT_ENCODING = os.getenv("TOKEN_BUDGET_DEFAULT_ENCODING", "cl100k_base")
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+# Teks pendek lebih murah dihitung ulang daripada di-hash untuk cache
+TOKEN_COUNT_CACHE_MIN_CHARS = int(os.getenv("TOKEN_COUNT_CACHE_MIN_CHARS", "256"))
+
+# Rata-rata cl100k ~4 huruf/token; prefix 6 huruf/token pasti memuat > limit token untuk
+# teks normal, jadi sisa teks tidak perlu di-encode saat hanya ingin tahu "melebihi budget"
+PREFIX_CHARS_PER_TOKEN = 6
+
+# Estimator offline bisa meleset beberapa persen di bawah tiktoken; beri bantalan
+ESTIMATE_SAFETY_FACTOR = float(os.getenv("TOKEN_ESTIMATE_SAFETY_FACTOR", "1.1"))
+
+# Bobot default untuk bagian prompt; makin besar makin banyak jatah token
+SECTION_PRIORITY = {
+    "system": 8.0,
+    "context": 4.0,
+    "rag": 2.0,
+    "history": 1.0,
+}
+
+# Prefix model -> encoding. Model non-OpenAI (llama, gemini, mixtral) tidak punya BPE
+# publik di tiktoken; cl100k cukup dekat untuk keperluan budgeting.
+_MODEL_ENCODINGS = (
+    ("gpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-5", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+)
+
+FALLBACK = "fallback"
+
+_SENTENCE_RE = re.compile(r"[^.!?\n]*(?:[.!?]+[\"')\]]*|\n+|$)\s*")
+_WORD_RE = re.compile(r"\w+|[^\w\s]+", re.UNICODE)
+
+_encodings: Dict[str, object] = {}
+_encoding_lock = threading.Lock()
+_count_cache = LRUCache(max_items=TOKEN_COUNT_CACHE_SIZE)
+
+
+def _ensure_offline_cache_dir() -> None:
+    """Arahkan tiktoken ke file BPE bawaan litellm supaya tidak perlu download."""
+    if os.getenv("TIKTOKEN_CACHE_DIR"):
+        return
+    try:
+        spec = find_spec("litellm")
+    except (ImportError, ValueError):
+        return
+    if not spec or not spec.submodule_search_locations:
+        return
+    bundled = os.path.join(list(spec.submodule_search_locations)[0], "litellm_core_utils", "tokenizers")
+    if os.path.isdir(bundled):
+        os.environ["TIKTOKEN_CACHE_DIR"] = bundled
+
+
+def encoding_name_for(model: Optional[str]) -> str:
+    name = str(model or "").lower().rsplit("/", 1)[-1]
+    for prefix, encoding in _MODEL_ENCODINGS:
+        if name.startswith(prefix):
+            return encoding
+    return DEFAULT_ENCODING
+
+
+def get_encoding(model: Optional[str] = None):
+    """Encoding tiktoken untuk model (di-cache), atau None bila harus memakai fallback."""
+    name = encoding_name_for(model)
+    if name in _encodings:
+        return _encodings[name]
+    with _encoding_lock:
+        if name in _encodings:
+            return _encodings[name]
+        encoding = None
+        if tiktoken is not None:
+            _ensure_offline_cache_dir()
+            try:
+                encoding = tiktoken.get_encoding(name)
+            except Exception as exc:
+                logger.warning(f"tiktoken encoding {name} unavailable, using estimator: {exc}")
+        _encodings[name] = encoding
+        return encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimator tanpa tokenizer: kata pendek = 1 token, kata panjang dipecah per ~4 huruf."""
+    total = 0
+    for match in _WORD_RE.finditer(text):
+        length = match.end() - match.start()
+        total += 1 if length <= 4 else 1 + math.ceil((length - 4) / 4)
+    return total
+
+
+def count_tokens(text, model: Optional[str] = None) -> int:
+    text = str(text or "")
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if len(text) < TOKEN_COUNT_CACHE_MIN_CHARS:
+        return _count(encoding, text)
+    # Kunci = digest, bukan teks: cache tidak menahan ribuan bab/histori panjang di memori
+    key = (encoding.name if encoding is not None else FALLBACK,
+           hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    cached = _count_cache.get(key)
+    if cached is None:
+        cached = _count(encoding, text)
+        _count_cache.set(key, cached)
+    return cached
+
+
+def _count(encoding, text: str) -> int:
+    if encoding is None:
+        return math.ceil(estimate_tokens(text) * ESTIMATE_SAFETY_FACTOR)
+    return len(encoding.encode_ordinary(text))
+
+
+def _count_prefix(text: str, model: Optional[str], limit: int):
+    """
+    (token, huruf yang dihitung). Teks yang jauh lebih panjang dari `limit` cukup dihitung
+    prefix-nya: hasilnya batas bawah yang sudah > limit, dan itu sudah cukup untuk budgeting.
+    """
+    window = (max(0, limit) + 1) * PREFIX_CHARS_PER_TOKEN
+    if len(text) > window:
+        head = text[:window]
+        tokens = count_tokens(head, model)
+        if tokens > limit:
+            return tokens, len(head)
+    return count_tokens(text, model), len(text)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Pecah teks jadi kalimat/baris; spasi penutup ikut tiap potongan sehingga join('') == text."""
+    return [piece for piece in _SENTENCE_RE.findall(text) if piece]
+
+
+def _hard_cut(text: str, max_tokens: int, model: Optional[str], from_end: bool) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode_ordinary(text)
+        kept = tokens[-max_tokens:] if from_end else tokens[:max_tokens]
+        return encoding.decode(kept)
+    words = re.findall(r"\S+\s*", text)
+    limit = int(max_tokens / ESTIMATE_SAFETY_FACTOR)
+    kept, used = [], 0
+    for word in (reversed(words) if from_end else words):
+        cost = estimate_tokens(word)
+        if used + cost > limit:
+            break
+        kept.append(word)
+        used += cost
+    return "".join(reversed(kept) if from_end else kept)
+
+
+def truncate_to_tokens(
+    text,
+    max_tokens: int,
+    model: Optional[str] = None,
+    keep: str = "start",
+    marker: str = "",
+) -> str:
+    """
+    Potong teks ke max_tokens di batas kalimat. keep="start" menyimpan awal teks,
+    keep="end" menyimpan akhir (mis. histori terbaru). `marker` (mis. "...") ikut
+    dihitung ke budget. Kalau satu kalimat pun tidak muat, kalimat itu dipotong per token.
+    """
+    text = str(text or "")
+    total, measured_chars = _count_prefix(text, model, max_tokens)
+    if total <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(marker, model)
+    if budget <= 0:
+        return ""
+
+    from_end = keep == "end"
+    sentences = split_sentences(text)
+    if from_end:
+        sentences.reverse()
+
+    def joined(count):
+        kept = sentences[:count]
+        return "".join(reversed(kept) if from_end else kept).strip()
+
+    # Tebakan awal proporsional jumlah huruf (satu encode), lalu geser per kalimat;
+    # jauh lebih murah daripada meng-encode ratusan kalimat satu per satu
+    target_chars = measured_chars * budget / total
+    count, chars = 0, 0
+    while count < len(sentences) and chars + len(sentences[count]) <= target_chars:
+        chars += len(sentences[count])
+        count += 1
+    used = count_tokens(joined(count), model)
+    while count > 0 and used > budget:
+        count -= 1
+        # Spasi penutup biasanya melebur ke token kata berikutnya, jadi tidak dihitung
+        used -= count_tokens(sentences[count].rstrip(), model)
+    while count < len(sentences):
+        cost = count_tokens(sentences[count].rstrip(), model)
+        if used + cost > budget:
+            break
+        used += cost
+        count += 1
+
+    if count == 0:
+        body = _hard_cut(sentences[0], budget, model, from_end).strip()
+    else:
+        body = joined(count)
+        # Hitungan per kalimat hanya perkiraan; buang kalimat tepi sampai benar-benar muat
+        while count > 1 and count_tokens(body, model) > budget:
+            count -= 1
+            body = joined(count)
+    if not body:
+        return ""
+    if not marker:
+        return body
+    return f"{marker}\n{body}" if from_end else f"{body}\n{marker}"
+
+
+@dataclass
+class PromptSection:
+    name: str
+    text: str
+    priority: float = 1.0
+    min_tokens: int = 0
+    required: bool = False
+    keep: str = "start"
+    marker: str = "..."
+
+
+@dataclass
+class BudgetResult:
+    texts: Dict[str, str]
+    tokens: Dict[str, int]
+    requested: Dict[str, int]  # untuk teks yang jauh melebihi budget: batas bawah
+    budget: int
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+    @property
+    def truncated(self) -> List[str]:
+        return [name for name, used in self.tokens.items() if used < self.requested[name]]
+
+
+class TokenBudgeter:
+    """
+    Bagi budget token ke beberapa section berdasarkan prioritas (water-filling):
+    section `required` selalu utuh, lalu `min_tokens` tiap section dipenuhi sesuai
+    urutan prioritas, sisanya dibagi proporsional bobot. Section yang butuh lebih
+    sedikit dari jatahnya mengembalikan kelebihannya ke section lain.
+    """
+
+    def __init__(self, max_tokens: int, model: Optional[str] = None):
+        self.max_tokens = max(0, int(max_tokens))
+        self.model = model
+
+    def allocate(self, sections: Sequence[PromptSection]) -> Dict[str, int]:
+        return self._allocate(sections, self._needs(sections))
+
+    def _needs(self, sections: Sequence[PromptSection]) -> Dict[str, int]:
+        # Section opsional yang jauh melebihi budget tidak perlu dihitung sampai habis
+        return {
+            s.name: count_tokens(s.text, self.model) if s.required else _count_prefix(s.text, self.model, self.max_tokens)[0]
+            for s in sections
+        }
+
+    def _allocate(self, sections: Sequence[PromptSection], needs: Dict[str, int]) -> Dict[str, int]:
+        remaining = self.max_tokens
+        grants = {s.name: 0 for s in sections}
+        for section in sections:
+            if section.required:
+                grants[section.name] = needs[section.name]
+                remaining -= needs[section.name]
+        if sum(needs.values()) <= self.max_tokens:
+            return dict(needs)
+
+        flexible = sorted((s for s in sections if not s.required), key=lambda s: -s.priority)
+        for section in flexible:
+            floor = min(section.min_tokens, needs[section.name], max(0, remaining))
+            grants[section.name] = floor
+            remaining -= floor
+
+        open_sections = [s for s in flexible if grants[s.name] < needs[s.name]]
+        while remaining > 0 and open_sections:
+            weight = sum(max(s.priority, 0.0) for s in open_sections) or float(len(open_sections))
+            pool = remaining
+            for section in open_sections:
+                share = pool * (max(section.priority, 0.0) or 1.0) / weight
+                grant = min(needs[section.name] - grants[section.name], int(share))
+                grants[section.name] += grant
+                remaining -= grant
+            if remaining == pool:
+                break
+            open_sections = [s for s in open_sections if grants[s.name] < needs[s.name]]
+        return grants
+
+    def fit(self, sections: Sequence[PromptSection]) -> BudgetResult:
+        needs = self._needs(sections)
+        grants = self._allocate(sections, needs)
+        texts, used = {}, {}
+        for section in sections:
+            grant = grants[section.name]
+            if grant >= needs[section.name]:
+                texts[section.name] = section.text
+                used[section.name] = needs[section.name]
+                continue
+            text = truncate_to_tokens(section.text, grant, self.model, keep=section.keep, marker=section.marker)
+            texts[section.name] = text
+            used[section.name] = count_tokens(text, self.model)
+        return BudgetResult(texts=texts, tokens=used, requested=needs, budget=self.max_tokens)
@@ -0,0 +1,56 @@
+# File: benchmarks/_bootstrap.py
+# Deskripsi: Setup ringan agar benchmark bisa import modul `app.*` tanpa menjalankan
+# app/__init__.py (Firebase, Flask, Redis). Polanya sama dengan stub di tests/.
+
+import sys
+import time
+import types
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def register_packages(*names):
+    """Daftarkan package `app` dan sub-package kosong (mis. "utils", "agent")."""
+    app_package = sys.modules.get("app")
+    if app_package is None or not hasattr(app_package, "__path__"):
+        app_package = types.ModuleType("app")
+        app_package.__path__ = [str(REPO_ROOT / "app")]
+        sys.modules["app"] = app_package
+
+    for name in names:
+        full_name = f"app.{name}"
+        package = sys.modules.get(full_name)
+        if package is None:
+            package = types.ModuleType(full_name)
+            package.__path__ = [str(REPO_ROOT / "app" / name.replace(".", "/"))]
+            sys.modules[full_name] = package
+        setattr(app_package, name.split(".")[0], sys.modules[f"app.{name.split('.')[0]}"])
+    return app_package
+
+
+def stub_module(name, **attrs):
+    module = types.ModuleType(name)
+    for key, value in attrs.items():
+        setattr(module, key, value)
+    sys.modules[name] = module
+    return module
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """Return (hasil terakhir, rata-rata detik per panggilan)."""
+    result = None
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) / max(1, repeat)
+
+
+def report(title, rows):
+    print(f"\n== {title} ==")
+    width = max(len(str(label)) for label, _ in rows) if rows else 0
+    for label, value in rows:
+        print(f"  {str(label).ljust(width)}  {value}")
@@ -0,0 +1,119 @@
+# File: benchmarks/bench_agent_context.py
+# Deskripsi: Latency SharedMemory.build_agent_context dengan latency buatan per sumber:
+# jalur lama (embed + search paper, lalu embed + search dokumen, serial) vs pipeline baru
+# (embed sekali + fan-out paper/dokumen/percakapan dengan deadline bersama). Skenario
+# berikutnya menyuntikkan sumber paper lalu embed yang macet untuk melihat degradasi.
+#
+#   python -m benchmarks.bench_agent_context --embed 0.25 --papers 0.3 --document 0.2 --requests 20
+
+import argparse
+import logging
+import statistics
+import time
+
+import gevent
+
+from benchmarks._bootstrap import register_packages, report, stub_module
+
+register_packages("agent", "utils")
+stub_module("litellm", completion=lambda *args, **kwargs: None)
+stub_module("litellm.exceptions", RateLimitError=RuntimeError)
+
+from app.agent import memory_system  # noqa: E402
+from app.agent.memory_system import InMemoryProfileStore, SharedMemory  # noqa: E402
+
+
+class Record:
+    def __init__(self, payload, score=0.9):
+        self.payload = payload
+        self.score = score
+
+
+class SlowVectorDB:
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    def search(self, collection, query_vector, filter=None, score_threshold=None, limit=10):
+        if collection == "research_papers":
+            gevent.sleep(self.latencies["papers"])
+            return [Record({"title": "Literasi keuangan mahasiswa", "year": 2023, "topics": ["literasi"]})]
+        gevent.sleep(self.latencies["document"])
+        return [Record({"content": "Bab 2 membahas teori perilaku terencana."})]
+
+    def scroll(self, collection, scroll_filter, order_by, limit):
+        return []
+
+    def upsert(self, collection, points):
+        return None
+
+
+def legacy_build(memory, query):
+    """Salinan urutan lama: dua embed + dua search, satu per satu."""
+    known_papers = memory.research.get_papers(topic=query, min_relevance=0.6)
+    sections = memory.document.get_relevant_context(query, doc_id=memory._project_doc_id(), top_k=2)
+    return known_papers, sections, memory.conversation.get_context_window(last_n=6)
+
+
+def measure(fn, requests):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e3, max(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embed", type=float, default=0.25, help="latency embedding (detik)")
+    parser.add_argument("--papers", type=float, default=0.3, help="latency search paper (detik)")
+    parser.add_argument("--document", type=float, default=0.2, help="latency search dokumen (detik)")
+    parser.add_argument("--stalled", type=float, default=10.0, help="latency sumber paper yang macet (detik)")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    embed_calls = []
+
+    def slow_embed(text):
+        embed_calls.append(text)
+        gevent.sleep(args.embed)
+        return [0.1, 0.2, 0.3]
+
+    memory_system.embed = slow_embed
+    embed_ms = args.embed * 1e3
+    latencies = {"papers": args.papers, "document": args.document}
+    memory = SharedMemory("bench", "project", SlowVectorDB(latencies), InMemoryProfileStore())
+    query = "pengaruh literasi keuangan terhadap minat investasi"
+
+    rows = []
+    for label, fn in (("legacy serial", lambda: legacy_build(memory, query)),
+                      ("parallel pipeline", lambda: memory.build_agent_context(query))):
+        embed_calls.clear()
+        median_ms, max_ms = measure(fn, args.requests)
+        rows.append((label, f"median {median_ms:7.1f} ms  max {max_ms:7.1f} ms  embeds/request {len(embed_calls) / args.requests:.0f}"))
+
+    sources = memory.context_metrics["sources"]
+    rows.append(("per-source (last request)", "  ".join(f"{name}={m['duration_ms']}ms" for name, m in sources.items())))
+
+    latencies["papers"] = args.stalled
+    median_ms, _ = measure(lambda: memory.build_agent_context(query), 3)
+    status = memory.context_metrics["sources"]["papers"]["status"]
+    rows.append((f"papers stalled {args.stalled:.0f}s", (
+        f"median {median_ms:7.1f} ms  (deadline {memory_system.AGENT_CONTEXT_DEADLINE_SECONDS:.1f}s, papers={status}; "
+        f"legacy would wait ~{(2 * args.embed + args.stalled + args.document) * 1e3:.0f} ms)"
+    )))
+    latencies["papers"] = args.papers
+    args.embed = args.stalled
+    median_ms, _ = measure(lambda: memory.build_agent_context(query), 3)
+    sources = memory.context_metrics["sources"]
+    rows.append((f"embed stalled {args.stalled:.0f}s", (
+        f"median {median_ms:7.1f} ms  (embed={sources['embed']['status']}, "
+        f"conversation={sources['conversation']['status']}; semantic lookups dropped)"
+    )))
+    report(f"agent context: embed {embed_ms:.0f} ms, papers {args.papers * 1e3:.0f} ms, "
+           f"document {args.document * 1e3:.0f} ms", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# File: benchmarks/bench_analysis_cache.py
+# Deskripsi: Latency analisis berulang (buka ulang hasil / ganti chart) pada dataset yang
+# tidak berubah. Jalur lama: load dataset (CSV + replay edit log) + hitung ulang fungsi
+# stats_utils di setiap request. Jalur baru: cek versi dataset (meta.json + ukuran edit
+# log) lalu ambil dari AnalysisResultCache (LRU, atau disk untuk worker lain).
+#
+#   python -m benchmarks.bench_analysis_cache --rows 20000 --repeat 20
+
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("utils", "services")
+
+from app.services import analysis_cache  # noqa: E402
+from app.utils import data_engine, stats_utils  # noqa: E402
+from app.utils.data_engine import OnThesisDataset  # noqa: E402
+
+USER, PROJECT = "bench", "analysis"
+
+ANALYSES = {
+    "descriptive-analysis": (stats_utils.run_descriptive_analysis, {"variables": ["ITEM_0", "ITEM_1", "ITEM_2"]}),
+    "normality": (stats_utils.run_normality_test, {"variables": ["ITEM_0", "ITEM_1", "ITEM_2", "ITEM_3"]}),
+    "linear-regression": (stats_utils.run_linear_regression, {"variables": ["ITEM_0", "ITEM_1", "ITEM_2", "ITEM_3"]}),
+    "chi-square": (stats_utils.run_chi_square, {"variables": ["KELOMPOK", "ITEM_0"]}),
+    "reliability": (stats_utils.run_reliability_analysis, {"variables": [f"ITEM_{i}" for i in range(8)]}),
+}
+
+
+def _frame(rows, cols):
+    rng = np.random.default_rng(5)
+    base = rng.normal(3, 1, rows)
+    data = {f"item_{i}": np.clip(np.rint(base + rng.normal(0, 0.8, rows)), 1, 5) for i in range(cols - 1)}
+    data["kelompok"] = rng.choice(["A", "B", "C"], rows)
+    return pd.DataFrame(data)
+
+
+def legacy_request(analysis_id):
+    func, params = ANALYSES[analysis_id]
+    dataset = OnThesisDataset.load(USER, PROJECT)
+    return func(dataset, dict(params))
+
+
+def cached_request(cache, analysis_id):
+    func, params = ANALYSES[analysis_id]
+    version = OnThesisDataset.load(USER, PROJECT, load_data=False).content_version()
+    result, source = cache.get(USER, PROJECT, version, analysis_id, params)
+    if source is None:
+        dataset = OnThesisDataset.load(USER, PROJECT)
+        result = func(dataset, dict(params))
+        cache.set(USER, PROJECT, version, analysis_id, params, result)
+        source = analysis_cache.SOURCE_COMPUTED
+    return result, source
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    data_engine.CLOUD_SYNC_DEBOUNCE_S = 0
+    data_engine.LOCAL_STORAGE_PATH = tempfile.mkdtemp(prefix="onthesis-bench-")
+    dataset = OnThesisDataset(df=_frame(args.rows, args.cols), user_id=USER, project_id=PROJECT)
+
+    rows = []
+    cache = analysis_cache.AnalysisResultCache()
+    for analysis_id in ANALYSES:
+        legacy_result, legacy_s = timed(legacy_request, analysis_id, repeat=max(1, args.repeat // 4))
+        (first, source), first_s = timed(cached_request, cache, analysis_id)
+        assert source == analysis_cache.SOURCE_COMPUTED
+        _, disk_s = timed(lambda: cached_request(analysis_cache.AnalysisResultCache(), analysis_id), repeat=args.repeat)
+        (repeat, source), lru_s = timed(cached_request, cache, analysis_id, repeat=args.repeat)
+        assert source == analysis_cache.SOURCE_LRU and repeat == first
+        rows.append((analysis_id, f"legacy {legacy_s * 1e3:7.1f} ms | first {first_s * 1e3:7.1f} ms"
+                                  f" | repeat (LRU) {lru_s * 1e3:6.2f} ms | repeat (disk) {disk_s * 1e3:6.2f} ms"
+                                  f" | {legacy_s / lru_s:5.0f}x"))
+
+    dataset.update_cell_data(0, 0, "1")
+    (_, source), after_edit_s = timed(cached_request, cache, "descriptive-analysis")
+    rows.append(("after a cell edit", f"{source} in {after_edit_s * 1e3:.1f} ms (invalidated by new dataset version)"))
+    _, version_s = timed(lambda: OnThesisDataset.load(USER, PROJECT, load_data=False).content_version(), repeat=50)
+    rows.append(("dataset version check", f"{version_s * 1e3:.2f} ms"))
+    report(f"repeat analysis latency: {args.rows:,} x {args.cols} dataset", rows)
+
+
+if __name__ == "__main__":
+    main()
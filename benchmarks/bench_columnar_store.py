@@ -0,0 +1,106 @@
+# File: benchmarks/bench_columnar_store.py
+# Deskripsi: Load time + RSS snapshot dataset: data.csv (format lama, parse teks + tebak
+# dtype) vs snapshot kolumnar (.npy per kolom, mmap) penuh dan sebagian kolom. Registry
+# dimatikan supaya yang diukur memang baca dari disk; tiap load di proses anak (fork)
+# agar RSS tidak tercampur antar skenario.
+#
+#   python -m benchmarks.bench_columnar_store --rows 1000000 --cols 10
+
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._bootstrap import register_packages, report
+
+register_packages("utils")
+
+from app.utils import data_engine, dataset_registry  # noqa: E402
+from app.utils.data_engine import OnThesisDataset  # noqa: E402
+
+USER = "bench"
+SUBSET = ["ITEM_0", "ITEM_1", "KELOMPOK"]
+
+
+def _frame(rows, cols):
+    rng = np.random.default_rng(9)
+    data = {f"item_{i}": rng.integers(1, 6, rows).astype(float) for i in range(cols - 1)}
+    data["kelompok"] = rng.choice(["Kontrol", "Eksperimen A", "Eksperimen B"], rows)
+    return pd.DataFrame(data)
+
+
+def _rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _child(project, mode, queue):
+    dataset_registry._registry = dataset_registry.DatasetRegistry(max_items=0)
+    before = _rss_mb()
+    started = time.perf_counter()
+    if mode == "subset":
+        df = OnThesisDataset.load_columns(USER, SUBSET, project_id=project)
+    else:
+        df = OnThesisDataset.load(USER, project).df
+    load_s = time.perf_counter() - started
+    loaded_rss = _rss_mb() - before
+    df[[c for c in df.columns if c.startswith("ITEM_")]].sum()  # sentuh semua halaman numerik
+    queue.put((load_s, loaded_rss, _rss_mb() - before, list(df.dtypes.astype(str).unique())))
+
+
+def measure(project, mode, repeat):
+    ctx = mp.get_context("fork")
+    runs = []
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_child, args=(project, mode, queue))
+        proc.start()
+        runs.append(queue.get())
+        proc.join()
+    best = min(runs, key=lambda run: run[0])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data_engine.CLOUD_SYNC_DEBOUNCE_S = 0
+    data_engine.LOCAL_STORAGE_PATH = tempfile.mkdtemp(prefix="onthesis-bench-")
+    frame = _frame(args.rows, args.cols)
+    sizes = {}
+    for storage in ("csv", "columnar"):
+        data_engine.DATASET_STORAGE_FORMAT = storage
+        ds = OnThesisDataset(df=frame.copy(), user_id=USER, project_id=storage)
+        started = time.perf_counter()
+        ds.save()
+        sizes[storage] = (time.perf_counter() - started,
+                          sum(os.path.getsize(os.path.join(root, name))
+                              for root, _, names in os.walk(ds.local_dir) for name in names) / 2**20)
+    dataset_registry._registry = dataset_registry.DatasetRegistry(max_items=0)
+    del frame
+
+    rows = []
+    for label, project, mode in [("csv, full load", "csv", "full"),
+                                 ("columnar, full load (mmap)", "columnar", "full"),
+                                 (f"columnar, {len(SUBSET)} columns", "columnar", "subset")]:
+        load_s, loaded_rss, touched_rss, dtypes = measure(project, mode, args.repeat)
+        rows.append((label, f"load {load_s * 1e3:7.1f} ms | RSS +{loaded_rss:6.1f} MB after load,"
+                            f" +{touched_rss:6.1f} MB after scanning numerics | dtypes {dtypes}"))
+    for storage, (save_s, size_mb) in sizes.items():
+        rows.append((f"{storage} save / on disk", f"{save_s * 1e3:7.1f} ms | {size_mb:.1f} MB"))
+    report(f"dataset snapshot load: {args.rows:,} x {args.cols}", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# File: benchmarks/bench_conversation_memory.py
+# Deskripsi: Byte yang dikirim ke Redis + latency per turn ConversationMemory: blob JSON
+# lama (SETEX seluruh list tiap turn) vs append-only (RPUSH per turn + summary terpisah)
+# pada 50, 500 dan 5.000 turn. Redis diganti fake in-process yang menghitung byte payload
+# dan round trip; latency request path = CPU terukur + round trip * --rtt + byte / --bandwidth.
+#
+#   python -m benchmarks.bench_conversation_memory --turns 50 500 5000 --rtt 0.0005
+#
+# Window default (max_turns=20) membatasi blob lama ke ~21 turn; --max-turns 0 mematikan
+# kompresi supaya terlihat biaya O(n) blob pada window panjang. Tulisan rangkuman dari
+# worker background ikut dihitung (LLM diganti fungsi instan).
+
+import argparse
+import json
+import time
+from collections import Counter
+from datetime import datetime
+
+import gevent
+
+from benchmarks._bootstrap import register_packages, report, stub_module
+
+register_packages("agent", "utils")
+stub_module("litellm", completion=lambda *args, **kwargs: None)
+stub_module("litellm.exceptions", RateLimitError=RuntimeError)
+
+from app.agent import memory_system  # noqa: E402
+from app.agent.memory_system import ConversationMemory, get_conversation_summarizer  # noqa: E402
+
+MESSAGE = (
+    "Bab 2 saya membahas pengaruh literasi keuangan terhadap minat investasi mahasiswa; "
+    "tolong cek apakah kerangka teorinya sudah runtut dan sitasinya lengkap."
+)
+
+
+def _size(value):
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(str(value))
+
+
+class MeteredRedis:
+    """Fake Redis secukupnya untuk ConversationMemory, mencatat byte tulis dan round trip,
+    dipisah antara request path (greenlet utama) dan worker rangkuman background."""
+
+    def __init__(self):
+        self.data = {}
+        self.bytes_written = Counter()
+        self.round_trips = Counter()
+        self._main = gevent.getcurrent()
+
+    def _bucket(self):
+        return "request" if gevent.getcurrent() is self._main else "background"
+
+    def _trip(self):
+        self.round_trips[self._bucket()] += 1
+
+    def _call(self, name, *args, **kwargs):
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            self._trip()
+            return self._call(name, *args, **kwargs)
+        return command
+
+    def _meter(self, *values):
+        self.bytes_written[self._bucket()] += sum(_size(v) for v in values)
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _set(self, key, value, ex=None):
+        self._meter(key, value)
+        self.data[key] = value
+
+    def _setex(self, key, ttl, value):
+        self._set(key, value)
+
+    def _delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def _rpush(self, key, *values):
+        self._meter(key, *values)
+        self.data.setdefault(key, []).extend(values)
+        return len(self.data[key])
+
+    def _lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _ltrim(self, key, start, end):
+        if key in self.data:
+            self.data[key] = self.data[key][start:] if end == -1 else self.data[key][start:end + 1]
+
+    def _expire(self, key, ttl):
+        return key in self.data
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.reset()
+
+            def reset(self):
+                self.calls = []
+                self.immediate = False
+
+            def watch(self, *keys):
+                redis._trip()
+                self.immediate = True
+
+            def multi(self):
+                self.immediate = False
+
+            def __getattr__(self, name):
+                def command(*args, **kwargs):
+                    if self.immediate:
+                        redis._trip()
+                        return redis._call(name, *args, **kwargs)
+                    self.calls.append((name, args, kwargs))
+                return command
+
+            def execute(self):
+                redis._trip()
+                return [redis._call(name, *args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
+
+class LegacyConversationMemory(ConversationMemory):
+    """Salinan load/save lama: satu blob JSON `conv:<scope>` ditulis ulang tiap turn."""
+
+    def load(self):
+        data = memory_system.redis_client.get(f"conv:{self.scope_id}")
+        if data:
+            self.turns = [memory_system.ConversationTurn.from_dict(t) for t in json.loads(data)]
+
+    def save(self):
+        raw = json.dumps([t.to_dict() for t in self.turns])
+        memory_system.redis_client.setex(f"conv:{self.scope_id}", 86400, raw)
+
+    def _persist_turn(self, turn):
+        pass
+
+    def _append_turn(self, turn):
+        self.turns.append(turn)
+        if len(self.turns) > self.max_turns:
+            old_turns = self.turns[:-self.max_turns]
+            summary = self._summarize(old_turns)
+            self.turns = [memory_system.ConversationTurn(
+                role="system", content=f"[Ringkasan percakapan sebelumnya]: {summary}", intent="summary",
+                plan_id=None, timestamp=datetime.now(), tokens_used=0,
+            )] + self.turns[-self.max_turns:]
+        self.save()
+
+
+def run(memory_cls, turns, max_turns, rtt, bandwidth):
+    redis = MeteredRedis()
+    memory_system.redis_client = redis
+    memory = memory_cls(scope_id="bench:project", max_turns=max_turns or turns + 1)
+    memory._summarize = lambda old: "Ringkasan: literasi keuangan dan minat investasi."
+
+    cpu_s = 0.0
+    for index in range(turns):
+        started = time.perf_counter()
+        memory.add_turn("user" if index % 2 == 0 else "assistant", f"{MESSAGE} ({index})")
+        cpu_s += time.perf_counter() - started
+        gevent.sleep(0)  # beri giliran ke worker rangkuman, seperti antar-request
+    get_conversation_summarizer().join()
+
+    request_s = cpu_s + redis.round_trips["request"] * rtt + redis.bytes_written["request"] / bandwidth
+    return {
+        "bytes": sum(redis.bytes_written.values()) / turns,
+        "request_ms": request_s / turns * 1e3,
+        "request_trips": redis.round_trips["request"] / turns,
+        "background_trips": redis.round_trips["background"] / turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--max-turns", type=int, nargs="+", default=[20, 0],
+                        help="window ConversationMemory; 0 = tanpa kompresi")
+    parser.add_argument("--rtt", type=float, default=0.0005, help="round trip Redis (detik)")
+    parser.add_argument("--bandwidth", type=float, default=100e6, help="byte/detik ke Redis")
+    args = parser.parse_args()
+
+    for max_turns in args.max_turns:
+        rows = []
+        for turns in args.turns:
+            legacy = run(LegacyConversationMemory, turns, max_turns, args.rtt, args.bandwidth)
+            append = run(ConversationMemory, turns, max_turns, args.rtt, args.bandwidth)
+            rows.append((f"{turns:5d} turns", (
+                f"legacy {legacy['bytes'] / 1024:8.1f} KiB/turn {legacy['request_ms']:6.2f} ms/turn | "
+                f"append {append['bytes'] / 1024:5.2f} KiB/turn {append['request_ms']:5.2f} ms/turn "
+                f"(round trips: {append['request_trips']:.2f} request + {append['background_trips']:.2f} background) | "
+                f"{legacy['bytes'] / append['bytes']:6.1f}x fewer bytes"
+            )))
+        window = f"max_turns={max_turns}" if max_turns else "no compression"
+        report(f"conversation memory writes ({window}, rtt {args.rtt * 1e3:.1f} ms)", rows)
+
+
+if __name__ == "__main__":
+    main()
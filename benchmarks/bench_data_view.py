@@ -0,0 +1,79 @@
+# File: benchmarks/bench_data_view.py
+# Deskripsi: Time-to-first-window data view: dump penuh lama (get_data_view_data + potong
+# 1000 baris + json) vs jendela server-side (data_view.get_window), termasuk sort/filter
+# cold (permutasi dihitung) dan warm (permutasi dari cache, mis. saat scroll).
+#
+#   python -m benchmarks.bench_data_view --rows 200000 --cols 20
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("utils")
+
+from app.utils import data_view  # noqa: E402
+
+WINDOW = 200
+
+
+def _frame(rows, cols):
+    rng = np.random.default_rng(5)
+    data = {f"ITEM_{i}": rng.integers(1, 6, rows).astype(float) for i in range(cols - 2)}
+    data["SKOR"] = np.where(rng.random(rows) < 0.05, np.nan, rng.normal(70, 10, rows).round(1))
+    data["KELOMPOK"] = rng.choice(["Kontrol", "Eksperimen A", "Eksperimen B"], rows)
+    return pd.DataFrame(data)
+
+
+def legacy_dump(df):
+    # Sama dengan route lama: seluruh tabel -> list, baru dipotong 1000 baris
+    data = {"columns": list(df.columns), "data": df.replace({np.nan: None}).values.tolist()}
+    data["data"] = data["data"][:1000]
+    return json.dumps(data)
+
+
+def window(df, cache_key=None, **params):
+    return json.dumps(data_view.get_window(df, cache_key=cache_key, **params))
+
+
+def cold(df, **params):
+    data_view.clear_cache()
+    return window(df, cache_key="bench", **params)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = _frame(args.rows, args.cols)
+    sort = "SKOR:desc,KELOMPOK"
+    filters = [{"column": "KELOMPOK", "op": "eq", "value": "Kontrol"}, {"column": "SKOR", "op": "ge", "value": 80}]
+    scenarios = [
+        ("legacy full dump, first 1000 rows", lambda: legacy_dump(df)),
+        ("window 1000 rows (same payload)", lambda: window(df, limit=1000)),
+        (f"window {WINDOW} rows", lambda: window(df, limit=WINDOW)),
+        (f"window {WINDOW} rows, orient=columns", lambda: window(df, limit=WINDOW, orient="columns")),
+        (f"window {WINDOW} rows x 8 cols", lambda: window(df, limit=WINDOW, col_limit=8)),
+        (f"sorted window, cold ({sort})", lambda: cold(df, limit=WINDOW, sort=sort)),
+        ("sorted window, warm (scroll)", lambda: window(df, "bench", offset=50_000, limit=WINDOW, sort=sort)),
+        ("filtered + sorted window, cold", lambda: cold(df, limit=WINDOW, sort=sort, filters=filters)),
+        ("filtered + sorted window, warm", lambda: window(df, "bench", offset=1_000, limit=WINDOW, sort=sort, filters=filters)),
+    ]
+
+    rows = []
+    for label, fn in scenarios:
+        if "warm" in label:
+            fn()  # isi cache dulu
+        payload, seconds = timed(fn, repeat=args.repeat)
+        rows.append((label, f"{seconds * 1e3:8.2f} ms | {len(payload) / 1024:8.1f} KiB"))
+    report(f"data view time-to-first-window: {args.rows:,} x {args.cols}", rows)
+
+
+if __name__ == "__main__":
+    main()
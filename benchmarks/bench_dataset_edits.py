@@ -0,0 +1,81 @@
+# File: benchmarks/bench_dataset_edits.py
+# Deskripsi: 1.000 edit cell berurutan pada sheet besar: delta edit log vs save() penuh per edit
+# (jalur lama: tulis ulang seluruh data.csv di setiap edit). Jalur lama hanya diukur untuk
+# sebagian edit lalu diekstrapolasi, karena per edit-nya O(rows).
+#
+#   python -m benchmarks.bench_dataset_edits --rows 100000 --edits 1000
+
+import argparse
+import os
+import random
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("utils")
+
+from app.utils import data_engine  # noqa: E402
+from app.utils.data_engine import OnThesisDataset  # noqa: E402
+
+
+def _frame(rows, cols):
+    rng = np.random.default_rng(7)
+    data = {f"item_{i}": rng.integers(1, 6, rows).astype(float) for i in range(cols - 1)}
+    data["kelompok"] = rng.choice(["A", "B", "C"], rows)
+    return pd.DataFrame(data)
+
+
+def _edits(count, rows, cols):
+    rnd = random.Random(11)
+    return [(rnd.randrange(rows), rnd.randrange(cols - 1), str(rnd.randint(1, 5))) for _ in range(count)]
+
+
+def _legacy_edit(ds, r, c, val):
+    ds._apply_cell(r, c, float(val))
+    ds.save(sync_to_cloud=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--edits", type=int, default=1000)
+    parser.add_argument("--legacy-edits", type=int, default=20, help="edit yang diukur untuk jalur lama")
+    args = parser.parse_args()
+
+    data_engine.CLOUD_SYNC_DEBOUNCE_S = 0
+    # Compaction di luar jendela pengukuran supaya angka mencerminkan biaya append per edit
+    data_engine.COMPACT_EVERY_EDITS = args.edits + 1
+    data_engine.LOCAL_STORAGE_PATH = tempfile.mkdtemp(prefix="onthesis-bench-")
+    edits = _edits(args.edits, args.rows, args.cols)
+
+    ds, create_s = timed(OnThesisDataset, df=_frame(args.rows, args.cols), user_id="bench", project_id="delta")
+    _, delta_s = timed(lambda: [ds.update_cell_data(r, c, v) for r, c, v in edits])
+    log_bytes = os.path.getsize(ds.local_edit_log_path)
+    loaded, load_s = timed(OnThesisDataset.load, "bench", "delta")
+    assert loaded.pending_edits == args.edits
+    _, compact_s = timed(loaded.save, sync_to_cloud=False)
+
+    legacy = OnThesisDataset(df=_frame(args.rows, args.cols), user_id="bench", project_id="legacy")
+    sample = edits[:args.legacy_edits]
+    _, legacy_s = timed(lambda: [_legacy_edit(legacy, r, c, v) for r, c, v in sample])
+    legacy_per_edit = legacy_s / max(1, len(sample))
+
+    report(f"{args.edits} sequential cell edits on {args.rows:,} x {args.cols}", [
+        ("initial save (snapshot)", f"{create_s * 1e3:8.1f} ms"),
+        ("delta log: total", f"{delta_s * 1e3:8.1f} ms"),
+        ("delta log: per edit", f"{delta_s / args.edits * 1e6:8.1f} us"),
+        ("edit log size", f"{log_bytes / 1024:8.1f} KiB"),
+        ("load + replay", f"{load_s * 1e3:8.1f} ms"),
+        ("compaction", f"{compact_s * 1e3:8.1f} ms"),
+        ("full save per edit: per edit", f"{legacy_per_edit * 1e3:8.1f} ms  (n={len(sample)})"),
+        ("full save per edit: total (extrapolated)", f"{legacy_per_edit * args.edits:8.1f} s"),
+        ("speedup", f"{legacy_per_edit * args.edits / delta_s:8.0f}x"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# File: benchmarks/bench_dataset_registry.py
+# Deskripsi: Memori + latency request analisis / data-view pada dataset 1 juta baris. Jalur
+# lama: OnThesisDataset.load = pd.read_csv di setiap request lalu _get_df menyalin frame
+# lagi; jalur baru: DatasetRegistry (satu frame per versi, view read-only, copy-on-write).
+# Memori diukur dengan tracemalloc selama N request "bersamaan" masih memegang frame-nya.
+#
+#   python -m benchmarks.bench_dataset_registry --rows 1000000 --concurrent 8
+
+import argparse
+import gc
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("utils")
+
+from app.utils import data_engine, dataset_registry, stats_utils  # noqa: E402
+from app.utils.data_engine import OnThesisDataset  # noqa: E402
+
+USER, PROJECT = "bench", "registry"
+VARIABLES = ["ITEM_0", "ITEM_1", "ITEM_2"]
+
+
+def _frame(rows, cols):
+    rng = np.random.default_rng(3)
+    data = {f"item_{i}": rng.integers(1, 6, rows).astype(float) for i in range(cols - 1)}
+    data["kelompok"] = rng.choice(["A", "B", "C"], rows)
+    return pd.DataFrame(data)
+
+
+def legacy_request():
+    dataset = OnThesisDataset.load(USER, PROJECT)
+    frame = dataset.df.copy()  # salinan lama di _get_df
+    return dataset, frame, frame[VARIABLES].describe()
+
+
+def registry_request():
+    dataset = OnThesisDataset.load(USER, PROJECT)
+    frame = stats_utils._get_df(dataset)
+    return dataset, frame, frame[VARIABLES].describe()
+
+
+def load_only():
+    return OnThesisDataset.load(USER, PROJECT)
+
+
+def held_memory(request, concurrent):
+    """MB yang masih dipegang selama `concurrent` request aktif bersamaan."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = [request() for _ in range(concurrent)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return (current - baseline) / 2**20, (peak - baseline) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--concurrent", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data_engine.CLOUD_SYNC_DEBOUNCE_S = 0
+    data_engine.LOCAL_STORAGE_PATH = tempfile.mkdtemp(prefix="onthesis-bench-")
+    OnThesisDataset(df=_frame(args.rows, args.cols), user_id=USER, project_id=PROJECT)
+    rows = []
+
+    dataset_registry._registry = dataset_registry.DatasetRegistry(max_items=0)  # = tanpa registry
+    _, legacy_load_s = timed(load_only, repeat=args.repeat)
+    _, legacy_s = timed(legacy_request, repeat=args.repeat)
+    legacy_held, legacy_peak = held_memory(legacy_request, args.concurrent)
+
+    dataset_registry._registry = dataset_registry.DatasetRegistry()
+    _, cold_s = timed(registry_request)
+    _, warm_load_s = timed(load_only, repeat=args.repeat * 20)
+    _, warm_s = timed(registry_request, repeat=args.repeat * 20)
+    registry_held, registry_peak = held_memory(registry_request, args.concurrent)
+
+    rows.append(("load, legacy (read_csv)", f"{legacy_load_s * 1e3:8.1f} ms"))
+    rows.append(("load, registry warm", f"{warm_load_s * 1e3:8.2f} ms  ({legacy_load_s / warm_load_s:,.0f}x)"))
+    rows.append(("legacy request (read_csv + copy)", f"{legacy_s * 1e3:8.1f} ms"))
+    rows.append(("registry request, cold", f"{cold_s * 1e3:8.1f} ms"))
+    rows.append(("registry request, warm", f"{warm_s * 1e3:8.1f} ms  (rest is describe() itself)"))
+    rows.append((f"held by {args.concurrent} requests, legacy",
+                 f"{legacy_held:8.1f} MB  (peak {legacy_peak:.1f} MB)"))
+    rows.append((f"held by {args.concurrent} requests, registry",
+                 f"{registry_held:8.1f} MB  (peak {registry_peak:.1f} MB, registry frame already resident)"))
+    rows.append(("registry frame size", f"{dataset_registry.get_registry().stats()['bytes'] / 2**20:8.1f} MB"))
+
+    editor = OnThesisDataset.load(USER, PROJECT)
+    _, edit_s = timed(editor.update_cell_data, 0, 0, "5")
+    _, after_edit_s = timed(registry_request)
+    rows.append(("first edit on shared frame (copy-on-write)", f"{edit_s * 1e3:8.1f} ms"))
+    rows.append(("next request after the edit", f"{after_edit_s * 1e3:8.2f} ms (new version published, no read_csv)"))
+    report(f"dataset registry: {args.rows:,} x {args.cols}", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# File: benchmarks/bench_embedding_cache.py
+# Deskripsi: Micro-benchmark encode/decode vektor 3072-dim: JSON (format lama)
+# vs packed float32 / float16 / int8 (EmbeddingCache).
+#
+#   python -m benchmarks.bench_embedding_cache --repeat 2000
+
+import argparse
+import json
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("agent")
+
+from app.agent.embedding_cache import decode_vector, encode_vector  # noqa: E402
+from app.agent.embedding_service import FakeEmbeddingProvider  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=3072)
+    args = parser.parse_args()
+
+    vector = FakeEmbeddingProvider(dim=args.dim).embed_batch(["benchmark"])[0]
+    rows = [("dim", args.dim), ("repeat", args.repeat)]
+
+    blob = json.dumps(vector)
+    _, encode_s = timed(json.dumps, vector, repeat=args.repeat)
+    _, decode_s = timed(json.loads, blob, repeat=args.repeat)
+    rows.append(("json", f"{len(blob):>6} B  encode {encode_s * 1e6:8.1f}us  decode {decode_s * 1e6:8.1f}us"))
+
+    for dtype in ("float32", "float16", "int8"):
+        packed = encode_vector(vector, dtype)
+        _, encode_s = timed(encode_vector, vector, dtype, repeat=args.repeat)
+        _, decode_s = timed(decode_vector, packed, dtype, repeat=args.repeat)
+        error = max(abs(a - b) for a, b in zip(decode_vector(packed, dtype), vector))
+        rows.append((
+            dtype,
+            f"{len(packed):>6} B  encode {encode_s * 1e6:8.1f}us  decode {decode_s * 1e6:8.1f}us  max_err {error:.2e}",
+        ))
+
+    report("embedding cache encode/decode", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# File: benchmarks/bench_embedding_service.py
+# Deskripsi: Bandingkan embed satu-per-satu vs embed_many vs micro-batching greenlet
+# memakai FakeEmbeddingProvider (offline, latency per provider call bisa diatur).
+#
+#   python -m benchmarks.bench_embedding_service --chunks 200 --latency 0.05
+
+import argparse
+
+import gevent
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("agent")
+
+from app.agent.embedding_service import EmbeddingService, FakeEmbeddingProvider  # noqa: E402
+
+
+def _sequential(service, texts):
+    return [service.embed_many([text])[0] for text in texts]
+
+
+def _concurrent_single(service, texts):
+    jobs = [gevent.spawn(service.embed, text) for text in texts]
+    gevent.joinall(jobs, raise_error=True)
+    return [job.value for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="detik per provider call")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--dim", type=int, default=3072)
+    args = parser.parse_args()
+
+    texts = [f"paragraf {i}: pembelajaran adaptif di perguruan tinggi" for i in range(args.chunks)]
+    rows = [("chunks", args.chunks), ("provider latency", f"{args.latency * 1000:.0f}ms")]
+
+    for label, runner in (
+        ("one call per chunk", _sequential),
+        ("embed_many", lambda service, items: service.embed_many(items)),
+        ("concurrent embed() micro-batched", _concurrent_single),
+    ):
+        provider = FakeEmbeddingProvider(dim=args.dim, latency=args.latency)
+        service = EmbeddingService(
+            provider=provider,
+            max_batch_size=args.max_batch,
+            max_wait=args.max_wait_ms / 1000.0,
+            dim=args.dim,
+        )
+        _, seconds = timed(runner, service, texts)
+        rows.append((label, f"{seconds:.3f}s, provider calls={provider.calls}"))
+
+    report("embedding service benchmark", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# File: benchmarks/bench_http_client.py
+# Deskripsi: Klien HTTP bersama vs requests.get polos terhadap server stub lokal
+# (tests/http_stub.py) dengan latency buatan. Campuran query berulang meniru unified
+# search: berapa request yang benar-benar sampai ke server, cache hit rate, dan koneksi TCP.
+#
+#   python -m benchmarks.bench_http_client --requests 400 --distinct 40 --latency 0.02
+
+import argparse
+import random
+import time
+
+import requests
+
+from benchmarks._bootstrap import register_packages, report
+
+register_packages("utils")
+
+from app.utils import http_client  # noqa: E402
+from tests.http_stub import StubHTTPServer  # noqa: E402
+
+
+def _workload(total, distinct, seed=11):
+    rng = random.Random(seed)
+    # Zipf-ish: query populer muncul jauh lebih sering
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices([f"topic {i}" for i in range(distinct)], weights=weights, k=total)
+
+
+def _run(server, fetch, queries):
+    before = dict(server.counts)
+    started = time.perf_counter()
+    for query in queries:
+        fetch(f"{server.url}/works", {"search": query}).json()
+    elapsed = time.perf_counter() - started
+    delta = {k: server.counts.get(k, 0) - before.get(k, 0) for k in ("requests", "connections", "not_modified")}
+    return elapsed, delta
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--distinct", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="latency server per request (detik)")
+    parser.add_argument("--cache-control", default="max-age=60")
+    args = parser.parse_args()
+
+    queries = _workload(args.requests, args.distinct)
+    with StubHTTPServer(cache_control=args.cache_control, latency=args.latency) as server:
+        bare_s, bare = _run(server, lambda url, params: requests.get(url, params=params, timeout=10), queries)
+
+        pooled = http_client.HttpClient(cache=None)
+        pooled_s, pool = _run(server, lambda url, params: pooled.get(url, params=params), queries)
+
+        cached = http_client.HttpClient(cache=http_client.ResponseCache())
+        cached_s, hit = _run(server, lambda url, params: cached.get(url, params=params, source="openalex"), queries)
+
+    n = len(queries)
+    report(f"http client: {n} GETs, {args.distinct} distinct, latency {args.latency * 1e3:.0f} ms", [
+        ("requests.get (no pooling)", f"{bare_s * 1e3 / n:7.2f} ms/req  server hits {bare['requests']:4d}  connections {bare['connections']}"),
+        ("pooled session, no cache", f"{pooled_s * 1e3 / n:7.2f} ms/req  server hits {pool['requests']:4d}  connections {pool['connections']}"),
+        ("pooled session + cache", f"{cached_s * 1e3 / n:7.2f} ms/req  server hits {hit['requests']:4d}  connections {hit['connections']}"),
+        ("cache hit rate", f"{cached.stats['cache_hits'] / n:7.1%}"),
+        ("speedup vs requests.get", f"{bare_s / cached_s:7.1f}x"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# File: benchmarks/bench_intent_tiers.py
+# Deskripsi: Akurasi + latency classifier bertingkat (cache -> rules -> model lokal -> LLM)
+# atas fixture berlabel (benchmarks/fixtures/intent_messages.jsonl, tidak tumpang tindih
+# dengan contoh few-shot). LLM diganti oracle yang menjawab label fixture dengan latency
+# buatan, jadi yang diukur: berapa pesan selesai tanpa LLM, dan seberapa benar tier lokal.
+#
+#   python -m benchmarks.bench_intent_tiers --llm-latency 0.9 --sweep
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks._bootstrap import register_packages, report, stub_module
+
+register_packages("agent", "utils")
+if "litellm" not in sys.modules:
+    stub_module("litellm", completion=lambda *args, **kwargs: None)
+    stub_module("litellm.exceptions", RateLimitError=RuntimeError)
+
+from app.agent import intent_tiers  # noqa: E402
+from app.agent.intent_classifier import INTENT_CLASSIFIER_PROMPT, IntentClassifier  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "intent_messages.jsonl"
+
+
+def load_fixture(path=FIXTURE):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _oracle(labels):
+    def call_llm(prompt):
+        message = prompt.rsplit("User message: ", 1)[1].split("\n", 1)[0]
+        intent = labels[message]
+        confidence = 0.4 if intent == "unclear" else 0.9
+        return json.dumps({"intent": intent, "confidence": confidence, "needs_clarification": intent == "unclear"})
+    return call_llm
+
+
+def run(rows, llm_latency, **classifier_kwargs):
+    labels = {row["text"]: row["intent"] for row in rows}
+    classifier = IntentClassifier(cache=intent_tiers.IntentCache(), **classifier_kwargs)
+    classifier._call_llm = _oracle(labels)
+
+    per_tier = Counter()
+    correct = Counter()
+    local_seconds = 0.0
+    for row in rows:
+        started = time.perf_counter()
+        result = classifier.classify(row["text"], [])
+        local_seconds += time.perf_counter() - started
+        tier = result.get("tier") or "llm"
+        per_tier[tier] += 1
+        correct[tier] += result["intent"] == row["intent"]
+    return classifier, per_tier, correct, local_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.9, help="latency LLM classifier (detik)")
+    parser.add_argument("--sweep", action="store_true", help="sapu ambang probabilitas model lokal")
+    args = parser.parse_args()
+
+    rows = load_fixture()
+    n = len(rows)
+    started = time.perf_counter()
+    intent_tiers.local_model_for(INTENT_CLASSIFIER_PROMPT)
+    train_ms = (time.perf_counter() - started) * 1e3
+
+    classifier, per_tier, correct, local_s = run(rows, args.llm_latency)
+    llm_calls = per_tier["llm"]
+    answered_locally = n - llm_calls
+    local_correct = sum(correct[t] for t in ("rules", "local"))
+    tiered_latency = local_s + llm_calls * args.llm_latency
+    rows_out = [
+        ("fixture messages", n),
+        ("local model training (once)", f"{train_ms:.1f} ms"),
+    ]
+    for tier in ("rules", "local", "llm"):
+        if per_tier[tier]:
+            rows_out.append((f"tier {tier}", f"{per_tier[tier]:3d} msgs  accuracy {correct[tier] / per_tier[tier]:.1%}"))
+    rows_out += [
+        ("answered without LLM", f"{answered_locally / n:.1%}  (accuracy {local_correct / max(1, answered_locally):.1%})"),
+        ("overall accuracy (oracle LLM)", f"{sum(correct.values()) / n:.1%}"),
+        ("local tiers latency", f"{local_s / n * 1e3:.2f} ms/msg"),
+        ("LLM-only latency", f"{args.llm_latency * 1e3:.0f} ms/msg"),
+        ("tiered mean latency", f"{tiered_latency / n * 1e3:.0f} ms/msg"),
+    ]
+
+    _, repeat_tiers, _, _ = run(rows + rows, args.llm_latency)
+    rows_out.append(("second pass served from cache", f"{repeat_tiers['cache']} of {n}"))
+    report("intent classification tiers", rows_out)
+
+    if args.sweep:
+        sweep = []
+        for min_prob in (0.4, 0.5, 0.6, 0.7, 0.8):
+            _, tiers, ok, _ = run(rows, args.llm_latency, local_min_prob=min_prob)
+            acc = ok["local"] / tiers["local"] if tiers["local"] else float("nan")
+            sweep.append((f"min_prob {min_prob:.2f}", f"local {tiers['local']:3d} msgs  accuracy {acc:.1%}  LLM calls {tiers['llm']}"))
+        report("local model threshold sweep", sweep)
+
+
+if __name__ == "__main__":
+    main()
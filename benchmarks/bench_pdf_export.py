@@ -0,0 +1,76 @@
+# File: benchmarks/bench_pdf_export.py
+# Deskripsi: Throughput export PDF: jalur subprocess lama (satu pdf_worker.py + cold start
+# Chromium per export) vs render service hangat (pool browser context), sekuensial dan
+# konkuren. Butuh Chromium Playwright (`playwright install chromium`).
+#
+#   python -m benchmarks.bench_pdf_export --exports 20 --concurrency 4 --pool 2
+
+import argparse
+import os
+import time
+
+import gevent
+import gevent.pool
+
+from benchmarks._bootstrap import register_packages, report
+
+register_packages("services")
+
+SAMPLE = {
+    "template": "academic_report",
+    "title": "Analisis Pengaruh Media Sosial terhadap Prestasi Belajar",
+    "content_html": "<p>" + "Hasil uji regresi menunjukkan pengaruh yang signifikan. " * 80 + "</p>",
+    "date": "16 Oktober 2026",
+}
+
+
+def _throughput(render, exports, concurrency):
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for _ in range(exports):
+            render(SAMPLE)
+    else:
+        pool = gevent.pool.Pool(concurrency)
+        for job in [pool.spawn(render, SAMPLE) for _ in range(exports)]:
+            job.get()
+    elapsed = time.perf_counter() - started
+    return f"{exports / elapsed:6.2f} exports/s  ({elapsed * 1e3 / exports:7.0f} ms/export)"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exports", type=int, default=20)
+    parser.add_argument("--legacy-exports", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pool", type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ["PDF_RENDER_POOL_SIZE"] = str(args.pool)
+    from app.services import pdf_service  # noqa: E402
+
+    client = pdf_service.PdfRenderClient()
+    try:
+        started = time.perf_counter()
+        client.render("<html><body>warmup</body></html>")
+        warmup_s = time.perf_counter() - started
+    except pdf_service.RenderServiceUnavailable as e:
+        print(f"Render service unavailable: {e}")
+        return
+
+    def warm(data):
+        return client.render(pdf_service.render_export_html(data))
+
+    rows = [
+        ("render service startup (one-time)", f"{warmup_s * 1e3:7.0f} ms"),
+        ("subprocess: sequential", _throughput(pdf_service.PdfService.generate_pdf_subprocess, args.legacy_exports, 1)),
+        (f"subprocess: concurrency {args.concurrency}",
+         _throughput(pdf_service.PdfService.generate_pdf_subprocess, args.legacy_exports, args.concurrency)),
+        (f"warm pool={args.pool}: sequential", _throughput(warm, args.exports, 1)),
+        (f"warm pool={args.pool}: concurrency {args.concurrency}", _throughput(warm, args.exports, args.concurrency)),
+    ]
+    client.close()
+    report("pdf export throughput", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# File: benchmarks/bench_query_translation.py
+# Deskripsi: LLM call per pencarian untuk terjemahan query: jalur lama (selalu 1 call)
+# vs QueryTranslator (deteksi bahasa + cache + single-flight). Upstream palsu dengan
+# latency buatan; pencarian datang dalam gelombang greenlet konkuren.
+#
+#   python -m benchmarks.bench_query_translation --searches 600 --concurrency 20 --latency 0.3
+
+import argparse
+import random
+import time
+
+import gevent
+from gevent.pool import Pool
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("utils")
+
+from app.utils.query_translation import QueryTranslator, detect_language  # noqa: E402
+
+ID_QUERIES = [
+    "pengaruh media sosial terhadap prestasi belajar", "kinerja karyawan", "kepuasan pelanggan",
+    "literasi keuangan", "motivasi belajar siswa", "minat beli konsumen", "kinerja guru",
+    "implementasi kurikulum merdeka", "kecemasan matematika", "stunting pada balita",
+    "transformasi digital UMKM", "keterlibatan karyawan", "pemasaran digital",
+]
+EN_QUERIES = [
+    "machine learning in education", "deep learning", "customer loyalty", "financial literacy",
+    "self efficacy", "mathematics anxiety", "teacher performance", "purchase intention",
+    "structural equation modeling", "social media addiction among adolescents",
+]
+
+
+def _workload(n, seed=3):
+    rng = random.Random(seed)
+    pool = ID_QUERIES + EN_QUERIES
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(pool))]
+    rng.shuffle(weights)
+    queries = rng.choices(pool, weights=weights, k=n)
+    # Variasi penulisan yang sama maknanya (kapitalisasi, spasi, tanda tanya)
+    return [rng.choice([q, q.title(), f" {q}?", q.upper()]) for q in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="latency LLM palsu (detik)")
+    args = parser.parse_args()
+
+    calls = []
+
+    def upstream(query):
+        calls.append(query)
+        gevent.sleep(args.latency)
+        return f"en:{query.lower()}"
+
+    queries = _workload(args.searches)
+    translator = QueryTranslator(translate_fn=upstream)
+    started = time.perf_counter()
+    pool = Pool(args.concurrency)
+    for query in queries:
+        pool.spawn(translator.translate, query)
+    pool.join()
+    elapsed = time.perf_counter() - started
+    legacy_elapsed = args.searches / args.concurrency * args.latency  # 1 call per pencarian
+
+    _, detect_s = timed(lambda: [detect_language(q) for q in queries], repeat=5)
+    metrics = translator.metrics()
+    n = args.searches
+    report(f"query translation: {n} searches, concurrency {args.concurrency}, LLM latency {args.latency * 1e3:.0f} ms", [
+        ("legacy LLM calls", f"{n:5d}  (1.00 per search, ~{legacy_elapsed:.1f}s wall)"),
+        ("translator LLM calls", f"{len(calls):5d}  ({len(calls) / n:.2f} per search, {elapsed:.1f}s wall)"),
+        ("  skipped (english)", metrics["skipped_english"]),
+        ("  cache hits", metrics["lru_hits"] + metrics["redis_hits"]),
+        ("  deduped in flight", metrics["deduped"]),
+        ("LLM calls saved", f"{metrics['llm_calls_saved']} ({metrics['llm_calls_saved'] / n:.1%})"),
+        ("detector cost", f"{detect_s / n * 1e6:.1f} us/query"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# File: benchmarks/bench_research_memory.py
+# Deskripsi: ResearchMemory.add_papers + get_citations untuk satu hasil pencarian (25 paper)
+# terhadap qdrant-client mode in-memory: jalur lama (upsert per paper, scroll per id) vs
+# batch (upsert per chunk, satu retrieve + cache per paper id). Embedding diganti vector
+# acak; latency = waktu terukur + jumlah request Qdrant * --rtt (in-memory tanpa jaringan).
+#
+#   python -m benchmarks.bench_research_memory --papers 25 --rounds 20 --rtt 0.02
+
+import argparse
+import asyncio
+import time
+import warnings
+from collections import Counter
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmarks._bootstrap import register_packages, report, stub_module
+
+register_packages("agent", "utils")
+stub_module("litellm", completion=lambda *args, **kwargs: None)
+stub_module("litellm.exceptions", RateLimitError=RuntimeError)
+
+from app.agent import memory_system  # noqa: E402
+from app.agent.memory_system import QdrantVectorDB, ResearchMemory  # noqa: E402
+from app.utils.lru_cache import LRUCache  # noqa: E402
+
+
+class CountingClient:
+    """Proxy QdrantClient yang menghitung request per method."""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.calls[name] += 1
+            return attr(*args, **kwargs)
+        return call
+
+
+class ScrollOnlyVectorDB(QdrantVectorDB):
+    retrieve = None
+
+
+def _papers(round_index, count):
+    return [{
+        "paper_id": f"r{round_index}-p{i}",
+        "title": f"Literasi keuangan dan minat investasi {round_index}-{i}",
+        "authors": ["Putri, A."],
+        "year": 2023,
+        "abstract": "Studi kuantitatif tentang literasi keuangan mahasiswa.",
+        "relevance_score": 0.8,
+        "citation_count": i,
+        "doi": f"10.1000/r{round_index}.{i}",
+        "source": "openalex",
+        "topics": ["literasi keuangan"],
+    } for i in range(count)]
+
+
+def run(vector_db_cls, batch_size, cached, args):
+    client = CountingClient(QdrantClient(":memory:"))
+    vector_db = vector_db_cls(client=client)
+    vector_db._ensure_collections()
+    client.calls.clear()
+    cache = LRUCache(max_items=4096 if cached else 0)
+
+    add_s = fetch_s = 0.0
+    add_calls = fetch_calls = 0
+    for round_index in range(args.rounds):
+        papers = _papers(round_index, args.papers)
+        ids = [paper["paper_id"] for paper in papers]
+
+        writer = ResearchMemory(vector_db, "user-1", "project-1", paper_cache=cache, upsert_batch_size=batch_size)
+        before = sum(client.calls.values())
+        started = time.perf_counter()
+        writer.add_papers(papers)
+        add_s += time.perf_counter() - started
+        add_calls += sum(client.calls.values()) - before
+
+        # Request lain (instance baru) meminta sitasi untuk hasil yang sama, dua kali
+        for _ in range(2):
+            reader = ResearchMemory(vector_db, "user-1", "project-1", paper_cache=cache, upsert_batch_size=batch_size)
+            before = sum(client.calls.values())
+            started = time.perf_counter()
+            citations = asyncio.run(reader.get_citations(ids))
+            fetch_s += time.perf_counter() - started
+            fetch_calls += sum(client.calls.values()) - before
+            assert len(citations) == args.papers
+
+    fetches = args.rounds * 2
+    return {
+        "add_ms": (add_s + add_calls * args.rtt) / args.rounds * 1e3,
+        "add_calls": add_calls / args.rounds,
+        "fetch_ms": (fetch_s + fetch_calls * args.rtt) / fetches * 1e3,
+        "fetch_calls": fetch_calls / fetches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=memory_system.RESEARCH_UPSERT_BATCH_SIZE)
+    parser.add_argument("--rtt", type=float, default=0.02, help="round trip Qdrant Cloud (detik)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+    rng = np.random.default_rng(11)
+    memory_system.embed_many = lambda texts: rng.standard_normal((len(texts), memory_system.VECTOR_DIM)).tolist()
+
+    legacy = run(ScrollOnlyVectorDB, 1, False, args)
+    uncached = run(QdrantVectorDB, args.batch_size, False, args)
+    batched = run(QdrantVectorDB, args.batch_size, True, args)
+    report(f"research memory: {args.papers} papers/search, {args.rounds} searches, rtt {args.rtt * 1e3:.0f} ms", [
+        ("legacy add_papers", f"{legacy['add_calls']:5.1f} requests  {legacy['add_ms']:7.1f} ms"),
+        ("batched add_papers", f"{batched['add_calls']:5.1f} requests  {batched['add_ms']:7.1f} ms"),
+        ("legacy get_citations", f"{legacy['fetch_calls']:5.1f} requests  {legacy['fetch_ms']:7.1f} ms"),
+        ("retrieve get_citations", f"{uncached['fetch_calls']:5.1f} requests  {uncached['fetch_ms']:7.1f} ms  (cache off)"),
+        ("batched get_citations", f"{batched['fetch_calls']:5.1f} requests  {batched['fetch_ms']:7.1f} ms  (retrieve + cache)"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
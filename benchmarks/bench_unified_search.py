@@ -0,0 +1,85 @@
+# File: benchmarks/bench_unified_search.py
+# Deskripsi: Bandingkan unified_search sequential (lama) vs fan-out gevent dengan
+# sumber stub yang tidur sesuai latency yang bisa dikonfigurasi.
+#
+#   python -m benchmarks.bench_unified_search --latency crossref=0.8 --latency pubmed=2.5 --deadline 1.5
+
+import argparse
+import time
+
+import gevent
+
+from benchmarks._bootstrap import register_packages, report, stub_module, timed
+
+register_packages("utils")
+stub_module("app.utils.general_utils", make_api_request_with_retry=lambda *args, **kwargs: None)
+
+from app.utils import search_utils  # noqa: E402
+
+DEFAULT_LATENCIES = {
+    "crossref": 0.8,
+    "openalex": 0.6,
+    "doaj": 1.2,
+    "pubmed": 1.6,
+    "eric": 0.9,
+}
+
+
+def _stub_source(name, latency, limit):
+    def _search(keywords, year=None, limit=limit):
+        gevent.sleep(latency)
+        return [{"title": f"{name} paper {i}", "doi": f"10.0/{name}.{i}"} for i in range(limit)]
+    return _search
+
+
+def _sequential(functions, query, limit):
+    results = []
+    for fn in functions.values():
+        results.extend(fn(query, None, limit))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", action="append", default=[], help="source=detik, bisa diulang")
+    parser.add_argument("--deadline", type=float, default=None, help="deadline per sumber (detik)")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    latencies = dict(DEFAULT_LATENCIES)
+    for item in args.latency:
+        name, _, value = item.partition("=")
+        latencies[name.strip()] = float(value)
+
+    functions = {name: _stub_source(name, latency, args.limit) for name, latency in latencies.items()}
+    search_utils._translate_query_to_english = lambda query: query
+    deadlines = {name: args.deadline for name in functions} if args.deadline else None
+
+    _, sequential_s = timed(_sequential, functions, "ai", args.limit)
+
+    first_event_s = None
+    fanout_results = []
+    statuses = {}
+    started = time.perf_counter()
+    for event in search_utils.iter_unified_search(
+        "ai", sources=list(functions), limit=args.limit, deadlines=deadlines, search_functions=functions
+    ):
+        if first_event_s is None:
+            first_event_s = time.perf_counter() - started
+        fanout_results.extend(event["results"])
+        statuses[event["source"]] = event["status"]
+    fanout_s = time.perf_counter() - started
+
+    report("unified_search stub benchmark", [
+        ("latencies", ", ".join(f"{k}={v}s" for k, v in latencies.items())),
+        ("sequential total", f"{sequential_s:.3f}s"),
+        ("fan-out total", f"{fanout_s:.3f}s"),
+        ("fan-out first result", f"{first_event_s:.3f}s"),
+        ("speedup", f"{sequential_s / fanout_s:.2f}x"),
+        ("results", len(fanout_results)),
+        ("source status", statuses),
+    ])
+
+
+if __name__ == "__main__":
+    main()
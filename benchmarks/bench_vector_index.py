@@ -0,0 +1,94 @@
+# File: benchmarks/bench_vector_index.py
+# Deskripsi: Latensi query RAG lokal: scan file JSON + cosine per chunk (format lama)
+# vs VectorIndex (mmap .npy + satu matmul + argpartition) pada 10k dan 100k chunk.
+#
+#   python -m benchmarks.bench_vector_index --sizes 10000 100000 --dim 384
+#
+# Scan JSON lama hanya diukur sampai --legacy-max chunk karena file-nya membengkak
+# (100k x 384 float sebagai teks JSON ~ 800MB).
+
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks._bootstrap import register_packages, report, timed
+
+register_packages("services")
+
+from app.services.vector_index import VectorIndex  # noqa: E402
+
+CHUNKS_PER_DOC = 50
+
+
+def _make_chunks(count, dim, rng):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [
+        {"content": f"chunk {i}", "vector": vectors[i].tolist(), "doc_id": f"doc{i // CHUNKS_PER_DOC}", "user_id": "bench"}
+        for i in range(count)
+    ]
+
+
+def _legacy_search(storage_path, query, k):
+    """Salinan jalur lama LiteContextEngine.search_context (semantic saja)."""
+    all_chunks = []
+    for filename in os.listdir(storage_path):
+        if filename.startswith("bench_") and filename.endswith(".json"):
+            with open(os.path.join(storage_path, filename), "r", encoding="utf-8") as f:
+                all_chunks.extend(json.load(f))
+    query_vec = np.array(query)
+    scored = []
+    for chunk in all_chunks:
+        vec = np.array(chunk["vector"])
+        score = np.dot(query_vec, vec) / (np.linalg.norm(query_vec) * np.linalg.norm(vec))
+        scored.append((score, chunk))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--legacy-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    query = rng.standard_normal(args.dim).astype(np.float32).tolist()
+    rows = [("dim", args.dim), ("k", args.k)]
+
+    for size in args.sizes:
+        chunks = _make_chunks(size, args.dim, rng)
+        with tempfile.TemporaryDirectory() as storage_path:
+            if size <= args.legacy_max:
+                # Direktori terpisah: upsert ke index akan memigrasi file JSON lama di storage_path
+                legacy_path = os.path.join(storage_path, "legacy")
+                os.makedirs(legacy_path)
+                for start in range(0, size, CHUNKS_PER_DOC):
+                    with open(os.path.join(legacy_path, f"bench_doc{start}.json"), "w", encoding="utf-8") as f:
+                        json.dump(chunks[start:start + CHUNKS_PER_DOC], f)
+                _, legacy_s = timed(_legacy_search, legacy_path, query, args.k, repeat=max(1, args.repeat // 10))
+                rows.append((f"{size:>7} json scan", f"{legacy_s * 1e3:9.2f} ms/query"))
+
+            index = VectorIndex(storage_path)
+            _, build_s = timed(index.upsert_document, "bench", "bench_all", chunks)
+            _, cold_s = timed(index.search, "bench", query, args.k)
+            _, warm_s = timed(index.search, "bench", query, args.k, repeat=args.repeat)
+            rows.append((f"{size:>7} index build", f"{build_s * 1e3:9.2f} ms"))
+            rows.append((f"{size:>7} index cold", f"{cold_s * 1e3:9.2f} ms/query"))
+            rows.append((f"{size:>7} index warm", f"{warm_s * 1e3:9.2f} ms/query"))
+
+            extra = chunks[:CHUNKS_PER_DOC]
+            _, append_s = timed(lambda: index.upsert_document("bench", f"bench_new{rng.integers(1 << 30)}", extra),
+                                repeat=5)
+            rows.append((f"{size:>7} append {CHUNKS_PER_DOC}-chunk doc", f"{append_s * 1e3:9.2f} ms"))
+
+    report("vector index search", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -137,6 +137,19 @@ export function useAgentLoop({ editorRef, projectId, chapterId, onSave } = {}) {
                 }]);
                 break;
 
+            case 'TOOL_DELTA':
+                // Token streaming dari tool yang sedang berjalan; retry (attempt baru) mulai dari kosong.
+                setToolCalls((prev) => prev.map(t => {
+                    if (t.id !== event.id) return t;
+                    const sameAttempt = t.streamAttempt === event.attempt;
+                    return {
+                        ...t,
+                        streamAttempt: event.attempt,
+                        streamedText: (sameAttempt ? (t.streamedText || '') : '') + (event.delta || ''),
+                    };
+                }));
+                break;
+
             case 'TOOL_RESULT':
                 setSteps((prev) => [...prev, event]);
                 setToolCalls((prev) => prev.map(t =>
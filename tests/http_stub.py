@@ -0,0 +1,94 @@
+# File: tests/http_stub.py
+# Deskripsi: Server HTTP stub lokal (thread terpisah) untuk test dan benchmark http_client.
+# Meniru API akademik: JSON + ETag + Cache-Control yang bisa diatur, 304 untuk
+# If-None-Match yang cocok, 429 + Retry-After di /flaky, dan menghitung koneksi TCP.
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, supaya reuse koneksi terlihat
+    disable_nagle_algorithm = True  # header + body ditulis terpisah; tanpa ini delayed-ACK 40 ms
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stub.count("connections")
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count("requests")
+        if stub.latency:
+            time.sleep(stub.latency)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if parts.path == "/flaky":
+            attempt = stub.count("flaky")
+            if attempt <= int(query.get("fail", ["2"])[0]):
+                return self._send(429, b"", {"Retry-After": "0"})
+
+        body = json.dumps({"path": parts.path, "query": query, "version": stub.version}).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        headers = {"Content-Type": "application/json", "ETag": etag}
+        if stub.cache_control:
+            headers["Cache-Control"] = stub.cache_control
+        if self.headers.get("If-None-Match") == etag:
+            stub.count("not_modified")
+            return self._send(304, b"", headers)
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # klien sudah menyerah (test timeout)
+
+
+class StubHTTPServer:
+    def __init__(self, cache_control="max-age=60", latency=0.0):
+        self.cache_control = cache_control
+        self.latency = latency
+        self.version = 1
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            return self.counts[name]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
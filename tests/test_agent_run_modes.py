@@ -35,10 +35,10 @@ def _load_agent_routes(monkeypatch):
     gevent_queue_stub = types.ModuleType("gevent.queue")
 
     class DummyQueue:
-        def __init__(self):
+        def __init__(self, maxsize=None):
             self.items = []
 
-        def put(self, item):
+        def put(self, item, timeout=None):
             self.items.append(item)
 
         def get(self):
@@ -46,6 +46,7 @@ def _load_agent_routes(monkeypatch):
 
     gevent_stub.spawn = lambda func: func()
     gevent_queue_stub.Queue = DummyQueue
+    gevent_queue_stub.Full = type("Full", (Exception,), {})
     monkeypatch.setitem(sys.modules, "gevent", gevent_stub)
     monkeypatch.setitem(sys.modules, "gevent.queue", gevent_queue_stub)
 
@@ -0,0 +1,153 @@
+import importlib
+import os
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+for name in ("utils", "services"):
+    package = types.ModuleType(f"app.{name}")
+    package.__path__ = [str(REPO_ROOT / "app" / name)]
+    sys.modules.setdefault(f"app.{name}", package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+analysis_cache = importlib.import_module("app.services.analysis_cache")
+OnThesisDataset = data_engine.OnThesisDataset
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: (_ for _ in ()).throw(ValueError("no firebase")))
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    monkeypatch.setattr(analysis_cache, "_cache", analysis_cache.AnalysisResultCache())
+    return tmp_path
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode("utf-8")
+
+
+def _dataset(user_id="u1", project_id="p1"):
+    df = pd.DataFrame({"skor": np.arange(20, dtype=float), "kelompok": ["A", "B"] * 10})
+    return OnThesisDataset(df=df, user_id=user_id, project_id=project_id)
+
+
+def _version(user_id="u1", project_id="p1"):
+    return OnThesisDataset.load(user_id, project_id, load_data=False).content_version()
+
+
+def test_every_dataset_mutation_produces_a_new_content_version():
+    ds = _dataset()
+    seen = [_version()]
+    assert seen[0] is not None
+
+    ds.update_cell_data(0, 0, "5")
+    seen.append(_version())
+    ds.update_variable("SKOR", "label", "Skor total")
+    seen.append(_version())
+    ds.remove_duplicates()
+    seen.append(_version())
+
+    assert len(set(seen)) == len(seen)
+    # Membaca ulang tanpa mutasi tidak mengubah versi
+    assert _version() == seen[-1] == OnThesisDataset.load("u1", "p1").content_version()
+
+    ds.clear_all_data()
+    assert _version() is None
+
+
+def test_params_are_canonical_regardless_of_key_order():
+    cache = analysis_cache.AnalysisResultCache
+    first = cache.key_for("u1", "p1", "v1", "correlation-analysis", {"variables": ["A", "B"], "method": "pearson"})
+    second = cache.key_for("u1", "p1", "v1", "correlation-analysis", {"method": "pearson", "variables": ["A", "B"]})
+    swapped = cache.key_for("u1", "p1", "v1", "correlation-analysis", {"method": "pearson", "variables": ["B", "A"]})
+    assert first == second != swapped
+
+
+def test_disk_tier_survives_a_new_process_and_drops_old_versions(tmp_path):
+    writer = analysis_cache.AnalysisResultCache()
+    params = {"variables": ["SKOR"]}
+    assert writer.set("u1", "p1", "v1", "descriptive-analysis", params, {"summary_table": [{"Mean": 9.5}]})
+
+    reader = analysis_cache.AnalysisResultCache()  # LRU kosong, seperti worker lain
+    result, source = reader.get("u1", "p1", "v1", "descriptive-analysis", params)
+    assert source == analysis_cache.SOURCE_DISK and result == {"summary_table": [{"Mean": 9.5}]}
+    assert reader.get("u1", "p1", "v1", "descriptive-analysis", params)[1] == analysis_cache.SOURCE_LRU
+
+    cache_dir = Path(writer.disk_dir("u1", "p1"))
+    writer.set("u1", "p1", "v2", "descriptive-analysis", params, {"summary_table": []})
+    assert sorted(os.listdir(cache_dir)) == ["v2"]
+    assert analysis_cache.AnalysisResultCache().get("u1", "p1", "v1", "descriptive-analysis", params) == (None, None)
+
+
+def test_redis_tier_is_used_instead_of_disk_when_configured(tmp_path):
+    redis = FakeRedis()
+    analysis_cache.AnalysisResultCache(redis_client=redis).set("u1", "p1", "v1", "normality", {}, {"ok": True})
+
+    result, source = analysis_cache.AnalysisResultCache(redis_client=redis).get("u1", "p1", "v1", "normality", {})
+    assert (result, source) == ({"ok": True}, analysis_cache.SOURCE_REDIS)
+    assert not (tmp_path / "u1" / "p1" / analysis_cache.ANALYSIS_CACHE_DIR).exists()
+
+
+def test_errors_unserializable_results_and_missing_versions_are_not_cached():
+    cache = analysis_cache.AnalysisResultCache()
+    assert not cache.set("u1", "p1", "v1", "normality", {}, {"error": "kolom kosong"})
+    assert not cache.set("u1", "p1", "v1", "normality", {}, {"value": float("nan")})
+    assert not cache.set("u1", "p1", None, "normality", {}, {"value": 1})
+    assert cache.stats["writes"] == 0
+
+
+def test_cached_results_are_fresh_copies():
+    cache = analysis_cache.AnalysisResultCache()
+    cache.set("u1", "p1", "v1", "normality", {}, {"summary_table": [1, 2]})
+    first, _ = cache.get("u1", "p1", "v1", "normality", {})
+    first["ai_narrative_summary"] = "narasi"
+    assert cache.get("u1", "p1", "v1", "normality", {})[0] == {"summary_table": [1, 2]}
+
+
+def test_stat_engine_reuses_data_and_results_until_the_dataset_changes(monkeypatch):
+    statistics_engine = importlib.import_module("app.services.statistics_engine")
+    monkeypatch.setattr(statistics_engine.StatEngine, "_instance", None)
+    ds = _dataset(user_id="guest", project_id="default")
+    data_engine.get_registry().clear()  # paksa load pertama dari snapshot di disk
+
+    calls = []
+
+    def fake_descriptive(dataset, params):
+        calls.append(float(dataset.df["SKOR"].sum()))
+        return {"summary_table": [{"Sum": calls[-1]}]}
+
+    monkeypatch.setattr(statistics_engine.stats_utils, "run_descriptive_analysis", fake_descriptive)
+    reads = []
+    real_load = OnThesisDataset._load_snapshot
+    monkeypatch.setattr(OnThesisDataset, "_load_snapshot", lambda self, *a: reads.append(a) or real_load(self, *a))
+
+    engine = statistics_engine.StatEngine.get_instance()
+    first = engine.descriptive_analysis(["SKOR"])
+    again = statistics_engine.StatEngine.get_instance().descriptive_analysis(["SKOR"])
+    assert first == again == {"summary_table": [{"Sum": 190.0}]}
+    assert len(calls) == 1 and len(reads) == 1
+
+    ds.update_cell_data(0, 0, "100")
+    changed = statistics_engine.StatEngine.get_instance().descriptive_analysis(["SKOR"])
+    assert changed == {"summary_table": [{"Sum": 290.0}]}
+    # Frame versi baru sudah dipublikasikan oleh edit ke DatasetRegistry: tanpa baca snapshot lagi
+    assert len(calls) == 2 and len(reads) == 1
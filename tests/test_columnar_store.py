@@ -0,0 +1,116 @@
+import importlib
+import os
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+dataset_registry = importlib.import_module("app.utils.dataset_registry")
+columnar_store = importlib.import_module("app.utils.columnar_store")
+OnThesisDataset = data_engine.OnThesisDataset
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: (_ for _ in ()).throw(ValueError("no firebase")))
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    monkeypatch.setattr(dataset_registry, "_registry", dataset_registry.DatasetRegistry())
+    return tmp_path
+
+
+def _typed_frame():
+    return pd.DataFrame({
+        "SKOR": [1.5, np.nan, 3.0, 4.25],
+        "UMUR": np.array([20, 21, 22, 23], dtype=np.int64),
+        "AKTIF": [True, False, True, True],
+        "NAMA": ["Ani", None, "Budi", "Ani"],
+        "CAMPUR": np.array(["a", 2, np.nan, 3.5], dtype=object),
+        "TINGKAT": pd.Categorical(["S1", "S2", "S1", None], categories=["S1", "S2", "S3"], ordered=True),
+        "TANGGAL": pd.to_datetime(["2024-01-01", "2024-02-01", None, "2024-04-01"]),
+    })
+
+
+def test_snapshot_round_trips_dtypes_and_categories(tmp_path):
+    frame = _typed_frame()
+    columnar_store.write_snapshot(frame, str(tmp_path / "snap"))
+    loaded = columnar_store.read_snapshot(str(tmp_path / "snap"))
+
+    pd.testing.assert_frame_equal(loaded, frame)
+    assert loaded["TINGKAT"].cat.ordered and list(loaded["TINGKAT"].cat.categories) == ["S1", "S2", "S3"]
+    assert loaded["CAMPUR"].tolist()[:2] == ["a", 2]
+
+
+def test_numeric_columns_are_memory_mapped_and_subset_reads_skip_the_rest(tmp_path):
+    columnar_store.write_snapshot(_typed_frame(), str(tmp_path / "snap"))
+
+    subset = columnar_store.read_snapshot(str(tmp_path / "snap"), columns=["UMUR", "NAMA"])
+    assert list(subset.columns) == ["UMUR", "NAMA"]
+    values = subset["UMUR"].to_numpy()
+    assert not values.flags.writeable
+    bases = []
+    while values is not None:
+        bases.append(type(values))
+        values = getattr(values, "base", None)
+    assert np.memmap in bases
+
+
+def test_dataset_saves_columnar_and_loads_a_column_subset_with_edits():
+    ds = OnThesisDataset(df=_typed_frame(), user_id="u1", project_id="p1")
+    assert not os.path.exists(ds.local_data_path)
+    assert os.listdir(ds.local_columns_dir) == [ds.base_gen]
+
+    ds.update_cell_data(0, 1, "99")
+    ds.update_cell_data(4, 0, "7")  # baris baru
+    dataset_registry.get_registry().clear()
+
+    subset = OnThesisDataset.load_columns("u1", ["UMUR", "SKOR", "TIDAK_ADA"], project_id="p1")
+    assert list(subset.columns) == ["UMUR", "SKOR"]
+    assert subset["UMUR"].iloc[0] == 99 and subset["SKOR"].iloc[4] == 7
+    assert len(subset) == 5
+
+    full = OnThesisDataset.load("u1", "p1")
+    pd.testing.assert_frame_equal(full.df[["UMUR", "SKOR"]], subset)
+
+
+def test_recoded_values_and_labels_survive_reload():
+    ds = OnThesisDataset(df=_typed_frame(), user_id="u1", project_id="p1")
+    ds.recode_variable("NAMA", {"Ani": 1, "Budi": 2})
+    dataset_registry.get_registry().clear()
+
+    loaded = OnThesisDataset.load("u1", "p1")
+    assert pd.api.types.is_numeric_dtype(loaded.df["NAMA"])
+    assert loaded.meta["NAMA"].value_labels == {"1": "Ani", "2": "Budi"}
+    assert loaded.meta["NAMA"].measure == "nominal"
+
+
+def test_legacy_csv_project_is_read_and_migrated(monkeypatch):
+    monkeypatch.setattr(data_engine, "DATASET_STORAGE_FORMAT", "csv")
+    legacy = OnThesisDataset(df=pd.DataFrame({"skor": [1.0, 2.0]}), user_id="u1", project_id="p1")
+    assert os.path.exists(legacy.local_data_path)
+    assert not os.path.isdir(legacy.local_columns_dir)
+
+    monkeypatch.setattr(data_engine, "DATASET_STORAGE_FORMAT", "columnar")
+    dataset_registry.get_registry().clear()
+    ds = OnThesisDataset.load("u1", "p1")
+    assert ds.df["SKOR"].tolist() == [1.0, 2.0]
+    assert OnThesisDataset.load_columns("u1", ["SKOR"], project_id="p1")["SKOR"].tolist() == [1.0, 2.0]
+
+    ds.save()
+    assert not os.path.exists(ds.local_data_path)
+    assert ds.export_to_csv().getvalue() == b"SKOR\n1.0\n2.0\n"
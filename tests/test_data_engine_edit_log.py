@@ -0,0 +1,137 @@
+import importlib
+import json
+import os
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+OnThesisDataset = data_engine.OnThesisDataset
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: (_ for _ in ()).throw(ValueError("no firebase")))
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    return tmp_path
+
+
+def _dataset(rows=50):
+    df = pd.DataFrame({
+        "skor": np.arange(rows, dtype=float),
+        "kelompok": ["A" if i % 2 else "B" for i in range(rows)],
+    })
+    return OnThesisDataset(df=df, user_id="u1", project_id="p1")
+
+
+def _snapshot_bytes(ds):
+    snapshot_dir = Path(ds._snapshot_dir())
+    return {path.name: path.read_bytes() for path in sorted(snapshot_dir.iterdir())}
+
+
+def test_cell_edits_append_deltas_and_replay_on_load():
+    ds = _dataset()
+    snapshot_before = _snapshot_bytes(ds)
+
+    assert ds.update_cell_data(3, 0, "42") == (True, "Success (Local)")
+    ds.update_cell_data(4, 1, "C")
+    ds.update_cell_data(5, 0, "")
+    ds.update_cell_data(50, 0, "7")  # baris baru di ujung
+
+    # Snapshot tidak ditulis ulang; tiap edit = satu baris delta
+    assert _snapshot_bytes(ds) == snapshot_before
+    with open(ds.local_edit_log_path, encoding="utf-8") as f:
+        ops = [json.loads(line) for line in f]
+    assert [(op["r"], op["c"], op["v"]) for op in ops] == [(3, 0, 42), (4, 1, "C"), (5, 0, None), (50, 0, 7)]
+
+    loaded = OnThesisDataset.load("u1", "p1")
+    assert loaded.pending_edits == 4
+    assert len(loaded.df) == 51
+    assert loaded.df.iat[3, 0] == 42 and loaded.df.iat[4, 1] == "C"
+    assert pd.isna(loaded.df.iat[5, 0]) and loaded.df.iat[50, 0] == 7
+    pd.testing.assert_frame_equal(loaded.df, ds.df, check_dtype=False)
+
+
+def test_log_is_compacted_into_new_snapshot(monkeypatch):
+    monkeypatch.setattr(data_engine, "COMPACT_EVERY_EDITS", 3)
+    ds = _dataset()
+    first_gen = ds.base_gen
+
+    for row in range(3):
+        ds.update_cell_data(row, 0, "100")
+
+    assert not os.path.exists(ds.local_edit_log_path)
+    assert ds.base_gen != first_gen and ds.pending_edits == 0
+    snapshot = data_engine.columnar_store.read_snapshot(ds._snapshot_dir())
+    assert snapshot["SKOR"].tolist()[:4] == [100, 100, 100, 3]
+    assert os.listdir(ds.local_columns_dir) == [ds.base_gen]  # generasi lama dibuang
+
+
+def test_replay_skips_stale_generation_and_torn_tail():
+    ds = _dataset()
+    ds.update_cell_data(0, 0, "9")
+    with open(ds.local_edit_log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"g": "old-generation", "r": 1, "c": 0, "v": 555}) + "\n")
+        f.write('{"g": "%s", "r": 2, "c": 0, "v": 7' % ds.base_gen)  # crash di tengah append
+
+    loaded = OnThesisDataset.load("u1", "p1")
+
+    assert loaded.df.iat[0, 0] == 9
+    assert loaded.df.iat[1, 0] == 1 and loaded.df.iat[2, 0] == 2
+    assert loaded.pending_edits == 1
+
+
+class FakeTimer:
+    """Pengganti gevent.spawn_later: dicatat, baru jalan saat fire() (tanpa sleep sungguhan)."""
+
+    def __init__(self, delay, fn, *args):
+        self.delay, self.fn, self.args = delay, fn, args
+        self.killed = False
+
+    def kill(self, block=True):
+        self.killed = True
+
+    def fire(self):
+        if not self.killed:
+            self.fn(*self.args)
+
+
+def test_cloud_sync_is_debounced_into_one_batch(monkeypatch):
+    flushed, timers = [], []
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0.05)
+    monkeypatch.setattr(data_engine, "_cloud_sync_pending", {})
+    monkeypatch.setattr(data_engine, "_flush_cloud_sync", lambda user_id, project_id: flushed.append((user_id, project_id)))
+
+    def spawn_later(delay, fn, *args):
+        timers.append(FakeTimer(delay, fn, *args))
+        return timers[-1]
+
+    monkeypatch.setattr(data_engine.gevent, "spawn_later", spawn_later)
+    ds = _dataset()
+    ds.doc_ref = object()
+
+    for row in range(10):
+        ds.update_cell_data(row, 0, str(row * 2))
+    # Tiap edit menunda ulang timer: hanya timer terakhir yang masih hidup
+    assert [timer.killed for timer in timers] == [True] * 9 + [False]
+    assert timers[-1].delay == 0.05
+
+    for timer in timers:
+        timer.fire()
+    assert flushed == [("u1", "p1")]
@@ -0,0 +1,109 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+dataset_registry = importlib.import_module("app.utils.dataset_registry")
+data_view = importlib.import_module("app.utils.data_view")
+OnThesisDataset = data_engine.OnThesisDataset
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: (_ for _ in ()).throw(ValueError("no firebase")))
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    monkeypatch.setattr(dataset_registry, "_registry", dataset_registry.DatasetRegistry())
+    data_view.clear_cache()
+    return tmp_path
+
+
+def _frame():
+    return pd.DataFrame({
+        "NAMA": ["Ani", "Budi", None, "Citra", "Dodi", "Eka"],
+        "SKOR": [70.0, np.nan, 85.0, 70.0, 90.0, 60.0],
+        "KELOMPOK": ["A", "B", "A", "B", "A", "B"],
+    })
+
+
+def test_first_window_matches_the_legacy_full_dump():
+    frame = _frame()
+    legacy = OnThesisDataset(df=frame.copy(), user_id="u1", project_id="p1").get_data_view_data()
+
+    window = data_view.get_window(frame, offset=2, limit=3, col_offset=1, col_limit=2)
+    assert window["columns"] == ["SKOR", "KELOMPOK"]
+    assert window["total_rows"] == 6 and window["total_columns"] == 3
+    assert window["row_ids"] == [2, 3, 4]
+    assert window["data"] == [row[1:3] for row in legacy["data"][2:5]]
+    assert data_view.get_window(frame, offset=2, limit=3, columns=["KELOMPOK"],
+                                orient="columns")["data"] == [["A", "B", "A"]]
+
+
+def test_sort_is_stable_with_missing_values_last_and_filters_combine():
+    frame = _frame()
+
+    window = data_view.get_window(frame, sort="SKOR:desc,NAMA", limit=10)
+    assert window["row_ids"] == [4, 2, 0, 3, 5, 1]
+
+    window = data_view.get_window(frame, filters='[{"column": "KELOMPOK", "op": "eq", "value": "B"},'
+                                                 ' {"column": "SKOR", "op": "notnull"}]', sort="SKOR")
+    assert window["row_ids"] == [5, 3] and window["total_rows"] == 2
+    assert data_view.get_window(frame, filters=[{"column": "SKOR", "op": "ge", "value": "85"}])["row_ids"] == [2, 4]
+    assert data_view.get_window(frame, filters=[{"column": "NAMA", "op": "contains", "value": "DI"}])["row_ids"] == [1, 4]
+
+    with pytest.raises(ValueError):
+        data_view.get_window(frame, filters=[{"column": "SKOR", "op": "regex", "value": "."}])
+    with pytest.raises(KeyError):
+        data_view.get_window(frame, sort="TIDAK_ADA")
+
+
+def test_mixed_number_and_text_columns_sort_numbers_first_then_text():
+    frame = pd.DataFrame({"CAMPUR": np.array([10, "b", None, 2.5, "a", 3, True], dtype=object)})
+
+    assert data_view.get_window(frame, sort="CAMPUR")["row_ids"] == [6, 3, 5, 0, 4, 1, 2]
+    assert data_view.get_window(frame, sort="CAMPUR:desc")["row_ids"] == [0, 5, 3, 6, 1, 4, 2]
+
+
+@pytest.mark.parametrize("filters, sort", [
+    ({"column": "SKOR"}, None),
+    ('{"column": "SKOR"}', None),
+    (["SKOR"], None),
+    ("[{\"op\": \"eq\"}]", None),
+    ("bukan json", None),
+    (None, {"column": "SKOR"}),
+])
+def test_malformed_sort_and_filter_specs_raise_value_error(filters, sort):
+    with pytest.raises(ValueError):
+        data_view.get_window(_frame(), filters=filters, sort=sort)
+
+
+def test_sorted_permutation_is_cached_per_version_and_dropped_on_edit(monkeypatch):
+    ds = OnThesisDataset(df=_frame(), user_id="u1", project_id="p1")
+    calls = []
+    original = data_view.row_positions
+    monkeypatch.setattr(data_view, "row_positions", lambda *a, **k: calls.append(1) or original(*a, **k))
+
+    first = ds.get_data_view_window(sort="SKOR", limit=2)
+    second = ds.get_data_view_window(sort="SKOR", offset=2, limit=2)
+    assert len(calls) == 1
+    assert first["row_ids"] + second["row_ids"] == [5, 0, 3, 2]
+
+    ds.update_cell_data(5, 1, "100")
+    edited = ds.get_data_view_window(sort="SKOR", limit=2)
+    assert len(calls) == 2 and edited["row_ids"] == [0, 3]
@@ -0,0 +1,243 @@
+import importlib
+import json
+import shutil
+import sys
+import types
+from pathlib import Path
+
+import gevent
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+dataset_registry = importlib.import_module("app.utils.dataset_registry")
+cloud_sync = importlib.import_module("app.utils.dataset_cloud_sync")
+OnThesisDataset = data_engine.OnThesisDataset
+
+FIRESTORE_DOC_LIMIT = 1024 * 1024
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return json.loads(json.dumps(self._data))
+
+
+class FakeDocument:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def collection(self, name):
+        return FakeCollection(self.store, f"{self.path}/{name}")
+
+    def get(self):
+        self.store.reads += 1
+        self.store.in_flight += 1
+        self.store.max_in_flight = max(self.store.max_in_flight, self.store.in_flight)
+        gevent.sleep(0.001)
+        self.store.in_flight -= 1
+        return FakeSnapshot(self.store.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        self.store.write(self.path, data, merge)
+
+    def delete(self):
+        self.store.docs.pop(self.path, None)
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self.store, f"{self.path}/{doc_id}")
+
+    def list_documents(self):
+        prefix = self.path + "/"
+        return [FakeDocument(self.store, p) for p in list(self.store.docs)
+                if p.startswith(prefix) and "/" not in p[len(prefix):]]
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(("set", ref.path, data, merge))
+
+    def delete(self, ref):
+        self.ops.append(("delete", ref.path, None, False))
+
+    def commit(self):
+        assert len(self.ops) <= 500
+        self.store.commits.append(len(self.ops))
+        for op, path, data, merge in self.ops:
+            if op == "set": self.store.write(path, data, merge)
+            else: self.store.docs.pop(path, None)
+
+
+class FakeFirestore:
+    """Firestore in-memory; mencatat bytes (JSON) yang ditulis per dokumen."""
+
+    def __init__(self):
+        self.docs = {}
+        self.commits = []
+        self.bytes_written = 0
+        self.largest_doc = 0
+        self.reads = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def write(self, path, data, merge):
+        size = len(json.dumps(data, default=str))
+        self.bytes_written += size
+        self.largest_doc = max(self.largest_doc, size)
+        self.docs[path] = {**self.docs.get(path, {}), **data} if merge else json.loads(json.dumps(data, default=str))
+
+
+@pytest.fixture
+def firestore_db(tmp_path, monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: db)
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    monkeypatch.setattr(dataset_registry, "_registry", dataset_registry.DatasetRegistry())
+    return db
+
+
+def _frame(rows=30_000):
+    rng = np.random.default_rng(1)
+    data = {f"item_{i}": rng.integers(1, 6, rows).astype(float) for i in range(8)}
+    data["kelompok"] = rng.choice(["Kontrol", "Eksperimen"], rows)
+    return pd.DataFrame(data)
+
+
+def _sync(ds, db):
+    before = db.bytes_written
+    assert ds.save(sync_to_cloud=True)[0]
+    return db.bytes_written - before
+
+
+def test_large_dataset_is_split_into_blocks_under_the_document_limit(firestore_db):
+    frame = _frame()
+    legacy_size = len(json.dumps(frame.to_dict(orient="records")))
+    assert legacy_size > FIRESTORE_DOC_LIMIT  # format lama: satu dokumen ini ditolak Firestore
+
+    OnThesisDataset(df=frame, user_id="u1", project_id="p1")
+
+    manifest = next(v for k, v in firestore_db.docs.items() if k.endswith("data_storage/manifest"))
+    assert manifest["row_count"] == len(frame) and len(manifest["blocks"]) > 1
+    assert firestore_db.largest_doc < FIRESTORE_DOC_LIMIT
+    assert all(n <= cloud_sync.BATCH_MAX_OPS for n in firestore_db.commits)
+
+
+def test_resync_uploads_only_changed_blocks(firestore_db):
+    ds = OnThesisDataset(df=_frame(), user_id="u1", project_id="p1")
+    first = firestore_db.bytes_written
+
+    assert _sync(ds, firestore_db) < first / 100  # tanpa perubahan: hanya manifest + meta
+
+    blocks_before = {k for k in firestore_db.docs if "/data_blocks/" in k}
+    ds.update_cell_data(12_345, 2, "5")
+    changed = _sync(ds, firestore_db)
+    blocks_after = {k for k in firestore_db.docs if "/data_blocks/" in k}
+    manifest = next(v for k, v in firestore_db.docs.items() if k.endswith("data_storage/manifest"))
+    assert len(manifest["blocks"]) > 4
+    assert len(blocks_after - blocks_before) == 1 and changed < 2 * first / len(manifest["blocks"])
+    assert len(blocks_after) == len(manifest["blocks"])  # blok lama yang diganti sudah dihapus
+
+
+def test_restore_downloads_blocks_in_parallel(firestore_db, tmp_path):
+    frame = _frame()
+    ds = OnThesisDataset(df=frame, user_id="u1", project_id="p1")
+    ds.update_cell_data(0, 0, "")
+    ds.save(sync_to_cloud=True)
+    expected = ds.df.copy()
+
+    shutil.rmtree(tmp_path / "u1")  # device baru: lokal kosong
+    dataset_registry.get_registry().clear()
+    firestore_db.max_in_flight = 0
+
+    restored = OnThesisDataset.load("u1", "p1")
+    pd.testing.assert_frame_equal(restored.df, expected, check_dtype=False)
+    assert firestore_db.max_in_flight > 1
+
+
+def test_legacy_single_document_is_restored_and_migrated(firestore_db, tmp_path):
+    project = "artifacts/onthesis-app/users/u1/projects/p1"
+    firestore_db.docs[project] = {"variables": {}, "base_gen": None}
+    firestore_db.docs[f"{project}/data_storage/main_data"] = {"rows": [{"skor": 1.0}, {"skor": None}]}
+
+    ds = OnThesisDataset.load("u1", "p1")
+    assert ds.df["SKOR"].tolist()[0] == 1.0 and pd.isna(ds.df["SKOR"].iloc[1])
+
+    ds.save(sync_to_cloud=True)
+    assert f"{project}/data_storage/main_data" not in firestore_db.docs
+    assert f"{project}/data_storage/manifest" in firestore_db.docs
+
+
+def test_clear_all_data_removes_blocks_and_manifest(firestore_db):
+    ds = OnThesisDataset(df=_frame(5_000), user_id="u1", project_id="p1")
+    ds.clear_all_data()
+    assert not [k for k in firestore_db.docs if "/data_blocks/" in k or "/data_storage/" in k]
+
+
+def test_restore_retries_once_when_a_concurrent_push_replaced_the_manifest(firestore_db, monkeypatch):
+    ds = OnThesisDataset(df=_frame(), user_id="u1", project_id="p1")
+    project = ds.doc_ref
+    stale_manifest = cloud_sync.fetch_manifest(project)
+
+    ds.update_cell_data(0, 0, "5")
+    ds.save(sync_to_cloud=True)  # blok lama yang diganti langsung dihapus
+    expected = ds.df.copy()
+
+    fresh_manifest = cloud_sync.fetch_manifest(project)
+    manifests = [stale_manifest, fresh_manifest]
+    original_fetch = cloud_sync.fetch_manifest
+    monkeypatch.setattr(cloud_sync, "fetch_manifest",
+                        lambda doc_ref: manifests.pop(0) if manifests else original_fetch(doc_ref))
+
+    restored = cloud_sync.pull_dataset(project)
+    pd.testing.assert_frame_equal(restored, expected, check_dtype=False)
+
+
+def test_skewed_row_sizes_are_split_below_the_hard_block_limit(firestore_db):
+    frame = _frame(10_000)
+    frame["jawaban"] = ""
+    frame.loc[:299, "jawaban"] = ["x" * 5_000] * 300  # teks bebas panjang hanya di awal
+    assert cloud_sync.choose_block_rows(frame) * 5_000 > FIRESTORE_DOC_LIMIT  # estimasi sampel meleset
+
+    ds = OnThesisDataset(df=frame, user_id="u1", project_id="p1")
+    blocks = [v for k, v in firestore_db.docs.items() if "/data_blocks/" in k]
+    assert max(len(b["rows"]) for b in blocks) <= cloud_sync.BLOCK_HARD_MAX_BYTES
+    assert firestore_db.largest_doc < FIRESTORE_DOC_LIMIT
+
+    manifest = cloud_sync.fetch_manifest(ds.doc_ref)
+    assert sum(b["row_count"] for b in blocks) == manifest["row_count"] == len(frame)
+    restored = cloud_sync.pull_dataset(ds.doc_ref)
+    assert restored.iloc[:, -1].tolist() == ds.df.iloc[:, -1].tolist()
+    assert _sync(ds, firestore_db) < 64 * 1024  # belahan stabil: resync tanpa perubahan tidak upload blok
@@ -0,0 +1,119 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+data_engine = importlib.import_module("app.utils.data_engine")
+dataset_registry = importlib.import_module("app.utils.dataset_registry")
+stats_utils = importlib.import_module("app.utils.stats_utils")
+OnThesisDataset = data_engine.OnThesisDataset
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_engine, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(data_engine.firestore, "client", lambda: (_ for _ in ()).throw(ValueError("no firebase")))
+    monkeypatch.setattr(data_engine, "CLOUD_SYNC_DEBOUNCE_S", 0)
+    monkeypatch.setattr(dataset_registry, "_registry", dataset_registry.DatasetRegistry())
+    return tmp_path
+
+
+@pytest.fixture
+def snapshot_reads(monkeypatch):
+    reads = []
+    real_load = OnThesisDataset._load_snapshot
+    monkeypatch.setattr(OnThesisDataset, "_load_snapshot", lambda self, *a: reads.append(a) or real_load(self, *a))
+    return reads
+
+
+def _dataset(rows=20):
+    df = pd.DataFrame({"skor": np.arange(rows, dtype=float), "kelompok": ["A", "B"] * (rows // 2)})
+    OnThesisDataset(df=df, user_id="u1", project_id="p1")
+    dataset_registry.get_registry().clear()  # mulai dari kondisi "proses baru"
+
+
+def test_loads_share_one_parsed_frame(snapshot_reads):
+    _dataset()
+    first = OnThesisDataset.load("u1", "p1")
+    second = OnThesisDataset.load("u1", "p1")
+
+    assert len(snapshot_reads) == 1
+    assert first.df is not second.df
+    assert np.shares_memory(first.df["SKOR"].to_numpy(), second.df["SKOR"].to_numpy())
+    assert first.version == second.version == first.content_version()
+
+
+def test_mutations_copy_before_writing(snapshot_reads):
+    _dataset()
+    editor = OnThesisDataset.load("u1", "p1")
+    reader = OnThesisDataset.load("u1", "p1")
+
+    editor.update_cell_data(0, 0, "100")
+    editor.recode_variable("KELOMPOK", {"A": 1, "B": 2})
+
+    assert reader.df["SKOR"].iloc[0] == 0.0
+    assert reader.df["KELOMPOK"].iloc[0] == "A"
+    # Versi baru dipublikasikan oleh editor: load berikutnya tanpa baca snapshot
+    latest = OnThesisDataset.load("u1", "p1")
+    assert latest.df["SKOR"].iloc[0] == 100.0 and latest.df["KELOMPOK"].iloc[0] == 1
+    assert len(snapshot_reads) == 1
+
+
+def test_stale_instance_does_not_publish_its_frame(snapshot_reads):
+    _dataset()
+    first = OnThesisDataset.load("u1", "p1")
+    second = OnThesisDataset.load("u1", "p1")
+
+    first.update_cell_data(0, 0, "5")
+    second.update_cell_data(1, 0, "6")  # tidak melihat edit `first`
+    assert second.version is None
+
+    merged = OnThesisDataset.load("u1", "p1")
+    assert merged.df["SKOR"].tolist()[:2] == [5.0, 6.0]
+    assert len(snapshot_reads) == 2
+
+
+def test_analysis_dataframe_is_not_copied():
+    _dataset()
+    ds = OnThesisDataset.load("u1", "p1")
+    whole = stats_utils._get_df(ds)
+    assert np.shares_memory(whole["SKOR"].to_numpy(), ds.df["SKOR"].to_numpy())
+    assert stats_utils.run_descriptive_analysis(ds, {"variables": ["SKOR"]})["summary_table"]
+
+
+def test_clear_and_memory_budget_evict_frames():
+    frame = pd.DataFrame({"x": np.zeros(1000)})
+    registry = dataset_registry.DatasetRegistry(max_bytes=int(dataset_registry.frame_nbytes(frame) * 1.5))
+    registry.put("u1", "p1", "v1", frame)
+    registry.put("u1", "p1", "v2", frame.copy())
+    assert registry.checkout("u1", "p1", "v1") == (None, 0)  # versi lama dibuang
+
+    registry.put("u2", "p1", "v1", frame.copy())  # melewati budget bytes
+    assert registry.checkout("u1", "p1", "v2")[0] is None
+    assert registry.checkout("u2", "p1", "v1")[0] is not None
+
+    registry.invalidate("u2", "p1")
+    assert registry.stats()["items"] == 0
+
+
+def test_clear_all_data_drops_the_shared_frame(snapshot_reads):
+    _dataset()
+    ds = OnThesisDataset.load("u1", "p1")
+    ds.clear_all_data()
+    assert dataset_registry.get_registry().stats()["items"] == 0
+    assert OnThesisDataset.load("u1", "p1").df.empty
@@ -0,0 +1,135 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+sys.modules["app.agent"].__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules["app"].agent = sys.modules["app.agent"]
+
+cache_module = importlib.import_module("app.agent.embedding_cache")
+EmbeddingCache = cache_module.EmbeddingCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+
+    def execute(self):
+        self.redis.pipeline_executions += 1
+        for key, value in self.ops:
+            self.redis.store[key] = value
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.mget_calls = 0
+        self.get_calls = 0
+        self.pipeline_executions = 0
+
+    def get(self, key):
+        self.get_calls += 1
+        return self.store.get(key)
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+VECTOR = [0.5, -0.25, 0.125, 1.0]
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 0.0), ("float16", 1e-3), ("int8", 1.0 / 127)])
+def test_encode_decode_roundtrip(dtype, tolerance):
+    blob = cache_module.encode_vector(VECTOR, dtype)
+    decoded = cache_module.decode_vector(blob, dtype)
+
+    assert len(decoded) == len(VECTOR)
+    assert max(abs(a - b) for a, b in zip(decoded, VECTOR)) <= tolerance
+
+
+def test_binary_blob_is_much_smaller_than_json():
+    import json
+
+    vector = [0.0123456789 * (i % 97) for i in range(3072)]
+    assert len(cache_module.encode_vector(vector, "float32")) == 3072 * 4
+    assert len(cache_module.encode_vector(vector, "int8")) == 3072 + 4
+    assert len(json.dumps(vector)) > 3072 * 4
+
+
+def test_keys_are_namespaced_by_model_dim_and_dtype():
+    base = EmbeddingCache(model="models/gemini-embedding-001", dim=3072)
+    other_dim = EmbeddingCache(model="models/gemini-embedding-001", dim=768)
+    other_model = EmbeddingCache(model="models/text-embedding-004", dim=3072)
+
+    assert base.key_for("x").startswith("emb:gemini-embedding-001:3072:float32:")
+    assert len({base.key_for("x"), other_dim.key_for("x"), other_model.key_for("x")}) == 3
+
+
+def test_get_many_uses_single_mget_and_pipeline_write():
+    redis = FakeRedis()
+    writer = EmbeddingCache(redis_client=redis, dim=4)
+    writer.set_many({"a": VECTOR, "b": VECTOR, "c": VECTOR})
+    assert redis.pipeline_executions == 1
+
+    reader = EmbeddingCache(redis_client=redis, dim=4)
+    found = reader.get_many(["a", "b", "c", "missing"])
+
+    assert set(found) == {"a", "b", "c"}
+    assert redis.mget_calls == 1
+    assert redis.get_calls == 0
+    assert reader.stats["redis_hits"] == 3
+    assert reader.stats["misses"] == 1
+
+
+def test_lru_front_tier_skips_redis_on_repeat_lookup():
+    redis = FakeRedis()
+    cache = EmbeddingCache(redis_client=redis, dim=4)
+    cache.set("a", VECTOR)
+
+    assert cache.get("a") == VECTOR
+    assert redis.mget_calls == 0
+    assert cache.stats["lru_hits"] == 1
+    assert cache.hit_rate() == 1.0
+
+
+def test_vectors_with_wrong_dimension_are_treated_as_miss():
+    redis = FakeRedis()
+    EmbeddingCache(redis_client=redis, dim=4).set("a", VECTOR)
+    redis.store = {key.replace(":4:", ":3:"): value for key, value in redis.store.items()}
+
+    assert EmbeddingCache(redis_client=redis, dim=3).get("a") is None
+
+
+def test_lru_front_tier_stores_float32_bounded_by_bytes_and_returns_copies():
+    cache = EmbeddingCache(dim=3072, lru_max_bytes=3 * 3072 * 4)
+    vector = [0.25] * 3072
+    for text in ("a", "b", "c", "d"):
+        cache.set(text, vector)
+
+    assert len(cache.lru) == 3 and cache.lru.total_bytes == 3 * 3072 * 4
+    assert cache.get("a") is None
+
+    first = cache.get("d")
+    first[0] = 99.0
+    assert cache.get("d")[0] == 0.25
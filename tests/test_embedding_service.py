@@ -0,0 +1,112 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import gevent
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+sys.modules["app.agent"].__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules["app"].agent = sys.modules["app.agent"]
+
+embedding_module = importlib.import_module("app.agent.embedding_service")
+EmbeddingService = embedding_module.EmbeddingService
+FakeEmbeddingProvider = embedding_module.FakeEmbeddingProvider
+
+
+class DictCache:
+    def __init__(self):
+        self.store = {}
+
+    def get_many(self, texts):
+        return {text: self.store[text] for text in texts if text in self.store}
+
+    def set_many(self, vectors):
+        self.store.update(vectors)
+
+
+def test_fake_provider_is_deterministic_and_normalized():
+    provider = FakeEmbeddingProvider(dim=16)
+    first = provider.embed_batch(["bab 1"])[0]
+    second = FakeEmbeddingProvider(dim=16).embed_batch(["bab 1"])[0]
+
+    assert first == second
+    assert len(first) == 16
+    assert abs(sum(v * v for v in first) - 1.0) < 1e-9
+    assert first != provider.embed_batch(["bab 2"])[0]
+
+
+def test_embed_many_dedupes_chunks_and_preserves_order():
+    provider = FakeEmbeddingProvider(dim=8)
+    service = EmbeddingService(provider=provider, max_batch_size=2, dim=8)
+
+    vectors = service.embed_many(["a", "b", "a", "c"])
+
+    assert provider.calls == 2
+    assert provider.texts_embedded == 3
+    assert vectors[0] == vectors[2]
+    assert vectors[1] == provider._vector("b")
+
+
+def test_embed_many_uses_cache_before_provider():
+    provider = FakeEmbeddingProvider(dim=8)
+    cache = DictCache()
+    service = EmbeddingService(provider=provider, cache=cache, dim=8)
+
+    service.embed_many(["a", "b"])
+    service.embed_many(["a", "b", "c"])
+
+    assert provider.texts_embedded == 3
+    assert service.stats["cache_hits"] == 2
+
+
+def test_concurrent_single_embeds_are_coalesced_into_one_call():
+    provider = FakeEmbeddingProvider(dim=8, latency=0.01)
+    service = EmbeddingService(provider=provider, max_batch_size=64, max_wait=0.02, dim=8)
+
+    jobs = [gevent.spawn(service.embed, f"chunk {i}") for i in range(10)]
+    gevent.joinall(jobs, raise_error=True)
+
+    assert provider.calls == 1
+    assert [job.value for job in jobs] == [provider._vector(f"chunk {i}") for i in range(10)]
+
+
+def test_micro_batch_flushes_immediately_when_full():
+    provider = FakeEmbeddingProvider(dim=8)
+    service = EmbeddingService(provider=provider, max_batch_size=3, max_wait=5.0, dim=8)
+
+    jobs = [gevent.spawn(service.embed, f"t{i}") for i in range(6)]
+    gevent.joinall(jobs, timeout=1.0, raise_error=True)
+
+    assert all(job.successful() for job in jobs)
+    assert provider.calls == 2
+
+
+def test_provider_error_propagates_to_every_waiter():
+    class BrokenProvider(FakeEmbeddingProvider):
+        def embed_batch(self, texts):
+            raise RuntimeError("quota exceeded")
+
+    service = EmbeddingService(provider=BrokenProvider(dim=8), max_wait=0.01, dim=8)
+    jobs = [gevent.spawn(service.embed, f"t{i}") for i in range(3)]
+    gevent.joinall(jobs)
+
+    assert all(isinstance(job.exception, RuntimeError) for job in jobs)
+
+
+def test_missing_api_key_returns_zero_vectors_without_provider_call():
+    provider = embedding_module.GeminiEmbeddingProvider(api_key="")
+    service = EmbeddingService(provider=provider, dim=4)
+
+    assert service.embed("x") == [0.0] * 4
+    assert provider.calls == 0
@@ -0,0 +1,129 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+import requests
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+http_client = importlib.import_module("app.utils.http_client")
+
+from tests.http_stub import StubHTTPServer  # noqa: E402
+
+
+@pytest.fixture
+def stub_server():
+    with StubHTTPServer() as server:
+        yield server
+
+
+def _client(store=None, **kwargs):
+    sleeps = []
+    client = http_client.HttpClient(cache=http_client.ResponseCache(store=store), sleep=sleeps.append, **kwargs)
+    client.sleeps = sleeps
+    return client
+
+
+def test_fresh_responses_are_served_from_cache_over_one_pooled_connection(stub_server):
+    client = _client()
+    for i in range(20):
+        response = client.get(f"{stub_server.url}/works", params={"q": f"topic-{i % 4}"})
+        assert response.json()["query"] == {"q": [f"topic-{i % 4}"]}
+
+    assert stub_server.counts["requests"] == 4
+    assert stub_server.counts["connections"] == 1
+    assert client.stats["cache_hits"] == 16
+
+
+def test_stale_entries_are_revalidated_with_etag(stub_server, monkeypatch):
+    stub_server.cache_control = "no-cache"
+    client = _client()
+
+    first = client.get(f"{stub_server.url}/works")
+    second = client.get(f"{stub_server.url}/works")
+
+    assert first.from_cache is False and second.from_cache is True
+    assert second.status_code == 200 and second.json() == first.json()
+    assert stub_server.counts["not_modified"] == 1
+    assert client.stats["revalidated"] == 1
+
+    stub_server.version = 2
+    assert client.get(f"{stub_server.url}/works").json()["version"] == 2
+
+
+def test_no_store_is_never_cached_but_source_ttl_overrides_server_policy(stub_server, monkeypatch):
+    stub_server.cache_control = "no-store"
+    client = _client()
+    client.get(f"{stub_server.url}/works")
+    client.get(f"{stub_server.url}/works")
+    assert stub_server.counts["requests"] == 2 and client.stats["cache_stores"] == 0
+
+    stub_server.cache_control = "max-age=0"
+    monkeypatch.setenv("HTTP_CACHE_TTL_OPENALEX", "300")
+    client.get(f"{stub_server.url}/other", source="openalex")
+    client.get(f"{stub_server.url}/other", source="openalex")
+    assert stub_server.counts["requests"] == 3
+
+
+def test_cache_key_varies_by_credentials(stub_server):
+    client = _client()
+    client.get(f"{stub_server.url}/works", headers={"Authorization": "Bearer a"})
+    client.get(f"{stub_server.url}/works", headers={"Authorization": "Bearer b"})
+    assert stub_server.counts["requests"] == 2
+
+
+def test_rate_limits_are_retried_with_jittered_backoff(stub_server):
+    client = _client(retries=4)
+    response = client.get(f"{stub_server.url}/flaky", params={"fail": 2}, cache=False)
+
+    assert response.status_code == 200
+    assert client.stats["retries"] == 2 and len(client.sleeps) == 2
+
+    exhausted = _client(retries=2).get(f"{stub_server.url}/flaky", params={"fail": 10}, cache=False)
+    assert exhausted.status_code == 429
+
+    delays = [http_client.jittered_backoff(3, base=0.5, cap=2) for _ in range(200)]
+    assert all(0 <= d <= 2 for d in delays) and len(set(delays)) > 1
+
+
+def test_timeout_is_always_applied(stub_server):
+    stub_server.latency = 0.5
+    client = _client(timeout=(1, 0.1), retries=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get(f"{stub_server.url}/works")
+
+
+def test_disk_store_survives_a_new_process_level_client(stub_server, tmp_path):
+    store = http_client._DiskStore(str(tmp_path))
+    _client(store=store).get(f"{stub_server.url}/works")
+
+    response = _client(store=http_client._DiskStore(str(tmp_path))).get(f"{stub_server.url}/works")
+    assert response.from_cache is True and response.json()["path"] == "/works"
+    assert stub_server.counts["requests"] == 1
+
+
+def test_parse_cache_control():
+    policy = http_client.parse_cache_control("public, max-age=120, s-maxage=600")
+    assert policy == {"no_store": False, "no_cache": False, "max_age": 600}
+    assert http_client.parse_cache_control("private, no-store")["no_store"] is True
+
+
+def test_lru_front_tier_is_bounded_by_body_bytes():
+    cache = http_client.ResponseCache(lru_max_bytes=3000)
+    response = types.SimpleNamespace(url="u", status_code=200, headers={}, content=b"x" * 1000, encoding="utf-8")
+    for key in ("a", "b", "c"):
+        cache.put(key, response, fresh_for=60)
+
+    assert cache.lru.total_bytes <= 3000 and len(cache.lru) == 2
+    assert cache.get("a") is None and cache.get("c") is not None
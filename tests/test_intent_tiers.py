@@ -0,0 +1,98 @@
+import importlib
+import json
+import sys
+import types
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+
+litellm_stub = types.ModuleType("litellm")
+litellm_stub.completion = lambda *args, **kwargs: None
+sys.modules.setdefault("litellm", litellm_stub)
+litellm_exceptions_stub = types.ModuleType("litellm.exceptions")
+litellm_exceptions_stub.RateLimitError = RuntimeError
+sys.modules.setdefault("litellm.exceptions", litellm_exceptions_stub)
+
+intent_tiers = importlib.import_module("app.agent.intent_tiers")
+intent_classifier_module = importlib.import_module("app.agent.intent_classifier")
+IntentClassifier = intent_classifier_module.IntentClassifier
+
+
+def _classifier(llm_intent="general_chat", confidence=0.9):
+    classifier = IntentClassifier(cache=intent_tiers.IntentCache())
+    calls = []
+
+    def fake_llm(prompt):
+        calls.append(prompt)
+        return json.dumps({"intent": llm_intent, "confidence": confidence, "needs_clarification": False})
+
+    classifier._call_llm = fake_llm
+    return classifier, calls
+
+
+def test_rule_tier_answers_without_llm():
+    classifier, calls = _classifier()
+
+    result = classifier.classify("Tolong cek sitasi di paragraf ini.", [])
+
+    assert result["intent"] == "validate_citations"
+    assert result["tier"] == intent_tiers.TIER_RULES
+    assert calls == []
+
+
+def test_local_model_answers_paraphrases_it_is_confident_about():
+    model = intent_tiers.local_model_for(intent_classifier_module.INTENT_CLASSIFIER_PROMPT)
+
+    ranked = model.predict_proba("halo selamat pagi, apa kabar")
+
+    assert ranked[0][0] == "greeting"
+    assert abs(sum(prob for _, prob in ranked) - 1.0) < 1e-6
+
+
+def test_repeated_message_is_served_from_cache():
+    classifier, calls = _classifier(llm_intent="revise_chapter")
+    message = "Ini bab 2 saya, gimana menurutmu?"
+
+    first = classifier.classify(message, [])
+    second = classifier.classify("  ini BAB 2 saya, gimana menurutmu? ", [])
+
+    assert first["tier"] == intent_tiers.TIER_LLM
+    assert second["intent"] == "revise_chapter" and second["tier"] == intent_tiers.TIER_CACHE
+    assert len(calls) == 1
+    assert classifier.tier_counts[intent_tiers.TIER_CACHE] == 1
+
+
+def test_cache_key_includes_recent_history():
+    cache = intent_tiers.IntentCache()
+    result = intent_tiers.intent_result("revise_chapter", 0.9, intent_tiers.TIER_LLM)
+    cache.set("lanjutkan", [{"role": "user", "content": "bab 2"}], result)
+
+    assert cache.get("lanjutkan", [{"role": "user", "content": "bab 2"}])["intent"] == "revise_chapter"
+    assert cache.get("lanjutkan", [{"role": "user", "content": "bab 3"}]) is None
+
+
+def test_abstract_question_defers_to_llm():
+    classifier, calls = _classifier(llm_intent="general_chat")
+
+    result = classifier.classify("Apa itu abstract?", [])
+
+    assert result["tier"] == intent_tiers.TIER_LLM
+    assert len(calls) == 1
+
+
+def test_unclear_llm_results_are_not_cached():
+    classifier, calls = _classifier(llm_intent="unclear", confidence=0.3)
+
+    classifier.classify("Pertanyaan ambigu", [])
+    classifier.classify("Pertanyaan ambigu", [])
+
+    assert len(calls) == 2
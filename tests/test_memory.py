@@ -1,11 +1,16 @@
 import importlib
 import asyncio
+import json
 import sys
+import time
 import types
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import gevent
+import pytest
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
@@ -45,6 +50,7 @@ sys.modules.setdefault("app.agent.task_planner", task_planner_stub)
 
 redis_stub = types.ModuleType("redis")
 redis_stub.from_url = lambda url: None
+redis_stub.WatchError = type("WatchError", (Exception,), {})
 sys.modules["redis"] = redis_stub
 
 litellm_stub = types.ModuleType("litellm")
@@ -271,8 +277,11 @@ class FakeResearchRecord:
 class FakeResearchVectorDB:
     def __init__(self):
         self.records = {}
+        self.upsert_calls = []
+        self.retrieve_calls = []
 
     def upsert(self, collection, points):
+        self.upsert_calls.append(len(points))
         for point in points:
             payload = dict(point["payload"])
             record_id = point["id"]
@@ -296,6 +305,17 @@ class FakeResearchVectorDB:
                 matches.append(record)
         return matches[:limit]
 
+    def retrieve(self, collection, ids):
+        self.retrieve_calls.append(list(ids))
+        return [self.records[str(point_id)] for point_id in ids if str(point_id) in self.records]
+
+
+@pytest.fixture(autouse=True)
+def _isolated_research_paper_cache():
+    memory_module._research_paper_cache.clear()
+    yield
+    memory_module._research_paper_cache.clear()
+
 
 def _make_mock_paper(**overrides):
     now = datetime.now()
@@ -491,6 +511,7 @@ def test_conversation_memory_compression_preserves_content(monkeypatch):
     conversation.add_turn("user", "Saya meneliti adaptive learning.")
     conversation.add_turn("assistant", "Baik, kita fokus pada adaptive learning.")
     conversation.add_turn("user", "Metodenya mixed methods.")
+    memory_module.get_conversation_summarizer().join(timeout=5)
 
     assert conversation.turns[0].role == "system"
     assert "adaptive learning" in conversation.turns[0].content.lower()
@@ -525,3 +546,457 @@ def test_user_profile_update_does_not_overwrite_with_empty():
     updated_profile = profiles.get_or_create("user-1")
     assert updated_profile.thesis_topic == "adaptive learning"
     assert updated_profile.field == "education"
+
+
+class FakeListRedis:
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+        self.commands = []
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key):
+        value = self.data.get(key)
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key))
+        self.data[key] = value
+        self._touch(key)
+
+    def setex(self, key, ttl, value):
+        self.set(key, value, ex=ttl)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self._touch(key)
+
+    def rpush(self, key, *values):
+        self.commands.append(("rpush", key))
+        self.data.setdefault(key, []).extend(values)
+        self._touch(key)
+        return len(self.data[key])
+
+    def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        end = len(items) if end == -1 else end + 1
+        return [item.encode("utf-8") for item in items[start:end]]
+
+    def ltrim(self, key, start, end):
+        if key in self.data:
+            self.data[key] = self.data[key][start:] if end == -1 else self.data[key][start:end + 1]
+
+    def expire(self, key, ttl):
+        return key in self.data
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.reset()
+
+            def reset(self):
+                self.calls = []
+                self.watched = {}
+                self.immediate = False
+
+            def watch(self, *keys):
+                self.watched = {key: redis.versions.get(key, 0) for key in keys}
+                self.immediate = True
+
+            def multi(self):
+                self.immediate = False
+
+            def __getattr__(self, name):
+                def command(*args, **kwargs):
+                    if self.immediate:
+                        return getattr(redis, name)(*args, **kwargs)
+                    self.calls.append((name, args, kwargs))
+                return command
+
+            def execute(self):
+                if any(redis.versions.get(key, 0) != version for key, version in self.watched.items()):
+                    raise memory_module.redis.WatchError()
+                return [getattr(redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
+
+def test_conversation_turns_are_appended_not_rewritten(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    monkeypatch.setattr(ConversationMemory, "_summarize", lambda self, turns: "ringkasan bab 1")
+    conversation = ConversationMemory(scope_id="user-1:project-1", max_turns=3, db=InMemoryProfileStore())
+
+    for index in range(5):
+        conversation.add_turn("user", f"pesan {index}")
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    assert [cmd for cmd in redis.commands if cmd[0] == "rpush"] == [("rpush", "conv:user-1:project-1:turns")] * 5
+    assert "conv:user-1:project-1" not in redis.data
+    assert len(redis.data["conv:user-1:project-1:turns"]) == 5
+
+    reloaded = ConversationMemory(scope_id="user-1:project-1", max_turns=3, db=InMemoryProfileStore())
+    assert [turn.content for turn in reloaded.turns] == [turn.content for turn in conversation.turns]
+    assert reloaded.turns[0].intent == "summary"
+    assert reloaded.get_context_window(last_n=2) == [
+        {"role": "user", "content": "pesan 3"},
+        {"role": "user", "content": "pesan 4"},
+    ]
+
+
+def test_legacy_conversation_blob_is_migrated_once(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    legacy_turns = [
+        {"role": "system", "content": "[Ringkasan percakapan sebelumnya]: metode kuantitatif",
+         "intent": "summary", "plan_id": None, "timestamp": "2024-01-01T10:00:00", "tokens_used": 5},
+        {"role": "user", "content": "Lanjut bab 3", "intent": None, "plan_id": None,
+         "timestamp": "2024-01-01T10:01:00", "tokens_used": 3},
+    ]
+    redis.data["conv:user-1:project-1"] = json.dumps(legacy_turns)
+
+    conversation = ConversationMemory(scope_id="user-1:project-1", db=InMemoryProfileStore())
+
+    assert [turn.to_dict() for turn in conversation.turns] == legacy_turns
+    assert "conv:user-1:project-1" not in redis.data
+    assert len(redis.data["conv:user-1:project-1:turns"]) == 1
+    assert json.loads(redis.data["conv:user-1:project-1:summary"])["turn"]["intent"] == "summary"
+
+    again = ConversationMemory(scope_id="user-1:project-1", db=InMemoryProfileStore())
+    assert [turn.to_dict() for turn in again.turns] == legacy_turns
+
+
+def test_flush_session_clears_turns_and_summary(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    shared = SharedMemory("user-1", "project-1", vector_db=None, db=InMemoryProfileStore())
+    shared.conversation.add_turn("user", "Halo")
+
+    shared.flush_session()
+
+    assert "conv:user-1:project-1:turns" not in redis.data
+    assert ConversationMemory(scope_id="user-1:project-1").turns == []
+
+
+class SlowSummarizer:
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, turns):
+        self.calls.append([turn.content for turn in turns])
+        gevent.sleep(self.delay)
+        return f"ringkasan #{len(self.calls)}"
+
+
+def _turn(content, minute):
+    return memory_module.ConversationTurn(
+        role="user", content=content, intent=None, plan_id=None,
+        timestamp=datetime(2024, 1, 1, 10, minute), tokens_used=1,
+    )
+
+
+def test_threshold_crossing_truncates_now_and_summarizes_in_background(monkeypatch):
+    summarize = SlowSummarizer()
+    monkeypatch.setattr(ConversationMemory, "_summarize", lambda self, turns: summarize(turns))
+    conversation = ConversationMemory(scope_id="user-1:bg", max_turns=2, db=InMemoryProfileStore())
+
+    for minute, content in enumerate(["t0", "t1", "t2"]):
+        conversation._append_turn(_turn(content, minute))
+
+    # Request path tidak menunggu LLM: window langsung terpotong, rangkuman belum ada
+    assert [turn.content for turn in conversation.turns] == ["t1", "t2"]
+    assert summarize.calls == []
+
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    assert summarize.calls == [["t0"]]
+    assert conversation.turns[0].content == "[Ringkasan percakapan sebelumnya]: ringkasan #1"
+    assert conversation.summary_state["version"] == 1
+
+
+def test_queued_jobs_for_the_same_memory_coalesce_into_one_llm_call(monkeypatch):
+    summarize = SlowSummarizer()
+    monkeypatch.setattr(ConversationMemory, "_summarize", lambda self, turns: summarize(turns))
+    conversation = ConversationMemory(scope_id="user-1:coalesce", max_turns=1, db=InMemoryProfileStore())
+
+    for minute, content in enumerate(["t0", "t1", "t2", "t3"]):
+        conversation._append_turn(_turn(content, minute))
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    assert summarize.calls == [["t0", "t1", "t2"]]
+    assert [turn.content for turn in conversation.turns][1:] == ["t3"]
+
+
+def test_concurrent_workers_merge_each_turn_exactly_once(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    summarize = SlowSummarizer()
+    monkeypatch.setattr(ConversationMemory, "_summarize", lambda self, turns: summarize(turns))
+
+    worker_a = ConversationMemory(scope_id="user-1:race", max_turns=2)
+    worker_a._append_turn(_turn("t0", 0))
+    worker_a._append_turn(_turn("t1", 1))
+    worker_b = ConversationMemory(scope_id="user-1:race", max_turns=2)
+
+    # Dua worker (state sama) melewati ambang hampir bersamaan dan sama-sama membuang t0
+    worker_a._append_turn(_turn("t2", 2))
+    worker_b._append_turn(_turn("t3", 3))
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    stored = json.loads(redis.data["conv:user-1:race:summary"])
+    assert stored["version"] == 1
+    assert stored["covered_until"] == "2024-01-01T10:00:00"
+    # Keduanya sempat memanggil LLM, tapi hanya satu CAS yang menang; yang kalah membaca
+    # ulang dan tidak menemukan turn baru untuk dirangkum.
+    assert summarize.calls == [["t0"], ["t0"]]
+
+    worker_a._append_turn(_turn("t4", 4))
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    stored = json.loads(redis.data["conv:user-1:race:summary"])
+    assert stored["version"] == 2
+    assert stored["covered_until"] == "2024-01-01T10:01:00"
+    assert summarize.calls[-1][-1] == "t1"
+    assert summarize.calls[-1][0].startswith("[Ringkasan percakapan sebelumnya]")
+
+    reloaded = ConversationMemory(scope_id="user-1:race", max_turns=2)
+    assert reloaded.turns[0].content == stored["turn"]["content"]
+
+
+def test_flush_during_summarization_discards_the_stale_job(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    summarize = SlowSummarizer(delay=0.05)
+    monkeypatch.setattr(ConversationMemory, "_summarize", lambda self, turns: summarize(turns))
+    conversation = ConversationMemory(scope_id="user-1:flush", max_turns=1)
+
+    conversation._append_turn(_turn("rahasia lama", 0))
+    conversation._append_turn(_turn("t1", 1))
+    gevent.sleep(0.01)  # worker sudah di tengah panggilan LLM
+    conversation.turns = []
+    conversation.save()
+    memory_module.get_conversation_summarizer().join(timeout=5)
+
+    stored = json.loads(redis.data["conv:user-1:flush:summary"])
+    assert stored["turn"] is None and stored["version"] == 0
+    assert conversation.turns == []
+
+
+class RecordingProfileStore(InMemoryProfileStore):
+    def __init__(self):
+        self.saves = []
+        self.saved = None
+
+    def save(self, profile, fields=None):
+        self.saves.append(fields)
+        self.saved = profile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _profile_memory(store, clock):
+    buffer = memory_module.ProfileWriteBuffer(interval=30, active_refresh=600, clock=clock)
+    return UserProfileMemory(db=store, write_buffer=buffer), buffer
+
+
+def test_profile_noop_messages_skip_firestore_and_redis_writes(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    store = RecordingProfileStore()
+    profiles, buffer = _profile_memory(store, FakeClock())
+
+    profiles.update_from_conversation("user-1", "Skripsi saya tentang literasi keuangan mahasiswa.")
+    for _ in range(5):
+        profiles.update_from_conversation("user-1", "Oke lanjut, tolong perbaiki paragraf ini.")
+
+    assert len(store.saves) == 1
+    assert [cmd for cmd in redis.commands if cmd == ("set", "profile:user-1")] == [("set", "profile:user-1")]
+    assert buffer.stats["performed"] == 1
+    assert buffer.stats["skipped"] == 5 and buffer.stats["redis_skipped"] == 5
+
+
+def test_profile_changes_are_debounced_and_coalesced_per_user():
+    store = RecordingProfileStore()
+    clock = FakeClock()
+    profiles, buffer = _profile_memory(store, clock)
+    profiles.update_from_conversation("user-1", "Skripsi saya tentang literasi keuangan mahasiswa.")
+    assert len(store.saves) == 1
+
+    clock.now += 5
+    profiles.update_from_conversation("user-1", "Pakai gaya sitasi IEEE ya.")
+    clock.now += 5
+    profiles.update_from_conversation("user-1", "Tolong tulis in english.")
+
+    # Masih dalam interval 30 detik: belum ada write kedua, tapi request baru melihat perubahan
+    assert len(store.saves) == 1
+    fresh = UserProfileMemory(db=store, write_buffer=buffer).get_or_create("user-1")
+    assert fresh.citation_style == "IEEE" and fresh.preferred_language == "en"
+
+    buffer.flush_all()
+    assert store.saves[-1] == ["citation_style", "last_active", "preferred_language"]
+    assert buffer.stats["performed"] == 2 and buffer.stats["coalesced"] == 1
+
+
+def test_profile_last_active_is_refreshed_only_when_stale():
+    store = RecordingProfileStore()
+    clock = FakeClock()
+    profiles, buffer = _profile_memory(store, clock)
+    profile = profiles.get_or_create("user-1")
+    buffer.observe(profile)
+
+    profiles.update_from_conversation("user-1", "Halo")
+    assert store.saves == []
+
+    profile.last_active -= timedelta(seconds=601)
+    buffer._written["user-1"]["last_active"] = profile.last_active
+    profiles.update_from_conversation("user-1", "Halo lagi")
+    assert store.saves == [["last_active"]]
+
+
+def test_profile_diff_uses_the_profile_loaded_in_this_request_across_workers(monkeypatch):
+    redis = FakeListRedis()
+    monkeypatch.setattr(memory_module, "redis_client", redis)
+    store = RecordingProfileStore()
+    worker_a = memory_module.ProfileWriteBuffer(interval=30, active_refresh=600, clock=FakeClock())
+    worker_b = memory_module.ProfileWriteBuffer(interval=30, active_refresh=600, clock=FakeClock())
+
+    def request(buffer, message):
+        profiles = UserProfileMemory(db=store, write_buffer=buffer)  # instance baru per request
+        profiles.update_from_conversation("user-1", message)
+        buffer.flush_all()
+
+    request(worker_a, "Pakai gaya sitasi APA ya.")
+    request(worker_b, "Ganti gaya sitasi ke IEEE.")
+    request(worker_a, "Kembali ke gaya sitasi APA.")
+
+    assert json.loads(redis.data["profile:user-1"])["citation_style"] == "APA"
+    assert store.saves[-1] == ["citation_style", "last_active"] and store.saved.citation_style == "APA"
+    assert worker_a.stats["skipped"] == 0
+
+
+def test_add_papers_embeds_and_upserts_in_chunks(monkeypatch):
+    embed_batches = []
+
+    def fake_embed_many(texts):
+        embed_batches.append(len(texts))
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+    monkeypatch.setattr(memory_module, "embed_many", fake_embed_many)
+    vector_db = FakeResearchVectorDB()
+    memory = ResearchMemory(vector_db=vector_db, user_id="user-1", project_id="project-1", upsert_batch_size=2)
+
+    memory.add_papers([_make_mock_paper(paper_id=f"paper-{i}", doi=f"10.1/{i}") for i in range(5)])
+
+    assert embed_batches == [2, 2, 1]
+    assert vector_db.upsert_calls == [2, 2, 1]
+    assert sorted(vector_db.records) == [f"user-1:project-1:paper-{i}" for i in range(5)]
+
+
+def test_get_citations_fetches_missing_ids_in_one_retrieve_and_caches_them(monkeypatch):
+    monkeypatch.setattr(memory_module, "embed_many", lambda texts: [[0.0] * 3 for _ in texts])
+    vector_db = FakeResearchVectorDB()
+    seed = ResearchMemory(vector_db=vector_db, user_id="user-1", project_id="project-1")
+    seed.add_papers([_make_mock_paper(paper_id=f"paper-{i}", citation_key=f"key_{i}") for i in range(3)])
+    memory_module._research_paper_cache.clear()
+
+    fresh = ResearchMemory(vector_db=vector_db, user_id="user-1", project_id="project-1")
+    citations = asyncio.run(fresh.get_citations(["paper-2", "paper-0", "paper-missing", "paper-1"]))
+
+    assert [citation["citation_key"] for citation in citations] == ["key_2", "key_0", "key_1"]
+    assert vector_db.retrieve_calls == [[
+        "user-1:project-1:paper-2", "user-1:project-1:paper-0",
+        "user-1:project-1:paper-missing", "user-1:project-1:paper-1",
+    ]]
+
+    # Request berikutnya (instance baru) dilayani cache proses
+    again = ResearchMemory(vector_db=vector_db, user_id="user-1", project_id="project-1")
+    assert len(asyncio.run(again.get_citations(["paper-0", "paper-1"]))) == 2
+    assert len(vector_db.retrieve_calls) == 1
+
+
+def test_get_citations_falls_back_to_scroll_without_retrieve(monkeypatch):
+    monkeypatch.setattr(memory_module, "embed_many", lambda texts: [[0.0] * 3 for _ in texts])
+
+    class ScrollOnlyVectorDB(FakeResearchVectorDB):
+        retrieve = None
+
+    vector_db = ScrollOnlyVectorDB()
+    ResearchMemory(vector_db=vector_db).add_papers([_make_mock_paper()])
+    memory_module._research_paper_cache.clear()
+
+    citations = asyncio.run(ResearchMemory(vector_db=vector_db).get_citations(["paper-1"]))
+
+    assert [citation["paper_id"] for citation in citations] == ["paper-1"]
+
+
+def test_build_agent_context_embeds_once_and_records_source_metrics(monkeypatch):
+    embedded = []
+    monkeypatch.setattr(memory_module, "embed", lambda text: embedded.append(text) or [0.1, 0.2, 0.3])
+    memory = SharedMemory("user-1", "project-1", FakeContextVectorDB(), InMemoryProfileStore())
+
+    memory.build_agent_context("adaptive learning")
+
+    assert embedded == ["adaptive learning"]
+    sources = memory.context_metrics["sources"]
+    assert set(sources) == {"embed", "papers", "document", "conversation"}
+    assert all(source["status"] == "ok" for source in sources.values())
+
+
+def test_build_agent_context_runs_lookups_concurrently_and_drops_late_sources(monkeypatch):
+    monkeypatch.setattr(memory_module, "embed", lambda text: [0.1, 0.2, 0.3])
+    monkeypatch.setattr(memory_module, "AGENT_CONTEXT_DEADLINE_SECONDS", 0.5)
+    memory = SharedMemory("user-1", "project-1", FakeContextVectorDB(), InMemoryProfileStore())
+
+    def slow_papers(topic, min_relevance=0.5, query_vector=None):
+        gevent.sleep(5)
+        return [{"title": "Terlambat", "year": 2024}]
+
+    def document_context(query, doc_id, top_k=3, query_vector=None):
+        gevent.sleep(0.2)
+        return "Draft bab 2"
+
+    monkeypatch.setattr(memory.research, "get_papers", slow_papers)
+    monkeypatch.setattr(memory.document, "get_relevant_context", document_context)
+
+    started = time.perf_counter()
+    context = memory.build_agent_context("adaptive learning")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.5
+    assert context["relevant_thesis_sections"] == "Draft bab 2"
+    assert context["known_papers_summary"] == "Belum ada paper tersimpan untuk topik ini."
+    assert memory.context_metrics["sources"]["papers"]["status"] == "timeout"
+    assert memory.context_metrics["sources"]["document"]["status"] == "ok"
+
+
+def test_stalled_embed_is_bounded_by_the_context_deadline(monkeypatch):
+    def stalled_embed(text):
+        gevent.sleep(30)
+        return [0.1, 0.2, 0.3]
+
+    monkeypatch.setattr(memory_module, "embed", stalled_embed)
+    monkeypatch.setattr(memory_module, "AGENT_CONTEXT_DEADLINE_SECONDS", 0.3)
+    memory = SharedMemory("user-1", "project-1", FakeContextVectorDB(), InMemoryProfileStore())
+    memory.conversation.turns = [_turn("Halo", 0)]
+
+    started = time.perf_counter()
+    context = memory.build_agent_context("adaptive learning")
+
+    assert time.perf_counter() - started < 1.5
+    assert context["conversation_history"] == [{"role": "user", "content": "Halo"}]
+    assert context["known_papers_summary"] == "Belum ada paper tersimpan untuk topik ini."
+    sources = memory.context_metrics["sources"]
+    assert sources["embed"]["status"] == "timeout" and sources["conversation"]["status"] == "ok"
+    assert sources["papers"]["status"] != "ok" and sources["document"]["status"] != "ok"
@@ -0,0 +1,178 @@
+import asyncio
+import importlib
+import sys
+import textwrap
+import types
+from pathlib import Path
+
+import gevent
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+services_package = types.ModuleType("app.services")
+services_package.__path__ = [str(REPO_ROOT / "app" / "services")]
+sys.modules.setdefault("app.services", services_package)
+
+render_service = importlib.import_module("app.services.pdf_render_service")
+pdf_service = importlib.import_module("app.services.pdf_service")
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.html = None
+
+    async def goto(self, url):
+        self.url = url
+
+    async def set_content(self, html, wait_until="load"):
+        self.html = html
+        if "HANG" in html:
+            await asyncio.sleep(10)
+
+    async def pdf(self, **options):
+        self.browser.active += 1
+        self.browser.max_active = max(self.browser.max_active, self.browser.active)
+        await asyncio.sleep(0.02)
+        self.browser.active -= 1
+        assert options["format"] == "A4"
+        return f"%PDF {self.html}".encode()
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.handler = None
+        self.closed = False
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    async def new_page(self):
+        return FakePage(self.browser)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.active = 0
+        self.max_active = 0
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        pass
+
+
+def _run_pool(jobs, **pool_kwargs):
+    browser = FakeBrowser()
+
+    async def factory():
+        return browser
+
+    async def scenario():
+        pool = render_service.RenderPool(factory, **pool_kwargs)
+        await pool.start()
+        results = await asyncio.gather(*(pool.submit(job) for job in jobs))
+        await pool.close()
+        return pool, results
+
+    pool, results = asyncio.run(scenario())
+    return browser, pool, results
+
+
+def test_pool_bounds_concurrency_and_reuses_warm_contexts():
+    jobs = [{"html": f"doc-{i}"} for i in range(8)]
+    browser, pool, results = _run_pool(jobs, size=2, context_max_renders=100)
+
+    assert [r["pdf"] for r in results] == [f"%PDF doc-{i}".encode() for i in range(8)]
+    assert browser.max_active == 2
+    assert len(browser.contexts) == 2
+    assert pool.stats["browser_launches"] == 1
+
+
+def test_contexts_are_recycled_after_max_renders():
+    jobs = [{"html": f"doc-{i}"} for i in range(6)]
+    browser, pool, _ = _run_pool(jobs, size=1, context_max_renders=2)
+
+    assert pool.stats["recycled_contexts"] == 3
+    assert [c.closed for c in browser.contexts] == [True, True, True, False]
+
+
+def test_job_timeout_fails_only_that_job_and_replaces_its_context():
+    jobs = [{"html": "HANG", "timeout": 0.05}, {"html": "ok"}]
+    browser, pool, results = _run_pool(jobs, size=1)
+
+    assert results[0] == {"ok": False, "error": "PDF render timed out"}
+    assert results[1]["ok"] and results[1]["pdf"] == b"%PDF ok"
+    assert pool.stats["timeouts"] == 1 and browser.contexts[0].closed
+
+
+def test_static_assets_are_read_once_and_served_from_memory(tmp_path):
+    (tmp_path / "images").mkdir()
+    logo = tmp_path / "images" / "logo.png"
+    logo.write_bytes(b"PNG")
+    cache = render_service.AssetCache(str(tmp_path))
+
+    assert cache.get("images/logo.png") == (b"PNG", "image/png")
+    logo.unlink()
+    assert cache.get("images/logo.png") == (b"PNG", "image/png")
+    assert cache.get("../secret.txt") is None
+
+
+FAKE_SERVICE = textwrap.dedent('''
+    import base64, json, sys, time
+    if "--fail" in sys.argv[0]:
+        print(json.dumps({"ready": False, "error": "no chromium"}), flush=True)
+        sys.exit(0)
+    print(json.dumps({"ready": True}), flush=True)
+    for line in sys.stdin:
+        job = json.loads(line)
+        time.sleep(0.01)
+        pdf = base64.b64encode(("%PDF " + job["html"]).encode()).decode()
+        print(json.dumps({"id": job["id"], "ok": True, "pdf": pdf}), flush=True)
+''')
+
+
+def _fake_script(tmp_path, name="fake_service.py"):
+    script = tmp_path / name
+    script.write_text(FAKE_SERVICE)
+    return str(script)
+
+
+def test_client_renders_concurrently_and_recycles_process(tmp_path):
+    client = pdf_service.PdfRenderClient(script=_fake_script(tmp_path), max_jobs_per_process=3)
+
+    jobs = [gevent.spawn(client.render, f"doc-{i}") for i in range(5)]
+    gevent.joinall(jobs, timeout=10)
+    assert [job.value for job in jobs] == [f"%PDF doc-{i}".encode() for i in range(5)]
+
+    assert client.render("later") == b"%PDF later"
+    assert client.stats["process_starts"] == 2 and client.stats["recycles"] == 1
+    client.close()
+
+
+def test_generate_pdf_falls_back_when_service_cannot_start(tmp_path, monkeypatch):
+    client = pdf_service.PdfRenderClient(script=_fake_script(tmp_path, "fake--fail.py"))
+    monkeypatch.setattr(pdf_service, "_render_client", client)
+    monkeypatch.setattr(pdf_service, "render_export_html", lambda data: "<html></html>")
+    monkeypatch.setattr(pdf_service.PdfService, "generate_pdf_subprocess", staticmethod(lambda data: b"%PDF legacy"))
+
+    assert pdf_service.PdfService.generate_pdf({"template": "agent_report"}) == b"%PDF legacy"
+    with pytest.raises(pdf_service.RenderServiceUnavailable):
+        client.render("<html></html>")
@@ -0,0 +1,199 @@
+import importlib
+import sys
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+import gevent
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+sys.modules["app.agent"].__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules["app"].agent = sys.modules["app.agent"]
+
+REAL_MODULES = ("app.agent.task_planner", "app.agent.plan_executor")
+
+
+def _import_real_agents():
+    """Import task_planner/plan_executor asli walaupun test lain memasang stub di sys.modules."""
+    saved = {name: sys.modules.pop(name) for name in REAL_MODULES if name in sys.modules}
+    try:
+        return [importlib.import_module(name) for name in REAL_MODULES]
+    finally:
+        for name in REAL_MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+
+task_planner_module, plan_executor_module = _import_real_agents()
+
+TaskPlan = task_planner_module.TaskPlan
+TaskStep = task_planner_module.TaskStep
+PlanExecutor = plan_executor_module.PlanExecutor
+
+
+class SleepyAgent:
+    """Tool stub dengan latensi tetap; mencatat konkurensi maksimum."""
+
+    def __init__(self, latency=0.1, fail_tools=()):
+        self.latency = latency
+        self.fail_tools = set(fail_tools)
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def run_tool(self, tool_name, input_data, params, memory=None, **kwargs):
+        self.calls.append(tool_name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            gevent.sleep(self.latency)
+            if tool_name in self.fail_tools:
+                raise RuntimeError(f"{tool_name} failed")
+            return f"{tool_name}({input_data})"
+        finally:
+            self.active -= 1
+
+
+def _step(step_id, tool, input_from="user", depends_on=None, output_to="user", params=None):
+    return TaskStep(
+        step_id=step_id,
+        agent="stub_agent",
+        tool=tool,
+        input_from=input_from,
+        output_to=output_to,
+        params=params or {},
+        depends_on=depends_on or [],
+    )
+
+
+def _plan(steps):
+    return TaskPlan(
+        plan_id="plan-dag",
+        user_query="topik",
+        intent="custom",
+        steps=steps,
+        estimated_tokens=100,
+        created_at=datetime.now(),
+        status="pending",
+    )
+
+
+def _fan_in_plan():
+    return _plan([
+        _step("step_1", "lookup_a"),
+        _step("step_2", "lookup_b"),
+        _step("step_3", "lookup_c"),
+        _step("step_4", "merge", input_from="step_1", depends_on=["step_2", "step_3"]),
+    ])
+
+
+def _executor(agent, events=None, mode="dag", max_parallel=3):
+    executor = PlanExecutor(
+        agents={"stub_agent": agent},
+        on_event=(lambda kind, data: events.append((kind, data))) if events is not None else None,
+    )
+    executor.execution_mode = mode
+    executor.max_parallel_steps = max_parallel
+    return executor
+
+
+def test_independent_steps_run_concurrently_and_merge_waits_for_deps():
+    agent = SleepyAgent(latency=0.1)
+    plan = _fan_in_plan()
+
+    started = time.perf_counter()
+    result = _executor(agent).execute(plan)
+    elapsed = time.perf_counter() - started
+
+    assert result == "merge(lookup_a(topik))"
+    assert plan.status == "done"
+    assert agent.max_active == 3
+    assert agent.calls[-1] == "merge"
+    # 2 "gelombang" (3 lookup paralel + merge), bukan 4 langkah serial
+    assert elapsed < 0.35
+
+
+def test_pool_size_caps_concurrency():
+    agent = SleepyAgent(latency=0.05)
+    _executor(agent, max_parallel=2).execute(_fan_in_plan())
+    assert agent.max_active == 2
+
+
+def test_events_are_emitted_in_plan_order():
+    agent = SleepyAgent(latency=0.01)
+    # step_1 paling lambat, tapi event-nya tetap keluar lebih dulu
+    latencies = {"lookup_a": 0.15, "lookup_b": 0.01, "lookup_c": 0.05}
+    original = agent.run_tool
+
+    def run_tool(tool_name, input_data, params, memory=None, **kwargs):
+        agent.latency = latencies.get(tool_name, 0.01)
+        return original(tool_name, input_data, params, memory=memory)
+
+    agent.run_tool = run_tool
+    events = []
+    _executor(agent, events=events).execute(_fan_in_plan())
+
+    tool_events = [(kind, data["step_id"]) for kind, data in events if kind in {"TOOL_CALL", "TOOL_RESULT"}]
+    assert tool_events == [
+        ("TOOL_CALL", "step_1"), ("TOOL_RESULT", "step_1"),
+        ("TOOL_CALL", "step_2"), ("TOOL_RESULT", "step_2"),
+        ("TOOL_CALL", "step_3"), ("TOOL_RESULT", "step_3"),
+        ("TOOL_CALL", "step_4"), ("TOOL_RESULT", "step_4"),
+    ]
+
+
+def test_failed_branch_stops_dependents():
+    agent = SleepyAgent(latency=0.01, fail_tools={"lookup_b"})
+    plan = _fan_in_plan()
+
+    result = _executor(agent).execute(plan)
+
+    assert plan.status == "failed"
+    assert "merge" not in agent.calls
+    assert result == plan_executor_module.ERROR_MESSAGES["general"]
+
+
+def test_linear_plans_and_serial_mode_keep_serial_path(monkeypatch):
+    executor = _executor(SleepyAgent(latency=0.0))
+    chain = _plan([
+        _step("step_1", "a", output_to="step_2"),
+        _step("step_2", "b", input_from="step_1", depends_on=["step_1"]),
+    ])
+    assert executor._should_run_dag(chain) is False
+    assert executor._should_run_dag(_fan_in_plan()) is True
+
+    executor.execution_mode = "serial"
+    assert executor._should_run_dag(_fan_in_plan()) is False
+
+
+def test_dependency_graph_includes_implicit_references():
+    executor = _executor(SleepyAgent())
+    plan = _plan([
+        _step("step_1", "search_papers"),
+        _step("step_2", "extract_findings", input_from="memory"),
+        _step("step_3", "score", params={"claims_input": "step_2"}),
+        _step("step_4", "outline", output_to="step_5"),
+        _step("step_5", "write"),
+    ])
+
+    graph = executor._dependency_graph(plan)
+
+    assert graph["step_2"] == {"step_1"}
+    assert graph["step_3"] == {"step_2"}
+    assert graph["step_5"] == {"step_4"}
+    assert executor._dependency_graph(_plan([
+        _step("step_1", "a", depends_on=["step_2"]),
+        _step("step_2", "b", depends_on=["step_1"]),
+    ])) is None
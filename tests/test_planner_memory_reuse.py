@@ -1,9 +1,22 @@
 from types import SimpleNamespace
 
+import pytest
+
+from app.agent import embedding_service
 from app.agent.memory_system import SharedMemory
 from app.agent.task_planner import TaskPlanner
 
 
+@pytest.fixture
+def fake_embeddings():
+    """Embedding lokal deterministik: build_agent_context meng-embed query walau sumber semantik di-stub."""
+    embedding_service.set_embedding_service(
+        embedding_service.EmbeddingService(provider=embedding_service.FakeEmbeddingProvider())
+    )
+    yield
+    embedding_service.set_embedding_service(None)
+
+
 def _get_step(plan, tool_name):
     return next((step for step in plan.steps if step.tool == tool_name), None)
 
@@ -73,7 +86,7 @@ def test_generate_plan_emits_paper_search_when_known_papers_list_is_empty():
     assert extract_step.depends_on == ["step_2"]
 
 
-def test_build_agent_context_adds_structured_known_papers_on_topic():
+def test_build_agent_context_adds_structured_known_papers_on_topic(fake_embeddings):
     memory = SharedMemory.__new__(SharedMemory)
     memory.user_id = "user-1"
     memory.project_id = "project-a"
@@ -89,10 +102,10 @@ def test_build_agent_context_adds_structured_known_papers_on_topic():
     )
     memory.conversation = SimpleNamespace(get_context_window=lambda last_n=6: [])
     memory.document = SimpleNamespace(
-        get_relevant_context=lambda query, doc_id, top_k=2: "Ringkasan draft terkait"
+        get_relevant_context=lambda query, doc_id, top_k=2, query_vector=None: "Ringkasan draft terkait"
     )
     memory.research = SimpleNamespace(
-        get_papers=lambda topic, min_relevance=0.6: [
+        get_papers=lambda topic, min_relevance=0.6, query_vector=None: [
             {
                 "title": "Deteksi Hoaks dengan AI",
                 "topics": ["AI untuk deteksi hoaks", "NLP"],
@@ -0,0 +1,165 @@
+import importlib
+import sys
+import types
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+sys.modules["app.agent"].__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules["app"].agent = sys.modules["app.agent"]
+
+task_planner_stub = types.ModuleType("app.agent.task_planner")
+
+
+@dataclass
+class TaskPlan:
+    plan_id: str = "plan"
+
+
+task_planner_stub.TaskPlan = TaskPlan
+sys.modules.setdefault("app.agent.task_planner", task_planner_stub)
+
+
+def _is_qdrant(name):
+    return name == "qdrant_client" or name.startswith("qdrant_client.")
+
+
+def _import_real_qdrant():
+    """Import qdrant_client asli walaupun test lain memasang stub di sys.modules."""
+    saved = {name: sys.modules.pop(name) for name in list(sys.modules) if _is_qdrant(name)}
+    try:
+        client_module = importlib.import_module("qdrant_client")
+        models_module = importlib.import_module("qdrant_client.models")
+        return client_module.QdrantClient, models_module
+    finally:
+        for name in [name for name in sys.modules if _is_qdrant(name)]:
+            sys.modules.pop(name)
+        sys.modules.update(saved)
+
+
+def _import_memory_system():
+    saved = sys.modules.pop("app.agent.memory_system", None)
+    try:
+        return importlib.import_module("app.agent.memory_system")
+    finally:
+        if saved is not None:
+            sys.modules["app.agent.memory_system"] = saved
+        else:
+            sys.modules.pop("app.agent.memory_system", None)
+
+
+RealQdrantClient, qdrant_models = _import_real_qdrant()
+memory_module = _import_memory_system()
+embedding_module = sys.modules[memory_module.get_embedding_service.__module__]
+
+SCHEMA_METHODS = ("collection_exists", "get_collection", "create_collection", "delete_collection", "create_payload_index")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(memory_module, "QdrantClient", RealQdrantClient)
+    for name in ("Distance", "VectorParams", "PointStruct", "Filter", "FieldCondition", "MatchValue"):
+        monkeypatch.setattr(memory_module, name, getattr(qdrant_models, name))
+    monkeypatch.setattr(memory_module, "redis_client", None)
+    monkeypatch.delenv("QDRANT_URL", raising=False)
+    monkeypatch.delenv("QDRANT_API_KEY", raising=False)
+    # Embedding deterministik lokal: test ini tidak boleh memanggil Gemini walau GEMINI_API_KEY ada
+    embedding_module.set_embedding_service(embedding_module.EmbeddingService(provider=embedding_module.FakeEmbeddingProvider()))
+    memory_module.qdrant_registry.reset()
+    yield memory_module.qdrant_registry
+    memory_module.qdrant_registry.reset()
+    embedding_module.set_embedding_service(None)
+
+
+def _count_schema_calls(monkeypatch, client):
+    calls = {name: 0 for name in SCHEMA_METHODS}
+    for name in SCHEMA_METHODS:
+        original = getattr(client, name)
+
+        def wrapper(*args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(client, name, wrapper)
+    return calls
+
+
+def test_first_construction_bootstraps_schema_once(registry):
+    vector_db = memory_module.QdrantVectorDB()
+
+    assert registry.bootstrap_runs == 1
+    for logical in memory_module.VECTOR_COLLECTIONS:
+        assert vector_db.client.collection_exists(vector_db._resolve_collection_name(logical))
+
+
+def test_hot_path_makes_zero_bootstrap_calls_and_shares_client(registry, monkeypatch):
+    first = memory_module.QdrantVectorDB()
+    calls = _count_schema_calls(monkeypatch, first.client)
+
+    instances = [memory_module.QdrantVectorDB() for _ in range(25)]
+    document = memory_module.DocumentMemory(instances[-1], user_id="u1", project_id="p1")
+    document.add_or_update_chunks("u1:p1", "bab_1", ["Latar belakang penelitian."])
+    document.get_all_chapter_summaries("u1:p1")
+
+    assert calls == {name: 0 for name in SCHEMA_METHODS}
+    assert registry.bootstrap_runs == 1
+    assert all(instance.client is first.client for instance in instances)
+
+
+def test_schema_version_bump_triggers_single_rebootstrap(registry, monkeypatch):
+    memory_module.QdrantVectorDB()
+    monkeypatch.setattr(memory_module, "VECTOR_SCHEMA_VERSION", memory_module.VECTOR_SCHEMA_VERSION + 1)
+
+    memory_module.QdrantVectorDB()
+    memory_module.QdrantVectorDB()
+
+    assert registry.bootstrap_runs == 2
+
+
+def test_redis_marker_lets_other_workers_skip_bootstrap(registry, monkeypatch):
+    class FakeRedis:
+        def __init__(self):
+            self.store = {}
+
+        def get(self, key):
+            return self.store.get(key)
+
+        def set(self, key, value):
+            self.store[key] = str(value).encode()
+
+    shared_redis = FakeRedis()
+    monkeypatch.setattr(memory_module, "redis_client", shared_redis)
+    monkeypatch.setenv("QDRANT_URL", "https://qdrant.example")
+    monkeypatch.setenv("QDRANT_API_KEY", "secret")
+    monkeypatch.setattr(type(registry), "_create_client", staticmethod(lambda url, api_key: RealQdrantClient(":memory:")))
+
+    memory_module.QdrantVectorDB()
+    assert registry.bootstrap_runs == 1
+    assert shared_redis.store
+
+    # Simulasikan worker kedua: state proses kosong, marker Redis sudah ada.
+    registry.reset()
+    memory_module.QdrantVectorDB()
+    assert registry.bootstrap_runs == 0
+
+
+def test_reconcile_forces_bootstrap(registry):
+    memory_module.QdrantVectorDB()
+
+    report = memory_module.reconcile_vector_schema()
+
+    assert registry.bootstrap_runs == 2
+    assert report["schema_version"] == memory_module.VECTOR_SCHEMA_VERSION
+    assert all(info["vector_size"] == memory_module.VECTOR_DIM for info in report["collections"].values())
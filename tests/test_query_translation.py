@@ -0,0 +1,159 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import gevent
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+query_translation = importlib.import_module("app.utils.query_translation")
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode("utf-8")
+
+
+class CountingTranslator:
+    def __init__(self, latency=0.0):
+        self.calls = []
+        self.latency = latency
+
+    def __call__(self, query):
+        self.calls.append(query)
+        if self.latency:
+            gevent.sleep(self.latency)
+        return f"EN({query.strip().lower()})"
+
+
+@pytest.mark.parametrize("query", [
+    "machine learning in education",
+    "the effect of social media on academic performance",
+    "deep learning",
+    "customer loyalty",
+    "financial literacy",
+])
+def test_english_queries_are_detected(query):
+    assert query_translation.detect_language(query) == "en"
+
+
+@pytest.mark.parametrize("query", [
+    "pengaruh media sosial terhadap prestasi belajar",
+    "kinerja karyawan",
+    "kepuasan pelanggan",
+    "literasi keuangan",
+    "implementasi kurikulum merdeka",
+])
+def test_indonesian_queries_are_detected(query):
+    assert query_translation.detect_language(query) == "id"
+
+
+def test_english_input_skips_the_llm():
+    upstream = CountingTranslator()
+    translator = query_translation.QueryTranslator(translate_fn=upstream)
+
+    result = translator.translate("machine learning in education")
+
+    assert result == "machine learning in education"
+    assert result.reason == "english" and result.llm_calls_saved == 1
+    assert upstream.calls == []
+
+
+def test_normalized_queries_share_one_cache_entry_across_translators():
+    redis = FakeRedis()
+    upstream = CountingTranslator()
+    first = query_translation.QueryTranslator(redis_client=redis, translate_fn=upstream)
+
+    assert first.translate("Pengaruh Media Sosial") == "EN(pengaruh media sosial)"
+    assert first.translate("  pengaruh   media sosial? ").reason == "cache"
+
+    # Worker lain (LRU kosong) membaca dari Redis
+    second = query_translation.QueryTranslator(redis_client=redis, translate_fn=upstream)
+    result = second.translate("pengaruh media sosial")
+    assert result == "EN(pengaruh media sosial)" and result.reason == "cache"
+    assert len(upstream.calls) == 1
+    assert second.stats["redis_hits"] == 1
+
+
+def test_concurrent_identical_queries_trigger_one_upstream_call():
+    upstream = CountingTranslator(latency=0.05)
+    translator = query_translation.QueryTranslator(translate_fn=upstream)
+
+    jobs = [gevent.spawn(translator.translate, "kinerja karyawan") for _ in range(10)]
+    gevent.joinall(jobs, timeout=5)
+
+    assert {str(job.value) for job in jobs} == {"EN(kinerja karyawan)"}
+    assert len(upstream.calls) == 1
+    assert sorted(job.value.reason for job in jobs) == ["deduped"] * 9 + ["llm"]
+    metrics = translator.metrics()
+    assert metrics["llm_calls"] == 1 and metrics["llm_calls_saved"] == 9
+
+
+def test_waiters_fall_back_to_original_query_when_the_leader_is_slow():
+    upstream = CountingTranslator(latency=0.2)
+    translator = query_translation.QueryTranslator(translate_fn=upstream, flight_timeout=0.02)
+
+    leader = gevent.spawn(translator.translate, "kinerja karyawan")
+    gevent.sleep(0)
+    waiter = gevent.spawn(translator.translate, "kinerja karyawan")
+    gevent.joinall([leader, waiter], timeout=5)
+
+    assert waiter.successful()
+    assert waiter.value == "kinerja karyawan" and waiter.value.reason == "unavailable"
+    assert leader.value == "EN(kinerja karyawan)" and len(upstream.calls) == 1
+
+
+def test_upstream_failure_falls_back_to_original_query_and_is_not_cached():
+    def failing(query):
+        raise RuntimeError("groq down")
+
+    translator = query_translation.QueryTranslator(translate_fn=failing)
+    result = translator.translate("kinerja guru")
+
+    assert result == "kinerja guru" and result.reason == "unavailable"
+    assert translator.lru.get("kinerja guru") is None
+
+
+def test_unified_search_reports_translation_metrics(monkeypatch):
+    saved = {name: sys.modules.get(name) for name in ("app.utils.search_utils", "app.utils.general_utils")}
+    general_utils_stub = types.ModuleType("app.utils.general_utils")
+    general_utils_stub.make_api_request_with_retry = lambda *args, **kwargs: None
+    sys.modules["app.utils.general_utils"] = general_utils_stub
+    sys.modules.pop("app.utils.search_utils", None)
+    try:
+        search_utils = importlib.import_module("app.utils.search_utils")
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    translator = query_translation.QueryTranslator(translate_fn=CountingTranslator())
+    monkeypatch.setattr(search_utils, "translate_query", translator.translate)
+    functions = {"crossref": lambda q, year, limit: [{"title": q, "doi": "10.1/x"}]}
+    monkeypatch.setattr(search_utils, "_search_functions", lambda: functions)
+
+    first = search_utils.unified_search("kinerja guru", sources=["crossref"], with_status=True)
+    second = search_utils.unified_search("Kinerja guru", sources=["crossref"], with_status=True)
+
+    assert first["results"][0]["title"] == "EN(kinerja guru)"
+    assert first["translation"]["llm_calls"] == 1 and first["translation"]["llm_calls_saved"] == 0
+    assert second["translation"] == {"language": "id", "reason": "cache", "llm_calls": 0, "llm_calls_saved": 1}
@@ -0,0 +1,93 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pingouin as pg
+import pytest
+from scipy import stats
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+reliability = importlib.import_module("app.utils.reliability")
+stats_utils = importlib.import_module("app.utils.stats_utils")
+
+
+def _likert(n=300, k=8, seed=3):
+    rng = np.random.default_rng(seed)
+    trait = rng.normal(size=(n, 1))
+    loadings = np.linspace(0.2, 0.9, k)
+    raw = trait * loadings + rng.normal(size=(n, k))
+    scores = np.clip(np.round(raw + 3), 1, 5)
+    return pd.DataFrame(scores, columns=[f"Q{i + 1}" for i in range(k)])
+
+
+def _reference_item_stats(df):
+    """Jalur lama: pg.cronbach_alpha + pearsonr diulang per item."""
+    rows = []
+    for col in df.columns:
+        others = [c for c in df.columns if c != col]
+        r_it, _ = stats.pearsonr(df[col], df[others].sum(axis=1))
+        alpha_drop = pg.cronbach_alpha(data=df[others])[0] if len(others) >= 2 else 0.0
+        rows.append((r_it, alpha_drop))
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("k", [2, 3, 8, 25])
+def test_matches_pingouin_and_per_item_recomputation(k):
+    df = _likert(k=k)
+    result = reliability.reliability_statistics(df)
+
+    alpha, ci = pg.cronbach_alpha(data=df, ci=.95)
+    assert result["alpha"] == pytest.approx(alpha, rel=1e-12, abs=1e-12)
+    np.testing.assert_array_equal(result["ci"], ci)
+
+    reference = _reference_item_stats(df)
+    np.testing.assert_allclose(result["corrected_item_total"], reference[:, 0], rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(result["alpha_if_deleted"], reference[:, 1], rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(result["mean"], df.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(result["sd"], df.std().to_numpy(), rtol=1e-12)
+
+
+def test_split_half_matches_direct_computation():
+    df = _likert(k=9)
+    halves = reliability.reliability_statistics(df)["split_half"]
+
+    odd = df.iloc[:, 0::2].sum(axis=1)
+    even = df.iloc[:, 1::2].sum(axis=1)
+    r = stats.pearsonr(odd, even)[0]
+    total_var = (odd + even).var()
+    assert halves["r_halves"] == pytest.approx(r, rel=1e-10)
+    assert halves["spearman_brown"] == pytest.approx(2 * r / (1 + r), rel=1e-10)
+    assert halves["guttman"] == pytest.approx(2 * (1 - (odd.var() + even.var()) / total_var), rel=1e-10)
+
+
+def test_run_reliability_analysis_output_is_unchanged():
+    df = _likert(k=6)
+    result = stats_utils.run_reliability_analysis(df, {"variables": list(df.columns)})
+
+    alpha, ci = pg.cronbach_alpha(data=df, ci=.95)
+    summary = result["summary_table"][0]
+    assert summary["Cronbach_Alpha"] == round(alpha, 3)
+    assert [summary["CI_95_Lower"], summary["CI_95_Upper"]] == list(ci)
+    assert summary["N_Items"] == 6 and summary["N_Sample"] == len(df)
+    halves = reliability.split_half(reliability.item_covariance(df)[1])
+    assert [summary["Split_Half_r"], summary["Spearman_Brown"], summary["Guttman_Split_Half"]] == [
+        round(halves["r_halves"], 3), round(halves["spearman_brown"], 3), round(halves["guttman"], 3)
+    ]
+
+    reference = _reference_item_stats(df)
+    for row, (r_it, alpha_drop) in zip(result["summary_table_coefficients"], reference):
+        assert row["Corrected_Item_Total_Correlation"] == round(r_it, 3)
+        assert row["Cronbach_Alpha_if_Deleted"] == round(alpha_drop, 3)
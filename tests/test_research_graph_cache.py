@@ -0,0 +1,298 @@
+import importlib
+import importlib.util
+import sys
+import types
+from dataclasses import dataclass
+from pathlib import Path
+
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RESEARCH_GRAPH_API_PATH = REPO_ROOT / "app" / "api" / "research_graph_api.py"
+PROJECT_ID = "proj-1"
+USER_ID = "user-1"
+
+
+class _FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data or {})
+
+
+class _FakeDocumentRef:
+    def __init__(self, db, collection_name, doc_id):
+        self.db = db
+        self.collection_name = collection_name
+        self.id = doc_id
+
+    def get(self):
+        self.db.reads[self.collection_name] = self.db.reads.get(self.collection_name, 0) + 1
+        return _FakeSnapshot(self.id, self.db._collections.setdefault(self.collection_name, {}).get(self.id))
+
+    def set(self, data, merge=False):
+        self.db.writes[self.collection_name] = self.db.writes.get(self.collection_name, 0) + 1
+        self.db._collections.setdefault(self.collection_name, {})[self.id] = dict(data)
+
+
+class _FakeCollection:
+    def __init__(self, db, collection_name):
+        self.db = db
+        self.collection_name = collection_name
+
+    def document(self, doc_id):
+        return _FakeDocumentRef(self.db, self.collection_name, doc_id)
+
+    def where(self, field, op, value):
+        return self
+
+    def stream(self):
+        self.db.reads[self.collection_name] = self.db.reads.get(self.collection_name, 0) + 1
+        return []
+
+
+class _FakeFirestoreDB:
+    """Firestore palsu yang menghitung read/write per koleksi."""
+
+    def __init__(self):
+        self._collections = {}
+        self.reads = {}
+        self.writes = {}
+
+    def collection(self, name):
+        return _FakeCollection(self, name)
+
+    def reset_counts(self):
+        self.reads, self.writes = {}, {}
+
+    def counts(self):
+        return sum(self.reads.values()), sum(self.writes.values())
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=False):
+        redis = self
+
+        class _Pipe:
+            def setex(self, key, ttl, value):
+                redis.data[key] = value.encode() if isinstance(value, str) else value
+
+            def execute(self):
+                return []
+
+        return _Pipe()
+
+
+def _load_module(monkeypatch, fake_db):
+    app_stub = types.ModuleType("app")
+    app_stub.__path__ = [str(REPO_ROOT / "app")]
+    app_stub.firestore_db = fake_db
+    monkeypatch.setitem(sys.modules, "app", app_stub)
+
+    services_pkg = types.ModuleType("app.services")
+    services_pkg.__path__ = [str(REPO_ROOT / "app" / "services")]
+    monkeypatch.setitem(sys.modules, "app.services", services_pkg)
+    monkeypatch.delitem(sys.modules, "app.services.research_graph_store", raising=False)
+
+    firebase_admin_stub = types.ModuleType("firebase_admin")
+    firebase_admin_stub.firestore = types.ModuleType("firebase_admin.firestore")
+    monkeypatch.setitem(sys.modules, "firebase_admin", firebase_admin_stub)
+    monkeypatch.setitem(sys.modules, "firebase_admin.firestore", firebase_admin_stub.firestore)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+
+    module_name = "app.api.research_graph_api"
+    spec = importlib.util.spec_from_file_location(module_name, RESEARCH_GRAPH_API_PATH)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, module_name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _build_client(monkeypatch, fake_db):
+    module = _load_module(monkeypatch, fake_db)
+
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test-secret"
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+
+    @dataclass
+    class TestUser(UserMixin):
+        id: str
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return TestUser(user_id)
+
+    app.register_blueprint(module.research_graph_bp, url_prefix="/api/thesis-brain")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = USER_ID
+        session["_fresh"] = True
+    return client, module
+
+
+def _seed_project(fake_db, **overrides):
+    project = {
+        "userId": USER_ID,
+        "title": "Pengaruh Media Sosial terhadap Prestasi Belajar",
+        "methodology": "quantitative",
+        "variables_indicators": "Media Sosial\nPrestasi Belajar",
+        "problem_statement": "1. Apakah media sosial berpengaruh terhadap prestasi belajar?",
+        "hypothesis": "H1: Media sosial berpengaruh positif terhadap prestasi belajar",
+        "theoretical_framework": "Uses and Gratifications Theory",
+        "updatedAt": "2026-10-01T10:00:00",
+    }
+    project.update(overrides)
+    fake_db._collections.setdefault("projects", {})[PROJECT_ID] = project
+
+
+def _graph_url(suffix=""):
+    return f"/api/thesis-brain/graph/{PROJECT_ID}{suffix}"
+
+
+def test_reads_never_write_and_warm_reads_skip_rebuild(monkeypatch):
+    fake_db = _FakeFirestoreDB()
+    _seed_project(fake_db)
+    client, module = _build_client(monkeypatch, fake_db)
+    build_calls = []
+    graph_cls = module._graph_models()["ResearchGraph"]
+    original_build = graph_cls.build_from_project.__func__
+    monkeypatch.setattr(graph_cls, "build_from_project", classmethod(
+        lambda cls, *args: build_calls.append(args[1]) or original_build(cls, *args)
+    ))
+
+    counts = {}
+    for label, url in [
+        ("graph", _graph_url()),
+        ("graph (warm)", _graph_url()),
+        ("validate", _graph_url("/validate")),
+        ("context", _graph_url("/context/bab2")),
+    ]:
+        fake_db.reset_counts()
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        counts[label] = fake_db.counts()
+
+    # Tanpa Redis: 1 read project + 1 read graph (validasi versi), tidak pernah write.
+    # Endpoint context menambah 1 query citations milik ThesisContextCompiler sendiri.
+    assert counts == {
+        "graph": (2, 0),
+        "graph (warm)": (2, 0),
+        "validate": (2, 0),
+        "context": (3, 0),
+    }
+    assert build_calls == [PROJECT_ID]
+    assert not fake_db._collections.get("research_graphs")
+
+
+def test_mutations_write_only_when_content_changes(monkeypatch):
+    fake_db = _FakeFirestoreDB()
+    _seed_project(fake_db)
+    client, _module = _build_client(monkeypatch, fake_db)
+    variable = {"id": "var-3", "name": "Motivasi", "type": "moderating"}
+    snapshot = {"summary": "Bab 1 membahas latar belakang.", "status": "draft", "word_count": 800}
+
+    writes = []
+    for method, url, payload in [
+        ("post", _graph_url("/variables"), variable),
+        ("post", _graph_url("/variables"), variable),
+        ("put", _graph_url("/chapters/bab1/snapshot"), snapshot),
+        ("put", _graph_url("/chapters/bab1/snapshot"), snapshot),
+    ]:
+        fake_db.reset_counts()
+        response = getattr(client, method)(url, json=payload)
+        assert response.status_code == 200, response.get_json()
+        writes.append(fake_db.counts()[1])
+
+    # Snapshot memakai last_updated baru tiap request, jadi PUT kedua tetap menulis
+    assert writes == [1, 0, 1, 1]
+    stored = fake_db._collections["research_graphs"][PROJECT_ID]
+    assert stored["content_hash"] and stored["source_hashes"]
+    assert [v["name"] for v in stored["variables"]] == ["Media Sosial", "Prestasi Belajar", "Motivasi"]
+
+
+def test_project_change_rebuilds_only_changed_sections(monkeypatch):
+    fake_db = _FakeFirestoreDB()
+    _seed_project(fake_db)
+    client, _module = _build_client(monkeypatch, fake_db)
+    client.post(_graph_url("/variables"), json={"id": "var-3", "name": "Motivasi", "type": "moderating"})
+    client.put(_graph_url("/chapters/bab1/snapshot"), json={"summary": "Ringkasan bab 1", "status": "approved"})
+
+    _seed_project(
+        fake_db,
+        hypothesis="H1: Media sosial berpengaruh negatif terhadap prestasi belajar",
+        updatedAt="2026-10-02T08:00:00",
+    )
+    fake_db.reset_counts()
+    graph = client.get(_graph_url()).get_json()["graph"]
+
+    assert fake_db.counts()[1] == 0
+    assert graph["hypotheses"][0]["statement"].endswith("berpengaruh negatif terhadap prestasi belajar")
+    # Seksi yang sumbernya tidak berubah tetap memakai data manual
+    assert [v["name"] for v in graph["variables"]][-1] == "Motivasi"
+    assert graph["chapter_snapshots"]["bab1"]["summary"] == "Ringkasan bab 1"
+    assert graph["constraints"]["approved_chapters"] == ["bab1"]
+
+
+def test_redis_tier_shares_graph_between_workers(monkeypatch):
+    fake_db = _FakeFirestoreDB()
+    _seed_project(fake_db)
+    module = _load_module(monkeypatch, fake_db)
+    store_module = importlib.import_module("app.services.research_graph_store")
+    redis = _FakeRedis()
+    worker_a = store_module.ResearchGraphStore(fake_db, redis_client=redis)
+    worker_b = store_module.ResearchGraphStore(fake_db, redis_client=redis)
+
+    graph = worker_a.load(PROJECT_ID, USER_ID)
+    graph.theories.append(module._graph_models()["Theory"](id="theory-2", name="Self-Regulated Learning"))
+    assert worker_a.save(graph) is True
+
+    fake_db.reset_counts()
+    seen_by_b = worker_b.load(PROJECT_ID, USER_ID)
+    # Dengan Redis: hanya dokumen project yang dibaca dari Firestore
+    assert fake_db.counts() == (1, 0)
+    assert seen_by_b.theories[-1].name == "Self-Regulated Learning"
+    assert worker_b.save(seen_by_b) is False
+
+
+def test_cold_redis_reloads_persisted_graph_instead_of_rebuilding(monkeypatch):
+    fake_db = _FakeFirestoreDB()
+    _seed_project(fake_db, theoretical_framework="Kerangka Teori")
+    module = _load_module(monkeypatch, fake_db)
+    store_module = importlib.import_module("app.services.research_graph_store")
+    models = module._graph_models()
+    redis = _FakeRedis()
+
+    writer = store_module.ResearchGraphStore(fake_db, redis_client=redis)
+    graph = writer.load(PROJECT_ID, USER_ID)
+    graph.theories.append(models["Theory"](id="theory-2", name="Manual Theory X"))
+    assert writer.save(graph) is True
+    persisted = [t["name"] for t in fake_db._collections["research_graphs"][PROJECT_ID]["theories"]]
+    assert persisted == ["Kerangka Teori", "Manual Theory X"]
+
+    # Restart / flush Redis: worker baru tanpa LRU, Redis kosong
+    redis.data.clear()
+    reader = store_module.ResearchGraphStore(fake_db, redis_client=redis)
+    loaded = reader.load(PROJECT_ID, USER_ID)
+    assert [t.name for t in loaded.theories] == persisted
+    assert redis.data  # di-seed ulang dari dokumen tersimpan
+
+    reader.save(loaded)
+    stored = fake_db._collections["research_graphs"][PROJECT_ID]
+    assert [t["name"] for t in stored["theories"]] == persisted
@@ -0,0 +1,131 @@
+import importlib
+import sys
+import time
+import types
+from pathlib import Path
+
+import gevent
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+sys.modules["app.utils"].__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules["app"].utils = sys.modules["app.utils"]
+
+
+def _import_real_search_utils():
+    """Import search_utils asli tanpa mengganggu stub yang dipasang test lain."""
+    saved = {name: sys.modules.get(name) for name in ("app.utils.search_utils", "app.utils.general_utils")}
+    general_utils_stub = types.ModuleType("app.utils.general_utils")
+    general_utils_stub.make_api_request_with_retry = lambda *args, **kwargs: None
+    sys.modules["app.utils.general_utils"] = general_utils_stub
+    sys.modules.pop("app.utils.search_utils", None)
+    try:
+        return importlib.import_module("app.utils.search_utils")
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+search_fanout = importlib.import_module("app.utils.search_fanout")
+search_utils = _import_real_search_utils()
+FanOutExecutor = search_fanout.FanOutExecutor
+
+
+def _sleeping_source(delay, results):
+    def _run():
+        gevent.sleep(delay)
+        return results
+    return _run
+
+
+def test_fanout_runs_sources_concurrently():
+    executor = FanOutExecutor(default_deadline=2.0)
+    started = time.time()
+    outcomes = executor.run({
+        "a": _sleeping_source(0.2, [1]),
+        "b": _sleeping_source(0.2, [2]),
+        "c": _sleeping_source(0.2, [3]),
+    })
+    elapsed = time.time() - started
+
+    assert sorted(o.name for o in outcomes) == ["a", "b", "c"]
+    assert all(o.ok for o in outcomes)
+    assert elapsed < 0.5
+
+
+def test_fanout_returns_partial_results_when_source_misses_deadline():
+    executor = FanOutExecutor(default_deadline=2.0, deadlines={"slow": 0.1})
+    outcomes = {o.name: o for o in executor.run({
+        "fast": _sleeping_source(0.01, ["x"]),
+        "slow": _sleeping_source(1.0, ["never"]),
+    })}
+
+    assert outcomes["fast"].status == "ok"
+    assert outcomes["fast"].results == ["x"]
+    assert outcomes["slow"].status == "timeout"
+    assert outcomes["slow"].results == []
+
+
+def test_fanout_reports_errors_without_failing_other_sources():
+    def _broken():
+        raise RuntimeError("boom")
+
+    outcomes = {o.name: o for o in FanOutExecutor().run({"ok": lambda: [1], "broken": _broken})}
+
+    assert outcomes["ok"].results == [1]
+    assert outcomes["broken"].status == "error"
+    assert "boom" in outcomes["broken"].error
+
+
+def test_fanout_streams_outcomes_in_completion_order():
+    executor = FanOutExecutor(default_deadline=2.0)
+    names = [o.name for o in executor.iter_outcomes({
+        "slow": _sleeping_source(0.15, []),
+        "fast": _sleeping_source(0.01, []),
+        "mid": _sleeping_source(0.07, []),
+    })]
+
+    assert names == ["fast", "mid", "slow"]
+
+
+def test_iter_unified_search_dedupes_across_sources(monkeypatch):
+    monkeypatch.setattr(search_utils, "_translate_query_to_english", lambda query: query)
+    shared = {"title": "Shared Paper", "doi": "10.1/shared"}
+    functions = {
+        "crossref": lambda q, y, l: [shared, {"title": "Crossref Only", "doi": None}],
+        "openalex": lambda q, y, l: (gevent.sleep(0.05), [dict(shared), {"title": "OpenAlex Only", "doi": ""}])[1],
+    }
+
+    events = list(search_utils.iter_unified_search(
+        "ai", sources=["crossref", "openalex"], search_functions=functions
+    ))
+
+    assert [event["source"] for event in events] == ["crossref", "openalex"]
+    assert [ref["title"] for ref in events[0]["results"]] == ["Shared Paper", "Crossref Only"]
+    assert [ref["title"] for ref in events[1]["results"]] == ["OpenAlex Only"]
+
+
+def test_unified_search_with_status_marks_timed_out_sources(monkeypatch):
+    monkeypatch.setattr(search_utils, "_translate_query_to_english", lambda query: query)
+    monkeypatch.setattr(search_utils, "search_crossref", lambda q, y, l: [{"title": "Fast", "doi": "10.1/fast"}])
+    monkeypatch.setattr(search_utils, "search_doaj", lambda q, y, l: gevent.sleep(1.0) or [])
+
+    payload = search_utils.unified_search(
+        "ai", sources=["crossref", "doaj"], deadlines={"doaj": 0.05}, with_status=True
+    )
+
+    assert [ref["title"] for ref in payload["results"]] == ["Fast"]
+    assert payload["sources"]["crossref"]["status"] == "ok"
+    assert payload["sources"]["doaj"]["status"] == "timeout"
@@ -3,12 +3,23 @@ from types import SimpleNamespace
 
 import pytest
 
+from app.agent import embedding_service
 import app.agent.memory_system as memory_system_module
 from app.agent.memory_system import DummyDocumentDB, SharedMemory
 from app.agent.task_planner import TaskPlan
 from app.routes.agent import _build_pruned_context
 
 
+@pytest.fixture(autouse=True)
+def fake_embeddings():
+    """Embedding lokal deterministik: tidak ada test di sini yang boleh memanggil Gemini."""
+    embedding_service.set_embedding_service(
+        embedding_service.EmbeddingService(provider=embedding_service.FakeEmbeddingProvider())
+    )
+    yield
+    embedding_service.set_embedding_service(None)
+
+
 class FakeRedis:
     def __init__(self):
         self.store = {}
@@ -19,9 +30,43 @@ class FakeRedis:
     def setex(self, key, ttl, value):
         self.store[key] = value
 
-    def set(self, key, value):
+    def set(self, key, value, ex=None):
         self.store[key] = value
 
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def rpush(self, key, *values):
+        self.store.setdefault(key, []).extend(values)
+        return len(self.store[key])
+
+    def lrange(self, key, start, end):
+        items = self.store.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def ltrim(self, key, start, end):
+        if key in self.store:
+            self.store[key] = self.lrange(key, start, end)
+
+    def expire(self, key, ttl):
+        return key in self.store
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return Pipeline()
+
 
 class FakeSearchResult:
     def __init__(self, payload):
@@ -106,6 +151,8 @@ def test_conversation_history_is_isolated_per_project(monkeypatch):
     history = project_b.conversation.get_context_window()
 
     assert history == []
+    reloaded_a = SharedMemory("user-1", "project-a", FakeVectorDB(), DummyDocumentDB())
+    assert reloaded_a.conversation.get_context_window() == [{"role": "user", "content": "Halo dari project A"}]
 
 
 def test_user_profile_stays_global_across_projects(monkeypatch):
@@ -136,11 +183,11 @@ def test_build_agent_context_reads_semantic_context_from_composite_project_scope
         )
     )
     memory.conversation = SimpleNamespace(get_context_window=lambda last_n=6: [])
-    memory.research = SimpleNamespace(get_papers=lambda topic, min_relevance=0.6: None)
+    memory.research = SimpleNamespace(get_papers=lambda topic, min_relevance=0.6, query_vector=None: None)
 
     captured = {}
 
-    def fake_get_relevant_context(query, doc_id, top_k=2):
+    def fake_get_relevant_context(query, doc_id, top_k=2, query_vector=None):
         captured["query"] = query
         captured["doc_id"] = doc_id
         captured["top_k"] = top_k
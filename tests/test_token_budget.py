@@ -0,0 +1,133 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+utils_package = types.ModuleType("app.utils")
+utils_package.__path__ = [str(REPO_ROOT / "app" / "utils")]
+sys.modules.setdefault("app.utils", utils_package)
+
+token_budget = importlib.import_module("app.utils.token_budget")
+
+PARAGRAPH = (
+    "Penelitian ini menganalisis pengaruh literasi keuangan terhadap minat investasi mahasiswa. "
+    "Data dikumpulkan melalui survei daring pada 250 responden! "
+    "Apakah literasi keuangan berpengaruh signifikan?\n"
+    "Hasil regresi menunjukkan pengaruh positif dan signifikan."
+)
+
+
+@pytest.fixture(params=["tiktoken", "fallback"])
+def tokenizer(request, monkeypatch):
+    if request.param == "fallback":
+        monkeypatch.setattr(token_budget, "get_encoding", lambda model=None: None)
+    elif token_budget.get_encoding() is None:
+        pytest.skip("tiktoken encoding unavailable")
+    return request.param
+
+
+def test_encoding_is_resolved_per_model_family():
+    assert token_budget.encoding_name_for("groq/llama-3.1-8b-instant") == "cl100k_base"
+    assert token_budget.encoding_name_for("openai/gpt-4o-mini") == "o200k_base"
+    assert token_budget.encoding_name_for(None) == token_budget.DEFAULT_ENCODING
+
+
+def test_encodings_are_loaded_once(monkeypatch):
+    calls = []
+
+    class FakeTiktoken:
+        @staticmethod
+        def get_encoding(name):
+            calls.append(name)
+            raise ConnectionError("offline")
+
+    monkeypatch.setattr(token_budget, "tiktoken", FakeTiktoken)
+    monkeypatch.setattr(token_budget, "_encodings", {})
+
+    assert token_budget.get_encoding("gpt-4o") is None
+    assert token_budget.get_encoding("gpt-4o-mini") is None
+    # Encoding yang gagal dimuat tetap di-cache: estimator dipakai tanpa retry per panggilan
+    assert calls == ["o200k_base"]
+    assert token_budget.count_tokens("halo dunia", "gpt-4o") >= token_budget.estimate_tokens("halo dunia") > 0
+
+
+def test_count_cache_keys_on_a_digest_not_the_text(tokenizer, monkeypatch):
+    monkeypatch.setattr(token_budget, "_count_cache", token_budget.LRUCache(max_items=8))
+    long_text = PARAGRAPH * 20
+
+    first = token_budget.count_tokens(long_text)
+    assert token_budget.count_tokens(long_text) == first
+    assert len(token_budget._count_cache) == 1
+    (key,) = list(token_budget._count_cache._data)
+    assert long_text not in key and sum(len(part) for part in key) < 64
+
+
+def test_split_sentences_is_lossless():
+    pieces = token_budget.split_sentences(PARAGRAPH)
+    assert "".join(pieces) == PARAGRAPH
+    assert len(pieces) == 4
+
+
+def test_truncation_keeps_whole_sentences(tokenizer):
+    first_two = "".join(token_budget.split_sentences(PARAGRAPH)[:2]).strip()
+    budget = token_budget.count_tokens(first_two) + 1
+
+    head = token_budget.truncate_to_tokens(PARAGRAPH, budget)
+    assert head == first_two
+
+    tail = token_budget.truncate_to_tokens(PARAGRAPH, 20, keep="end", marker="...")
+    assert tail.startswith("...\n") and tail.endswith("pengaruh positif dan signifikan.")
+    assert token_budget.count_tokens(tail) <= 20
+
+
+def test_single_oversized_sentence_is_cut_by_tokens(tokenizer):
+    text = "kata " * 200
+    cut = token_budget.truncate_to_tokens(text, 15)
+    assert 0 < token_budget.count_tokens(cut) <= 15
+
+
+def test_text_within_budget_is_untouched(tokenizer):
+    assert token_budget.truncate_to_tokens(PARAGRAPH, 10_000, marker="...") == PARAGRAPH
+
+
+def test_budgeter_keeps_required_sections_and_weights_the_rest(tokenizer):
+    body = "Kalimat pengisi yang cukup panjang untuk dipotong. " * 80
+    budgeter = token_budget.TokenBudgeter(400)
+    result = budgeter.fit([
+        token_budget.PromptSection("system", "Anda adalah asisten tesis.", required=True),
+        token_budget.PromptSection("context", body, priority=4.0),
+        token_budget.PromptSection("history", body, priority=1.0, keep="end"),
+        token_budget.PromptSection("rag", "Paper A (2024)", priority=2.0),
+    ])
+
+    assert result.texts["system"] == "Anda adalah asisten tesis."
+    assert result.texts["rag"] == "Paper A (2024)"
+    assert result.total_tokens <= 400
+    assert result.tokens["context"] > 2 * result.tokens["history"] > 0
+    assert sorted(result.truncated) == ["context", "history"]
+
+
+def test_budgeter_honours_min_tokens_before_weights():
+    body = "Kalimat pengisi untuk histori percakapan. " * 50
+    grants = token_budget.TokenBudgeter(300).allocate([
+        token_budget.PromptSection("context", body, priority=10.0),
+        token_budget.PromptSection("history", body, priority=0.1, min_tokens=100),
+    ])
+    assert grants["history"] >= 100
+    assert sum(grants.values()) <= 300
+
+
+def test_budgeter_returns_everything_when_it_fits():
+    sections = [token_budget.PromptSection("context", PARAGRAPH), token_budget.PromptSection("rag", "Paper A")]
+    result = token_budget.TokenBudgeter(10_000).fit(sections)
+    assert result.texts == {"context": PARAGRAPH, "rag": "Paper A"}
+    assert result.truncated == []
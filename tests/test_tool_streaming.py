@@ -0,0 +1,184 @@
+import importlib
+import sys
+import types
+from datetime import datetime
+from pathlib import Path
+
+import gevent
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+agent_package = types.ModuleType("app.agent")
+agent_package.__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules.setdefault("app.agent", agent_package)
+sys.modules["app.agent"].__path__ = [str(REPO_ROOT / "app" / "agent")]
+sys.modules["app"].agent = sys.modules["app.agent"]
+
+REAL_MODULES = ("app.agent.task_planner", "app.agent.plan_executor", "app.agent.writing_agent")
+
+
+def _import_real_agents():
+    """Import modul agent asli (juga litellm) walaupun test lain memasang stub di sys.modules."""
+    names = [name for name in list(sys.modules)
+             if name in REAL_MODULES or name == "litellm" or name.startswith("litellm.")]
+    saved = {name: sys.modules.pop(name) for name in names}
+    try:
+        return [importlib.import_module(name) for name in REAL_MODULES]
+    finally:
+        for name in REAL_MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+
+task_planner_module, plan_executor_module, writing_agent_module = _import_real_agents()
+
+TaskPlan = task_planner_module.TaskPlan
+TaskStep = task_planner_module.TaskStep
+PlanExecutor = plan_executor_module.PlanExecutor
+WritingAgent = writing_agent_module.WritingAgent
+
+
+def _chunk(content):
+    delta = types.SimpleNamespace(content=content)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+
+
+class FakeStreamingLLM:
+    """Pengganti litellm.completion: stream token dengan jeda kecil per token."""
+
+    def __init__(self, tokens, delay=0.01, fail_models=(), fail_after=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.fail_models = set(fail_models)
+        self.fail_after = fail_after
+        self.calls = []
+
+    def __call__(self, model, messages, api_key=None, max_tokens=None, stream=False, **kwargs):
+        self.calls.append({"model": model, "stream": stream})
+        if model in self.fail_models:
+            raise RuntimeError(f"{model} unavailable")
+        if not stream:
+            message = types.SimpleNamespace(content="".join(self.tokens))
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+        def generator():
+            for index, token in enumerate(self.tokens):
+                if self.fail_after is not None and index == self.fail_after:
+                    raise RuntimeError("connection reset")
+                gevent.sleep(self.delay)
+                yield _chunk(token)
+        return generator()
+
+
+class RecordingAnalysisAgent:
+    def __init__(self):
+        self.scored = []
+
+    def score_thesis_quality(self, text, memory=None):
+        self.scored.append(text)
+        return {"scores": {"academic_tone": 9, "structure": 9}, "overall": 9}
+
+
+def _plan():
+    return TaskPlan(
+        plan_id="plan-stream",
+        user_query="Tulis latar belakang tentang literasi digital",
+        intent="generate_section",
+        steps=[TaskStep(
+            step_id="step_1",
+            agent="writing_agent",
+            tool="generate_section",
+            input_from="user",
+            output_to="user",
+            params={},
+            depends_on=[],
+        )],
+        estimated_tokens=1000,
+        created_at=datetime.now(),
+        status="pending",
+    )
+
+
+def test_executor_streams_tool_tokens_then_validates_accumulated_text(monkeypatch):
+    tokens = ["Literasi ", "digital ", "merupakan ", "kompetensi ", "penting ", "bagi ", "mahasiswa."]
+    fake_llm = FakeStreamingLLM(tokens)
+    monkeypatch.setattr(writing_agent_module.litellm, "completion", fake_llm)
+    analysis_agent = RecordingAnalysisAgent()
+    events = []
+
+    executor = PlanExecutor(
+        agents={"writing_agent": WritingAgent(), "analysis_agent": analysis_agent},
+        on_event=lambda kind, data: events.append((kind, data)),
+    )
+    executor.stream_min_chars = 1
+    plan = _plan()
+    result = executor.execute(plan)
+
+    deltas = [data for kind, data in events if kind == "TOOL_DELTA"]
+    assert result == "".join(tokens)
+    assert "".join(d["delta"] for d in deltas) == result
+    assert [d["seq"] for d in deltas] == list(range(1, len(deltas) + 1))
+    assert all(call["stream"] for call in fake_llm.calls)
+
+    kinds = [kind for kind, _ in events if kind in {"TOOL_CALL", "TOOL_DELTA", "TOOL_RESULT"}]
+    assert kinds[0] == "TOOL_CALL" and kinds[-1] == "TOOL_RESULT"
+
+    # Validator berjalan setelah stream, di atas teks yang sudah terkumpul
+    assert analysis_agent.scored == [result]
+
+    trace = plan.execution_trace[-1]
+    assert trace["ttft_ms"] is not None and trace["ttft_ms"] <= trace["duration_ms"]
+    assert trace["streamed_chars"] == len(result)
+    result_event = next(data for kind, data in events if kind == "TOOL_RESULT")
+    assert result_event["ttft_ms"] == trace["ttft_ms"]
+
+
+def test_token_deltas_are_coalesced_after_first_token(monkeypatch):
+    tokens = ["a"] * 40
+    monkeypatch.setattr(writing_agent_module.litellm, "completion", FakeStreamingLLM(tokens, delay=0))
+    events = []
+    executor = PlanExecutor(
+        agents={"writing_agent": WritingAgent()},
+        on_event=lambda kind, data: events.append((kind, data)),
+    )
+    executor.stream_min_chars = 16
+    executor.stream_flush_interval = 60
+    executor.execute(_plan())
+
+    deltas = [data["delta"] for kind, data in events if kind == "TOOL_DELTA"]
+    assert deltas[0] == "a"
+    assert [len(d) for d in deltas] == [1, 16, 16, 7]
+
+
+def test_stream_falls_back_only_before_first_token(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fallback-key")
+    agent = WritingAgent()
+    received = []
+
+    primary_down = FakeStreamingLLM(["ok"], delay=0, fail_models={agent.model})
+    monkeypatch.setattr(writing_agent_module.litellm, "completion", primary_down)
+    assert agent.stream_tool("rewrite_text", "teks", {}, on_chunk=received.append) == "ok"
+    assert [call["model"] for call in primary_down.calls] == [agent.model, "gemini/gemini-2.5-flash"]
+
+    mid_stream_failure = FakeStreamingLLM(["a", "b", "c"], delay=0, fail_after=2)
+    monkeypatch.setattr(writing_agent_module.litellm, "completion", mid_stream_failure)
+    result = agent.stream_tool("rewrite_text", "teks", {}, on_chunk=received.append)
+    # Tool menangkap error seperti jalur non-stream; tidak ada fallback yang menyambung jawaban lain
+    assert result.startswith("Error:")
+    assert len(mid_stream_failure.calls) == 1
+
+
+def test_run_tool_outside_stream_tool_does_not_stream(monkeypatch):
+    fake_llm = FakeStreamingLLM(["x"], delay=0)
+    monkeypatch.setattr(writing_agent_module.litellm, "completion", fake_llm)
+    agent = WritingAgent()
+    agent.stream_tool("rewrite_text", "teks", {}, on_chunk=lambda _: None)
+    agent.run_tool("rewrite_text", "teks", {})
+    assert [call["stream"] for call in fake_llm.calls] == [True, False]
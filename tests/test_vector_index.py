@@ -0,0 +1,159 @@
+import importlib
+import json
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(REPO_ROOT / "app")]
+sys.modules.setdefault("app", app_package)
+sys.modules["app"].__path__ = [str(REPO_ROOT / "app")]
+
+services_package = types.ModuleType("app.services")
+services_package.__path__ = [str(REPO_ROOT / "app" / "services")]
+sys.modules.setdefault("app.services", services_package)
+sys.modules["app.services"].__path__ = [str(REPO_ROOT / "app" / "services")]
+sys.modules["app"].services = sys.modules["app.services"]
+
+vector_index_module = importlib.import_module("app.services.vector_index")
+VectorIndex = vector_index_module.VectorIndex
+
+
+def _chunk(content, vector, **extra):
+    return {"content": content, "vector": vector, **extra}
+
+
+def test_search_returns_top_k_by_cosine_without_vectors_in_payload(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert_document("u1", "u1_doc", [
+        _chunk("x axis", [1.0, 0.0, 0.0], doc_id="doc"),
+        _chunk("y axis", [0.0, 1.0, 0.0], doc_id="doc"),
+        _chunk("mostly x", [0.9, 0.1, 0.0], doc_id="doc"),
+    ])
+
+    results = index.search("u1", [2.0, 0.0, 0.0], k=2)
+
+    assert [chunk["content"] for _, chunk in results] == ["x axis", "mostly x"]
+    assert results[0][0] == np.float32(1.0)
+    assert all("vector" not in chunk for _, chunk in results)
+    assert index.search("u1", [1.0, 0.0, 0.0], k=5, min_score=0.5)[-1][1]["content"] == "mostly x"
+    assert index.search("other-user", [1.0, 0.0, 0.0], k=2) == []
+
+
+def test_reupsert_replaces_document_and_delete_tombstones_rows(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert_document("u1", "u1_a", [_chunk("old a", [1.0, 0.0])])
+    index.upsert_document("u1", "u1_b", [_chunk("b", [0.0, 1.0])])
+    index.upsert_document("u1", "u1_a", [_chunk("new a", [1.0, 0.0])])
+
+    contents = sorted(chunk["content"] for chunk in index.iter_chunks("u1"))
+    assert contents == ["b", "new a"]
+
+    assert index.delete_document("u1", "u1_b") is True
+    assert index.delete_document("u1", "u1_b") is False
+    assert [chunk["content"] for chunk in index.iter_chunks("u1")] == ["new a"]
+
+    manifest = json.loads((Path(index.partition_dir("u1")) / "manifest.json").read_text())
+    # compaction membuang baris mati, jadi hanya tersisa satu baris
+    assert manifest["count"] == 1
+    assert manifest["docs"] == {"u1_a": [0, 1]}
+
+
+def test_project_partitions_filter_and_keyword_only_chunks(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert_document("u1", "u1_p1_doc", [_chunk("keyword only", [])], project_id="p1")
+    index.upsert_document("u1", "u1_p2_doc", [_chunk("vector", [0.0, 1.0])], project_id="p2")
+
+    assert [c["content"] for c in index.iter_chunks("u1", "p1")] == ["keyword only"]
+    assert sorted(c["content"] for c in index.iter_chunks("u1")) == ["keyword only", "vector"]
+
+    # partisi p1 belum punya dim, jadi dinaikkan saat dokumen bervektor pertama masuk
+    index.upsert_document("u1", "u1_p1_doc2", [_chunk("now with vector", [1.0, 0.0])], project_id="p1")
+    scores, chunks = index.score_all("u1", [1.0, 0.0], project_id="p1")
+    by_content = {chunk["content"]: float(score) for score, chunk in zip(scores, chunks)}
+    assert by_content == {"keyword only": 0.0, "now with vector": 1.0}
+
+
+def test_migrate_json_store_imports_legacy_files_once(tmp_path):
+    legacy = [
+        {"content": "legacy chunk", "vector": [0.0, 1.0], "doc_id": "d1", "user_id": "u1", "project_id": "p1"},
+    ]
+    (tmp_path / "u1_p1_d1.json").write_text(json.dumps(legacy))
+    (tmp_path / "u2_d9.json").write_text(json.dumps([{"content": "other", "vector": [1.0, 0.0]}]))
+
+    index = VectorIndex(str(tmp_path))
+    index.ensure_migrated("u1")
+    index.ensure_migrated("u1")
+
+    results = index.search("u1", [0.0, 1.0], k=3, project_id="p1")
+    assert [chunk["content"] for _, chunk in results] == ["legacy chunk"]
+    assert index.user_partitions("u2") == []
+
+    report = index.migrate_json_store(remove_legacy=True)
+    assert report == {"files": 1, "chunks": 1, "errors": 0, "skipped": 1}
+    assert not list(tmp_path.glob("*.json"))
+    assert len(list(index.iter_chunks("u1"))) == 1
+
+
+def test_snapshot_is_reused_until_manifest_changes(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert_document("u1", "u1_a", [_chunk("a", [1.0, 0.0])])
+
+    first = index.partitions("u1")[0]
+    assert index.partitions("u1")[0] is first
+    assert isinstance(first.segments[0], np.memmap)
+
+    index.upsert_document("u1", "u1_b", [_chunk("b", [0.0, 1.0])])
+    assert index.partitions("u1")[0] is not first
+
+
+def test_first_upsert_migrates_legacy_files_and_failed_migration_is_retried(tmp_path, monkeypatch):
+    (tmp_path / "u1_old.json").write_text(json.dumps([{"content": "legacy", "vector": [1.0, 0.0]}]))
+    index = VectorIndex(str(tmp_path))
+
+    original = index._upsert
+    monkeypatch.setattr(index, "_upsert", lambda *a, **k: (_ for _ in ()).throw(OSError("disk full")))
+    index.ensure_migrated("u1")
+    assert not list(index.iter_chunks("u1"))
+    monkeypatch.setattr(index, "_upsert", original)
+
+    # Upload baru sebelum query pertama: dokumen lama tetap ikut termigrasi
+    index.upsert_document("u1", "u1_new", [_chunk("fresh", [0.0, 1.0])])
+    assert sorted(chunk["content"] for chunk in index.iter_chunks("u1")) == ["fresh", "legacy"]
+
+    # Penanda per user: proses baru tidak memigrasi ulang walau file lama masih ada
+    (tmp_path / "u1_old.json").write_text(json.dumps([{"content": "stale", "vector": [1.0, 0.0]}]))
+    VectorIndex(str(tmp_path)).ensure_migrated("u1")
+    assert sorted(chunk["content"] for chunk in index.iter_chunks("u1")) == ["fresh", "legacy"]
+
+
+def test_upsert_appends_a_segment_without_rewriting_existing_rows(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert_document("u1", "u1_a", [_chunk("a", [1.0, 0.0])])
+    directory = Path(index.partition_dir("u1"))
+    first_segment = sorted(directory.glob("vectors.*.npy"))
+    stamp = first_segment[0].stat().st_mtime_ns
+
+    index.upsert_document("u1", "u1_b", [_chunk("b", [0.0, 1.0])])
+    manifest = json.loads((directory / "manifest.json").read_text())
+    assert len(manifest["segments"]) == 2 and manifest["docs"] == {"u1_a": [0, 1], "u1_b": [1, 2]}
+    assert first_segment[0].stat().st_mtime_ns == stamp
+    assert [chunk["content"] for _, chunk in index.search("u1", [0.0, 1.0], k=1)] == ["b"]
+
+
+def test_too_many_segments_are_compacted_into_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index_module, "MAX_SEGMENTS", 3)
+    index = VectorIndex(str(tmp_path))
+    for i in range(4):
+        index.upsert_document("u1", f"u1_{i}", [_chunk(str(i), [1.0, float(i)])])
+
+    directory = Path(index.partition_dir("u1"))
+    manifest = json.loads((directory / "manifest.json").read_text())
+    assert len(manifest["segments"]) == 1 and manifest["count"] == 4
+    assert len(list(directory.glob("vectors.*.npy"))) == 1
+    assert sorted(chunk["content"] for chunk in index.iter_chunks("u1")) == ["0", "1", "2", "3"]